@@ -0,0 +1,227 @@
+"""Synthetic GPT images and fixtures for the benchmarks.
+
+Images are generated once, and kept in the directory passed using
+``--benchmark-image-dir`` (if any), so large images can be reused across runs.
+"""
+
+import dataclasses
+import os
+import struct
+import uuid
+import zlib
+from pathlib import Path
+from typing import List
+
+import pytest
+
+import gptsum
+from gptsum import gpt
+
+# Number of partition entries, and the size of every entry
+_NUM_ENTRIES = 128
+_ENTRY_SIZE = 128
+_ENTRIES_LBAS = _NUM_ENTRIES * _ENTRY_SIZE // gpt.LBA_SIZE
+# Type of the partition in every image, "Linux filesystem data"
+_PARTITION_TYPE = uuid.UUID("0fc63daf-8483-4772-8e79-3d69d8477de4")
+
+# Size of the blocks of data written to dense images, and the fraction of every
+# block sparse images contain data in
+_BLOCK_SIZE = 1024 * 1024
+_SPARSE_DATA = 16
+
+_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_size(value: str) -> int:
+    """Parse a size with an optional binary unit suffix.
+
+    >>> parse_size("16M")
+    16777216
+    >>> parse_size("4096")
+    4096
+
+    :param value: Size to parse, like ``512``, ``16M`` or ``32G``
+
+    :returns: Size in bytes
+    """
+    unit = _UNITS.get(value[-1:].upper(), 1)
+    number = value[:-1] if unit != 1 else value
+    return int(number) * unit
+
+
+def _format_size(size: int) -> str:
+    """Format a size using the largest binary unit it's a multiple of."""
+    for suffix, unit in reversed(_UNITS.items()):
+        if size % unit == 0:
+            return f"{size // unit}{suffix}"
+    return str(size)
+
+
+@dataclasses.dataclass(frozen=True)
+class ImageSpec:
+    """Specification of a synthetic image."""
+
+    size: int
+    """Size of the image in bytes."""
+    sparse: bool
+    """Whether most of the image consists of holes, rather than data."""
+
+    @property
+    def name(self) -> str:
+        """Name of the image, unique for every specification."""
+        kind = "sparse" if self.sparse else "dense"
+        return f"{kind}-{_format_size(self.size)}"
+
+
+def make_image(path: Path, spec: ImageSpec) -> None:
+    """Generate a GPT image with an embedded checksum.
+
+    Dense images are filled with pseudo-random data. Sparse images only contain
+    data in the first part of every block. A single partition covers the first half
+    of the usable space.
+
+    :param path: Path of the image to write
+    :param spec: Specification of the image
+    """
+    lbas = spec.size // gpt.LBA_SIZE
+    first_usable_lba = 2 + _ENTRIES_LBAS
+    last_usable_lba = lbas - 2 - _ENTRIES_LBAS
+
+    entries = bytearray(_NUM_ENTRIES * _ENTRY_SIZE)
+    struct.pack_into(
+        "<16s16sQQQ72s",
+        entries,
+        0,
+        _PARTITION_TYPE.bytes_le,
+        uuid.uuid4().bytes_le,
+        first_usable_lba,
+        first_usable_lba + (last_usable_lba - first_usable_lba + 1) // 2 - 1,
+        0,
+        "data".encode("utf-16-le"),
+    )
+    entries_crc32 = zlib.crc32(entries)
+    primary = gpt.GPTHeader(
+        current_lba=1,
+        backup_lba=lbas - 1,
+        first_usable_lba=first_usable_lba,
+        last_usable_lba=last_usable_lba,
+        disk_guid=uuid.uuid4(),
+        entries_starting_lba=2,
+        num_entries=_NUM_ENTRIES,
+        entry_size=_ENTRY_SIZE,
+        entries_crc32=entries_crc32,
+    )
+    backup = dataclasses.replace(
+        primary,
+        current_lba=primary.backup_lba,
+        backup_lba=primary.current_lba,
+        entries_starting_lba=lbas - 1 - _ENTRIES_LBAS,
+    )
+
+    block = os.urandom(_BLOCK_SIZE)
+    data_size = _BLOCK_SIZE // _SPARSE_DATA if spec.sparse else _BLOCK_SIZE
+    first = primary.first_usable_lba * gpt.LBA_SIZE
+    last = (primary.last_usable_lba + 1) * gpt.LBA_SIZE
+
+    with open(path, "wb") as fd:
+        fd.truncate(spec.size)
+
+        for offset in range(first, last, _BLOCK_SIZE):
+            fd.seek(offset)
+            fd.write(block[: min(data_size, last - offset)])
+
+    with gpt.GPTImage(path=path, open_mode=os.O_RDWR) as image:
+        for header in (primary, backup):
+            gpt.pwrite_all(
+                image.fileno(),
+                bytes(entries),
+                header.entries_starting_lba * gpt.LBA_SIZE,
+            )
+        image.write_gpt_headers(primary, backup, sync=False)
+
+    gptsum.embed(path=path)
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add options to select the images to benchmark."""
+    group = parser.getgroup("gptsum benchmarks")
+    group.addoption(
+        "--benchmark-image-sizes",
+        default="16M,256M",
+        help=(
+            "comma-separated sizes of the synthetic images to benchmark, "
+            "e.g., 16M,1G,32G (default: %(default)s)"
+        ),
+    )
+    group.addoption(
+        "--benchmark-image-dir",
+        type=Path,
+        default=None,
+        help="directory to keep generated images in across runs",
+    )
+    group.addoption(
+        "--benchmark-startup-budget",
+        type=float,
+        default=100.0,
+        help=(
+            "maximum time in milliseconds 'gptsum get-guid' may take on top of "
+            "starting the interpreter (default: %(default)s)"
+        ),
+    )
+
+
+def _image_specs(config: pytest.Config) -> List[ImageSpec]:
+    """Get the specifications of all images to benchmark."""
+    sizes = [
+        parse_size(size)
+        for size in config.getoption("--benchmark-image-sizes").split(",")
+    ]
+    return [ImageSpec(size, sparse) for size in sizes for sparse in [False, True]]
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    """Parametrize benchmarks using the ``image`` fixture over all images."""
+    if "image" in metafunc.fixturenames:
+        specs = _image_specs(metafunc.config)
+        metafunc.parametrize(
+            "image", specs, indirect=True, ids=[spec.name for spec in specs]
+        )
+
+
+@pytest.fixture(scope="session")
+def image_dir(
+    request: pytest.FixtureRequest, tmp_path_factory: pytest.TempPathFactory
+) -> Path:
+    """Return the directory generated images are kept in."""
+    path: Path = request.config.getoption("--benchmark-image-dir")
+    if path is None:
+        return tmp_path_factory.mktemp("images")
+
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _image(image_dir: Path, spec: ImageSpec) -> Path:
+    """Get the path of an image, generating it unless it exists."""
+    path = image_dir / f"{spec.name}.img"
+
+    if not path.exists():
+        tmp = path.with_name(f".{path.name}.tmp")
+        make_image(tmp, spec)
+        tmp.replace(path)
+
+    return path
+
+
+@pytest.fixture
+def image(request: pytest.FixtureRequest, image_dir: Path) -> Path:
+    """Return the path of a generated image, see :func:`pytest_generate_tests`."""
+    spec: ImageSpec = request.param
+    return _image(image_dir, spec)
+
+
+@pytest.fixture
+def small_image(request: pytest.FixtureRequest, image_dir: Path) -> Path:
+    """Return the path of the smallest dense image benchmarked."""
+    spec = min(_image_specs(request.config), key=lambda spec: spec.size)
+    return _image(image_dir, dataclasses.replace(spec, sparse=False))
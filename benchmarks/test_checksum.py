@@ -0,0 +1,158 @@
+"""Benchmarks of the :mod:`gptsum.checksum` module."""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pytest
+import pytest_benchmark.fixture
+
+from gptsum import checksum, gpt
+
+_BUFFER_SIZES = [64 * 1024, 128 * 1024, 1024 * 1024, 4 * 1024 * 1024]
+
+_STRATEGIES = [
+    checksum.ReadStrategy.PREADV,
+    checksum.ReadStrategy.READ,
+    checksum.ReadStrategy.MMAP,
+    checksum.ReadStrategy.DIRECT,
+]
+
+# Warm page caches are kept warm, even for images larger than `PageCachePolicy.AUTO`
+# keeps in the page cache
+_KEEP = checksum.PageCachePolicy.KEEP
+
+
+def _drop_cache(path: Path) -> None:
+    """Evict a file from the page cache, if supported by the platform."""
+    posix_fadvise = getattr(os, "posix_fadvise", None)
+    if posix_fadvise is None:  # pragma: no cover
+        pytest.skip("posix_fadvise is not supported on this platform")
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def _hash_file(path: Path, read_options: checksum.ReadOptions) -> int:
+    """Hash a file using :func:`checksum.hash_file`."""
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fd:
+        size = os.fstat(fd.fileno()).st_size
+        return checksum.hash_file(
+            hasher.update, fd.fileno(), size, 0, read_options=read_options
+        )
+
+
+@pytest.mark.parametrize("buffer_size", _BUFFER_SIZES, ids=lambda s: f"{s >> 10}K")
+@pytest.mark.parametrize("strategy", _STRATEGIES, ids=lambda s: s.value)
+def test_hash_file(
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture,
+    image: Path,
+    strategy: checksum.ReadStrategy,
+    buffer_size: int,
+) -> None:
+    """Benchmark :func:`checksum.hash_file` with a warm page cache."""
+    read_options = checksum.ReadOptions(
+        strategy=strategy, buffer_size=buffer_size, page_cache=_KEEP
+    )
+    benchmark.extra_info["bytes"] = image.stat().st_size
+    benchmark(_hash_file, image, read_options)
+
+
+@pytest.mark.parametrize(
+    "version",
+    [checksum.VERSION_1, checksum.VERSION_2, checksum.VERSION_3],
+    ids=["v1", "v2", "v3"],
+)
+@pytest.mark.parametrize("cache", ["warm", "cold"])
+def test_calculate(
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture,
+    image: Path,
+    cache: str,
+    version: int,
+) -> None:
+    """Benchmark :func:`checksum.calculate` with a cold or warm page cache."""
+
+    def calculate() -> bytes:
+        with gpt.GPTImage(path=image, open_mode=os.O_RDONLY) as gpt_image:
+            return checksum.calculate(
+                gpt_image, version, read_options=checksum.ReadOptions(page_cache=_KEEP)
+            )
+
+    def setup() -> Tuple[Tuple[()], Dict[str, object]]:
+        if cache == "cold":
+            _drop_cache(image)
+        return ((), {})
+
+    if cache == "warm":
+        calculate()
+
+    benchmark.extra_info["bytes"] = image.stat().st_size
+    benchmark.pedantic(  # type: ignore[no-untyped-call]
+        calculate, setup=setup, rounds=5
+    )
+
+
+@pytest.mark.parametrize(
+    "algorithm", checksum.available_algorithms(), ids=lambda a: a.value
+)
+def test_calculate_algorithm(
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture,
+    image: Path,
+    algorithm: checksum.Algorithm,
+) -> None:
+    """Benchmark version 1 :func:`checksum.calculate` with a warm page cache."""
+
+    def calculate() -> bytes:
+        with gpt.GPTImage(path=image, open_mode=os.O_RDONLY) as gpt_image:
+            return checksum.calculate(
+                gpt_image,
+                algorithm=algorithm,
+                read_options=checksum.ReadOptions(page_cache=_KEEP),
+            )
+
+    benchmark.extra_info["bytes"] = image.stat().st_size
+    benchmark(calculate)
+
+
+def test_header_unpack(
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture, small_image: Path
+) -> None:
+    """Benchmark :meth:`gpt.GPTHeader.unpack`."""
+    with open(small_image, "rb") as fd:
+        fd.seek(gpt.LBA_SIZE)
+        data = fd.read(gpt.LBA_SIZE)
+
+    benchmark(gpt.GPTHeader.unpack, data)
+
+
+def test_image_headers(
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture, small_image: Path
+) -> None:
+    """Benchmark opening an image, validating it and parsing its headers."""
+
+    def read_headers() -> Tuple[gpt.GPTHeader, gpt.GPTHeader]:
+        with gpt.GPTImage(path=small_image, open_mode=os.O_RDONLY) as image:
+            image.validate()
+            return (image.read_primary_gpt_header(), image.read_backup_gpt_header())
+
+    benchmark(read_headers)
+
+
+def test_partition_tables(
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture, small_image: Path
+) -> None:
+    """Benchmark reading and validating both partition entry arrays of an image."""
+
+    def read_partitions() -> List[gpt.GPTPartition]:
+        with gpt.GPTImage(path=small_image, open_mode=os.O_RDONLY) as image:
+            image.validate()
+            image.read_backup_partition_table()
+            return image.read_primary_partition_table().partitions()
+
+    benchmark(read_partitions)
@@ -0,0 +1,117 @@
+"""Benchmarks of the :mod:`gptsum.cli` module."""
+
+import shutil
+import subprocess  # noqa: S404
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+import pytest_benchmark.fixture
+
+
+# Number of runs to take the fastest of when measuring startup times
+_STARTUP_RUNS = 20
+
+
+def _run(args: List[str]) -> None:
+    """Run the CLI in a new interpreter."""
+    subprocess.run(  # noqa: S603
+        [sys.executable, "-m", "gptsum", *args],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+@pytest.mark.parametrize(
+    "args",
+    [["--help"], ["get-guid"], ["verify"]],
+    ids=["help", "get-guid", "verify"],
+)
+def test_cli(
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture,
+    small_image: Path,
+    args: List[str],
+) -> None:
+    """Benchmark the end-to-end latency of CLI commands, including startup."""
+    if args != ["--help"]:
+        args = [*args, str(small_image)]
+
+    benchmark.pedantic(  # type: ignore[no-untyped-call]
+        _run, args=(args,), rounds=10, warmup_rounds=1
+    )
+
+
+def test_verify(
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture, image: Path
+) -> None:
+    """Benchmark the end-to-end latency of ``gptsum verify``."""
+    benchmark.extra_info["bytes"] = image.stat().st_size
+    benchmark.pedantic(  # type: ignore[no-untyped-call]
+        _run, args=(["verify", str(image)],), rounds=3, warmup_rounds=1
+    )
+
+
+@pytest.mark.parametrize("method", ["copy-embed", "copy-then-embed"])
+def test_copy_embed(
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture,
+    image: Path,
+    tmp_path: Path,
+    method: str,
+) -> None:
+    """Benchmark ``gptsum copy-embed`` against copying an image, then embedding."""
+    copy = tmp_path / "copy.img"
+
+    def copy_embed() -> None:
+        if method == "copy-embed":
+            _run(["copy-embed", str(image), str(copy)])
+        else:
+            shutil.copyfile(image, copy)
+            _run(["embed", str(copy)])
+
+    benchmark.extra_info["bytes"] = image.stat().st_size
+    benchmark.pedantic(  # type: ignore[no-untyped-call]
+        copy_embed, rounds=3, warmup_rounds=1
+    )
+
+
+def _fastest_run(command: List[str]) -> float:
+    """Get the fastest of a number of runs of a command, in seconds."""
+    fastest = float("inf")
+    for _ in range(_STARTUP_RUNS):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)  # noqa: S603
+        fastest = min(fastest, time.perf_counter() - start)
+    return fastest
+
+
+def test_startup_budget(
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture,
+    request: pytest.FixtureRequest,
+    small_image: Path,
+) -> None:
+    """Ensure ``gptsum get-guid`` stays within its startup time budget.
+
+    The budget applies to the time taken on top of starting a bare interpreter, so
+    it depends less on the speed of the machine.
+    """
+    budget: float = request.config.getoption("--benchmark-startup-budget")
+
+    interpreter = _fastest_run([sys.executable, "-c", "pass"])
+    benchmark.pedantic(  # type: ignore[no-untyped-call]
+        _run,
+        args=(["get-guid", str(small_image)],),
+        rounds=_STARTUP_RUNS,
+        warmup_rounds=1,
+    )
+
+    if benchmark.stats is None:
+        pytest.skip("benchmarking is disabled")
+
+    overhead = (benchmark.stats.stats.min - interpreter) * 1000
+    benchmark.extra_info["overhead_ms"] = overhead
+    assert overhead <= budget, (
+        f"gptsum get-guid took {overhead:.1f} ms on top of starting the "
+        f"interpreter, exceeding the budget of {budget} ms"
+    )
@@ -9,6 +9,7 @@ import shutil
 import sys
 from pathlib import Path
 
+import nox
 from nox_poetry import Session, session
 
 # pylint: disable=redefined-outer-name
@@ -25,9 +26,23 @@ PYTHON_VERSIONS = [
     "3.14",
 ]
 
+# The benchmarks take a while, only run them when requested explicitly
+nox.options.sessions = [
+    "flake8",
+    "pylint",
+    "safety",
+    "mypy",
+    "tests",
+    "coverage",
+    "typeguard",
+    "xdoctest",
+    "docs",
+]
+
 SOURCES = [
     "src/",
     "tests/",
+    "benchmarks/",
     "noxfile.py",
     "docs/conf.py",
 ]
@@ -161,6 +176,28 @@ def coverage(session: Session) -> None:
     session.run("coverage", *args)
 
 
+@session(python=PYTHON_VERSIONS[-1])
+def benchmarks(session: Session) -> None:
+    """Run the benchmark suite.
+
+    Results are saved in ``.benchmarks``, and can be compared to earlier runs by
+    passing, e.g., ``--benchmark-compare --benchmark-compare-fail=median:10%``.
+    """
+    session.install(".")
+    session.install(
+        "pytest",
+        "pytest-benchmark",
+    )
+    session.run(
+        "pytest",
+        "benchmarks",
+        "--benchmark-only",
+        "--benchmark-autosave",
+        "--benchmark-storage=.benchmarks",
+        *session.posargs,
+    )
+
+
 @session(python=PYTHON_VERSIONS)
 def typeguard(session: Session) -> None:
     """Runtime type checking using Typeguard."""
@@ -6,38 +6,83 @@ Like `isomd5sum <https://github.com/rhinstaller/isomd5sum>`_.
 This module exposes the functionality provided by the tool through a Python API.
 """
 
+import contextlib
 import dataclasses
+import importlib
 import os
+import stat
 import uuid
-from importlib.metadata import Distribution, distribution
 from pathlib import Path
-from typing import Callable, Optional, cast
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    cast,
+)
 
-import gptsum.checksum
 import gptsum.gpt
 
-__metadata__ = cast(Callable[[str], Distribution], distribution)(__name__).metadata
-__author__ = __metadata__["Author"]
-"""Package author name.
+# Importing the modules used to calculate checksums takes a while, and commands which
+# only read the GPT headers, like reading the GUID of an image, don't need them, so
+# they're imported on first use, see `__getattr__`
+if TYPE_CHECKING:  # pragma: no cover
+    import gptsum.cache
+    import gptsum.checksum
+    import gptsum.compression
+    import gptsum.manifest
 
-.. versionadded:: 0.0.9
-"""
-__contact__ = __metadata__["Author-email"]
-"""Package author contact e-mail address.
+_LAZY_SUBMODULES = frozenset(["cache", "checksum", "compression", "manifest"])
 
-.. versionadded:: 0.0.9
-"""
-__license__ = __metadata__["License"]
-"""Package license identifier.
+# Module attributes set from the distribution metadata, and their metadata fields
+_METADATA_ATTRIBUTES = {
+    "__author__": "Author",
+    "__contact__": "Author-email",
+    "__license__": "License",
+    "__version__": "Version",
+}
 
-.. versionadded:: 0.0.9
-"""
-__version__ = __metadata__["Version"]
-"""Package version identifier.
 
-.. versionadded:: 0.0.1
-"""
-del __metadata__
+def __getattr__(name: str) -> Any:
+    """Get the package metadata, or a submodule, loading it on first use.
+
+    Looking up the distribution metadata takes longer than the rest of the package
+    import, and most uses of the package don't need it.
+
+    - ``__author__``: Package author name (since 0.0.9)
+    - ``__contact__``: Package author contact e-mail address (since 0.0.9)
+    - ``__license__``: Package license identifier (since 0.0.9)
+    - ``__version__``: Package version identifier (since 0.0.1)
+
+    Likewise, :mod:`gptsum.cache`, :mod:`gptsum.checksum`,
+    :mod:`gptsum.compression` and :mod:`gptsum.manifest` are imported on first use.
+
+    .. versionchanged:: 0.6.0
+       The metadata is read, and submodules other than :mod:`gptsum.gpt` are
+       imported, on first use, rather than when importing the package.
+    """
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+
+    if name != "__metadata__" and name not in _METADATA_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # pylint: disable-next=import-outside-toplevel
+    from importlib.metadata import Distribution, distribution
+
+    metadata = cast(Callable[[str], Distribution], distribution)(__name__).metadata
+    globals()["__metadata__"] = metadata
+    for attr, field in _METADATA_ATTRIBUTES.items():
+        globals()[attr] = metadata[field]
+
+    return globals()[name]
 
 
 def _check_fd_or_path(fd: Optional[int], path: Optional[Path]) -> None:
@@ -65,28 +110,101 @@ def _check_fd_or_path(fd: Optional[int], path: Optional[Path]) -> None:
         raise ValueError("Both fd and path can't be given")
 
 
-def get_guid(*, fd: Optional[int] = None, path: Optional[Path] = None) -> uuid.UUID:
+def _measure(
+    stats: Optional["gptsum.checksum.IOStatistics"], phase: "gptsum.checksum.Phase"
+) -> ContextManager[None]:
+    """Measure the time spent in a phase, if statistics are collected."""
+    if stats is None:
+        return contextlib.nullcontext()
+    return stats.measure(phase)
+
+
+def _open_image(  # pylint: disable=too-many-arguments
+    stack: contextlib.ExitStack,
+    *,
+    fd: Optional[int],
+    path: Optional[Path],
+    open_mode: int,
+    size: Optional[int],
+    stats: Optional["gptsum.checksum.IOStatistics"],
+) -> gptsum.gpt.GPTImage:
+    """Open an image, closed by ``stack``, measuring the time spent doing so.
+
+    This is not a generator-based context manager, since these can't pass through
+    a :class:`VerificationFailure`: its ``__traceback__`` can't be set.
+    """
+    with _measure(stats, gptsum.checksum.Phase.OPEN):
+        return stack.enter_context(
+            gptsum.gpt.GPTImage(fd=fd, path=path, open_mode=open_mode, size=size)
+        )
+
+
+def get_guid(
+    *, fd: Optional[int] = None, path: Optional[Path] = None, size: Optional[int] = None
+) -> uuid.UUID:
     """Get the GUID of a disk image.
 
     One of ``fd`` or ``path`` must be given.
 
     :param fd: Readable file-descriptor to an image file
     :param path: Path of a readable image file
+    :param size: Size of the image, if only a prefix of the file or block device,
+        e.g., when an image was written to a larger device
 
     :returns: GUID of the disk image
 
     .. versionadded:: 0.0.9
+    .. versionchanged:: 0.6.0
+       Added the ``size`` argument.
     """
     _check_fd_or_path(fd, path)
 
-    with gptsum.gpt.GPTImage(fd=fd, path=path, open_mode=os.O_RDONLY) as image:
+    with gptsum.gpt.GPTImage(
+        fd=fd, path=path, open_mode=os.O_RDONLY, size=size
+    ) as image:
         image.validate()
         primary = image.read_primary_gpt_header()
         return primary.disk_guid
 
 
+def get_partitions(
+    *, fd: Optional[int] = None, path: Optional[Path] = None, size: Optional[int] = None
+) -> List[gptsum.gpt.GPTPartition]:
+    """Get the used partitions of a disk image.
+
+    One of ``fd`` or ``path`` must be given. Both partition entry arrays are read
+    and validated against the GPT headers.
+
+    :param fd: Readable file-descriptor to an image file
+    :param path: Path of a readable image file
+    :param size: Size of the image, if only a prefix of the file or block device,
+        e.g., when an image was written to a larger device
+
+    :returns: Used partitions of the disk image, in the order of their entries
+
+    :raises gptsum.gpt.InvalidImageError: GPT headers are not compatible, or a
+        partition entry array doesn't fit in the image
+    :raises gptsum.gpt.EntriesChecksumMismatchError: Partition entry array checksum
+        mismatch
+
+    .. versionadded:: 0.6.0
+    """
+    _check_fd_or_path(fd, path)
+
+    with gptsum.gpt.GPTImage(
+        fd=fd, path=path, open_mode=os.O_RDONLY, size=size
+    ) as image:
+        image.validate()
+        image.read_backup_partition_table()
+        return image.read_primary_partition_table().partitions()
+
+
 def set_guid(
-    guid: uuid.UUID, *, fd: Optional[int] = None, path: Optional[Path] = None
+    guid: uuid.UUID,
+    *,
+    fd: Optional[int] = None,
+    path: Optional[Path] = None,
+    size: Optional[int] = None,
 ) -> None:
     """Set the GUID of a disk image.
 
@@ -95,18 +213,33 @@ def set_guid(
     :param guid: GUID to write to the disk image
     :param fd: Readable and writable file-descriptor to an image file
     :param path: Path of a readable and writable image file
+    :param size: Size of the image, if only a prefix of the file or block device,
+        e.g., when an image was written to a larger device
 
     .. versionadded:: 0.0.9
+    .. versionchanged:: 0.6.0
+       Cached checksums of the image are removed. Added the ``size`` argument.
     """
     _check_fd_or_path(fd, path)
 
-    with gptsum.gpt.GPTImage(fd=fd, path=path, open_mode=os.O_RDWR) as image:
+    with gptsum.gpt.GPTImage(fd=fd, path=path, open_mode=os.O_RDWR, size=size) as image:
         image.validate()
         image.update_guid(guid)
+        gptsum.cache.invalidate(image, path, gptsum.checksum.VERSIONS)
 
 
-def calculate_expected_guid(
-    *, fd: Optional[int] = None, path: Optional[Path] = None
+def calculate_expected_guid(  # pylint: disable=too-many-arguments
+    *,
+    fd: Optional[int] = None,
+    path: Optional[Path] = None,
+    version: Optional[int] = None,
+    algorithm: Optional["gptsum.checksum.Algorithm"] = None,
+    threads: Optional[int] = None,
+    read_options: Optional["gptsum.checksum.ReadOptions"] = None,
+    stats: Optional["gptsum.checksum.IOStatistics"] = None,
+    cache_policy: Optional["gptsum.cache.CachePolicy"] = None,
+    size: Optional[int] = None,
+    progress: Optional["gptsum.checksum.ProgressCallback"] = None,
 ) -> uuid.UUID:
     """Calculate the expected checksum GUID of a disk image.
 
@@ -114,38 +247,360 @@ def calculate_expected_guid(
 
     :param fd: Readable file-descriptor to an image file
     :param path: Path of a readable image file
+    :param version: Checksum version, one of :data:`gptsum.checksum.VERSIONS`,
+        :data:`gptsum.checksum.DEFAULT_VERSION` if not given
+    :param algorithm: Digest algorithm of version 1 and 3 checksums,
+        :data:`gptsum.checksum.DEFAULT_ALGORITHM` if not given
+    :param threads: Number of worker threads used to calculate version 2 checksums
+    :param read_options: Options controlling how data is read from the image
+    :param stats: Statistics to update with the amount of data read from the image,
+        and synthesized for holes in sparse image files, and the time spent in
+        every phase
+    :param cache_policy: Policy for the persistent checksum cache, see
+        :mod:`gptsum.cache`. The cache is not used if not given.
+    :param size: Size of the image, if only a prefix of the file or block device,
+        e.g., when an image was written to a larger device
+    :param progress: Function called with the number of bytes hashed so far and the
+        size of the image, at a bounded rate
 
     :returns: Expected checksum GUID of the disk image
 
     .. versionadded:: 0.0.9
+    .. versionchanged:: 0.6.0
+       Added the ``version``, ``algorithm``, ``threads``, ``read_options``,
+       ``stats``, ``cache_policy``, ``size`` and ``progress`` arguments.
     """
     _check_fd_or_path(fd, path)
 
-    with gptsum.gpt.GPTImage(fd=fd, path=path, open_mode=os.O_RDONLY) as image:
-        image.validate()
-        digest = gptsum.checksum.calculate(image)
+    with contextlib.ExitStack() as stack:
+        image = _open_image(
+            stack, fd=fd, path=path, open_mode=os.O_RDONLY, size=size, stats=stats
+        )
+
+        with _measure(stats, gptsum.checksum.Phase.HEADERS):
+            image.validate()
+
+        version, algorithm = _checksum_defaults(version, algorithm)
+        digest = _calculate_digest(
+            image,
+            path,
+            version=version,
+            algorithm=algorithm,
+            threads=threads,
+            read_options=read_options,
+            stats=stats,
+            cache_policy=_cache_policy_default(cache_policy),
+            progress=progress,
+        )
         return gptsum.checksum.digest_to_guid(digest)
 
 
-def embed(*, fd: Optional[int] = None, path: Optional[Path] = None) -> None:
+def _calculate_digest(  # pylint: disable=too-many-arguments
+    image: gptsum.gpt.GPTImage,
+    path: Optional[Path],
+    *,
+    version: int,
+    algorithm: "gptsum.checksum.Algorithm",
+    threads: Optional[int],
+    read_options: Optional["gptsum.checksum.ReadOptions"],
+    stats: Optional["gptsum.checksum.IOStatistics"],
+    cache_policy: "gptsum.cache.CachePolicy",
+    chunk_digests: Optional[List[bytes]] = None,
+    progress: Optional["gptsum.checksum.ProgressCallback"] = None,
+) -> bytes:
+    """Calculate the checksum of an open image, using the cache if allowed.
+
+    Chunk digests can't be cached, so if requested, the checksum is calculated.
+    """
+    if cache_policy == gptsum.cache.CachePolicy.TRUST and chunk_digests is None:
+        digest = gptsum.cache.lookup(image, path, version, algorithm)
+        if digest is not None:
+            return digest
+
+    with _measure(stats, gptsum.checksum.Phase.HASH):
+        digest = gptsum.checksum.calculate(
+            image,
+            version,
+            algorithm=algorithm,
+            threads=threads,
+            read_options=read_options,
+            stats=stats,
+            chunk_digests=chunk_digests,
+            progress=progress,
+        )
+
+    if cache_policy != gptsum.cache.CachePolicy.NONE:
+        gptsum.cache.store(image, path, version, digest, algorithm)
+
+    return digest
+
+
+def _checksum_defaults(
+    version: Optional[int], algorithm: Optional["gptsum.checksum.Algorithm"]
+) -> Tuple[int, "gptsum.checksum.Algorithm"]:
+    """Get the checksum version and digest algorithm to use, if not given."""
+    return (
+        gptsum.checksum.DEFAULT_VERSION if version is None else version,
+        gptsum.checksum.DEFAULT_ALGORITHM if algorithm is None else algorithm,
+    )
+
+
+def _cache_policy_default(
+    cache_policy: Optional["gptsum.cache.CachePolicy"],
+) -> "gptsum.cache.CachePolicy":
+    """Get the cache policy to use, if not given."""
+    return gptsum.cache.CachePolicy.NONE if cache_policy is None else cache_policy
+
+
+def _get_and_calculate_guid(  # pylint: disable=too-many-arguments
+    image: gptsum.gpt.GPTImage,
+    path: Optional[Path],
+    *,
+    version: Optional[int],
+    algorithm: Optional["gptsum.checksum.Algorithm"],
+    threads: Optional[int],
+    read_options: Optional["gptsum.checksum.ReadOptions"],
+    stats: Optional["gptsum.checksum.IOStatistics"],
+    cache_policy: "gptsum.cache.CachePolicy",
+    chunk_digests: Optional[List[bytes]] = None,
+    progress: Optional["gptsum.checksum.ProgressCallback"] = None,
+) -> Tuple[uuid.UUID, uuid.UUID]:
+    """Validate an open image, and get its current and expected checksum GUID.
+
+    If neither ``version`` nor ``algorithm`` is given, those recorded when embedding
+    the checksum are used, see :func:`gptsum.cache.record_embedded`.
+    """
+    with _measure(stats, gptsum.checksum.Phase.HEADERS):
+        image.validate()
+        current_guid = image.read_primary_gpt_header().disk_guid
+
+    if version is None and algorithm is None:
+        recorded = gptsum.cache.lookup_embedded(image, path, current_guid)
+        if recorded is not None:
+            version, algorithm = recorded
+    version, algorithm = _checksum_defaults(version, algorithm)
+
+    digest = _calculate_digest(
+        image,
+        path,
+        version=version,
+        algorithm=algorithm,
+        threads=threads,
+        read_options=read_options,
+        stats=stats,
+        cache_policy=cache_policy,
+        chunk_digests=chunk_digests,
+        progress=progress,
+    )
+
+    return (current_guid, gptsum.checksum.digest_to_guid(digest))
+
+
+def embed(  # pylint: disable=too-many-arguments
+    *,
+    fd: Optional[int] = None,
+    path: Optional[Path] = None,
+    version: Optional[int] = None,
+    algorithm: Optional["gptsum.checksum.Algorithm"] = None,
+    threads: Optional[int] = None,
+    read_options: Optional["gptsum.checksum.ReadOptions"] = None,
+    stats: Optional["gptsum.checksum.IOStatistics"] = None,
+    manifest: Optional[Path] = None,
+    partitions: bool = False,
+    size: Optional[int] = None,
+    progress: Optional["gptsum.checksum.ProgressCallback"] = None,
+) -> None:
     """Embed the calculated checksum GUID in an image file.
 
-    In essence a combination of :func:`calculate_expected_guid` and :func:`set_guid`.
+    In essence a combination of :func:`calculate_expected_guid` and :func:`set_guid`,
+    opening the image and reading its headers only once. The headers are only
+    written if the GUID changes.
+
+    If ``manifest`` is given, a :class:`gptsum.manifest.Manifest` of the image is
+    written to it, which can later be passed to :func:`verify` to locate damaged
+    regions of the image. Its chunk digests are calculated while reading the image
+    for the checksum.
+
+    If ``partitions`` is set, the checksum of every partition, as calculated by
+    :func:`gptsum.checksum.calculate_partitions`, is embedded as its unique
+    partition GUID first, so single partitions can be verified using
+    :func:`verify_partition`. Partitions are hashed in parallel. Since the
+    partition entry arrays are part of the image checksum, the image is read twice.
+
+    If ``version`` or ``algorithm`` is not the default, both are recorded with the
+    image, see :func:`gptsum.cache.record_embedded`, so :func:`verify` uses them
+    unless told otherwise.
 
     One of ``fd`` or ``path`` must be given.
 
     :param fd: Readable and writable file-descriptor to an image file
     :param path: Path to a readable and writable image file
+    :param version: Checksum version, one of :data:`gptsum.checksum.VERSIONS`,
+        :data:`gptsum.checksum.DEFAULT_VERSION` if not given
+    :param algorithm: Digest algorithm of version 1 and 3 checksums,
+        :data:`gptsum.checksum.DEFAULT_ALGORITHM` if not given
+    :param threads: Number of worker threads used to calculate version 2 checksums
+    :param read_options: Options controlling how data is read from the image
+    :param stats: Statistics to update with the amount of data read from the image,
+        and synthesized for holes in sparse image files, and the time spent in
+        every phase
+    :param manifest: Path of the manifest file to write
+    :param partitions: Embed the checksum of every partition in its partition entry
+    :param size: Size of the image, if only a prefix of the file or block device,
+        e.g., when an image was written to a larger device
+    :param progress: Function called with the number of bytes hashed so far and the
+        size of the image, at a bounded rate
 
     .. versionadded:: 0.0.9
+    .. versionchanged:: 0.6.0
+       Added the ``version``, ``algorithm``, ``threads``, ``read_options``,
+       ``stats``, ``manifest``, ``partitions``, ``size`` and ``progress``
+       arguments.
     """
     _check_fd_or_path(fd, path)
 
-    current_guid = get_guid(fd=fd, path=path)
-    checksum_guid = calculate_expected_guid(fd=fd, path=path)
+    _embed(
+        fd=fd,
+        path=path,
+        version=version,
+        algorithm=algorithm,
+        threads=threads,
+        read_options=read_options,
+        stats=stats,
+        sync=True,
+        manifest=manifest,
+        partitions=partitions,
+        size=size,
+        progress=progress,
+    )
 
-    if current_guid != checksum_guid:
-        set_guid(checksum_guid, fd=fd, path=path)
+
+def _embed(  # pylint: disable=too-many-arguments
+    *,
+    fd: Optional[int],
+    path: Optional[Path],
+    version: Optional[int],
+    algorithm: Optional["gptsum.checksum.Algorithm"],
+    threads: Optional[int],
+    read_options: Optional["gptsum.checksum.ReadOptions"],
+    stats: Optional["gptsum.checksum.IOStatistics"],
+    sync: bool,
+    manifest: Optional[Path],
+    partitions: bool,
+    size: Optional[int],
+    progress: Optional["gptsum.checksum.ProgressCallback"],
+) -> bool:
+    """Embed the calculated checksum GUID in an image file.
+
+    :returns: Whether the headers of the image were written
+    """
+    version, algorithm = _checksum_defaults(version, algorithm)
+
+    with contextlib.ExitStack() as stack:
+        image = _open_image(
+            stack, fd=fd, path=path, open_mode=os.O_RDWR, size=size, stats=stats
+        )
+        chunk_digests: Optional[List[bytes]] = None if manifest is None else []
+
+        written = False
+        if partitions:
+            written = _embed_partitions(
+                image,
+                threads=threads,
+                read_options=read_options,
+                stats=stats,
+                progress=progress,
+            )
+
+        current_guid, checksum_guid = _get_and_calculate_guid(
+            image,
+            path,
+            version=version,
+            algorithm=algorithm,
+            threads=threads,
+            read_options=read_options,
+            stats=stats,
+            cache_policy=gptsum.cache.CachePolicy.NONE,
+            chunk_digests=chunk_digests,
+            progress=progress,
+        )
+
+        with _measure(stats, gptsum.checksum.Phase.WRITE):
+            if manifest is not None and chunk_digests is not None:
+                gptsum.manifest.create(
+                    version, checksum_guid.bytes, image.size, chunk_digests, algorithm
+                ).write(manifest)
+
+            # Headers are rewritten after writing partition entries, even if the
+            # GUID didn't change, so they're synced
+            if written or current_guid != checksum_guid:
+                image.update_guid(checksum_guid, sync=sync)
+                gptsum.cache.invalidate(image, path, gptsum.checksum.VERSIONS)
+                written = True
+
+            _record_embedded(image, path, checksum_guid, version, algorithm)
+
+    return written
+
+
+def _record_embedded(
+    image: gptsum.gpt.GPTImage,
+    path: Optional[Path],
+    guid: uuid.UUID,
+    version: int,
+    algorithm: "gptsum.checksum.Algorithm",
+) -> None:
+    """Record the checksum version and algorithm of an image, if not the defaults.
+
+    Otherwise, :func:`verify` would need them to be given again.
+    """
+    if (version, algorithm) != _checksum_defaults(None, None):
+        gptsum.cache.record_embedded(image, path, guid, version, algorithm)
+
+
+def _embed_partitions(
+    image: gptsum.gpt.GPTImage,
+    *,
+    threads: Optional[int],
+    read_options: Optional["gptsum.checksum.ReadOptions"],
+    stats: Optional["gptsum.checksum.IOStatistics"],
+    progress: Optional["gptsum.checksum.ProgressCallback"],
+) -> bool:
+    """Embed the checksums of all partitions of an open image, without `fsync`.
+
+    Both partition entry arrays are replaced by the updated primary one.
+
+    :returns: Whether the partition entry arrays of the image were written
+    """
+    with _measure(stats, gptsum.checksum.Phase.HEADERS):
+        image.validate()
+        image.read_backup_partition_table()
+        table = image.read_primary_partition_table()
+        partitions = table.partitions()
+
+    with _measure(stats, gptsum.checksum.Phase.HASH):
+        digests = gptsum.checksum.calculate_partitions(
+            image,
+            partitions,
+            threads=threads,
+            read_options=read_options,
+            stats=stats,
+            progress=progress,
+        )
+
+    guids = {}
+    for partition, digest in zip(partitions, digests):
+        guid = gptsum.checksum.digest_to_guid(digest)
+        if guid != partition.unique_guid:
+            guids[partition.number - 1] = guid
+
+    if not guids:
+        return False
+
+    with _measure(stats, gptsum.checksum.Phase.WRITE):
+        image.write_partition_tables(table.with_unique_guids(guids), sync=False)
+
+    return True
 
 
 @dataclasses.dataclass(frozen=True)
@@ -157,26 +612,717 @@ class VerificationFailure(Exception):
 
     expected: uuid.UUID
     actual: uuid.UUID
+    damaged: Tuple[Tuple[int, int], ...] = ()
+    """Start and end offsets of the byte ranges which differ from the manifest.
+
+    Only set when verifying against a :class:`gptsum.manifest.Manifest`.
+
+    .. versionadded:: 0.6.0
+    """
 
+    def __reduce__(self) -> Tuple[Type["VerificationFailure"], Tuple[Any, ...]]:
+        """Support pickling, e.g., to pass failures between processes."""
+        return (type(self), (self.expected, self.actual, self.damaged))
 
-def verify(*, fd: Optional[int] = None, path: Optional[Path] = None) -> None:
+
+def verify(  # pylint: disable=too-many-arguments
+    *,
+    fd: Optional[int] = None,
+    path: Optional[Path] = None,
+    version: Optional[int] = None,
+    algorithm: Optional["gptsum.checksum.Algorithm"] = None,
+    threads: Optional[int] = None,
+    read_options: Optional["gptsum.checksum.ReadOptions"] = None,
+    stats: Optional["gptsum.checksum.IOStatistics"] = None,
+    cache_policy: Optional["gptsum.cache.CachePolicy"] = None,
+    manifest: Optional["gptsum.manifest.Manifest"] = None,
+    size: Optional[int] = None,
+    progress: Optional["gptsum.checksum.ProgressCallback"] = None,
+) -> None:
     """Verify a GPT disk image GUID against the calculated checksum.
 
-    In essence a combination of :func:`calculate_expected_guid` and :func:`get_guid`.
+    In essence a combination of :func:`calculate_expected_guid` and :func:`get_guid`,
+    opening the image and reading its headers only once.
+
+    If a ``manifest`` written by :func:`embed` is given, the chunks of the image are
+    hashed in parallel and compared against it instead, and the byte ranges which
+    changed are reported in :attr:`VerificationFailure.damaged`. If none changed,
+    the GUID is verified against the checksum recorded in the manifest. The checksum
+    version and algorithm of the manifest are used, and the cache is not.
+
+    If neither ``version`` nor ``algorithm`` is given, those :func:`embed` recorded
+    with the image are used, if any, see :func:`gptsum.cache.record_embedded`.
+    Otherwise, those not given default to :data:`gptsum.checksum.DEFAULT_VERSION`
+    and :data:`gptsum.checksum.DEFAULT_ALGORITHM`.
 
     One of ``fd`` or ``path`` must be given.
 
     :param fd: Readable file-descriptor to an image file
     :param path: Path to a readable image file
+    :param version: Checksum version, one of :data:`gptsum.checksum.VERSIONS`
+    :param algorithm: Digest algorithm of version 1 and 3 checksums
+    :param threads: Number of worker threads used to calculate version 2 checksums
+    :param read_options: Options controlling how data is read from the image
+    :param stats: Statistics to update with the amount of data read from the image,
+        and synthesized for holes in sparse image files, and the time spent in
+        every phase
+    :param cache_policy: Policy for the persistent checksum cache, see
+        :mod:`gptsum.cache`. The cache is not used if not given.
+    :param manifest: Manifest of the image to locate damaged regions with
+    :param size: Size of the image, if only a prefix of the file or block device,
+        e.g., when an image was written to a larger device
+    :param progress: Function called with the number of bytes hashed so far and the
+        size of the image, at a bounded rate
 
-    :raises VerificationFailure: Current GUID and checksum mismatch
+    :raises VerificationFailure: Current GUID and checksum mismatch, or image
+        contents differ from the manifest
+    :raises ValueError: Manifest doesn't match the size of the image
 
     .. versionadded:: 0.0.9
+    .. versionchanged:: 0.6.0
+       Added the ``version``, ``algorithm``, ``threads``, ``read_options``,
+       ``stats``, ``cache_policy``, ``manifest``, ``size`` and ``progress``
+       arguments.
     """
     _check_fd_or_path(fd, path)
 
-    current_guid = get_guid(fd=fd, path=path)
-    checksum_guid = calculate_expected_guid(fd=fd, path=path)
+    with contextlib.ExitStack() as stack:
+        image = _open_image(
+            stack, fd=fd, path=path, open_mode=os.O_RDONLY, size=size, stats=stats
+        )
+
+        if manifest is not None:
+            _verify_manifest(
+                image,
+                manifest,
+                threads=threads,
+                read_options=read_options,
+                stats=stats,
+                progress=progress,
+            )
+            return
+
+        current_guid, checksum_guid = _get_and_calculate_guid(
+            image,
+            path,
+            version=version,
+            algorithm=algorithm,
+            threads=threads,
+            read_options=read_options,
+            stats=stats,
+            cache_policy=_cache_policy_default(cache_policy),
+            progress=progress,
+        )
 
     if current_guid != checksum_guid:
         raise VerificationFailure(checksum_guid, current_guid)
+
+
+def verify_partition(  # pylint: disable=too-many-arguments
+    number: int,
+    *,
+    fd: Optional[int] = None,
+    path: Optional[Path] = None,
+    read_options: Optional["gptsum.checksum.ReadOptions"] = None,
+    stats: Optional["gptsum.checksum.IOStatistics"] = None,
+    size: Optional[int] = None,
+    progress: Optional["gptsum.checksum.ProgressCallback"] = None,
+) -> None:
+    """Verify the unique GUID of a partition against its calculated checksum.
+
+    The checksum of the partition must have been embedded using :func:`embed` with
+    ``partitions`` set. Only the GPT headers, the partition entry arrays and the
+    partition itself are read, so this is much cheaper than :func:`verify` for
+    partitions which are small compared to the image.
+
+    One of ``fd`` or ``path`` must be given.
+
+    :param number: Number of the partition, starting at 1
+    :param fd: Readable file-descriptor to an image file
+    :param path: Path to a readable image file
+    :param read_options: Options controlling how data is read from the image
+    :param stats: Statistics to update with the amount of data read from the image,
+        and synthesized for holes in sparse image files, and the time spent in
+        every phase
+    :param size: Size of the image, if only a prefix of the file or block device,
+        e.g., when an image was written to a larger device
+    :param progress: Function called with the number of bytes hashed so far and the
+        size of the partition, at a bounded rate
+
+    :raises VerificationFailure: Unique partition GUID and checksum mismatch
+    :raises ValueError: No such partition in the image
+    :raises gptsum.gpt.EntriesChecksumMismatchError: Partition entry array checksum
+        mismatch
+
+    .. versionadded:: 0.6.0
+    """
+    _check_fd_or_path(fd, path)
+
+    with contextlib.ExitStack() as stack:
+        image = _open_image(
+            stack, fd=fd, path=path, open_mode=os.O_RDONLY, size=size, stats=stats
+        )
+
+        with _measure(stats, gptsum.checksum.Phase.HEADERS):
+            image.validate()
+            image.read_backup_partition_table()
+            table = image.read_primary_partition_table()
+
+            partition = None
+            if 1 <= number <= table.num_entries:
+                partition = table.partition(number - 1)
+            if partition is None:
+                raise ValueError(f"No partition {number} in the image")
+
+        with _measure(stats, gptsum.checksum.Phase.HASH):
+            (digest,) = gptsum.checksum.calculate_partitions(
+                image,
+                [partition],
+                threads=1,
+                read_options=read_options,
+                stats=stats,
+                progress=progress,
+            )
+
+    checksum_guid = gptsum.checksum.digest_to_guid(digest)
+    if partition.unique_guid != checksum_guid:
+        raise VerificationFailure(checksum_guid, partition.unique_guid)
+
+
+def verify_stream(
+    fd: int,
+    *,
+    version: Optional[int] = None,
+    algorithm: Optional["gptsum.checksum.Algorithm"] = None,
+    read_options: Optional["gptsum.checksum.ReadOptions"] = None,
+    stats: Optional["gptsum.checksum.IOStatistics"] = None,
+    tee: Optional[int] = None,
+    compression: Optional["gptsum.compression.Compression"] = None,
+    progress: Optional["gptsum.checksum.ProgressCallback"] = None,
+) -> None:
+    """Verify a GPT disk image read from a stream, e.g., a pipe or socket.
+
+    Unlike :func:`verify`, the file descriptor doesn't need to be seekable: the
+    image is read in a single forward pass. All data read can be copied to another
+    file descriptor, e.g., to store an image while it's being downloaded and
+    verified. Note this data is written even if verification fails.
+
+    If the stream is compressed, it's decompressed in a separate thread, see
+    :mod:`gptsum.compression`. The decompressed image is copied to ``tee``.
+
+    :param fd: Readable file descriptor of the stream
+    :param version: Checksum version, one of :data:`gptsum.checksum.VERSIONS`,
+        :data:`gptsum.checksum.DEFAULT_VERSION` if not given. Unlike :func:`verify`,
+        the version and algorithm recorded when embedding can't be used.
+    :param algorithm: Digest algorithm of version 1 and 3 checksums,
+        :data:`gptsum.checksum.DEFAULT_ALGORITHM` if not given
+    :param read_options: Options controlling how data is read from the stream, of
+        which only :attr:`gptsum.checksum.ReadOptions.buffer_size` applies
+    :param stats: Statistics to update with the amount of data read from the stream
+    :param tee: Writable file descriptor to copy the image to
+    :param compression: Compression format of the stream, if compressed
+    :param progress: Function called with the number of bytes hashed so far and the
+        size of the (decompressed) image, at a bounded rate
+
+    :raises VerificationFailure: Current GUID and checksum mismatch
+    :raises gptsum.compression.DecompressionError: Decompression failed
+
+    .. versionadded:: 0.6.0
+    """
+    version, algorithm = _checksum_defaults(version, algorithm)
+
+    with _measure(stats, gptsum.checksum.Phase.HASH):
+        with gptsum.compression.decompressed(fd, compression) as stream_fd:
+            primary, digest = gptsum.checksum.calculate_stream(
+                stream_fd,
+                version,
+                algorithm=algorithm,
+                read_options=read_options,
+                tee=tee,
+                stats=stats,
+                progress=progress,
+            )
+    checksum_guid = gptsum.checksum.digest_to_guid(digest)
+
+    if primary.disk_guid != checksum_guid:
+        raise VerificationFailure(checksum_guid, primary.disk_guid)
+
+
+def calculate_expected_guid_stream(
+    fd: int,
+    *,
+    version: Optional[int] = None,
+    algorithm: Optional["gptsum.checksum.Algorithm"] = None,
+    read_options: Optional["gptsum.checksum.ReadOptions"] = None,
+    stats: Optional["gptsum.checksum.IOStatistics"] = None,
+    compression: Optional["gptsum.compression.Compression"] = None,
+    progress: Optional["gptsum.checksum.ProgressCallback"] = None,
+) -> uuid.UUID:
+    """Calculate the expected checksum GUID of a disk image read from a stream.
+
+    The image is read like in :func:`verify_stream`.
+
+    :param fd: Readable file descriptor of the stream
+    :param version: Checksum version, one of :data:`gptsum.checksum.VERSIONS`,
+        :data:`gptsum.checksum.DEFAULT_VERSION` if not given
+    :param algorithm: Digest algorithm of version 1 and 3 checksums,
+        :data:`gptsum.checksum.DEFAULT_ALGORITHM` if not given
+    :param read_options: Options controlling how data is read from the stream, of
+        which only :attr:`gptsum.checksum.ReadOptions.buffer_size` applies
+    :param stats: Statistics to update with the amount of data read from the stream
+    :param compression: Compression format of the stream, if compressed
+    :param progress: Function called with the number of bytes hashed so far and the
+        size of the (decompressed) image, at a bounded rate
+
+    :returns: Expected checksum GUID of the disk image
+
+    :raises gptsum.compression.DecompressionError: Decompression failed
+
+    .. versionadded:: 0.6.0
+    """
+    version, algorithm = _checksum_defaults(version, algorithm)
+
+    with _measure(stats, gptsum.checksum.Phase.HASH):
+        with gptsum.compression.decompressed(fd, compression) as stream_fd:
+            _, digest = gptsum.checksum.calculate_stream(
+                stream_fd,
+                version,
+                algorithm=algorithm,
+                read_options=read_options,
+                stats=stats,
+                progress=progress,
+            )
+
+    return gptsum.checksum.digest_to_guid(digest)
+
+
+def copy_embed(  # pylint: disable=too-many-arguments
+    source: int,
+    destination: int,
+    *,
+    version: Optional[int] = None,
+    algorithm: Optional["gptsum.checksum.Algorithm"] = None,
+    read_options: Optional["gptsum.checksum.ReadOptions"] = None,
+    stats: Optional["gptsum.checksum.IOStatistics"] = None,
+    compression: Optional["gptsum.compression.Compression"] = None,
+    progress: Optional["gptsum.checksum.ProgressCallback"] = None,
+) -> uuid.UUID:
+    """Copy a disk image, embedding its checksum GUID in the copy.
+
+    The image is read from ``source`` like in :func:`verify_stream`, and written to
+    ``destination`` while it's being hashed, so it's only read once. The GUID is
+    then written to both GPT headers of the copy, which is synced.
+
+    If ``destination`` is a regular file, it's truncated first, and buffers of
+    zeroes are skipped rather than written, so holes in the image are preserved.
+    Other destinations, e.g., block devices, are written from their start. Like in
+    :func:`embed`, a non-default ``version`` or ``algorithm`` is recorded in an
+    extended attribute of a regular file, if supported.
+
+    :param source: Readable file descriptor of the image, e.g., a regular file, a
+        block device or a pipe
+    :param destination: Readable and writable file descriptor to copy the image to
+    :param version: Checksum version, one of :data:`gptsum.checksum.VERSIONS`,
+        :data:`gptsum.checksum.DEFAULT_VERSION` if not given
+    :param algorithm: Digest algorithm of version 1 and 3 checksums,
+        :data:`gptsum.checksum.DEFAULT_ALGORITHM` if not given
+    :param read_options: Options controlling how data is read from the source, of
+        which only :attr:`gptsum.checksum.ReadOptions.buffer_size` applies
+    :param stats: Statistics to update with the amount of data read from the source,
+        and the time spent in every phase
+    :param compression: Compression format of the source, if compressed
+    :param progress: Function called with the number of bytes hashed so far and the
+        size of the (decompressed) image, at a bounded rate
+
+    :returns: Checksum GUID embedded in the copy
+
+    :raises ValueError: ``source`` and ``destination`` are the same file
+    :raises gptsum.compression.DecompressionError: Decompression failed
+
+    .. versionadded:: 0.6.0
+    """
+    version, algorithm = _checksum_defaults(version, algorithm)
+
+    source_stat = os.fstat(source)
+    destination_stat = os.fstat(destination)
+    if (source_stat.st_dev, source_stat.st_ino) == (
+        destination_stat.st_dev,
+        destination_stat.st_ino,
+    ):
+        raise ValueError("Source and destination are the same file")
+
+    sparse = stat.S_ISREG(destination_stat.st_mode)
+    if sparse:
+        os.ftruncate(destination, 0)
+    os.lseek(destination, 0, os.SEEK_SET)
+
+    with _measure(stats, gptsum.checksum.Phase.HASH):
+        with gptsum.compression.decompressed(source, compression) as stream_fd:
+            primary, digest = gptsum.checksum.calculate_stream(
+                stream_fd,
+                version,
+                algorithm=algorithm,
+                read_options=read_options,
+                tee=destination,
+                sparse=sparse,
+                stats=stats,
+                progress=progress,
+            )
+    checksum_guid = gptsum.checksum.digest_to_guid(digest)
+    size = (primary.backup_lba + 1) * gptsum.gpt.LBA_SIZE
+
+    # Holes at the end of the image were skipped past the end of the copy
+    if sparse:
+        os.ftruncate(destination, size)
+
+    with contextlib.ExitStack() as stack:
+        image = _open_image(
+            stack,
+            fd=destination,
+            path=None,
+            open_mode=os.O_RDWR,
+            size=size,
+            stats=stats,
+        )
+        with _measure(stats, gptsum.checksum.Phase.WRITE):
+            image.update_guid(checksum_guid, sync=True)
+            gptsum.cache.invalidate(image, None, gptsum.checksum.VERSIONS)
+            _record_embedded(image, None, checksum_guid, version, algorithm)
+
+    return checksum_guid
+
+
+def _verify_manifest(
+    image: gptsum.gpt.GPTImage,
+    manifest: "gptsum.manifest.Manifest",
+    *,
+    threads: Optional[int],
+    read_options: Optional["gptsum.checksum.ReadOptions"],
+    stats: Optional["gptsum.checksum.IOStatistics"],
+    progress: Optional["gptsum.checksum.ProgressCallback"],
+) -> None:
+    """Verify an open image against its manifest."""
+    with _measure(stats, gptsum.checksum.Phase.HEADERS):
+        image.validate()
+        current_guid = image.read_primary_gpt_header().disk_guid
+
+    if image.size != manifest.size or manifest.chunk_size != (
+        gptsum.checksum.CHUNK_SIZE
+    ):
+        raise ValueError(
+            f"Manifest is for an image of {manifest.size} bytes "
+            f"in chunks of {manifest.chunk_size} bytes, got {image.size} bytes "
+            f"in chunks of {gptsum.checksum.CHUNK_SIZE} bytes"
+        )
+
+    with _measure(stats, gptsum.checksum.Phase.HASH):
+        chunk_digests = gptsum.checksum.calculate_chunks(
+            image,
+            threads=threads,
+            read_options=read_options,
+            stats=stats,
+            progress=progress,
+        )
+    damaged = tuple(manifest.differences(chunk_digests))
+    checksum_guid = gptsum.checksum.digest_to_guid(manifest.digest)
+
+    if damaged or current_guid != checksum_guid:
+        raise VerificationFailure(checksum_guid, current_guid, damaged)
+
+
+@dataclasses.dataclass(frozen=True)
+class BatchResult:
+    """Result of processing a single image in a batch.
+
+    See :func:`verify_many` and :func:`embed_many`.
+
+    .. versionadded:: 0.6.0
+    """
+
+    path: Path
+    """Path of the image."""
+    error: Optional[Exception] = None
+    """Error raised when processing the image, ``None`` if successful.
+
+    This is a :class:`VerificationFailure` if verification of the image failed.
+    """
+    stats: Optional["gptsum.checksum.IOStatistics"] = None
+    """Statistics of the data read from the image, if requested."""
+
+
+# Keyword arguments passed to the worker functions processing a single image
+_BatchKwargs = Dict[str, Any]
+
+
+def _detect_compression(path: Path) -> Optional["gptsum.compression.Compression"]:
+    """Detect the compression format of an image file."""
+    fd = os.open(path, getattr(os, "O_CLOEXEC", 0) | os.O_RDONLY)
+    try:
+        return gptsum.compression.detect(fd)
+    finally:
+        os.close(fd)
+
+
+def _verify_one(path: Path, kwargs: _BatchKwargs) -> Tuple[BatchResult, bool]:
+    """Verify a single image, as part of a batch."""
+    stats = gptsum.checksum.IOStatistics() if kwargs.pop("stats") else None
+    locate = kwargs.pop("locate")
+    partition = kwargs.pop("partition")
+
+    try:
+        compression = _detect_compression(path)
+        if compression is not None:
+            if locate:
+                raise ValueError("Damage can't be located in compressed images")
+            if partition is not None:
+                raise ValueError("Partitions of compressed images can't be verified")
+            if kwargs["size"] is not None:
+                raise ValueError("The size of compressed images can't be overridden")
+
+            with open(path, "rb") as fd:
+                verify_stream(
+                    fd.fileno(),
+                    version=kwargs["version"],
+                    algorithm=kwargs["algorithm"],
+                    read_options=kwargs["read_options"],
+                    stats=stats,
+                    compression=compression,
+                    progress=kwargs["progress"],
+                )
+
+            return (BatchResult(path, None, stats), False)
+
+        if partition is not None:
+            if locate:
+                raise ValueError("Damage can't be located when verifying a partition")
+
+            verify_partition(
+                partition,
+                path=path,
+                read_options=kwargs["read_options"],
+                stats=stats,
+                size=kwargs["size"],
+                progress=kwargs["progress"],
+            )
+            return (BatchResult(path, None, stats), False)
+
+        manifest = None
+        if locate:
+            manifest = gptsum.manifest.Manifest.read(gptsum.manifest.default_path(path))
+
+        verify(path=path, stats=stats, manifest=manifest, **kwargs)
+    except (OSError, ValueError, VerificationFailure) as exc:
+        return (BatchResult(path, exc, stats), False)
+
+    return (BatchResult(path, None, stats), False)
+
+
+def _embed_one(path: Path, kwargs: _BatchKwargs) -> Tuple[BatchResult, bool]:
+    """Embed the checksum of a single image, without `fsync`, as part of a batch."""
+    stats = gptsum.checksum.IOStatistics() if kwargs.pop("stats") else None
+    manifest = None
+    if kwargs.pop("write_manifests"):
+        manifest = gptsum.manifest.default_path(path)
+
+    try:
+        written = _embed(
+            fd=None, path=path, stats=stats, sync=False, manifest=manifest, **kwargs
+        )
+    except (OSError, ValueError) as exc:
+        return (BatchResult(path, exc, stats), False)
+
+    return (BatchResult(path, None, stats), written)
+
+
+def _image_size(path: Path) -> int:
+    """Get the size of an image file, or 0 if it can't be retrieved."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def _run_many(  # pylint: disable=too-many-arguments
+    func: Callable[[Path, _BatchKwargs], Tuple[BatchResult, bool]],
+    paths: Iterable[Path],
+    jobs: Optional[int],
+    kwargs: _BatchKwargs,
+    stats: Optional["gptsum.checksum.IOStatistics"],
+    written: List[Path],
+) -> Iterator[BatchResult]:
+    """Run a function on many images, in a pool of processes if ``jobs`` is not 1.
+
+    Images are processed largest-first, so a large image submitted last doesn't
+    keep a single worker busy long after all others finished. Results are yielded
+    as they become available. Paths of images whose headers were written are added
+    to ``written``.
+    """
+    if jobs != 1 and kwargs["progress"] is not None:
+        raise ValueError("Progress can only be reported when using a single job")
+
+    kwargs = dict(kwargs, stats=stats is not None)
+    ordered = sorted(paths, key=_image_size, reverse=True)
+
+    def collect(result: BatchResult, was_written: bool) -> BatchResult:
+        if stats is not None and result.stats is not None:
+            stats.update(result.stats)
+        if was_written:
+            written.append(result.path)
+        return result
+
+    if jobs == 1:
+        for path in ordered:
+            yield collect(*func(path, dict(kwargs)))
+        return
+
+    # Deferred, since importing it takes a while, and it's only used for batches
+    import concurrent.futures  # pylint: disable=import-outside-toplevel
+
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+
+    try:
+        futures = [executor.submit(func, path, kwargs) for path in ordered]
+        for future in concurrent.futures.as_completed(futures):
+            yield collect(*future.result())
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def verify_many(  # pylint: disable=too-many-arguments
+    paths: Iterable[Path],
+    *,
+    jobs: Optional[int] = None,
+    version: Optional[int] = None,
+    algorithm: Optional["gptsum.checksum.Algorithm"] = None,
+    threads: Optional[int] = None,
+    read_options: Optional["gptsum.checksum.ReadOptions"] = None,
+    stats: Optional["gptsum.checksum.IOStatistics"] = None,
+    cache_policy: Optional["gptsum.cache.CachePolicy"] = None,
+    locate: bool = False,
+    partition: Optional[int] = None,
+    size: Optional[int] = None,
+    progress: Optional["gptsum.checksum.ProgressCallback"] = None,
+) -> Iterator[BatchResult]:
+    """Verify many GPT disk images, in parallel.
+
+    Images are verified in a pool of ``jobs`` processes, largest images first.
+    Results are yielded as soon as they're available, hence not necessarily in the
+    order of ``paths``.
+
+    Compressed images are detected, and decompressed on the fly like in
+    :func:`verify_stream`. The cache is not used for these.
+
+    :param paths: Paths of readable image files
+    :param jobs: Number of worker processes, defaults to the number of CPUs. If 1,
+        images are verified in the calling process.
+    :param version: Checksum version, one of :data:`gptsum.checksum.VERSIONS`. If
+        neither ``version`` nor ``algorithm`` is given, those recorded with every
+        image are used, like in :func:`verify`.
+    :param algorithm: Digest algorithm of version 1 and 3 checksums
+    :param threads: Number of worker threads used to calculate version 2 checksums
+    :param read_options: Options controlling how data is read from the images
+    :param stats: Statistics to update with the amount of data read from all
+        images, and synthesized for holes in sparse image files, and the time
+        spent in every phase
+    :param cache_policy: Policy for the persistent checksum cache, see
+        :mod:`gptsum.cache`. The cache is not used if not given.
+    :param locate: Verify every image against its manifest, read from
+        :func:`gptsum.manifest.default_path`, locating damaged regions
+    :param partition: Only verify this partition of every image, like
+        :func:`verify_partition`, ignoring ``version``, ``algorithm``, ``threads`` and
+        ``cache_policy``
+    :param size: Size of every image, if only a prefix of the files or block
+        devices
+    :param progress: Function called with the number of bytes hashed so far and the
+        size of the image being processed, at a bounded rate. Only supported if
+        ``jobs`` is 1.
+
+    :yields: Results, one for every image
+
+    :raises ValueError: Progress requested when using multiple jobs
+
+    .. versionadded:: 0.6.0
+    """
+    kwargs = {
+        "version": version,
+        "algorithm": algorithm,
+        "threads": threads,
+        "read_options": read_options,
+        "cache_policy": cache_policy,
+        "locate": locate,
+        "partition": partition,
+        "size": size,
+        "progress": progress,
+    }
+    return _run_many(_verify_one, paths, jobs, kwargs, stats, [])
+
+
+def embed_many(  # pylint: disable=too-many-arguments
+    paths: Iterable[Path],
+    *,
+    jobs: Optional[int] = None,
+    version: Optional[int] = None,
+    algorithm: Optional["gptsum.checksum.Algorithm"] = None,
+    threads: Optional[int] = None,
+    read_options: Optional["gptsum.checksum.ReadOptions"] = None,
+    stats: Optional["gptsum.checksum.IOStatistics"] = None,
+    write_manifests: bool = False,
+    partitions: bool = False,
+    size: Optional[int] = None,
+    progress: Optional["gptsum.checksum.ProgressCallback"] = None,
+) -> Iterator[BatchResult]:
+    """Embed the calculated checksum GUID in many image files, in parallel.
+
+    Images are processed like in :func:`verify_many`. Rather than calling `fsync`
+    after writing the headers of every image, all images whose headers were written
+    are synced once all of them are processed, before the iterator is exhausted.
+
+    :param paths: Paths of readable and writable image files
+    :param jobs: Number of worker processes, defaults to the number of CPUs. If 1,
+        images are processed in the calling process.
+    :param version: Checksum version, one of :data:`gptsum.checksum.VERSIONS`,
+        :data:`gptsum.checksum.DEFAULT_VERSION` if not given
+    :param algorithm: Digest algorithm of version 1 and 3 checksums,
+        :data:`gptsum.checksum.DEFAULT_ALGORITHM` if not given
+    :param threads: Number of worker threads used to calculate version 2 checksums
+    :param read_options: Options controlling how data is read from the images
+    :param stats: Statistics to update with the amount of data read from all
+        images, and synthesized for holes in sparse image files, and the time
+        spent in every phase
+    :param write_manifests: Write the manifest of every image to
+        :func:`gptsum.manifest.default_path`
+    :param partitions: Embed the checksum of every partition in its partition entry,
+        see :func:`embed`
+    :param size: Size of every image, if only a prefix of the files or block
+        devices
+    :param progress: Function called with the number of bytes hashed so far and the
+        size of the image being processed, at a bounded rate. Only supported if
+        ``jobs`` is 1.
+
+    :yields: Results, one for every image
+
+    :raises ValueError: Progress requested when using multiple jobs
+
+    .. versionadded:: 0.6.0
+    """
+    kwargs = {
+        "version": version,
+        "algorithm": algorithm,
+        "threads": threads,
+        "read_options": read_options,
+        "write_manifests": write_manifests,
+        "partitions": partitions,
+        "size": size,
+        "progress": progress,
+    }
+    written: List[Path] = []
+
+    yield from _run_many(_embed_one, paths, jobs, kwargs, stats, written)
+
+    with _measure(stats, gptsum.checksum.Phase.WRITE):
+        for path in written:
+            fd = os.open(path, getattr(os, "O_CLOEXEC", 0) | os.O_RDWR)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
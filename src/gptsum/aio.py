@@ -0,0 +1,362 @@
+"""Asyncio versions of the :mod:`gptsum` API.
+
+Reading and hashing images blocks for a long time, so calling the functions of
+:mod:`gptsum` from a coroutine would stall the event loop. The coroutines in this
+module run them in an executor instead.
+
+When a coroutine is cancelled, the operation running in the executor is stopped
+at the next checkpoint, which is reached at least every half second while hashing
+an image, and the coroutine only returns once the operation stopped. An image
+whose checksum is being embedded is left untouched if the operation is cancelled
+before its headers are written.
+
+The number of operations running concurrently is bounded by a semaphore. By
+default, one semaphore allowing :data:`DEFAULT_CONCURRENCY` operations is shared
+by all coroutines running on an event loop, so starting many operations at once
+doesn't exhaust the executor, and the threads or I/O bandwidth of the system.
+
+.. versionadded:: 0.6.0
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import uuid
+import weakref
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
+
+import gptsum
+import gptsum.cache
+import gptsum.checksum
+import gptsum.manifest
+
+DEFAULT_CONCURRENCY = max(1, (os.cpu_count() or 1) // 2)
+"""Number of operations run concurrently by default, on every event loop."""
+
+_T = TypeVar("_T")
+
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]"
+_semaphores = weakref.WeakKeyDictionary()
+
+
+class _Cancelled(Exception):
+    """Raised at a checkpoint of an operation whose coroutine was cancelled."""
+
+
+def _default_semaphore() -> asyncio.Semaphore:
+    """Get the semaphore shared by all operations on the running event loop."""
+    loop = asyncio.get_running_loop()
+
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(DEFAULT_CONCURRENCY)
+        _semaphores[loop] = semaphore
+
+    return semaphore
+
+
+async def _run(
+    func: Callable[[gptsum.checksum.ProgressCallback], _T],
+    *,
+    progress: Optional[gptsum.checksum.ProgressCallback],
+    semaphore: Optional[asyncio.Semaphore],
+    executor: Optional[concurrent.futures.Executor],
+) -> _T:
+    """Run an operation in an executor, stopping it when cancelled.
+
+    :param func: Operation to run, called with the progress callback to pass on,
+        which checks for cancellation
+    :param progress: Progress callback of the caller
+    :param semaphore: Semaphore bounding the number of concurrent operations, or
+        ``None`` for the default one
+    :param executor: Executor to run the operation in, or ``None`` for the default
+        executor of the event loop
+
+    :returns: Result of the operation
+    """
+    cancelled = threading.Event()
+
+    def checkpoint(done: int, total: int) -> None:
+        if cancelled.is_set():
+            raise _Cancelled()
+
+        if progress is not None:
+            progress(done, total)
+
+    if semaphore is None:
+        semaphore = _default_semaphore()
+
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(executor, func, checkpoint)
+
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            cancelled.set()
+            # Don't release the semaphore before the operation stopped
+            await asyncio.wait([future])
+            # The outcome of the operation is dropped, but mark it as retrieved
+            future.exception()
+            raise
+
+
+async def get_guid(
+    *,
+    fd: Optional[int] = None,
+    path: Optional[Path] = None,
+    size: Optional[int] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> uuid.UUID:
+    """Get the GUID of a disk image.
+
+    See :func:`gptsum.get_guid`.
+
+    :param fd: Readable file-descriptor to an image file
+    :param path: Path of a readable image file
+    :param size: Size of the image, if only a prefix of the file or block device
+    :param semaphore: Semaphore bounding the number of concurrent operations, or
+        ``None`` for the one shared on the running event loop
+    :param executor: Executor to run the operation in, or ``None`` for the default
+        executor of the running event loop
+
+    :returns: GUID of the disk image
+    """
+    return await _run(
+        lambda _: gptsum.get_guid(fd=fd, path=path, size=size),
+        progress=None,
+        semaphore=semaphore,
+        executor=executor,
+    )
+
+
+async def calculate_expected_guid(  # pylint: disable=too-many-arguments
+    *,
+    fd: Optional[int] = None,
+    path: Optional[Path] = None,
+    version: Optional[int] = None,
+    algorithm: Optional[gptsum.checksum.Algorithm] = None,
+    threads: Optional[int] = None,
+    read_options: Optional[gptsum.checksum.ReadOptions] = None,
+    stats: Optional[gptsum.checksum.IOStatistics] = None,
+    cache_policy: Optional[gptsum.cache.CachePolicy] = None,
+    size: Optional[int] = None,
+    progress: Optional[gptsum.checksum.ProgressCallback] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> uuid.UUID:
+    """Calculate the expected checksum GUID of a disk image.
+
+    See :func:`gptsum.calculate_expected_guid`.
+
+    :param fd: Readable file-descriptor to an image file
+    :param path: Path of a readable image file
+    :param version: Checksum version, one of :data:`gptsum.checksum.VERSIONS`, or
+        ``None`` for the default
+    :param algorithm: Digest algorithm of version 1 and 3 checksums, or ``None`` for
+        the default
+    :param threads: Number of worker threads used to calculate version 2 checksums
+    :param read_options: Options controlling how data is read from the image
+    :param stats: Statistics to update
+    :param cache_policy: Policy for the persistent checksum cache, or ``None`` to not
+        use it
+    :param size: Size of the image, if only a prefix of the file or block device
+    :param progress: Function called with the number of bytes hashed so far and the
+        size of the image, at a bounded rate, from the thread running the operation
+    :param semaphore: Semaphore bounding the number of concurrent operations, or
+        ``None`` for the one shared on the running event loop
+    :param executor: Executor to run the operation in, or ``None`` for the default
+        executor of the running event loop
+
+    :returns: Expected checksum GUID of the disk image
+    """
+    return await _run(
+        lambda checkpoint: gptsum.calculate_expected_guid(
+            fd=fd,
+            path=path,
+            version=version,
+            algorithm=algorithm,
+            threads=threads,
+            read_options=read_options,
+            stats=stats,
+            cache_policy=cache_policy,
+            size=size,
+            progress=checkpoint,
+        ),
+        progress=progress,
+        semaphore=semaphore,
+        executor=executor,
+    )
+
+
+async def embed(  # pylint: disable=too-many-arguments
+    *,
+    fd: Optional[int] = None,
+    path: Optional[Path] = None,
+    version: Optional[int] = None,
+    algorithm: Optional[gptsum.checksum.Algorithm] = None,
+    threads: Optional[int] = None,
+    read_options: Optional[gptsum.checksum.ReadOptions] = None,
+    stats: Optional[gptsum.checksum.IOStatistics] = None,
+    manifest: Optional[Path] = None,
+    partitions: bool = False,
+    size: Optional[int] = None,
+    progress: Optional[gptsum.checksum.ProgressCallback] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> None:
+    """Embed the calculated checksum GUID in an image file.
+
+    See :func:`gptsum.embed`.
+
+    :param fd: Readable and writable file-descriptor to an image file
+    :param path: Path to a readable and writable image file
+    :param version: Checksum version, one of :data:`gptsum.checksum.VERSIONS`, or
+        ``None`` for the default
+    :param algorithm: Digest algorithm of version 1 and 3 checksums, or ``None`` for
+        the default
+    :param threads: Number of worker threads used to calculate version 2 checksums
+    :param read_options: Options controlling how data is read from the image
+    :param stats: Statistics to update
+    :param manifest: Path of the manifest file to write
+    :param partitions: Embed the checksum of every partition in its partition entry
+    :param size: Size of the image, if only a prefix of the file or block device
+    :param progress: Function called with the number of bytes hashed so far and the
+        size of the image, at a bounded rate, from the thread running the operation
+    :param semaphore: Semaphore bounding the number of concurrent operations, or
+        ``None`` for the one shared on the running event loop
+    :param executor: Executor to run the operation in, or ``None`` for the default
+        executor of the running event loop
+    """
+    await _run(
+        lambda checkpoint: gptsum.embed(
+            fd=fd,
+            path=path,
+            version=version,
+            algorithm=algorithm,
+            threads=threads,
+            read_options=read_options,
+            stats=stats,
+            manifest=manifest,
+            partitions=partitions,
+            size=size,
+            progress=checkpoint,
+        ),
+        progress=progress,
+        semaphore=semaphore,
+        executor=executor,
+    )
+
+
+async def verify(  # pylint: disable=too-many-arguments
+    *,
+    fd: Optional[int] = None,
+    path: Optional[Path] = None,
+    version: Optional[int] = None,
+    algorithm: Optional[gptsum.checksum.Algorithm] = None,
+    threads: Optional[int] = None,
+    read_options: Optional[gptsum.checksum.ReadOptions] = None,
+    stats: Optional[gptsum.checksum.IOStatistics] = None,
+    cache_policy: Optional[gptsum.cache.CachePolicy] = None,
+    manifest: Optional[gptsum.manifest.Manifest] = None,
+    size: Optional[int] = None,
+    progress: Optional[gptsum.checksum.ProgressCallback] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> None:
+    """Verify a GPT disk image GUID against the calculated checksum.
+
+    See :func:`gptsum.verify`.
+
+    :param fd: Readable file-descriptor to an image file
+    :param path: Path to a readable image file
+    :param version: Checksum version, one of :data:`gptsum.checksum.VERSIONS`, or
+        ``None`` for the one recorded when embedding, if any, or the default
+    :param algorithm: Digest algorithm of version 1 and 3 checksums, or ``None`` for
+        the one recorded when embedding, if any, or the default
+    :param threads: Number of worker threads used to calculate version 2 checksums
+    :param read_options: Options controlling how data is read from the image
+    :param stats: Statistics to update
+    :param cache_policy: Policy for the persistent checksum cache, or ``None`` to not
+        use it
+    :param manifest: Manifest of the image to locate damaged regions with
+    :param size: Size of the image, if only a prefix of the file or block device
+    :param progress: Function called with the number of bytes hashed so far and the
+        size of the image, at a bounded rate, from the thread running the operation
+    :param semaphore: Semaphore bounding the number of concurrent operations, or
+        ``None`` for the one shared on the running event loop
+    :param executor: Executor to run the operation in, or ``None`` for the default
+        executor of the running event loop
+
+    :raises gptsum.VerificationFailure: Current GUID and checksum mismatch, or
+        image contents differ from the manifest
+    """
+    await _run(
+        lambda checkpoint: gptsum.verify(
+            fd=fd,
+            path=path,
+            version=version,
+            algorithm=algorithm,
+            threads=threads,
+            read_options=read_options,
+            stats=stats,
+            cache_policy=cache_policy,
+            manifest=manifest,
+            size=size,
+            progress=checkpoint,
+        ),
+        progress=progress,
+        semaphore=semaphore,
+        executor=executor,
+    )
+
+
+async def verify_partition(  # pylint: disable=too-many-arguments
+    number: int,
+    *,
+    fd: Optional[int] = None,
+    path: Optional[Path] = None,
+    read_options: Optional[gptsum.checksum.ReadOptions] = None,
+    stats: Optional[gptsum.checksum.IOStatistics] = None,
+    size: Optional[int] = None,
+    progress: Optional[gptsum.checksum.ProgressCallback] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> None:
+    """Verify the unique GUID of a partition against its calculated checksum.
+
+    See :func:`gptsum.verify_partition`.
+
+    :param number: Number of the partition, starting at 1
+    :param fd: Readable file-descriptor to an image file
+    :param path: Path to a readable image file
+    :param read_options: Options controlling how data is read from the image
+    :param stats: Statistics to update
+    :param size: Size of the image, if only a prefix of the file or block device
+    :param progress: Function called with the number of bytes hashed so far and the
+        size of the partition, at a bounded rate, from the thread running the
+        operation
+    :param semaphore: Semaphore bounding the number of concurrent operations, or
+        ``None`` for the one shared on the running event loop
+    :param executor: Executor to run the operation in, or ``None`` for the default
+        executor of the running event loop
+
+    :raises gptsum.VerificationFailure: Unique partition GUID and checksum mismatch
+    """
+    await _run(
+        lambda checkpoint: gptsum.verify_partition(
+            number,
+            fd=fd,
+            path=path,
+            read_options=read_options,
+            stats=stats,
+            size=size,
+            progress=checkpoint,
+        ),
+        progress=progress,
+        semaphore=semaphore,
+        executor=executor,
+    )
@@ -0,0 +1,343 @@
+"""Persistent cache of image checksums.
+
+Calculated checksums are stored in extended attributes of the image file, or, if
+the filesystem doesn't support these, in a sidecar file next to it. Along with the
+digest, the size, modification time and inode number of the image are stored, and
+a cached digest is only used if these still match.
+
+Only checksums of regular files are cached: the modification time of a block
+device doesn't reflect changes to its contents.
+
+The same storage is used to record the checksum version and digest algorithm an
+image was embedded with, if not the defaults, so they needn't be given again when
+verifying it, see :func:`record_embedded`.
+
+.. versionadded:: 0.6.0
+"""
+
+import enum
+import errno
+import os
+import stat
+import struct
+import uuid
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from gptsum import checksum, gpt
+
+_XATTR_PREFIX = "user.gptsum."
+_SIDECAR_SUFFIX = ".gptsum-cache"
+
+_FORMAT = 1
+# Format, digest, size, modification time, change time and inode number
+_RECORD = struct.Struct("<B16sQqqQ")
+
+_EMBEDDED_KEY = "embedded"
+# Format, checksum version and embedded GUID, followed by the algorithm name
+_EMBEDDED_RECORD = struct.Struct("<BB16s")
+
+# Errors returned when the filesystem doesn't support (user) extended attributes
+_XATTR_NOT_SUPPORTED = frozenset(
+    code
+    for code in [
+        getattr(errno, "ENOTSUP", None),
+        getattr(errno, "EOPNOTSUPP", None),
+        errno.EPERM,
+    ]
+    if code is not None
+)
+# Error returned when an extended attribute is not set
+_ENODATA = getattr(errno, "ENODATA", getattr(errno, "ENOATTR", errno.ENOENT))
+
+
+class CachePolicy(enum.Enum):
+    """Policy used for the checksum cache.
+
+    .. versionadded:: 0.6.0
+    """
+
+    NONE = "none"
+    """Don't use the cache at all."""
+    STORE = "store"
+    """Always calculate checksums, and store them in the cache."""
+    TRUST = "trust"
+    """Use checksums from the cache if the image didn't change, store them otherwise.
+
+    Note a change to the image contents which preserves its size, modification
+    time and inode number, e.g., when deliberately resetting its modification time,
+    won't be detected.
+    """
+
+
+def _key(version: int, algorithm: checksum.Algorithm) -> str:
+    """Get the name of the cache entry for some checksum version and algorithm.
+
+    Entries of the default algorithm keep the names they had before other
+    algorithms were supported.
+    """
+    if algorithm == checksum.DEFAULT_ALGORITHM:
+        return f"v{version}"
+    return f"v{version}-{algorithm.value}"
+
+
+def _sidecar(path: Path, key: str) -> Path:
+    """Get the path of the sidecar cache file of an image."""
+    return path.with_name(f".{path.name}.{key}{_SIDECAR_SUFFIX}")
+
+
+def _pack(digest: bytes, image: gpt.GPTImage, with_ctime: bool) -> bytes:
+    """Pack a cache record for an image."""
+    fstat = image.fstat()
+    ctime = fstat.st_ctime_ns if with_ctime else 0
+
+    return _RECORD.pack(
+        _FORMAT, digest, image.size, fstat.st_mtime_ns, ctime, fstat.st_ino
+    )
+
+
+def _unpack(record: bytes, image: gpt.GPTImage, with_ctime: bool) -> Optional[bytes]:
+    """Unpack a cache record, returning its digest if it matches the image."""
+    if len(record) != _RECORD.size:
+        return None
+
+    fmt, digest, size, mtime, ctime, ino = _RECORD.unpack(record)
+    fstat = image.fstat()
+    expected: Tuple[int, ...] = (
+        _FORMAT,
+        image.size,
+        fstat.st_mtime_ns,
+        fstat.st_ino,
+    )
+
+    if (fmt, size, mtime, ino) != expected:
+        return None
+    if with_ctime and ctime != fstat.st_ctime_ns:
+        return None
+
+    return bytes(digest)
+
+
+def _cacheable(image: gpt.GPTImage) -> bool:
+    """Check whether the checksum of an image can be cached."""
+    return stat.S_ISREG(image.fstat().st_mode)
+
+
+def _xattr_supported() -> bool:
+    """Check whether the platform supports extended attributes."""
+    return all(hasattr(os, name) for name in ["getxattr", "setxattr", "removexattr"])
+
+
+def _read(
+    image: gpt.GPTImage, path: Optional[Path], key: str
+) -> Optional[Tuple[bytes, bool]]:
+    """Read a record of an image, from an extended attribute or a sidecar file.
+
+    :returns: Record, and whether it was read from a sidecar file, or ``None`` if
+        not found
+    """
+    if not _cacheable(image):
+        return None
+
+    if _xattr_supported():  # pragma: platform-darwin, platform-win32
+        try:
+            # pylint: disable-next=no-member
+            return (os.getxattr(image.fileno(), _XATTR_PREFIX + key), False)
+        except OSError as exc:
+            if exc.errno not in _XATTR_NOT_SUPPORTED | {_ENODATA}:
+                raise
+
+    if path is None:
+        return None
+
+    try:
+        return (_sidecar(path, key).read_bytes(), True)
+    except FileNotFoundError:
+        return None
+
+
+def _write(
+    image: gpt.GPTImage,
+    path: Optional[Path],
+    key: str,
+    pack: Callable[[bool], bytes],
+) -> bool:
+    """Write a record of an image, to an extended attribute or a sidecar file.
+
+    :param pack: Function packing the record, called with whether it's written to
+        a sidecar file
+
+    :returns: Whether the record was written
+    """
+    if not _cacheable(image):
+        return False
+
+    if _xattr_supported():  # pragma: platform-darwin, platform-win32
+        try:
+            # pylint: disable-next=no-member
+            os.setxattr(image.fileno(), _XATTR_PREFIX + key, pack(False))
+            return True
+        except OSError as exc:
+            if exc.errno not in _XATTR_NOT_SUPPORTED:
+                return False
+
+    if path is None:
+        return False
+
+    try:
+        _sidecar(path, key).write_bytes(pack(True))
+    except OSError:
+        return False
+
+    return True
+
+
+def lookup(
+    image: gpt.GPTImage,
+    path: Optional[Path],
+    version: int,
+    algorithm: checksum.Algorithm = checksum.DEFAULT_ALGORITHM,
+) -> Optional[bytes]:
+    """Look up the cached checksum of an image.
+
+    :param image: Open image to look up
+    :param path: Path of the image, used to find a sidecar cache file
+    :param version: Checksum version
+    :param algorithm: Digest algorithm of the checksum
+
+    :returns: Cached checksum, or ``None`` if not found or the image changed
+    """
+    found = _read(image, path, _key(version, algorithm))
+    if found is None:
+        return None
+
+    # Writing the sidecar doesn't change the image, so its change time can be used
+    record, sidecar = found
+    return _unpack(record, image, sidecar)
+
+
+def store(
+    image: gpt.GPTImage,
+    path: Optional[Path],
+    version: int,
+    digest: bytes,
+    algorithm: checksum.Algorithm = checksum.DEFAULT_ALGORITHM,
+) -> bool:
+    """Store the checksum of an image in the cache.
+
+    Failure to store the checksum, e.g., due to lack of permissions or a read-only
+    filesystem, is not an error.
+
+    :param image: Open image to store the checksum of
+    :param path: Path of the image, used to create a sidecar cache file
+    :param version: Checksum version
+    :param digest: Checksum of the image
+    :param algorithm: Digest algorithm of the checksum
+
+    :returns: Whether the checksum was stored
+    """
+    # Setting an extended attribute changes the change time of the image, hence
+    # it's only recorded in the sidecar
+    return _write(
+        image,
+        path,
+        _key(version, algorithm),
+        lambda sidecar: _pack(digest, image, sidecar),
+    )
+
+
+def invalidate(
+    image: gpt.GPTImage,
+    path: Optional[Path],
+    versions: Tuple[int, ...],
+) -> None:
+    """Remove all cached checksums of an image.
+
+    :param image: Open image to remove the cached checksums of
+    :param path: Path of the image, used to find sidecar cache files
+    :param versions: Checksum versions to remove, of all algorithms
+    """
+    if not _cacheable(image):
+        return
+
+    keys = [
+        _key(version, algorithm)
+        for version in versions
+        for algorithm in checksum.Algorithm
+    ]
+
+    for key in keys:
+        if _xattr_supported():  # pragma: platform-darwin, platform-win32
+            try:
+                # pylint: disable-next=no-member
+                os.removexattr(image.fileno(), _XATTR_PREFIX + key)
+            except OSError as exc:
+                if exc.errno not in _XATTR_NOT_SUPPORTED | {_ENODATA, errno.EACCES}:
+                    raise
+
+        if path is not None:
+            try:
+                _sidecar(path, key).unlink()
+            except FileNotFoundError:
+                pass
+
+
+def record_embedded(
+    image: gpt.GPTImage,
+    path: Optional[Path],
+    guid: uuid.UUID,
+    version: int,
+    algorithm: checksum.Algorithm,
+) -> bool:
+    """Record the checksum version and digest algorithm an image was embedded with.
+
+    Like :func:`store`, failure to write the record is not an error.
+
+    :param image: Open image whose checksum was embedded
+    :param path: Path of the image, used to create a sidecar file
+    :param guid: Embedded checksum GUID
+    :param version: Checksum version
+    :param algorithm: Digest algorithm of the checksum
+
+    :returns: Whether the record was written
+    """
+    record = (
+        _EMBEDDED_RECORD.pack(_FORMAT, version, guid.bytes) + algorithm.value.encode()
+    )
+    return _write(image, path, _EMBEDDED_KEY, lambda _: record)
+
+
+def lookup_embedded(
+    image: gpt.GPTImage, path: Optional[Path], guid: uuid.UUID
+) -> Optional[Tuple[int, checksum.Algorithm]]:
+    """Look up the checksum version and digest algorithm an image was embedded with.
+
+    The record is only used if it was written when embedding ``guid``, so it's
+    ignored once the GUID was changed by other means.
+
+    :param image: Open image to look up
+    :param path: Path of the image, used to find a sidecar file
+    :param guid: Current GUID of the image
+
+    :returns: Checksum version and digest algorithm, or ``None`` if not recorded
+    """
+    found = _read(image, path, _EMBEDDED_KEY)
+    if found is None:
+        return None
+
+    record, _ = found
+    if len(record) < _EMBEDDED_RECORD.size:
+        return None
+
+    fmt, version, recorded_guid = _EMBEDDED_RECORD.unpack_from(record)
+    if (fmt, recorded_guid) != (_FORMAT, guid.bytes):
+        return None
+    if version not in checksum.VERSIONS:
+        return None
+
+    try:
+        algorithm = checksum.Algorithm(record[_EMBEDDED_RECORD.size :].decode())
+    except (UnicodeDecodeError, ValueError):
+        return None
+
+    return (version, algorithm)
@@ -1,109 +1,2087 @@
 """GPT disk image checksum calculation."""
 
-import hashlib
+import bisect
+import collections
+import contextlib
+import dataclasses
+import enum
+import errno
+import importlib
+import mmap
 import os
+import stat
+import struct
+import threading
+import time
 import uuid
-from typing import Callable, Union
+from types import ModuleType
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from gptsum import gpt
 
+# Importing `hashlib` (which loads OpenSSL) and `concurrent.futures` takes a
+# while, and commands which don't hash an image, like reading its GUID, don't need
+# them, so they're imported by the functions using them
+if TYPE_CHECKING:  # pragma: no cover
+    import hashlib
+
 ZERO_GUID = uuid.UUID(bytes=b"\0" * 16)
 _BUFFSIZE = 128 * 1024
+# Shared, preallocated buffer of zeroes, used to hash holes in sparse files
+_ZEROES = bytes(_BUFFSIZE)
+_ZEROES_VIEW = memoryview(_ZEROES)
 
+VERSION_1 = 1
+"""Checksum version: sequential digest of the whole image, see :class:`Algorithm`."""
+VERSION_2 = 2
+"""Checksum version: Blake2b tree digest over fixed-size leaves, hashed in parallel."""
+VERSION_3 = 3
+"""Checksum version: sequential digest of the GPT structures and partitions.
 
-def _posix_fadvise_sequential(fd: int, offset: int, size: int) -> None:
-    """Call `posix_fadvise` with the `POSIX_FADV_SEQUENTIAL` flag on given range."""
+.. versionadded:: 0.6.0
+"""
+VERSIONS = (VERSION_1, VERSION_2, VERSION_3)
+DEFAULT_VERSION = VERSION_1
+
+
+class Algorithm(enum.Enum):
+    """Digest algorithm of `VERSION_1` and `VERSION_3` checksums.
+
+    Digests are truncated to 16 bytes, the size of a GUID. `VERSION_2` checksums
+    and partition checksums always use Blake2b. The algorithm is not recorded in the
+    GUID, so the algorithm an image was embedded with must be used to verify it.
+
+    .. versionadded:: 0.6.0
+    """
+
+    BLAKE2B = "blake2b"
+    """Blake2b, the default."""
+    BLAKE2S = "blake2s"
+    """Blake2s, which can be faster than Blake2b on CPUs without 64-bit ALUs."""
+    SHA256 = "sha256"
+    """SHA-256, which is faster than Blake2b on CPUs with SHA extensions."""
+    BLAKE3 = "blake3"
+    """BLAKE3, only available if the :mod:`blake3` package is installed."""
+
+
+DEFAULT_ALGORITHM = Algorithm.BLAKE2B
+
+# Size of the windows of a file mapped at once by `ReadStrategy.MMAP`, and size of
+# the chunks passed to callbacks (after which pages are dropped from the mapping)
+_MMAP_WINDOW = 64 * 1024 * 1024
+_MMAP_CHUNK = 4 * 1024 * 1024
+assert _MMAP_WINDOW % mmap.ALLOCATIONGRANULARITY == 0  # noqa: S101
+assert _MMAP_CHUNK % mmap.PAGESIZE == 0  # noqa: S101
+
+# Alignment of offsets, sizes and buffers used by `ReadStrategy.DIRECT`, which must
+# be a multiple of the logical block size of the underlying storage
+_DIRECT_ALIGNMENT = 4096
+assert _DIRECT_ALIGNMENT % mmap.PAGESIZE == 0  # noqa: S101
+
+# Minimum size of the buffers used to read block devices
+_DEVICE_BUFFSIZE = 1024 * 1024
+# Default window of `PageCachePolicy.DROP`, and the fraction of the physical memory
+# above which `PageCachePolicy.AUTO` drops pages
+_PAGE_CACHE_WINDOW = 64 * 1024 * 1024
+_AUTO_DROP_FRACTION = 4
+# Size of the blocks of zeroes skipped rather than written when copying an image
+# into a sparse file, the usual filesystem block size
+_SPARSE_BLOCK_SIZE = 4096
+
+_DIGEST_SIZE = 16
+# Part of the `VERSION_2` format, changing this changes all digests
+_TREE_LEAF_SIZE = 4 * 1024 * 1024
+# Personalization of the Blake2b hashers of partitions, which are salted with
+# the partition number, see `calculate_partitions`
+_PARTITION_PERSON = b"gptsum partition"
+# Personalization of the Blake2b hasher of `VERSION_3` checksums, and the record
+# hashed before every region of the image: its offset and size
+_ALLOCATED_PERSON = b"gptsum allocated"
+_REGION_STRUCT = struct.Struct("<QQ")
+
+CHUNK_SIZE = _TREE_LEAF_SIZE
+"""Size of the chunks hashed by :func:`calculate_chunks`.
+
+.. versionadded:: 0.6.0
+"""
+
+ProgressCallback = Callable[[int, int], None]
+"""Function called with the number of bytes hashed so far, and the total number.
+
+.. versionadded:: 0.6.0
+"""
+
+# Minimum interval between progress reports in seconds, and number of bytes hashed
+# between looking at the clock, so reporting is cheap however small the chunks are
+_PROGRESS_INTERVAL = 0.5
+_PROGRESS_GRANULE = 16 * 1024 * 1024
+
+
+def _posix_fadvise(fd: int, offset: int, size: int, advice: str) -> None:
+    """Call `posix_fadvise` with the flag named `advice` on given range, if any."""
     # Make mypy happy
     posix_fadvise = getattr(os, "posix_fadvise", None)
-    posix_fadv_sequential = getattr(os, "POSIX_FADV_SEQUENTIAL", None)
+    flag = getattr(os, advice, None)
 
     if (
-        posix_fadvise is not None and posix_fadv_sequential is not None
+        posix_fadvise is not None and flag is not None
     ):  # pragma: platform-darwin, platform-win32
         # pylint: disable-next=not-callable
-        posix_fadvise(fd, offset, size, posix_fadv_sequential)
+        posix_fadvise(fd, offset, size, flag)
+
+
+def _posix_fadvise_sequential(fd: int, offset: int, size: int) -> None:
+    """Call `posix_fadvise` with the `POSIX_FADV_SEQUENTIAL` flag on given range."""
+    _posix_fadvise(fd, offset, size, "POSIX_FADV_SEQUENTIAL")
+
+
+class Phase(enum.Enum):
+    """Phase of an operation on an image, timed in :attr:`IOStatistics.phases`.
+
+    .. versionadded:: 0.6.0
+    """
+
+    OPEN = "open"
+    """Opening the image, and retrieving its size."""
+    HEADERS = "headers"
+    """Reading and validating the GPT headers."""
+    HASH = "hash"
+    """Hashing the image."""
+    WRITE = "write"
+    """Writing the GPT headers and manifest, and syncing them to disk."""
+
+
+@dataclasses.dataclass
+class PhaseTime:
+    """Time spent in a :class:`Phase`.
+
+    .. versionadded:: 0.6.0
+    """
+
+    wall: float = 0.0
+    """Elapsed wall-clock time, in seconds."""
+    cpu: float = 0.0
+    """CPU time used by all threads of the process, in seconds.
+
+    If this exceeds :attr:`wall`, multiple cores were used. If it's much lower,
+    the phase was waiting for I/O.
+    """
+
+
+@dataclasses.dataclass
+class IOStatistics:
+    """Statistics about the data fed to a hasher.
+
+    .. versionadded:: 0.6.0
+    """
+
+    bytes_read: int = 0
+    """Number of bytes read from the image file."""
+    bytes_synthesized: int = 0
+    """Number of bytes of holes in the image file, synthesized without reading."""
+    read_calls: int = 0
+    """Number of read system calls issued to read the image file.
+
+    When using :attr:`ReadStrategy.MMAP`, this is the number of windows mapped.
+    """
+    phases: Dict[Phase, PhaseTime] = dataclasses.field(default_factory=dict)
+    """Time spent in the phases of the operation, see :meth:`measure`."""
+
+    def update(self, other: "IOStatistics") -> None:
+        """Add the counters of another :class:`IOStatistics` to this one.
+
+        :param other: Statistics to add
+        """
+        for field in dataclasses.fields(self):
+            if field.name == "phases":
+                for phase, phase_time in other.phases.items():
+                    self._add_time(phase, phase_time.wall, phase_time.cpu)
+            else:
+                setattr(
+                    self,
+                    field.name,
+                    getattr(self, field.name) + getattr(other, field.name),
+                )
+
+    def _add_time(self, phase: Phase, wall: float, cpu: float) -> None:
+        phase_time = self.phases.setdefault(phase, PhaseTime())
+        phase_time.wall += wall
+        phase_time.cpu += cpu
+
+    @contextlib.contextmanager
+    def measure(self, phase: Phase) -> Iterator[None]:
+        """Measure the time spent in a phase, adding it to :attr:`phases`.
+
+        :param phase: Phase to account the time to
+
+        :returns: Context manager measuring the time spent in its body
+        """
+        wall = time.perf_counter()
+        cpu = time.process_time()
+
+        try:
+            yield
+        finally:
+            self._add_time(phase, time.perf_counter() - wall, time.process_time() - cpu)
+
+    @property
+    def average_read_size(self) -> Optional[float]:
+        """Average number of bytes read per read call, if any."""
+        if self.read_calls == 0:
+            return None
+        return self.bytes_read / self.read_calls
+
+    @property
+    def hash_throughput(self) -> Optional[float]:
+        """Number of bytes hashed per second of :attr:`Phase.HASH`, if timed."""
+        hash_time = self.phases.get(Phase.HASH)
+        if hash_time is None or hash_time.wall <= 0:
+            return None
+        return (self.bytes_read + self.bytes_synthesized) / hash_time.wall
+
+
+class _Progress:
+    """Report the progress of hashing to a callback, at a bounded rate.
+
+    The callback is called when starting, at most every `_PROGRESS_INTERVAL`
+    seconds while hashing, and when finished.
+    """
+
+    def __init__(self, callback: ProgressCallback, total: int) -> None:
+        self._callback = callback
+        self._total = total
+        self._done = 0
+        self._check = _PROGRESS_GRANULE
+        self._last = time.monotonic()
+
+        callback(0, total)
+
+    def advance(self, cnt: int) -> None:
+        """Account for `cnt` more bytes hashed."""
+        self._done += cnt
+
+        if self._done >= self._check:
+            self._check = self._done + _PROGRESS_GRANULE
+            now = time.monotonic()
+
+            if now - self._last >= _PROGRESS_INTERVAL:
+                self._last = now
+                self._callback(self._done, self._total)
+
+    def wrap(
+        self, callback: Callable[[Union[bytes, memoryview]], None]
+    ) -> Callable[[Union[bytes, memoryview]], None]:
+        """Wrap a function called on chunks of data, to account for them."""
+
+        def update(data: Union[bytes, memoryview]) -> None:
+            callback(data)
+            self.advance(len(data))
+
+        return update
+
+    def finish(self) -> None:
+        """Report the final progress."""
+        self._callback(self._done, self._total)
+
 
+def _progress(callback: Optional[ProgressCallback], total: int) -> Optional[_Progress]:
+    """Start reporting progress, if a callback is given."""
+    return None if callback is None else _Progress(callback, total)
 
-def hash_file(
+
+class _Hasher(Protocol):
+    """Incremental hasher, like those of :mod:`hashlib`."""
+
+    def update(self, data: Union[bytes, memoryview], /) -> None:
+        """Hash a piece of data."""
+
+    def digest(self) -> bytes:
+        """Get the digest of all data hashed."""
+
+
+def _blake3() -> Optional[ModuleType]:
+    """Import the optional :mod:`blake3` module, if installed."""
+    try:
+        return importlib.import_module("blake3")
+    except ImportError:  # pragma: has-blake3
+        return None
+
+
+def available_algorithms() -> List[Algorithm]:
+    """Get the digest algorithms which can be used on this system.
+
+    :returns: Available algorithms, in definition order
+
+    .. versionadded:: 0.6.0
+    """
+    return [
+        algorithm
+        for algorithm in Algorithm
+        if algorithm != Algorithm.BLAKE3 or _blake3() is not None
+    ]
+
+
+def _new_hasher(algorithm: Algorithm, person: bytes = b"") -> _Hasher:
+    """Construct a hasher, whose digest must be truncated to `_DIGEST_SIZE` bytes.
+
+    Blake2b hashers are personalized using their parameter block, for compatibility
+    with checksums calculated before other algorithms were supported. Others hash
+    the personalization first.
+
+    :raises ValueError: Algorithm not available
+    """
+    import hashlib  # pylint: disable=import-outside-toplevel
+
+    if algorithm == Algorithm.BLAKE2B:
+        return hashlib.blake2b(digest_size=_DIGEST_SIZE, person=person)
+
+    hasher: _Hasher
+    if algorithm == Algorithm.BLAKE2S:
+        hasher = hashlib.blake2s(digest_size=_DIGEST_SIZE)
+    elif algorithm == Algorithm.SHA256:
+        hasher = hashlib.sha256()
+    else:
+        blake3 = _blake3()
+        if blake3 is None:
+            raise ValueError(
+                "Algorithm blake3 requires the blake3 package, which is not "
+                "installed"
+            )
+        hasher = blake3.blake3()  # pragma: no-blake3
+
+    hasher.update(person)
+    return hasher
+
+
+def measure_throughput(algorithm: Algorithm, size: int = 256 * 1024 * 1024) -> float:
+    """Measure how fast an algorithm hashes data on this system.
+
+    Data is hashed from memory, in pieces of the default buffer size, so the result
+    is an upper bound of the throughput when hashing an image.
+
+    :param algorithm: Algorithm to measure
+    :param size: Amount of data to hash, in bytes
+
+    :returns: Throughput in bytes per second
+
+    :raises ValueError: Algorithm not available
+
+    .. versionadded:: 0.6.0
+    """
+    view = memoryview(os.urandom(ReadOptions.buffer_size))
+    hasher = _new_hasher(algorithm)
+
+    start = time.perf_counter()
+    for offset in range(0, size, len(view)):
+        hasher.update(view[: size - offset])
+    hasher.digest()
+    elapsed = time.perf_counter() - start
+
+    return size / max(elapsed, 1e-9)
+
+
+class ReadStrategy(enum.Enum):
+    """Strategy used to read data from image files.
+
+    .. versionadded:: 0.6.0
+    """
+
+    AUTO = "auto"
+    """Use :attr:`PREADV` if supported by the platform, :attr:`READ` otherwise."""
+    PREADV = "preadv"
+    """Read into a reused buffer using :func:`os.preadv`."""
+    READ = "read"
+    """Read using :func:`os.read`."""
+    MMAP = "mmap"
+    """Map windows of the file in memory, avoiding copies into a buffer."""
+    DIRECT = "direct"
+    """Read aligned blocks using :func:`os.preadv` with ``O_DIRECT``.
+
+    This bypasses the page cache, if supported by the platform and filesystem,
+    and falls back to buffered reads otherwise.
+    """
+
+
+class PageCachePolicy(enum.Enum):
+    """Policy for the page cache pages of data read from image files.
+
+    .. versionadded:: 0.6.0
+    """
+
+    AUTO = "auto"
+    """Use :attr:`DROP` when reading more than a quarter of the physical memory of
+    the system, :attr:`KEEP` otherwise."""
+    KEEP = "keep"
+    """Leave pages in the page cache, for the kernel to evict."""
+    DROP = "drop"
+    """Advise the kernel to read ahead of the data being hashed, and to drop pages
+    behind it, so reading a large image doesn't evict everything else from the page
+    cache.
+
+    Not supported on all platforms, where this is the same as :attr:`KEEP`.
+    """
+
+
+@dataclasses.dataclass(frozen=True)
+class ReadOptions:
+    """Options controlling how data is read from image files.
+
+    .. versionadded:: 0.6.0
+    """
+
+    strategy: ReadStrategy = ReadStrategy.AUTO
+    """Strategy used to read data."""
+    buffer_size: int = _BUFFSIZE
+    """Size of the buffers data is read into, in bytes.
+
+    Not used by :attr:`ReadStrategy.MMAP`, and rounded up to a multiple of the
+    required alignment by :attr:`ReadStrategy.DIRECT`.
+    """
+    queue_depth: int = 1
+    """Number of reads kept in flight by :attr:`ReadStrategy.PREADV`.
+
+    With a queue depth larger than 1, a pool of I/O threads reads ahead of the
+    hasher, so the device is kept busy while data is hashed. Not used by other
+    strategies, nor for `VERSION_2` checksums, whose leaves are read concurrently
+    already.
+    """
+    page_cache: PageCachePolicy = PageCachePolicy.AUTO
+    """Policy for the page cache pages of data read."""
+    page_cache_window: int = _PAGE_CACHE_WINDOW
+    """Size of the windows used by :attr:`PageCachePolicy.DROP`, in bytes.
+
+    Up to a window of data ahead of the data being hashed is read ahead, and pages
+    more than a window behind it are dropped.
+    """
+
+    def __post_init__(self) -> None:
+        """Validate the options.
+
+        :raises ValueError: Invalid buffer size, queue depth or page cache window
+        """
+        if self.buffer_size <= 0:
+            raise ValueError(f"Invalid buffer size {self.buffer_size}")
+        if self.queue_depth <= 0:
+            raise ValueError(f"Invalid queue depth {self.queue_depth}")
+        if self.page_cache_window <= 0:
+            raise ValueError(f"Invalid page cache window {self.page_cache_window}")
+
+
+def _physical_memory() -> Optional[int]:
+    """Get the size of the physical memory of the system, if known."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _resolve_page_cache(read_options: ReadOptions, size: int) -> ReadOptions:
+    """Resolve :attr:`PageCachePolicy.AUTO` for reading `size` bytes."""
+    if read_options.page_cache != PageCachePolicy.AUTO:
+        return read_options
+
+    memory = _physical_memory()
+    drop = memory is not None and size > memory // _AUTO_DROP_FRACTION
+    policy = PageCachePolicy.DROP if drop else PageCachePolicy.KEEP
+    return dataclasses.replace(read_options, page_cache=policy)
+
+
+# An extent of a file: its offset, its size, and whether it contains data (or is a
+# hole)
+_Extent = Tuple[int, int, bool]
+
+
+def _data_extents(
+    fd: int, offset: int, size: int, fstat: Optional[os.stat_result] = None
+) -> List[_Extent]:
+    """Split a range of a file into data extents and holes.
+
+    Holes are found using `lseek` with `SEEK_DATA` and `SEEK_HOLE`. If this is not
+    supported, or the file is not a regular file, the whole range is returned as a
+    single data extent.
+
+    :param fd: File descriptor of the file
+    :param offset: Start of the range
+    :param size: Size of the range
+    :param fstat: Status of the file, retrieved if not given
+
+    :returns: Contiguous extents covering the range
+
+    :raises OSError: `lseek` failed
+    """
+    seek_data = getattr(os, "SEEK_DATA", None)
+    seek_hole = getattr(os, "SEEK_HOLE", None)
+    if fstat is None:
+        fstat = os.fstat(fd)
+
+    if (
+        seek_data is not None and seek_hole is not None and stat.S_ISREG(fstat.st_mode)
+    ):  # pragma: platform-win32
+        # Don't report the end of the file as a hole
+        end = min(offset + size, fstat.st_size)
+        extents: List[_Extent] = []
+
+        curr = os.lseek(fd, 0, os.SEEK_CUR)
+
+        try:
+            while offset < end:
+                try:
+                    data = min(os.lseek(fd, offset, seek_data), end)
+                except OSError as exc:
+                    if exc.errno == errno.ENXIO:
+                        # No more data until the end of the file
+                        data = end
+                    elif exc.errno == errno.EINVAL:
+                        # Not supported by the filesystem, consider everything data
+                        extents.append((offset, end - offset, True))
+                        break
+                    else:
+                        raise
+
+                hole = end if data == end else min(os.lseek(fd, data, seek_hole), end)
+
+                if data < offset or (data < end and hole <= data):
+                    # Nonsensical results, which would never move forward: consider
+                    # everything data
+                    extents.append((offset, end - offset, True))
+                    break
+
+                if data > offset:
+                    extents.append((offset, data - offset, False))
+
+                if data == end:
+                    break
+
+                extents.append((data, hole - data, True))
+                offset = hole
+        finally:
+            os.lseek(fd, curr, os.SEEK_SET)
+
+        return extents
+
+    return [(offset, size, True)]
+
+
+def _clip_extents(
+    extents: Sequence[_Extent], starts: Sequence[int], offset: int, size: int
+) -> Iterator[_Extent]:
+    """Yield the parts of sorted, contiguous extents covering some range."""
+    end = offset + size
+    index = max(0, bisect.bisect_right(starts, offset) - 1)
+
+    while index < len(extents) and offset < end:
+        extent_offset, extent_size, is_data = extents[index]
+        extent_end = min(extent_offset + extent_size, end)
+
+        yield (offset, extent_end - offset, is_data)
+
+        offset = extent_end
+        index += 1
+
+
+def _feed_zeroes(
+    callback: Callable[[Union[bytes, memoryview]], None], size: int
+) -> int:
+    """Call a function on `size` zero bytes, taken from a shared buffer."""
+    done = 0
+
+    while size > 0:
+        cnt = min(size, len(_ZEROES))
+
+        if cnt < len(_ZEROES):
+            callback(_ZEROES_VIEW[:cnt])
+        else:
+            callback(_ZEROES)
+
+        done += cnt
+        size -= cnt
+
+    return done
+
+
+_thread_buffers = threading.local()
+
+
+def _buffer(size: int) -> bytearray:
+    """Get a buffer of `size` bytes, reused by later calls in the same thread.
+
+    Files are read extent by extent, and a daemon serves many requests from the
+    same worker threads, so allocating (and zeroing) a new buffer every time adds
+    up. Callers must not hold on to the buffer after returning.
+    """
+    buff: Optional[bytearray] = getattr(_thread_buffers, "buffer", None)
+
+    if buff is None or len(buff) != size:
+        buff = bytearray(size)
+        _thread_buffers.buffer = buff
+
+    return buff
+
+
+def _read_file_preadv(
     callback: Callable[[Union[bytes, memoryview]], None],
     fd: int,
     size: int,
     offset: int,
+    buffsize: int,
+    stats: Optional[IOStatistics] = None,
 ) -> int:
-    """Repeatedly call a function on a slice of a file."""
-    buffsize = _BUFFSIZE
+    """Repeatedly call a function on data read using `preadv` into a buffer."""
     done = 0
 
-    _posix_fadvise_sequential(fd, offset, size)
+    buff = _buffer(buffsize)
+    bufflist = [buff]
+    view = memoryview(buff)
 
-    if hasattr(os, "preadv"):  # pragma: platform-win32
-        buff = bytearray(buffsize)
-        bufflist = [buff]
-        view = memoryview(buff)
+    while size > 0:
+        cnt = os.preadv(fd, bufflist, offset)
+        if stats is not None:
+            stats.read_calls += 1
+        if cnt == 0:
+            break
 
-        while size > 0:
-            cnt = os.preadv(fd, bufflist, offset)
+        cnt = min(cnt, size)
 
-            cnt = min(cnt, size)
+        if cnt < buffsize:
+            callback(view[:cnt])
+        else:
+            callback(view)
 
-            if cnt < buffsize:
-                callback(view[:cnt])
-            else:
+        done += cnt
+        size -= cnt
+        offset += cnt
+
+    return done
+
+
+def _preadv_full(fd: int, view: memoryview, offset: int) -> Tuple[int, int]:
+    """Fill a buffer using `preadv`, retrying on short reads until end-of-file.
+
+    :returns: Number of bytes read, and number of `preadv` calls
+    """
+    done = 0
+    calls = 0
+
+    while done < len(view):
+        with view[done:] as rest:
+            cnt = os.preadv(fd, [rest], offset + done)
+        calls += 1
+        if cnt == 0:
+            break
+
+        done += cnt
+
+    return (done, calls)
+
+
+def _read_file_pipelined(  # pylint: disable=too-many-arguments
+    callback: Callable[[Union[bytes, memoryview]], None],
+    fd: int,
+    size: int,
+    offset: int,
+    buffsize: int,
+    queue_depth: int,
+    stats: Optional[IOStatistics] = None,
+) -> int:
+    """Repeatedly call a function on data read ahead by a pool of I/O threads.
+
+    Up to `queue_depth` buffers are being filled at increasing offsets, while the
+    callback consumes them in order. Once consumed, a buffer is reused for the next
+    read.
+
+    :param callback: Function to call on every chunk of data
+    :param fd: File descriptor of the file to read
+    :param size: Number of bytes to process
+    :param offset: Offset in the file to start at
+    :param buffsize: Size of every buffer
+    :param queue_depth: Number of buffers, hence reads in flight
+    :param stats: Statistics to update with the number of read calls
+
+    :returns: Number of bytes passed to ``callback``
+    """
+    import concurrent.futures  # pylint: disable=import-outside-toplevel
+
+    done = 0
+    end = offset + size
+    # Buffers being filled, the size of the read into them, and its result
+    pending: Deque[
+        Tuple[memoryview, int, "concurrent.futures.Future[Tuple[int, int]]"]
+    ] = collections.deque()
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=queue_depth, thread_name_prefix="gptsum-read"
+    ) as executor:
+
+        def submit(view: memoryview) -> None:
+            nonlocal offset
+
+            cnt = min(len(view), end - offset)
+            future = executor.submit(_preadv_full, fd, view[:cnt], offset)
+            pending.append((view, cnt, future))
+            offset += cnt
+
+        for _ in range(queue_depth):
+            if offset >= end:
+                break
+            submit(memoryview(bytearray(buffsize)))
+
+        while pending:
+            view, wanted, future = pending.popleft()
+            cnt, calls = future.result()
+            if stats is not None:
+                stats.read_calls += calls
+
+            if cnt == len(view):
                 callback(view)
+            elif cnt > 0:
+                callback(view[:cnt])
+            done += cnt
+
+            if cnt < wanted:
+                # End of file: reads still in flight can't return any data
+                for _, _, other in pending:
+                    other.cancel()
+                break
+
+            if offset < end:
+                submit(view)
+
+    return done
+
+
+def _read_file_read(
+    callback: Callable[[Union[bytes, memoryview]], None],
+    fd: int,
+    size: int,
+    offset: int,
+    buffsize: int,
+    stats: Optional[IOStatistics] = None,
+) -> int:
+    """Repeatedly call a function on data read using `read`."""
+    done = 0
+
+    curr = os.lseek(fd, 0, os.SEEK_CUR)
+    os.lseek(fd, offset, os.SEEK_SET)
+
+    try:
+        while size > 0:
+            data = os.read(fd, min(size, buffsize))
+            if stats is not None:
+                stats.read_calls += 1
+            if not data:
+                break
+
+            callback(data)
 
+            cnt = len(data)
             done += cnt
             size -= cnt
             offset += cnt
-    else:
-        curr = os.lseek(fd, 0, os.SEEK_CUR)
-        os.lseek(fd, offset, os.SEEK_SET)
+    finally:
+        os.lseek(fd, curr, os.SEEK_SET)
 
-        try:
-            while size > 0:
-                data = os.read(fd, min(size, buffsize))
+    return done
 
-                callback(data)
 
-                cnt = len(data)
-                done += cnt
-                size -= cnt
-                offset += cnt
-        finally:
-            os.lseek(fd, curr, os.SEEK_SET)
+def _madvise(mapped: mmap.mmap, name: str, start: int = 0, length: int = 0) -> None:
+    """Call `madvise` on (part of) a mapping, if the platform supports the advice."""
+    option = getattr(mmap, name, None)
+
+    if option is not None:  # pragma: platform-darwin, platform-win32
+        mapped.madvise(option, start, length)
+
+
+def _read_file_mmap(
+    callback: Callable[[Union[bytes, memoryview]], None],
+    fd: int,
+    size: int,
+    offset: int,
+    stats: Optional[IOStatistics] = None,
+) -> int:
+    """Repeatedly call a function on slices of the file mapped in memory.
+
+    The file is mapped in windows of `_MMAP_WINDOW` bytes, so files larger than the
+    address space can be handled. Pages already passed to the callback are dropped
+    from the mapping.
+
+    :param callback: Function to call on every chunk of data
+    :param fd: File descriptor of the file to read
+    :param size: Number of bytes to process
+    :param offset: Offset in the file to start at
+    :param stats: Statistics to update with the number of windows mapped
+
+    :returns: Number of bytes passed to ``callback``
+    """
+    done = 0
+
+    fstat = os.fstat(fd)
+    if stat.S_ISREG(fstat.st_mode):
+        # Mapping beyond the end of a file is an error, rather than a short read
+        size = max(0, min(size, fstat.st_size - offset))
+
+    while size > 0:
+        start = offset - offset % mmap.ALLOCATIONGRANULARITY
+        pos = offset - start
+        length = min(_MMAP_WINDOW, pos + size)
+
+        with mmap.mmap(fd, length, access=mmap.ACCESS_READ, offset=start) as mapped:
+            if stats is not None:
+                stats.read_calls += 1
+            _madvise(mapped, "MADV_SEQUENTIAL")
+            dropped = pos - pos % mmap.PAGESIZE
+
+            with memoryview(mapped) as view:
+                while pos < length:
+                    cnt = min(_MMAP_CHUNK, length - pos)
+
+                    with view[pos : pos + cnt] as chunk:
+                        callback(chunk)
+
+                    done += cnt
+                    size -= cnt
+                    pos += cnt
+
+                    # Drop the pages behind the cursor from the mapping
+                    behind = pos - pos % mmap.PAGESIZE
+                    if behind > dropped:
+                        _madvise(mapped, "MADV_DONTNEED", dropped, behind - dropped)
+                        dropped = behind
+
+        offset = start + length
 
     return done
 
 
-def calculate(image: gpt.GPTImage) -> bytes:
-    """Calculate the 16-byte checksum of the given image."""
-    fd = image.fileno()
+@contextlib.contextmanager
+def _direct_io(fd: int, read_options: ReadOptions) -> Iterator[None]:
+    """Set `O_DIRECT` on a file descriptor while using `ReadStrategy.DIRECT`.
+
+    This is a no-op when using another strategy, or when `O_DIRECT` is not supported
+    by the platform or filesystem. The original flags are restored afterwards.
+    """
+    o_direct = getattr(os, "O_DIRECT", None)
+
+    if read_options.strategy != ReadStrategy.DIRECT or o_direct is None:
+        yield
+        return
+
+    import fcntl  # pylint: disable=import-outside-toplevel
+
+    flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+
+    try:
+        fcntl.fcntl(fd, fcntl.F_SETFL, flags | o_direct)
+    except OSError as exc:
+        if exc.errno != errno.EINVAL:
+            raise
+        # Not supported by the filesystem, fall back to (aligned) buffered reads
+        yield
+        return
+
+    try:
+        yield
+    finally:
+        fcntl.fcntl(fd, fcntl.F_SETFL, flags)
+
+
+def _read_file_direct(
+    callback: Callable[[Union[bytes, memoryview]], None],
+    fd: int,
+    size: int,
+    offset: int,
+    buffsize: int,
+    stats: Optional[IOStatistics] = None,
+) -> int:
+    """Repeatedly call a function on data read in aligned blocks.
+
+    Reads start at offsets aligned to `_DIRECT_ALIGNMENT`, and are done into a
+    page-aligned buffer whose size is a multiple thereof, as required when reading
+    from a file descriptor opened with `O_DIRECT`. Data before `offset` or beyond
+    `size` in the first and last block is not passed to the callback.
+
+    :param callback: Function to call on every chunk of data
+    :param fd: File descriptor of the file to read
+    :param size: Number of bytes to process
+    :param offset: Offset in the file to start at
+    :param buffsize: Minimal size of the buffer
+    :param stats: Statistics to update with the number of read calls
+
+    :returns: Number of bytes passed to ``callback``
+    """
+    align = _DIRECT_ALIGNMENT
+    buffsize = (buffsize + align - 1) // align * align
+    done = 0
+
+    # Anonymous mappings are page-aligned
+    with mmap.mmap(-1, buffsize) as buff, memoryview(buff) as view:
+        while size > 0:
+            start = offset - offset % align
+            skip = offset - start
+            wanted = min(buffsize, (skip + size + align - 1) // align * align)
+
+            with view[:wanted] as target:
+                cnt = os.preadv(fd, [target], start)
+            if stats is not None:
+                stats.read_calls += 1
+
+            cnt = min(cnt - skip, size)
+            if cnt <= 0:
+                break
+
+            with view[skip : skip + cnt] as chunk:
+                callback(chunk)
+
+            done += cnt
+            size -= cnt
+            offset += cnt
+
+    return done
+
+
+def _read_file(
+    callback: Callable[[Union[bytes, memoryview]], None],
+    fd: int,
+    size: int,
+    offset: int,
+    read_options: ReadOptions,
+    stats: Optional[IOStatistics] = None,
+) -> int:
+    """Repeatedly call a function on data read from a slice of a file."""
+    strategy = read_options.strategy
+
+    if strategy == ReadStrategy.MMAP:
+        return _read_file_mmap(callback, fd, size, offset, stats)
+
+    if strategy == ReadStrategy.DIRECT:
+        if not hasattr(os, "preadv"):
+            raise ValueError("Read strategy 'direct' is not supported on this platform")
+
+        return _read_file_direct(
+            callback, fd, size, offset, read_options.buffer_size, stats
+        )
+
+    if strategy == ReadStrategy.AUTO:
+        if hasattr(os, "preadv"):  # pragma: platform-win32
+            strategy = ReadStrategy.PREADV
+        else:
+            strategy = ReadStrategy.READ
+
+    if strategy == ReadStrategy.PREADV:
+        if not hasattr(os, "preadv"):
+            raise ValueError("Read strategy 'preadv' is not supported on this platform")
+
+        if read_options.queue_depth > 1:
+            return _read_file_pipelined(
+                callback,
+                fd,
+                size,
+                offset,
+                read_options.buffer_size,
+                read_options.queue_depth,
+                stats,
+            )
+
+        return _read_file_preadv(
+            callback, fd, size, offset, read_options.buffer_size, stats
+        )
+
+    return _read_file_read(callback, fd, size, offset, read_options.buffer_size, stats)
+
+
+class _DropBehind:
+    """Sliding window over a range of a file read sequentially.
+
+    Every time the data passed on crosses a window boundary, the next window is
+    advised to be read ahead using `POSIX_FADV_WILLNEED`, and pages more than a
+    window behind are dropped from the page cache using `POSIX_FADV_DONTNEED`.
+    Pages are dropped lagging a window, so the ones still mapped or being hashed
+    aren't. Dirty pages are never dropped by the kernel, but data is only read.
+    """
+
+    def __init__(self, fd: int, offset: int, size: int, window: int) -> None:
+        self._fd = fd
+        self._window = window
+        self._end = offset + size
+        self._cursor = offset
+        self._dropped = offset
+        self._ahead = offset
+        self._advise_ahead()
+
+    def _advise_ahead(self) -> None:
+        ahead = min(self._end, self._cursor + self._window)
+        if ahead > self._ahead:
+            _posix_fadvise(
+                self._fd, self._ahead, ahead - self._ahead, "POSIX_FADV_WILLNEED"
+            )
+            self._ahead = ahead
+
+    def _drop(self, end: int) -> None:
+        if end > self._dropped:
+            _posix_fadvise(
+                self._fd, self._dropped, end - self._dropped, "POSIX_FADV_DONTNEED"
+            )
+            self._dropped = end
+
+    def wrap(
+        self, callback: Callable[[Union[bytes, memoryview]], None]
+    ) -> Callable[[Union[bytes, memoryview]], None]:
+        """Wrap a function called on every chunk of data, moving the window."""
+
+        def update(data: Union[bytes, memoryview]) -> None:
+            callback(data)
+            self._cursor += len(data)
+            if self._cursor >= self._ahead:
+                self._advise_ahead()
+                self._drop(self._cursor - self._window)
+
+        return update
+
+    def finish(self) -> None:
+        """Drop all pages read, once done."""
+        self._drop(self._cursor)
+
+
+def _hash_extents(
+    callback: Callable[[Union[bytes, memoryview]], None],
+    fd: int,
+    extents: Iterable[_Extent],
+    read_options: ReadOptions,
+    stats: Optional[IOStatistics],
+) -> int:
+    """Call a function on the contents of file extents, synthesizing holes."""
+    done = 0
+    drop_behind = read_options.page_cache == PageCachePolicy.DROP
+
+    for offset, size, is_data in extents:
+        if is_data:
+            window = None
+            data_callback = callback
+            if drop_behind:
+                window = _DropBehind(fd, offset, size, read_options.page_cache_window)
+                data_callback = window.wrap(callback)
+
+            cnt = _read_file(data_callback, fd, size, offset, read_options, stats)
+            if window is not None:
+                window.finish()
+            if stats is not None:
+                stats.bytes_read += cnt
+        else:
+            cnt = _feed_zeroes(callback, size)
+            if stats is not None:
+                stats.bytes_synthesized += cnt
+
+        done += cnt
+
+    return done
+
+
+def hash_file(  # pylint: disable=too-many-arguments
+    callback: Callable[[Union[bytes, memoryview]], None],
+    fd: int,
+    size: int,
+    offset: int,
+    *,
+    read_options: Optional[ReadOptions] = None,
+    stats: Optional[IOStatistics] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> int:
+    """Repeatedly call a function on a slice of a file.
+
+    Holes in sparse files are not read, but passed to the function as zeroes.
+
+    :param callback: Function to call on every chunk of data
+    :param fd: File descriptor of the file to read
+    :param size: Number of bytes to process
+    :param offset: Offset in the file to start at
+    :param read_options: Options controlling how data is read from the file
+    :param stats: Statistics to update with the amount of data read and synthesized
+    :param progress: Function to report progress to, at a bounded rate
+
+    :returns: Number of bytes passed to ``callback``
+
+    .. versionchanged:: 0.6.0
+       Added the ``progress`` argument.
+    """
+    if read_options is None:
+        read_options = ReadOptions()
+    read_options = _resolve_page_cache(read_options, size)
+
+    _posix_fadvise_sequential(fd, offset, size)
+
+    extents = _data_extents(fd, offset, size)
+
+    reporter = _progress(progress, size)
+    if reporter is not None:
+        callback = reporter.wrap(callback)
+
+    with _direct_io(fd, read_options):
+        done = _hash_extents(callback, fd, extents, read_options, stats)
+
+    if reporter is not None:
+        reporter.finish()
+
+    return done
+
+
+@dataclasses.dataclass(frozen=True)
+class _ImageStream:
+    """The byte stream of an image over which its checksum is calculated.
+
+    This is the image contents, with the GUID and CRC32 fields of both GPT headers
+    zeroed out.
+    """
+
+    fd: int
+    size: int
+    head: bytes
+    tail: bytes
+    read_options: ReadOptions
+    # Data extents and holes of the image file between `head` and `tail`, and
+    # their offsets
+    extents: Sequence[_Extent]
+    starts: Sequence[int]
+    # Reads of the body start at multiples of this, except for the first one
+    alignment: int = 1
+
+    @classmethod
+    def from_image(
+        cls, image: gpt.GPTImage, read_options: ReadOptions
+    ) -> "_ImageStream":
+        """Construct the stream of a :class:`gpt.GPTImage`."""
+        fd = image.fileno()
+
+        primary = image.read_primary_gpt_header()
+        backup = image.read_backup_gpt_header()
+
+        # The MBR is read, and the primary header packed, in place
+        raw_head = bytearray(gpt.MBR_SIZE + gpt.GPT_HEADER_SIZE)
+        gpt.pread_into(fd, memoryview(raw_head)[: gpt.MBR_SIZE], 0)
+        primary.with_new_guid(ZERO_GUID).pack_into(
+            raw_head, gpt.MBR_SIZE, override_crc32=0
+        )
+        head = bytes(raw_head)
+        tail = backup.with_new_guid(ZERO_GUID).pack(override_crc32=0)
+
+        size = image.size
+        body_size = size - len(head) - len(tail)
+
+        _posix_fadvise_sequential(fd, len(head), body_size)
+        extents = _data_extents(fd, len(head), body_size, image.fstat())
+        read_options = _resolve_page_cache(read_options, body_size)
+
+        # Read block devices in larger buffers of whole physical blocks
+        alignment = 1
+        geometry = image.geometry
+        if geometry is not None:
+            alignment = geometry.physical_block_size
+            buffer_size = max(read_options.buffer_size, _DEVICE_BUFFSIZE)
+            buffer_size += -buffer_size % alignment
+            read_options = dataclasses.replace(read_options, buffer_size=buffer_size)
+
+        return cls(
+            fd,
+            size,
+            head,
+            tail,
+            read_options,
+            extents,
+            [extent_offset for (extent_offset, _, _) in extents],
+            alignment,
+        )
+
+    def feed(
+        self,
+        callback: Callable[[Union[bytes, memoryview]], None],
+        offset: int,
+        size: int,
+        stats: Optional[IOStatistics] = None,
+    ) -> int:
+        """Repeatedly call a function on a slice of the stream."""
+        end = offset + size
+        body_start = len(self.head)
+        body_end = self.size - len(self.tail)
+        done = 0
+
+        # The (modified) headers were read from the image, hence accounted as such
+        if offset < body_start:
+            piece = self.head[offset : min(end, body_start)]
+            callback(piece)
+            done += len(piece)
+            if stats is not None:
+                stats.bytes_read += len(piece)
+
+        start, stop = max(offset, body_start), min(end, body_end)
+        # The body starts right after the headers: read up to the first aligned
+        # offset separately, so all other reads are aligned
+        aligned = min(stop, start + -start % self.alignment)
+
+        for piece_start, piece_stop in [(start, aligned), (aligned, stop)]:
+            if piece_start < piece_stop:
+                extents = _clip_extents(
+                    self.extents, self.starts, piece_start, piece_stop - piece_start
+                )
+                done += _hash_extents(
+                    callback, self.fd, extents, self.read_options, stats
+                )
+
+        if end > body_end:
+            piece = self.tail[max(offset, body_end) - body_end : end - body_end]
+            callback(piece)
+            done += len(piece)
+            if stats is not None:
+                stats.bytes_read += len(piece)
+
+        return done
+
+
+def _tree_node(node_offset: int, node_depth: int, last_node: bool) -> "hashlib.blake2b":
+    """Construct a Blake2b hasher for a node in a `VERSION_2` hash tree."""
+    import hashlib  # pylint: disable=import-outside-toplevel
+
+    return hashlib.blake2b(
+        digest_size=_DIGEST_SIZE,
+        fanout=0,
+        depth=2,
+        leaf_size=_TREE_LEAF_SIZE,
+        node_offset=node_offset,
+        node_depth=node_depth,
+        inner_size=_DIGEST_SIZE,
+        last_node=last_node,
+    )
+
+
+def _leaf_count(size: int) -> int:
+    """Get the number of `VERSION_2` tree leaves of a stream of some size."""
+    return max(1, (size + _TREE_LEAF_SIZE - 1) // _TREE_LEAF_SIZE)
+
+
+class _ChunkHasher:
+    """Calculate the leaf digests of a stream passed in sequentially.
+
+    The digests are equal to those of the `VERSION_2` tree leaves, but calculated
+    alongside a `VERSION_1` checksum, in the same pass over the data.
+    """
+
+    def __init__(self, size: int, digests: List[bytes]) -> None:
+        self._leaves = _leaf_count(size)
+        self._digests = digests
+        self._hasher = _tree_node(0, 0, self._leaves == 1)
+        self._left = _TREE_LEAF_SIZE
+
+    def update(self, data: Union[bytes, memoryview]) -> None:
+        """Hash a piece of the stream."""
+        view = memoryview(data)
+
+        while len(view) >= self._left:
+            self._hasher.update(view[: self._left])
+            view = view[self._left :]
+            self._next_leaf()
+
+        self._hasher.update(view)
+        self._left -= len(view)
+
+    def _next_leaf(self) -> None:
+        self._digests.append(self._hasher.digest())
+        index = len(self._digests)
+        self._hasher = _tree_node(index, 0, index == self._leaves - 1)
+        self._left = _TREE_LEAF_SIZE
+
+    def finish(self) -> None:
+        """Add the digest of the final, partial leaf, if any."""
+        if len(self._digests) < self._leaves:
+            self._digests.append(self._hasher.digest())
+
+
+def _hash_leaves(
+    stream: _ImageStream,
+    threads: Optional[int],
+    stats: Optional[IOStatistics],
+    progress: Optional[_Progress],
+) -> Iterator[bytes]:
+    """Calculate the `VERSION_2` tree leaf digests of an image stream, in order.
+
+    Leaves of `_TREE_LEAF_SIZE` bytes are hashed in a pool of worker threads. Both
+    Blake2b and the underlying reads release the GIL, so this scales with the
+    number of cores.
+
+    :param stream: Image stream to hash
+    :param threads: Number of worker threads, or ``None`` for the default
+    :param stats: Statistics to update
+    :param progress: Progress to advance as leaves are hashed
+
+    :returns: Iterator of 16-byte leaf digests
+    """
+    leaves = _leaf_count(stream.size)
+
+    def hash_leaf(index: int) -> Tuple[bytes, IOStatistics]:
+        offset = index * _TREE_LEAF_SIZE
+        size = min(_TREE_LEAF_SIZE, stream.size - offset)
+
+        # Statistics are collected per leaf, then merged by the calling thread
+        leaf_stats = IOStatistics()
+        hasher = _tree_node(index, 0, index == leaves - 1)
+        done = stream.feed(hasher.update, offset, size, leaf_stats)
+        assert done == size  # noqa: S101
+
+        return (hasher.digest(), leaf_stats)
+
+    import concurrent.futures  # pylint: disable=import-outside-toplevel
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=threads, thread_name_prefix="gptsum-leaf"
+    ) as executor:
+        for index, (digest, leaf_stats) in enumerate(
+            executor.map(hash_leaf, range(leaves))
+        ):
+            if stats is not None:
+                stats.update(leaf_stats)
+            if progress is not None:
+                progress.advance(
+                    min(_TREE_LEAF_SIZE, stream.size - index * _TREE_LEAF_SIZE)
+                )
+            yield digest
+
+
+def _calculate_tree(
+    stream: _ImageStream,
+    threads: Optional[int],
+    stats: Optional[IOStatistics],
+    chunk_digests: Optional[List[bytes]],
+    progress: Optional[_Progress],
+) -> bytes:
+    """Calculate the `VERSION_2` tree digest of an image stream.
+
+    :param stream: Image stream to hash
+    :param threads: Number of worker threads, or ``None`` for the default
+    :param stats: Statistics to update
+    :param chunk_digests: List to append the leaf digests to
+    :param progress: Progress to advance as leaves are hashed
+
+    :returns: 16-byte root digest of the hash tree
+    """
+    root = _tree_node(0, 1, True)
+
+    for digest in _hash_leaves(stream, threads, stats, progress):
+        root.update(digest)
+        if chunk_digests is not None:
+            chunk_digests.append(digest)
+
+    return root.digest()
+
+
+def _parallel_read_options(
+    read_options: Optional[ReadOptions], threads: Optional[int]
+) -> ReadOptions:
+    """Get the options to read an image from multiple threads.
+
+    :raises ValueError: :attr:`ReadStrategy.READ` used with multiple threads
+    """
+    if read_options is None:
+        read_options = ReadOptions()
+
+    # Leaves are read concurrently from a single file descriptor, so must use
+    # positional reads rather than the shared file offset
+    strategy = read_options.strategy
+    if strategy == ReadStrategy.AUTO and not hasattr(os, "preadv"):
+        strategy = ReadStrategy.MMAP
+    if strategy == ReadStrategy.READ and threads != 1:
+        raise ValueError(
+            "Read strategy 'read' can't be used to read an image using "
+            "multiple threads"
+        )
+
+    # Leaves are hashed concurrently, which already keeps reads in flight
+    return dataclasses.replace(read_options, strategy=strategy, queue_depth=1)
+
+
+def _check_version(version: int, algorithm: Algorithm) -> None:
+    """Check a checksum version can be calculated using an algorithm.
+
+    :raises ValueError: Unknown checksum version, or algorithm other than Blake2b
+        used for a `VERSION_2` checksum
+    """
+    if version not in VERSIONS:
+        raise ValueError(f"Unknown checksum version {version}")
+    # The tree mode of Blake2b is part of the `VERSION_2` format
+    if version == VERSION_2 and algorithm != Algorithm.BLAKE2B:
+        raise ValueError("Version 2 checksums can only use the blake2b algorithm")
+
+
+def calculate(  # pylint: disable=too-many-arguments
+    image: gpt.GPTImage,
+    version: int = DEFAULT_VERSION,
+    *,
+    algorithm: Algorithm = DEFAULT_ALGORITHM,
+    threads: Optional[int] = None,
+    read_options: Optional[ReadOptions] = None,
+    stats: Optional[IOStatistics] = None,
+    chunk_digests: Optional[List[bytes]] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> bytes:
+    """Calculate the 16-byte checksum of the given image.
+
+    Holes in sparse image files are not read from disk.
+
+    If ``chunk_digests`` is given, the digests of all chunks of the image, as
+    returned by :func:`calculate_chunks`, are appended to it. These are calculated
+    while reading the image for the checksum.
+
+    `VERSION_3` checksums only cover the allocated regions of the image: the
+    protective MBR, both GPT headers and partition entry arrays, and the partitions
+    listed in the primary array. The offset and size of every region are hashed
+    along its contents, so changes to the layout of the image change the checksum
+    as well. Space outside of the partitions is not read.
+
+    :param image: Image to calculate the checksum of
+    :param version: Checksum version to calculate, one of :data:`VERSIONS`
+    :param algorithm: Digest algorithm of `VERSION_1` and `VERSION_3` checksums
+    :param threads: Number of worker threads used for `VERSION_2` checksums,
+        defaults to a number based on the number of CPUs
+    :param read_options: Options controlling how data is read from the image
+    :param stats: Statistics to update with the amount of data read and synthesized
+    :param chunk_digests: List to append the digests of all chunks of the image to
+    :param progress: Function to report progress to, at a bounded rate
+
+    :returns: 16-byte checksum of the image
+
+    :raises ValueError: Unknown checksum version
+    :raises ValueError: Algorithm other than Blake2b used for a `VERSION_2`
+        checksum, or not available
+    :raises ValueError: :attr:`ReadStrategy.READ` used for `VERSION_2` checksums
+        with multiple threads
+    :raises ValueError: Chunk digests requested for a `VERSION_3` checksum
+    :raises InvalidImageError: A partition is not within the usable space of the
+        image, when calculating a `VERSION_3` checksum
+    :raises EntriesChecksumMismatchError: Partition entry array checksum mismatch,
+        when calculating a `VERSION_3` checksum
+
+    .. versionchanged:: 0.6.0
+       Added the ``algorithm``, ``chunk_digests`` and ``progress`` arguments, and
+       `VERSION_3`.
+    """
+    _check_version(version, algorithm)
+    if version == VERSION_3 and chunk_digests is not None:
+        raise ValueError("Chunk digests can't be calculated for version 3 checksums")
+
+    if version == VERSION_2:
+        read_options = _parallel_read_options(read_options, threads)
+    elif read_options is None:
+        read_options = ReadOptions()
+
+    stream = _ImageStream.from_image(image, read_options)
+
+    regions = None
+    total = stream.size
+    if version == VERSION_3:
+        regions = _allocated_regions(
+            image.read_primary_gpt_header(),
+            image.read_primary_partition_table(),
+            stream.size,
+        )
+        total = sum(region_size for (_, region_size) in regions)
+
+    reporter = _progress(progress, total)
+
+    # The headers were read (buffered) already, only the body is read directly
+    with _direct_io(stream.fd, read_options):
+        if version == VERSION_2:
+            digest = _calculate_tree(stream, threads, stats, chunk_digests, reporter)
+        elif regions is not None:
+            digest = _calculate_allocated(stream, regions, algorithm, stats, reporter)
+        else:
+            digest = _calculate_sequential(
+                stream, algorithm, stats, chunk_digests, reporter
+            )
+
+    if reporter is not None:
+        reporter.finish()
+
+    return digest
+
+
+def _calculate_sequential(
+    stream: _ImageStream,
+    algorithm: Algorithm,
+    stats: Optional[IOStatistics],
+    chunk_digests: Optional[List[bytes]],
+    progress: Optional[_Progress],
+) -> bytes:
+    """Calculate the `VERSION_1` digest of an image stream.
+
+    :param stream: Image stream to hash
+    :param algorithm: Digest algorithm
+    :param stats: Statistics to update
+    :param chunk_digests: List to append the leaf digests to
+    :param progress: Progress to advance as data is hashed
+
+    :returns: 16-byte digest
+    """
+    hasher = _new_hasher(algorithm)
+    update: Callable[[Union[bytes, memoryview]], None] = hasher.update
+    chunks = None
+
+    if chunk_digests is not None:
+        chunks = _ChunkHasher(stream.size, chunk_digests)
+        chunks_update = chunks.update
+
+        def update_both(data: Union[bytes, memoryview]) -> None:
+            hasher.update(data)
+            chunks_update(data)
+
+        update = update_both
+
+    if progress is not None:
+        update = progress.wrap(update)
+
+    done = stream.feed(update, 0, stream.size, stats)
+    assert done == stream.size  # noqa: S101
+
+    if chunks is not None:
+        chunks.finish()
+
+    return hasher.digest()[:_DIGEST_SIZE]
+
+
+def _allocated_regions(
+    primary: gpt.GPTHeader, table: gpt.GPTPartitionTable, size: int
+) -> List[Tuple[int, int]]:
+    """Get the regions of an image covered by a `VERSION_3` checksum, in order.
+
+    These are the space before the first usable LBA, which holds the MBR, the
+    primary header and entry array, the partitions, where overlapping or adjacent
+    ones are merged, and the space after the last usable LBA, which holds the
+    backup entry array and header.
+
+    :param primary: Primary GPT header of the image
+    :param table: Primary partition entry array of the image
+    :param size: Size of the image
+
+    :returns: Offset and size of every region
+
+    :raises InvalidImageError: Invalid usable space, or a partition is not within
+        it
+    """
+    first = primary.first_usable_lba * gpt.LBA_SIZE
+    last = (primary.last_usable_lba + 1) * gpt.LBA_SIZE
+    if (
+        not gpt.MBR_SIZE + gpt.GPT_HEADER_SIZE
+        <= first
+        <= last
+        <= (size - gpt.GPT_HEADER_SIZE)
+    ):
+        raise gpt.InvalidImageError("Invalid usable space in GPT header")
+
+    partitions: List[Tuple[int, int]] = []
+    for partition in sorted(
+        table.partitions(), key=lambda partition: partition.first_lba
+    ):
+        start = partition.first_lba * gpt.LBA_SIZE
+        end = (partition.last_lba + 1) * gpt.LBA_SIZE
+        if not first <= start < end <= last:
+            raise gpt.InvalidImageError(
+                f"Partition {partition.number} is not within the usable space of "
+                "the image"
+            )
+
+        if partitions and start <= partitions[-1][1]:
+            partitions[-1] = (partitions[-1][0], max(partitions[-1][1], end))
+        else:
+            partitions.append((start, end))
+
+    return (
+        [(0, first)]
+        + [(start, end - start) for (start, end) in partitions]
+        + [(last, size - last)]
+    )
+
+
+def _calculate_allocated(
+    stream: _ImageStream,
+    regions: Sequence[Tuple[int, int]],
+    algorithm: Algorithm,
+    stats: Optional[IOStatistics],
+    progress: Optional[_Progress],
+) -> bytes:
+    """Calculate the `VERSION_3` digest of an image stream.
+
+    :param stream: Image stream to hash
+    :param regions: Regions to hash, see `_allocated_regions`
+    :param algorithm: Digest algorithm
+    :param stats: Statistics to update
+    :param progress: Progress to advance as data is hashed
+
+    :returns: 16-byte digest
+    """
+    hasher = _new_hasher(algorithm, _ALLOCATED_PERSON)
+    update: Callable[[Union[bytes, memoryview]], None] = hasher.update
+    if progress is not None:
+        update = progress.wrap(update)
+
+    for offset, size in regions:
+        hasher.update(_REGION_STRUCT.pack(offset, size))
+        done = stream.feed(update, offset, size, stats)
+        assert done == size  # noqa: S101
+
+    return hasher.digest()[:_DIGEST_SIZE]
+
+
+class _AllocatedHasher:
+    """Calculate the `VERSION_3` digest of an image passed in sequentially.
+
+    The regions to hash after the first one are only known once the primary
+    partition entry array, which is captured while hashing the first region, was
+    passed in. Data outside of the regions is skipped.
+    """
+
+    def __init__(self, primary: gpt.GPTHeader, size: int, algorithm: Algorithm) -> None:
+        self._primary = primary
+        self._size = size
+        self._hasher = _new_hasher(algorithm, _ALLOCATED_PERSON)
+        self._offset = 0
+
+        first = primary.first_usable_lba * gpt.LBA_SIZE
+        self._regions: Deque[Tuple[int, int]] = collections.deque([(0, first)])
+
+        self._entries_offset = primary.entries_starting_lba * gpt.LBA_SIZE
+        self._entries: Optional[bytearray] = bytearray(
+            primary.num_entries * primary.entry_size
+        )
+        if not (
+            gpt.MBR_SIZE + gpt.GPT_HEADER_SIZE <= self._entries_offset
+            and self._entries_offset + len(self._entries) <= first
+        ):
+            raise gpt.InvalidImageError(
+                "GPT partition entries don't fit between the header and the "
+                "usable space"
+            )
+
+    def update(self, data: Union[bytes, memoryview]) -> None:
+        """Hash the next piece of the image."""
+        view = memoryview(data)
+
+        while len(view) > 0:
+            start, size = self._regions[0]
+            end = start + size
+
+            if self._offset < start:
+                cnt = min(len(view), start - self._offset)
+            else:
+                if self._offset == start:
+                    self._hasher.update(_REGION_STRUCT.pack(start, size))
+
+                cnt = min(len(view), end - self._offset)
+                if self._entries is not None:
+                    self._capture(view[:cnt])
+                self._hasher.update(view[:cnt])
+
+            view = view[cnt:]
+            self._offset += cnt
+
+            if self._offset == end:
+                self._regions.popleft()
+                if self._entries is not None:
+                    self._add_partitions(self._entries)
+                    self._entries = None
+
+    def _capture(self, data: memoryview) -> None:
+        """Copy the part of a piece of the first region in the entry array."""
+        assert self._entries is not None  # noqa: S101
+        start = max(self._offset, self._entries_offset)
+        end = min(self._offset + len(data), self._entries_offset + len(self._entries))
+
+        if start < end:
+            self._entries[
+                start - self._entries_offset : end - self._entries_offset
+            ] = data[start - self._offset : end - self._offset]
+
+    def _add_partitions(self, entries: bytearray) -> None:
+        """Add the regions following the first one, once all entries are known."""
+        table = gpt.GPTPartitionTable.unpack(entries, self._primary)
+        regions = _allocated_regions(self._primary, table, self._size)
+        self._regions.extend(regions[1:])
+
+    def digest(self) -> bytes:
+        """Get the digest of the image."""
+        return self._hasher.digest()[:_DIGEST_SIZE]
+
+
+def calculate_chunks(
+    image: gpt.GPTImage,
+    *,
+    threads: Optional[int] = None,
+    read_options: Optional[ReadOptions] = None,
+    stats: Optional[IOStatistics] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> List[bytes]:
+    """Calculate the digests of all chunks of the given image, in parallel.
+
+    Chunks are :data:`CHUNK_SIZE` bytes, except for the last one, and hashed like
+    the leaves of a `VERSION_2` tree, so independent of the GUID of the image.
+    Comparing these against previously calculated digests allows to locate damage
+    in an image without reading all of it sequentially.
+
+    :param image: Image to calculate the chunk digests of
+    :param threads: Number of worker threads, defaults to a number based on the
+        number of CPUs
+    :param read_options: Options controlling how data is read from the image
+    :param stats: Statistics to update with the amount of data read and synthesized
+    :param progress: Function to report progress to, at a bounded rate
+
+    :returns: 16-byte digests of all chunks of the image
+
+    :raises ValueError: :attr:`ReadStrategy.READ` used with multiple threads
+
+    .. versionadded:: 0.6.0
+    """
+    read_options = _parallel_read_options(read_options, threads)
+    stream = _ImageStream.from_image(image, read_options)
+    reporter = _progress(progress, stream.size)
+
+    with _direct_io(stream.fd, read_options):
+        digests = list(_hash_leaves(stream, threads, stats, reporter))
+
+    if reporter is not None:
+        reporter.finish()
+
+    return digests
+
+
+def _partition_extents(
+    image: gpt.GPTImage, partition: gpt.GPTPartition
+) -> List[_Extent]:
+    """Get the data extents and holes of a partition.
+
+    :raises InvalidImageError: Partition is not within the usable space of the image
+    """
+    header = image.read_primary_gpt_header()
+    if not (
+        header.first_usable_lba
+        <= partition.first_lba
+        <= partition.last_lba
+        <= header.last_usable_lba
+    ):
+        raise gpt.InvalidImageError(
+            f"Partition {partition.number} is not within the usable space of the "
+            "image"
+        )
+
+    offset = partition.first_lba * gpt.LBA_SIZE
+    _posix_fadvise_sequential(image.fileno(), offset, partition.size)
+    return _data_extents(image.fileno(), offset, partition.size, image.fstat())
+
+
+def calculate_partitions(
+    image: gpt.GPTImage,
+    partitions: Sequence[gpt.GPTPartition],
+    *,
+    threads: Optional[int] = None,
+    read_options: Optional[ReadOptions] = None,
+    stats: Optional[IOStatistics] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> List[bytes]:
+    """Calculate the 16-byte checksums of partitions of the given image, in parallel.
+
+    The checksum of a partition is the Blake2b digest of the contents of its LBA
+    range, salted with its number, so partitions with equal contents get distinct
+    checksums. It doesn't depend on the partition entry, nor on anything outside of
+    the partition. Partitions are hashed in a pool of worker threads.
+
+    :param image: Image containing the partitions
+    :param partitions: Partitions to calculate the checksums of
+    :param threads: Number of worker threads, defaults to a number based on the
+        number of CPUs
+    :param read_options: Options controlling how data is read from the image
+    :param stats: Statistics to update with the amount of data read and synthesized
+    :param progress: Function to report progress to, at a bounded rate
+
+    :returns: 16-byte checksums of the partitions, in order
+
+    :raises InvalidImageError: A partition is not within the usable space of the
+        image
+    :raises ValueError: :attr:`ReadStrategy.READ` used with multiple threads
+
+    .. versionadded:: 0.6.0
+    """
+    total = sum(partition.size for partition in partitions)
+    read_options = _resolve_page_cache(
+        _parallel_read_options(read_options, threads), total
+    )
+    # Extents are found up front, since this uses the offset of the file descriptor
+    extents = [_partition_extents(image, partition) for partition in partitions]
+    reporter = _progress(progress, total)
+    lock = threading.Lock()
+
+    import hashlib  # pylint: disable=import-outside-toplevel
+
+    def hash_partition(
+        partition: gpt.GPTPartition, partition_extents: List[_Extent]
+    ) -> Tuple[bytes, IOStatistics]:
+        hasher = hashlib.blake2b(
+            digest_size=_DIGEST_SIZE,
+            salt=partition.number.to_bytes(hashlib.blake2b.SALT_SIZE, "little"),
+            person=_PARTITION_PERSON,
+        )
+        update: Callable[[Union[bytes, memoryview]], None] = hasher.update
+
+        if reporter is not None:
+
+            def update_locked(data: Union[bytes, memoryview]) -> None:
+                hasher.update(data)
+                with lock:
+                    reporter.advance(len(data))
+
+            update = update_locked
+
+        # Statistics are collected per partition, then merged by the calling thread
+        partition_stats = IOStatistics()
+        done = _hash_extents(
+            update, image.fileno(), partition_extents, read_options, partition_stats
+        )
+        assert done == partition.size  # noqa: S101
+
+        return (hasher.digest(), partition_stats)
+
+    import concurrent.futures  # pylint: disable=import-outside-toplevel
+
+    digests = []
+
+    with _direct_io(image.fileno(), read_options):
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="gptsum-partition"
+        ) as executor:
+            for digest, partition_stats in executor.map(
+                hash_partition, partitions, extents
+            ):
+                if stats is not None:
+                    stats.update(partition_stats)
+                digests.append(digest)
+
+    if reporter is not None:
+        reporter.finish()
+
+    return digests
+
+
+def _readinto(fd: int, view: memoryview) -> int:
+    """Read from a file descriptor into a buffer, returning the number of bytes."""
+    if not hasattr(os, "readv"):  # pragma: platform-win32
+        data = os.read(fd, len(view))
+        view[: len(data)] = data
+        return len(data)
+
+    return os.readv(fd, [view])
+
+
+def _write_all(fd: int, data: Union[bytes, memoryview]) -> None:
+    """Write all data to a file descriptor, handling partial writes."""
+    view = memoryview(data)
+
+    while len(view) > 0:
+        view = view[os.write(fd, view) :]
+
+
+def _write_sparse(fd: int, data: memoryview, zeroes: bytes) -> None:
+    """Write data to a file descriptor, seeking over blocks of zeroes.
+
+    `zeroes` must be at least as large as `data`.
+    """
+    if zeroes.startswith(data):
+        os.lseek(fd, len(data), os.SEEK_CUR)
+        return
+
+    # Data up to here was written, or seeked over
+    done = 0
+    for start in range(0, len(data), _SPARSE_BLOCK_SIZE):
+        end = min(start + _SPARSE_BLOCK_SIZE, len(data))
+        if zeroes.startswith(data[start:end]):
+            _write_all(fd, data[done:start])
+            os.lseek(fd, end - start, os.SEEK_CUR)
+            done = end
+
+    _write_all(fd, data[done:])
+
+
+class _StreamReader:
+    """Read a stream sequentially, copying all data to another file descriptor.
+
+    If `sparse` is set, blocks of zeroes are skipped by seeking over them, rather
+    than written, so they become holes if the copy is a regular file.
+    """
+
+    def __init__(
+        self,
+        fd: int,
+        buffer_size: int,
+        tee: Optional[int],
+        stats: Optional[IOStatistics],
+        sparse: bool = False,
+    ) -> None:
+        self._fd = fd
+        self._view = memoryview(bytearray(buffer_size))
+        self._tee = tee
+        self._stats = stats
+        self._zeroes = bytes(buffer_size) if sparse else None
+
+    def read(self, size: int) -> memoryview:
+        """Read at most `size` bytes, and at most the buffer size.
+
+        The returned view is only valid until the next call.
+        """
+        cnt = _readinto(self._fd, self._view[: min(size, len(self._view))])
+        data = self._view[:cnt]
+
+        if self._tee is not None:
+            if self._zeroes is not None:
+                _write_sparse(self._tee, data, self._zeroes)
+            else:
+                _write_all(self._tee, data)
+        if self._stats is not None:
+            self._stats.bytes_read += cnt
+            self._stats.read_calls += 1
+
+        return data
+
+    def read_exactly(self, size: int) -> bytes:
+        """Read exactly `size` bytes, or less if the stream ends."""
+        pieces = []
+
+        while size > 0:
+            data = self.read(size)
+            if not data:
+                break
+
+            pieces.append(bytes(data))
+            size -= len(data)
+
+        return b"".join(pieces)
+
+
+def calculate_stream(  # pylint: disable=too-many-arguments
+    fd: int,
+    version: int = DEFAULT_VERSION,
+    *,
+    algorithm: Algorithm = DEFAULT_ALGORITHM,
+    read_options: Optional[ReadOptions] = None,
+    tee: Optional[int] = None,
+    sparse: bool = False,
+    stats: Optional[IOStatistics] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> Tuple[gpt.GPTHeader, bytes]:
+    """Calculate the checksum of an image read from a stream, e.g., a pipe.
+
+    The image is read in a single forward pass, so the file descriptor doesn't need
+    to be seekable. The primary GPT header is parsed from the start of the stream,
+    and its location of the backup header tells where the stream must end. Apart
+    from a read buffer, only this 512 byte header is kept in memory.
+
+    Leaves of `VERSION_2` checksums are hashed sequentially. Data outside of the
+    regions covered by `VERSION_3` checksums is read, but not hashed.
+
+    :param fd: Readable file descriptor of the stream
+    :param version: Checksum version to calculate, one of :data:`VERSIONS`
+    :param algorithm: Digest algorithm of `VERSION_1` and `VERSION_3` checksums
+    :param read_options: Options controlling how data is read from the stream, of
+        which only :attr:`ReadOptions.buffer_size` applies
+    :param tee: Writable file descriptor to copy all data read from the stream to
+    :param sparse: Seek over blocks of zeroes in ``tee`` rather than writing them,
+        so they become holes in a regular file. Seeking past the end of the file
+        doesn't extend it, so it must be truncated to the size of the image after.
+    :param stats: Statistics to update with the amount of data read
+    :param progress: Function to report progress to, at a bounded rate, once the
+        size of the image is known from its primary GPT header
+
+    :returns: Primary GPT header of the image, and its 16-byte checksum
+
+    :raises ValueError: Unknown checksum version, or algorithm other than Blake2b
+        used for a `VERSION_2` checksum, or not available
+    :raises gpt.InvalidImageError: Stream is not a valid GPT image
+    :raises gpt.EntriesChecksumMismatchError: Partition entry array checksum
+        mismatch, when calculating a `VERSION_3` checksum
+
+    .. versionadded:: 0.6.0
+    """
+    _check_version(version, algorithm)
+
+    if read_options is None:
+        read_options = ReadOptions()
+
+    reader = _StreamReader(fd, read_options.buffer_size, tee, stats, sparse)
+
+    head = reader.read_exactly(gpt.MBR_SIZE + gpt.GPT_HEADER_SIZE)
+    if len(head) != gpt.MBR_SIZE + gpt.GPT_HEADER_SIZE:
+        raise gpt.InvalidImageError("Image stream too small to be a valid GPT image")
+
+    primary = gpt.GPTHeader.unpack(head[gpt.MBR_SIZE :])
+    size = (primary.backup_lba + 1) * gpt.LBA_SIZE
+    if size < len(head) + gpt.GPT_HEADER_SIZE:
+        raise gpt.InvalidImageError("Invalid backup GPT header location")
+
+    hasher = _new_hasher(algorithm)
+    leaf_digests: List[bytes] = []
+    leaves = _ChunkHasher(size, leaf_digests)
+    allocated = None
+    if version == VERSION_3:
+        allocated = _AllocatedHasher(primary, size, algorithm)
+    update: Callable[[Union[bytes, memoryview]], None] = hasher.update
+    if version == VERSION_2:
+        update = leaves.update
+    elif allocated is not None:
+        update = allocated.update
+
+    reporter = _progress(progress, size)
+    if reporter is not None:
+        update = reporter.wrap(update)
+
+    update(head[: gpt.MBR_SIZE])
+    update(primary.with_new_guid(ZERO_GUID).pack(override_crc32=0))
 
-    hasher = hashlib.blake2b(digest_size=16)
-    offset = 0
+    left = size - len(head) - gpt.GPT_HEADER_SIZE
+    while left > 0:
+        data = reader.read(left)
+        if not data:
+            raise gpt.InvalidImageError("Image stream ended before its backup header")
 
-    mbr = gpt.pread_all(fd, gpt.MBR_SIZE, 0)
-    hasher.update(mbr)
-    offset += len(mbr)
+        update(data)
+        left -= len(data)
 
-    primary = image.read_primary_gpt_header()
-    primary_with_zero_guid = primary.with_new_guid(ZERO_GUID)
-    hasher.update(primary_with_zero_guid.pack(override_crc32=0))
-    offset += len(primary.pack())
+    tail = reader.read_exactly(gpt.GPT_HEADER_SIZE)
+    if len(tail) != gpt.GPT_HEADER_SIZE:
+        raise gpt.InvalidImageError("Image stream ended before its backup header")
 
-    last = os.fstat(fd).st_size - gpt.GPT_HEADER_SIZE
+    backup = gpt.GPTHeader.unpack(tail)
+    if not backup.is_backup_of(primary) or not primary.is_backup_of(backup):
+        raise gpt.InvalidImageError("GPT headers don't match")
 
-    offset += hash_file(hasher.update, fd, last - offset, offset)
+    if reader.read(1):
+        raise gpt.InvalidImageError("Image stream continues after its backup header")
 
-    assert offset == os.fstat(fd).st_size - gpt.GPT_HEADER_SIZE  # noqa: S101
+    update(backup.with_new_guid(ZERO_GUID).pack(override_crc32=0))
 
-    backup = image.read_backup_gpt_header()
-    backup_with_zero_guid = backup.with_new_guid(ZERO_GUID)
-    hasher.update(backup_with_zero_guid.pack(override_crc32=0))
-    offset += len(backup.pack())
+    if reporter is not None:
+        reporter.finish()
 
-    assert offset == os.fstat(fd).st_size  # noqa: S101
+    if version == VERSION_2:
+        leaves.finish()
+        hasher = _tree_node(0, 1, True)
+        for digest in leaf_digests:
+            hasher.update(digest)
+    elif allocated is not None:
+        return (primary, allocated.digest())
 
-    return hasher.digest()
+    return (primary, hasher.digest()[:_DIGEST_SIZE])
 
 
 def digest_to_guid(digest: bytes) -> uuid.UUID:
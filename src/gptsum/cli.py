@@ -1,149 +1,1277 @@
 """gptsum CLI implementation."""
 
 import argparse
+import contextlib
+import dataclasses
+import os
+import socket
+import stat
 import sys
+import time
 import uuid
-from typing import List, Optional
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+)
 
 import gptsum
-import gptsum.checksum
 import gptsum.gpt
 
+# Only imported when used by the subcommand, see `gptsum.__getattr__`
+if TYPE_CHECKING:  # pragma: no cover
+    import gptsum.cache
+    import gptsum.checksum
+    import gptsum.compression
 
-def build_parser() -> argparse.ArgumentParser:
-    """Build the CLI argument parser."""
-    docstring_firstline = gptsum.__doc__.strip().splitlines()[0]
-    docstring_suffix = docstring_firstline.split(":", 1)[1]
-    description = docstring_suffix.strip().capitalize()
-    parser = argparse.ArgumentParser(description=description)
 
-    parser.add_argument("--version", action="version", version=gptsum.__version__)
+# Interval between progress reports when not writing to a terminal, in seconds
+_PROGRESS_LOG_INTERVAL = 5.0
 
-    subparsers = parser.add_subparsers(title="subcommands")
 
-    embed_parser = subparsers.add_parser(
-        "embed",
-        help="calculate and embed the image checksum as its GUID",
-        description="Calculate and embed the checksum of a disk image as its GUID.",
+class _ProgressReporter:
+    """Report the progress of checksum calculations.
+
+    On a terminal, a status line with the amount of data hashed, the throughput and
+    the estimated time left is updated in place. Otherwise, this information is
+    written as a JSON object on a line, every `_PROGRESS_LOG_INTERVAL` seconds and
+    when an image is done.
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        self._stream = stream
+        self._tty = stream.isatty()
+        self._start = time.monotonic()
+        self._last: Optional[float] = None
+        self._shown = False
+
+    def __call__(self, done: int, total: int) -> None:
+        """Report progress, see :data:`gptsum.checksum.ProgressCallback`."""
+        now = time.monotonic()
+
+        if done == 0:
+            # Hashing of a new image started
+            self._start = now
+            self._last = None
+            return
+
+        elapsed = now - self._start
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if rate > 0 else None
+
+        if self._tty:
+            if done >= total:
+                self.clear()
+                return
+
+            eta_text = "-:--:--"
+            if eta is not None:
+                import datetime  # pylint: disable=import-outside-toplevel
+
+                eta_text = str(datetime.timedelta(seconds=round(eta)))
+
+            self._stream.write(
+                f"\r{done / 1e6:.0f}/{total / 1e6:.0f} MB "
+                f"({100 * done // total}%), {rate / 1e6:.1f} MB/s, ETA {eta_text}\x1b[K"
+            )
+            self._shown = True
+        else:
+            if (
+                done < total
+                and self._last is not None
+                and now - self._last < _PROGRESS_LOG_INTERVAL
+            ):
+                return
+
+            self._last = now
+            report = {
+                "done": done,
+                "total": total,
+                "rate": round(rate),
+                "eta": None if eta is None else round(eta, 1),
+            }
+            import json  # pylint: disable=import-outside-toplevel
+
+            self._stream.write(json.dumps(report) + "\n")
+
+        self._stream.flush()
+
+    def clear(self) -> None:
+        """Erase the status line from the terminal, if any."""
+        if self._shown:
+            self._stream.write("\r\x1b[K")
+            self._stream.flush()
+            self._shown = False
+
+
+def _positive_int(value: str) -> int:
+    """Parse a strictly positive integer argument."""
+    result = int(value)
+    if result <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value}")
+    return result
+
+
+def _image_size(value: str) -> int:
+    """Parse an image size argument, which must be a multiple of the LBA size."""
+    result = _positive_int(value)
+    if result % gptsum.gpt.LBA_SIZE != 0:
+        raise argparse.ArgumentTypeError(
+            f"must be a multiple of {gptsum.gpt.LBA_SIZE}: {value}"
+        )
+    return result
+
+
+def _add_size_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the argument overriding the image size to a subcommand parser."""
+    parser.add_argument(
+        "--size",
+        type=_image_size,
+        default=None,
+        help=(
+            "size of the image, if it only covers a prefix of the file or block "
+            "device, e.g., when it was written to a larger device"
+        ),
+        metavar="BYTES",
     )
-    embed_parser.set_defaults(func=embed)
-    embed_parser.add_argument(
-        "image",
-        type=argparse.FileType("rb+"),
-        help="disk image file",
+
+
+def _add_checksum_arguments(
+    parser: argparse.ArgumentParser, recorded: bool = False
+) -> None:
+    """Add arguments controlling the checksum calculation to a subcommand parser.
+
+    :param parser: Subcommand parser to add the arguments to
+    :param recorded: Whether the checksum version and algorithm recorded when
+        embedding are used if neither is given
+    """
+    version_default = f"{gptsum.checksum.DEFAULT_VERSION}"
+    algorithm_default = gptsum.checksum.DEFAULT_ALGORITHM.value
+    if recorded:
+        version_default = f"the one recorded when embedding, or {version_default}"
+        algorithm_default = f"the one recorded when embedding, or {algorithm_default}"
+
+    parser.add_argument(
+        "--checksum-version",
+        type=int,
+        choices=gptsum.checksum.VERSIONS,
+        default=None if recorded else gptsum.checksum.DEFAULT_VERSION,
+        help=(
+            "checksum version: 1 is a sequential digest, 2 is a tree digest "
+            "calculated in parallel, 3 is a sequential digest of the GPT "
+            f"structures and partitions only (default: {version_default})"
+        ),
+        dest="version",
+    )
+    parser.add_argument(
+        "--algorithm",
+        choices=[algorithm.value for algorithm in gptsum.checksum.Algorithm],
+        default=None if recorded else gptsum.checksum.DEFAULT_ALGORITHM.value,
+        help=(
+            "digest algorithm of version 1 and 3 checksums, which must match the "
+            "algorithm the checksum was embedded with, see the 'benchmark' "
+            f"subcommand (default: {algorithm_default})"
+        ),
+    )
+    parser.add_argument(
+        "--threads",
+        type=_positive_int,
+        default=None,
+        help="number of threads used to calculate version 2 checksums",
+        metavar="N",
+    )
+    parser.add_argument(
+        "--read-strategy",
+        choices=[strategy.value for strategy in gptsum.checksum.ReadStrategy],
+        default=gptsum.checksum.ReadStrategy.AUTO.value,
+        help=(
+            "strategy used to read the image: using preadv, read, by mapping "
+            "it in memory, or using direct I/O bypassing the page cache "
+            "(default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--buffer-size",
+        type=_positive_int,
+        default=gptsum.checksum.ReadOptions.buffer_size,
+        help="size of the buffers the image is read into (default: %(default)s)",
+        metavar="BYTES",
+    )
+    parser.add_argument(
+        "--queue-depth",
+        type=_positive_int,
+        default=gptsum.checksum.ReadOptions.queue_depth,
+        help=(
+            "number of reads kept in flight when reading using preadv "
+            "(default: %(default)s)"
+        ),
+        metavar="N",
+    )
+    parser.add_argument(
+        "--page-cache",
+        choices=[policy.value for policy in gptsum.checksum.PageCachePolicy],
+        default=gptsum.checksum.PageCachePolicy.AUTO.value,
+        help=(
+            "whether to keep the image in the page cache, or to drop it behind "
+            "the data being hashed, 'auto' dropping it when reading more than a "
+            "quarter of the memory of the system (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--page-cache-window",
+        type=_positive_int,
+        default=gptsum.checksum.ReadOptions.page_cache_window,
+        help=(
+            "size of the windows read ahead, and kept behind, when dropping the "
+            "image from the page cache (default: %(default)s)"
+        ),
+        metavar="BYTES",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_const",
+        const="text",
+        help=(
+            "report the number of bytes read from the image, and synthesized "
+            "for holes in sparse images, and the time spent in every phase, on "
+            "standard error"
+        ),
+    )
+    parser.add_argument(
+        "--stats-format",
+        choices=["text", "json"],
+        default=None,
+        help=(
+            "format of the statistics, JSON objects including read calls, "
+            "implies --stats (default: text)"
+        ),
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help=(
+            "report progress, throughput and estimated time left on standard "
+            "error, as a status line on a terminal or JSON lines otherwise"
+        ),
+    )
+    _add_size_argument(parser)
+
+
+def _add_batch_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add arguments to process many images to a subcommand parser."""
+    parser.add_argument(
+        "images",
+        type=Path,
+        nargs="*",
+        help="disk image files",
         metavar="FILE",
     )
+    parser.add_argument(
+        "--files0-from",
+        type=argparse.FileType("rb"),
+        help=(
+            "read NUL-separated paths of disk image files from F, "
+            "or from standard input if F is -"
+        ),
+        metavar="F",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        default=1,
+        help="number of images to process in parallel (default: %(default)s)",
+        metavar="N",
+    )
 
-    verify_parser = subparsers.add_parser(
-        "verify",
-        help="verify disk image contents against the expected checksum (GUID)",
-        description=(
-            "Calculate the expected checksum of a disk image, "
-            "then verify the embedded disk GUID against it. "
-            "If there's a mismatch, the tool will exit with exit code 1."
+
+def _batch_images(ns: argparse.Namespace) -> List[Path]:
+    """Get the paths of all images to process from parsed arguments."""
+    images: List[Path] = list(ns.images)
+
+    if ns.files0_from is not None:
+        with ns.files0_from as fd:
+            data = fd.read()
+        images.extend(Path(os.fsdecode(name)) for name in data.split(b"\0") if name)
+
+    return images
+
+
+def _is_stream(path: Path) -> bool:
+    """Check whether a path refers to standard input or a pipe."""
+    if str(path) == "-":
+        return True
+
+    try:
+        return stat.S_ISFIFO(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+def _verify_stream(
+    ns: argparse.Namespace, kwargs: Dict[str, Any]
+) -> gptsum.BatchResult:
+    """Verify a single image read from standard input or a pipe."""
+    path = ns.batch_images[0]
+    failure: Optional[gptsum.VerificationFailure] = None
+
+    try:
+        with contextlib.ExitStack() as stack:
+            if str(path) == "-":
+                fd = sys.stdin.buffer.fileno()
+            else:
+                fd = stack.enter_context(open(path, "rb")).fileno()
+            fd = stack.enter_context(gptsum.compression.decompressed_stream(fd))
+
+            tee = None
+            if ns.tee is not None:
+                tee = stack.enter_context(open(ns.tee, "wb")).fileno()
+
+            try:
+                gptsum.verify_stream(
+                    fd,
+                    version=kwargs["version"],
+                    algorithm=kwargs["algorithm"],
+                    read_options=kwargs["read_options"],
+                    stats=kwargs["stats"],
+                    tee=tee,
+                    progress=kwargs["progress"],
+                )
+            except gptsum.VerificationFailure as exc:
+                # Frozen, so it can't pass through generator context managers,
+                # which set its traceback
+                failure = exc
+    except (OSError, ValueError) as exc:
+        return gptsum.BatchResult(path, exc)
+
+    return gptsum.BatchResult(path, failure)
+
+
+def _verified_subject(ns: argparse.Namespace) -> str:
+    """Describe the GUIDs verified by a subcommand, for error messages."""
+    partition = getattr(ns, "partition", None)
+    if partition is not None:
+        return f"Unique GUID of partition {partition}"
+    return "Disk GUID"
+
+
+def _verified_hint(ns: argparse.Namespace) -> Optional[str]:
+    """Get a hint to report when a GUID mismatches, if any."""
+    if getattr(ns, "partition", None) is not None:
+        return None
+    if ns.version is not None or ns.algorithm is not None:
+        return None
+    return (
+        "If the checksum was embedded using another --checksum-version or "
+        "--algorithm, which wasn't recorded with the image, these must be given"
+    )
+
+
+def _report_batch(  # pylint: disable=too-many-arguments
+    results: Iterable[gptsum.BatchResult],
+    prefix: bool,
+    progress: Optional[_ProgressReporter] = None,
+    subject: str = "Disk GUID",
+    hint: Optional[str] = None,
+) -> bool:
+    """Report the results of a batch, as they come in.
+
+    :param results: Results to report
+    :param prefix: Whether to prefix messages with the image path, and report
+        successes as well
+    :param progress: Progress reporter whose status line to erase first
+    :param subject: Description of the GUIDs which were verified
+    :param hint: Message to report after a GUID mismatch
+
+    :returns: Whether any image failed
+    """
+    failed = False
+
+    for result in results:
+        if progress is not None:
+            progress.clear()
+
+        label = f"{result.path}: " if prefix else ""
+
+        if result.error is None:
+            if prefix:
+                sys.stdout.write(f"{label}OK\n")
+                sys.stdout.flush()
+            continue
+
+        failed = True
+        if isinstance(result.error, gptsum.VerificationFailure):
+            if result.error.damaged:
+                messages = [
+                    f"Image contents changed in bytes {start}-{end - 1}"
+                    for (start, end) in result.error.damaged
+                ]
+            else:
+                messages = [
+                    f"{subject} doesn't match expected checksum, "
+                    f"got {result.error.actual}, expected {result.error.expected}"
+                ]
+                if hint is not None:
+                    messages.append(hint)
+        else:
+            messages = [str(result.error)]
+
+        for message in messages:
+            sys.stderr.write(f"{label}{message}\n")
+        sys.stderr.flush()
+
+    return failed
+
+
+def _add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add arguments controlling the checksum cache to a subcommand parser."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--no-cache",
+        action="store_const",
+        const=gptsum.cache.CachePolicy.NONE,
+        dest="cache_policy",
+        help="don't use the checksum cache (default)",
+    )
+    group.add_argument(
+        "--cache",
+        action="store_const",
+        const=gptsum.cache.CachePolicy.STORE,
+        dest="cache_policy",
+        help=(
+            "store the calculated checksum in an extended attribute of the image, "
+            "or a sidecar file"
         ),
     )
-    verify_parser.set_defaults(func=verify)
-    verify_parser.add_argument(
+    group.add_argument(
+        "--trust-cache",
+        action="store_const",
+        const=gptsum.cache.CachePolicy.TRUST,
+        dest="cache_policy",
+        help=(
+            "use the cached checksum if the size, modification time and inode of "
+            "the image didn't change, store the checksum otherwise"
+        ),
+    )
+    parser.set_defaults(cache_policy=gptsum.cache.CachePolicy.NONE)
+
+
+def _checksum_kwargs(ns: argparse.Namespace) -> Dict[str, Any]:
+    """Get the checksum calculation keyword arguments from parsed arguments."""
+    return {
+        "version": ns.version,
+        "algorithm": (
+            None if ns.algorithm is None else gptsum.checksum.Algorithm(ns.algorithm)
+        ),
+        "threads": ns.threads,
+        "read_options": gptsum.checksum.ReadOptions(
+            strategy=gptsum.checksum.ReadStrategy(ns.read_strategy),
+            buffer_size=ns.buffer_size,
+            queue_depth=ns.queue_depth,
+            page_cache=gptsum.checksum.PageCachePolicy(ns.page_cache),
+            page_cache_window=ns.page_cache_window,
+        ),
+        "stats": gptsum.checksum.IOStatistics() if ns.stats else None,
+        "size": ns.size,
+        "progress": _ProgressReporter(sys.stderr) if ns.progress else None,
+    }
+
+
+def _stats_dict(stats: "gptsum.checksum.IOStatistics") -> Dict[str, Any]:
+    """Convert statistics to a JSON-serializable dictionary."""
+    return {
+        "bytes_read": stats.bytes_read,
+        "bytes_synthesized": stats.bytes_synthesized,
+        "read_calls": stats.read_calls,
+        "average_read_size": stats.average_read_size,
+        "hash_throughput": stats.hash_throughput,
+        "phases": {
+            phase.value: dataclasses.asdict(phase_time)
+            for phase, phase_time in stats.phases.items()
+        },
+    }
+
+
+def _report_stats(
+    stats: Optional["gptsum.checksum.IOStatistics"], fmt: Optional[str]
+) -> None:
+    """Write statistics to standard error in the given format, if any."""
+    if stats is None:
+        return
+
+    if fmt == "json":
+        import json  # pylint: disable=import-outside-toplevel
+
+        sys.stderr.write(json.dumps(_stats_dict(stats)) + "\n")
+    else:
+        for phase in gptsum.checksum.Phase:
+            phase_time = stats.phases.get(phase)
+            if phase_time is not None:
+                sys.stderr.write(
+                    f"{phase.value.capitalize()}: {phase_time.wall:.3f} s, "
+                    f"{phase_time.cpu:.3f} s CPU\n"
+                )
+
+        sys.stderr.write(
+            f"Read {stats.bytes_read} bytes, "
+            f"synthesized {stats.bytes_synthesized} bytes\n"
+        )
+
+    sys.stderr.flush()
+
+
+class _VersionAction(argparse.Action):
+    """Print the version of the package and exit.
+
+    Unlike the ``version`` action of :mod:`argparse`, the version is only looked up
+    when the option is given, since loading the package metadata is slow.
+    """
+
+    def __init__(self, option_strings: List[str], dest: str, **kwargs: Any) -> None:
+        super().__init__(
+            option_strings,
+            dest,
+            nargs=0,
+            default=argparse.SUPPRESS,
+            help="show program's version number and exit",
+            **kwargs,
+        )
+
+    def __call__(
+        self,
+        parser: argparse.ArgumentParser,
+        namespace: argparse.Namespace,
+        values: Any,
+        option_string: Optional[str] = None,
+    ) -> None:
+        """Print the version, and exit."""
+        sys.stdout.write(f"{gptsum.__version__}\n")
+        parser.exit()
+
+
+def _configure_embed(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the 'embed' subcommand."""
+    parser.set_defaults(func=embed)
+    _add_batch_arguments(parser)
+    _add_checksum_arguments(parser)
+    parser.add_argument(
+        "--manifest",
+        action="store_true",
+        help=(
+            "also write a manifest of chunk digests next to every image, "
+            "for use with 'verify --locate'"
+        ),
+    )
+    parser.add_argument(
+        "--partitions",
+        action="store_true",
+        help=(
+            "first embed the checksum of every partition as its unique partition "
+            "GUID, hashing partitions in parallel, for use with 'verify --partition'"
+        ),
+    )
+
+
+def _configure_copy_embed(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the 'copy-embed' subcommand."""
+    parser.set_defaults(func=copy_embed)
+    parser.add_argument(
+        "source",
+        type=Path,
+        help=(
+            "disk image file, block device or pipe to copy, or standard input if "
+            "SRC is -"
+        ),
+        metavar="SRC",
+    )
+    parser.add_argument(
+        "destination",
+        type=Path,
+        help="file or block device to copy the disk image to",
+        metavar="DST",
+    )
+    _add_checksum_arguments(parser)
+
+
+def _configure_verify(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the 'verify' subcommand."""
+    parser.set_defaults(func=verify)
+    _add_batch_arguments(parser)
+    _add_checksum_arguments(parser, recorded=True)
+    _add_cache_arguments(parser)
+    parser.add_argument(
+        "--tee",
+        type=Path,
+        help=(
+            "when verifying a single image from a pipe, or from standard input if "
+            "FILE is -, write it to F while verifying it"
+        ),
+        metavar="F",
+    )
+    parser.add_argument(
+        "--locate",
+        action="store_true",
+        help=(
+            "verify against the manifest written by 'embed --manifest', hashing "
+            "chunks in parallel and reporting the byte ranges which changed"
+        ),
+    )
+    parser.add_argument(
+        "--partition",
+        type=_positive_int,
+        help=(
+            "only verify partition N against the checksum embedded as its unique "
+            "GUID by 'embed --partitions', reading only this partition"
+        ),
+        metavar="N",
+    )
+
+
+def _configure_get_guid(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the 'get-guid' subcommand."""
+    parser.set_defaults(func=get_guid)
+    parser.add_argument(
         "image",
         type=argparse.FileType("rb"),
         help="disk image file",
         metavar="FILE",
     )
+    _add_size_argument(parser)
 
-    get_guid_parser = subparsers.add_parser(
-        "get-guid",
-        help="read a disk image GUID",
-        description="Read and print the GPT label GUID from a disk image.",
-    )
-    get_guid_parser.set_defaults(func=get_guid)
-    get_guid_parser.add_argument(
+
+def _configure_inspect(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the 'inspect' subcommand."""
+    parser.set_defaults(func=inspect)
+    parser.add_argument(
         "image",
         type=argparse.FileType("rb"),
         help="disk image file",
         metavar="FILE",
     )
-
-    set_guid_parser = subparsers.add_parser(
-        "set-guid",
-        help="set a disk image GUID",
-        description="Write a new label GUID to a disk image.",
+    _add_size_argument(parser)
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print the GUID and partitions as a JSON object",
     )
-    set_guid_parser.set_defaults(func=set_guid)
-    set_guid_parser.add_argument(
+
+
+def _configure_set_guid(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the 'set-guid' subcommand."""
+    parser.set_defaults(func=set_guid)
+    parser.add_argument(
         "image",
         type=argparse.FileType("rb+"),
         help="disk image file",
         metavar="FILE",
     )
-    set_guid_parser.add_argument(
+    parser.add_argument(
         "guid",
         type=uuid.UUID,
         help="new label GUID",
         metavar="GUID",
     )
+    _add_size_argument(parser)
 
-    calculate_guid_parser = subparsers.add_parser(
-        "calculate-expected-guid",
-        help="calculate and print the expected checksum (GUID) of an image",
-        description=(
-            "Calculate and print the expected checksum (GUID) of a disk image, "
-            "without writing it to the file."
-        ),
-    )
-    calculate_guid_parser.set_defaults(func=calculate_expected_guid)
-    calculate_guid_parser.add_argument(
+
+def _configure_calculate_expected_guid(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the 'calculate-expected-guid' subcommand."""
+    parser.set_defaults(func=calculate_expected_guid)
+    parser.add_argument(
         "image",
         type=argparse.FileType("rb"),
         help="disk image file",
         metavar="FILE",
     )
+    _add_checksum_arguments(parser)
+    _add_cache_arguments(parser)
+
+
+def _configure_benchmark(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the 'benchmark' subcommand."""
+    parser.set_defaults(func=benchmark)
+    parser.add_argument(
+        "--data-size",
+        type=_positive_int,
+        default=256 * 1024 * 1024,
+        help="amount of data hashed using every algorithm (default: %(default)s)",
+        metavar="BYTES",
+    )
+
+
+def _configure_serve(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the 'serve' subcommand."""
+    parser.set_defaults(func=serve)
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=None,
+        help=(
+            "path of the socket to listen on (default: $GPTSUM_SOCKET, or "
+            "gptsum.sock in $XDG_RUNTIME_DIR)"
+        ),
+        metavar="PATH",
+    )
+    parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=None,
+        help="number of connections handled concurrently",
+        metavar="N",
+    )
+
+
+# Subcommands: their name, help, description, and function adding their arguments
+_SUBCOMMANDS: List[Tuple[str, str, str, Callable[[argparse.ArgumentParser], None]]]
+_SUBCOMMANDS = [
+    (
+        "embed",
+        "calculate and embed the image checksum as its GUID",
+        "Calculate and embed the checksum of a disk image as its GUID.",
+        _configure_embed,
+    ),
+    (
+        "copy-embed",
+        "copy an image, embedding its checksum as the GUID of the copy",
+        (
+            "Copy a disk image, calculating its checksum while copying it, then "
+            "embed the checksum as the GUID of the copy. The image is only read "
+            "once, and holes are preserved when copying to a regular file. "
+            "Images compressed using xz, gzip, bzip2 or zstd are decompressed "
+            "on the fly."
+        ),
+        _configure_copy_embed,
+    ),
+    (
+        "verify",
+        "verify disk image contents against the expected checksum (GUID)",
+        (
+            "Calculate the expected checksum of a disk image, "
+            "then verify the embedded disk GUID against it. "
+            "Images compressed using xz, gzip, bzip2 or zstd are decompressed "
+            "on the fly. "
+            "If there's a mismatch for any image, the tool will exit with exit "
+            "code 1."
+        ),
+        _configure_verify,
+    ),
+    (
+        "get-guid",
+        "read a disk image GUID",
+        "Read and print the GPT label GUID from a disk image.",
+        _configure_get_guid,
+    ),
+    (
+        "inspect",
+        "print the GUID and partitions of a disk image",
+        (
+            "Print the GPT label GUID of a disk image, and its used partitions. "
+            "Both partition entry arrays are validated against their checksums."
+        ),
+        _configure_inspect,
+    ),
+    (
+        "set-guid",
+        "set a disk image GUID",
+        "Write a new label GUID to a disk image.",
+        _configure_set_guid,
+    ),
+    (
+        "calculate-expected-guid",
+        "calculate and print the expected checksum (GUID) of an image",
+        (
+            "Calculate and print the expected checksum (GUID) of a disk image, "
+            "without writing it to the file. "
+            "Images compressed using xz, gzip, bzip2 or zstd are decompressed "
+            "on the fly."
+        ),
+        _configure_calculate_expected_guid,
+    ),
+    (
+        "benchmark",
+        "compare the throughput of the digest algorithms on this machine",
+        (
+            "Measure how fast every digest algorithm selectable using --algorithm "
+            "hashes data in memory on this machine. Reading the image can still "
+            "be the bottleneck when hashing it."
+        ),
+        _configure_benchmark,
+    ),
+    (
+        "serve",
+        "run a daemon serving other invocations of the tool",
+        (
+            "Run a daemon listening on a Unix socket, to which other invocations "
+            "of the tool send their requests when the socket exists, avoiding "
+            "their startup costs. Runs until interrupted."
+        ),
+        _configure_serve,
+    ),
+]
+
+
+def build_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    """Build the CLI argument parser.
+
+    :param command: Only add the arguments of this subcommand, if known, since
+        building all of them slows down startup. All subcommands are listed in
+        the help output regardless.
+
+    .. versionchanged:: 0.6.0
+       Added the `command` parameter.
+    """
+    docstring_firstline = gptsum.__doc__.strip().splitlines()[0]
+    docstring_suffix = docstring_firstline.split(":", 1)[1]
+    description = docstring_suffix.strip().capitalize()
+    parser = argparse.ArgumentParser(description=description)
+
+    parser.add_argument("--version", action=_VersionAction)
+
+    subparsers = parser.add_subparsers(title="subcommands")
+
+    known = any(name == command for (name, _, _, _) in _SUBCOMMANDS)
+    for name, help_, subcommand_description, configure in _SUBCOMMANDS:
+        subparser = subparsers.add_parser(
+            name, help=help_, description=subcommand_description
+        )
+        if not known or name == command:
+            configure(subparser)
 
     return parser
 
 
 def get_guid(ns: argparse.Namespace) -> None:
     """Execute the 'get-guid' subcommand."""
-    guid = gptsum.get_guid(fd=ns.image.fileno())
+    guid = gptsum.get_guid(fd=ns.image.fileno(), size=ns.size)
     print(f"{guid}")
 
 
+def inspect(ns: argparse.Namespace) -> None:
+    """Execute the 'inspect' subcommand."""
+    fd = ns.image.fileno()
+    guid = gptsum.get_guid(fd=fd, size=ns.size)
+    partitions = gptsum.get_partitions(fd=fd, size=ns.size)
+
+    if ns.json:
+        import json  # pylint: disable=import-outside-toplevel
+
+        report = {
+            "guid": str(guid),
+            "partitions": [
+                {
+                    "number": partition.number,
+                    "type_guid": str(partition.type_guid),
+                    "unique_guid": str(partition.unique_guid),
+                    "first_lba": partition.first_lba,
+                    "last_lba": partition.last_lba,
+                    "attributes": partition.attributes,
+                    "name": partition.name,
+                }
+                for partition in partitions
+            ],
+        }
+        print(json.dumps(report))
+        return
+
+    print(f"Disk GUID: {guid}")
+    print(
+        f"{'Number':>6}  {'Start (LBA)':>12}  {'End (LBA)':>12}  {'Size':>14}  "
+        f"{'Type GUID':36}  {'Unique GUID':36}  Name"
+    )
+    for partition in partitions:
+        print(
+            f"{partition.number:>6}  {partition.first_lba:>12}  "
+            f"{partition.last_lba:>12}  {partition.size:>14}  "
+            f"{partition.type_guid!s:36}  {partition.unique_guid!s:36}  "
+            f"{partition.name}"
+        )
+
+
 def set_guid(ns: argparse.Namespace) -> None:
     """Execute the 'set-guid' subcommand."""
-    gptsum.set_guid(ns.guid, fd=ns.image.fileno())
+    gptsum.set_guid(ns.guid, fd=ns.image.fileno(), size=ns.size)
 
 
 def calculate_expected_guid(ns: argparse.Namespace) -> None:
     """Execute the 'calculate-expected-guid' subcommand."""
-    guid = gptsum.calculate_expected_guid(fd=ns.image.fileno())
+    kwargs = _checksum_kwargs(ns)
+    fd = ns.image.fileno()
+
+    compression = gptsum.compression.detect(fd)
+    if compression is not None:
+        if ns.size is not None:
+            raise ValueError("The size of compressed images can't be overridden")
+
+        guid = gptsum.calculate_expected_guid_stream(
+            fd,
+            version=kwargs["version"],
+            algorithm=kwargs["algorithm"],
+            read_options=kwargs["read_options"],
+            stats=kwargs["stats"],
+            compression=compression,
+            progress=kwargs["progress"],
+        )
+    else:
+        guid = gptsum.calculate_expected_guid(
+            fd=fd, cache_policy=ns.cache_policy, **kwargs
+        )
+
     print(f"{guid}")
+    _report_stats(kwargs["stats"], ns.stats)
 
 
 def embed(ns: argparse.Namespace) -> None:
     """Execute the 'embed' subcommand."""
-    gptsum.embed(fd=ns.image.fileno())
+    kwargs = _checksum_kwargs(ns)
+    results = gptsum.embed_many(
+        ns.batch_images,
+        jobs=ns.jobs,
+        write_manifests=ns.manifest,
+        partitions=ns.partitions,
+        **kwargs,
+    )
+    failed = _report_batch(results, ns.batch_prefix, kwargs["progress"])
+    _report_stats(kwargs["stats"], ns.stats)
+
+    if failed:
+        sys.exit(1)
+
+
+def copy_embed(ns: argparse.Namespace) -> None:
+    """Execute the 'copy-embed' subcommand."""
+    kwargs = _checksum_kwargs(ns)
+
+    try:
+        with contextlib.ExitStack() as stack:
+            if str(ns.source) == "-":
+                source = sys.stdin.buffer.fileno()
+            else:
+                source = stack.enter_context(open(ns.source, "rb")).fileno()
+
+            # Not truncated when opened, in case it's the source
+            destination = os.open(ns.destination, os.O_RDWR | os.O_CREAT, 0o666)
+            stack.callback(os.close, destination)
+
+            gptsum.copy_embed(
+                source,
+                destination,
+                version=kwargs["version"],
+                algorithm=kwargs["algorithm"],
+                read_options=kwargs["read_options"],
+                stats=kwargs["stats"],
+                compression=gptsum.compression.detect(source),
+                progress=kwargs["progress"],
+            )
+    except (OSError, ValueError) as exc:
+        result = gptsum.BatchResult(ns.source, exc)
+    else:
+        result = gptsum.BatchResult(ns.source)
+
+    failed = _report_batch([result], False, kwargs["progress"])
+    _report_stats(kwargs["stats"], ns.stats)
+
+    if failed:
+        sys.exit(1)
 
 
 def verify(ns: argparse.Namespace) -> None:
     """Execute the 'verify' subcommand."""
+    kwargs = _checksum_kwargs(ns)
+
+    if ns.stream:
+        results: Iterable[gptsum.BatchResult] = [_verify_stream(ns, kwargs)]
+    else:
+        results = gptsum.verify_many(
+            ns.batch_images,
+            jobs=ns.jobs,
+            cache_policy=ns.cache_policy,
+            locate=ns.locate,
+            partition=ns.partition,
+            **kwargs,
+        )
+    failed = _report_batch(
+        results,
+        ns.batch_prefix,
+        kwargs["progress"],
+        _verified_subject(ns),
+        _verified_hint(ns),
+    )
+    _report_stats(kwargs["stats"], ns.stats)
+
+    if failed:
+        sys.exit(1)
+
+
+def benchmark(ns: argparse.Namespace) -> None:
+    """Execute the 'benchmark' subcommand."""
+    available = gptsum.checksum.available_algorithms()
+
+    print(f"{'Algorithm':10}  {'Throughput':>13}")
+    for algorithm in gptsum.checksum.Algorithm:
+        if algorithm in available:
+            rate = gptsum.checksum.measure_throughput(algorithm, ns.data_size)
+            result = f"{rate / 1e6:.0f} MB/s"
+        else:
+            result = "not available"
+
+        default = " (default)" if algorithm == gptsum.checksum.DEFAULT_ALGORITHM else ""
+        print(f"{algorithm.value:10}  {result:>13}{default}")
+
+
+def serve(ns: argparse.Namespace) -> None:
+    """Execute the 'serve' subcommand."""
+    import gptsum.server  # pylint: disable=import-outside-toplevel
+
+    gptsum.server.serve(ns.socket, ns.workers)
+
+
+def _daemon_images(ns: argparse.Namespace) -> Optional[List[Path]]:
+    """Get the paths of the images a daemon can process for a subcommand, if any."""
+    if ns.func not in (get_guid, calculate_expected_guid, verify, embed):
+        return None
+    if getattr(ns, "stats", None) or getattr(ns, "progress", False):
+        return None
+
+    if hasattr(ns, "batch_images"):
+        if ns.jobs != 1 or getattr(ns, "stream", False):
+            return None
+        return list(ns.batch_images)
+
+    if ns.image is sys.stdin.buffer:
+        return None
+    mode = os.fstat(ns.image.fileno()).st_mode
+    if not (stat.S_ISREG(mode) or stat.S_ISBLK(mode)):
+        return None
+
+    return [Path(ns.image.name)]
+
+
+def _daemon_request(ns: argparse.Namespace, path: Path) -> Dict[str, Any]:
+    """Build the request to process an image for a subcommand, for a daemon."""
+    commands = {
+        get_guid: "get-guid",
+        calculate_expected_guid: "calculate-expected-guid",
+        verify: "verify",
+        embed: "embed",
+    }
+    request: Dict[str, Any] = {
+        "command": commands[ns.func],
+        "path": os.path.abspath(path),
+        "size": ns.size,
+    }
+
+    if hasattr(ns, "version"):
+        request.update(
+            version=ns.version,
+            algorithm=ns.algorithm,
+            threads=ns.threads,
+            read_strategy=ns.read_strategy,
+            buffer_size=ns.buffer_size,
+            queue_depth=ns.queue_depth,
+            page_cache=ns.page_cache,
+            page_cache_window=ns.page_cache_window,
+        )
+    if hasattr(ns, "cache_policy"):
+        request["cache_policy"] = ns.cache_policy.value
+    if hasattr(ns, "locate"):
+        request.update(locate=ns.locate, partition=ns.partition)
+    if hasattr(ns, "manifest"):
+        request.update(manifest=ns.manifest, partitions=ns.partitions)
+
+    return request
+
+
+def _run_daemon(ns: argparse.Namespace) -> bool:
+    """Execute a subcommand by a daemon, if one is running and able to.
+
+    If the daemon closes the connection, the images it didn't process are
+    processed locally.
+
+    :returns: Whether the subcommand was executed
+    """
+    images = _daemon_images(ns)
+    if images is None or not hasattr(socket, "AF_UNIX"):
+        return False
+
+    import gptsum.server  # pylint: disable=import-outside-toplevel
+
+    path = gptsum.server.default_socket()
+    if path is None:
+        return False
+
     try:
-        gptsum.verify(fd=ns.image.fileno())
-    except gptsum.VerificationFailure as exn:
-        sys.stderr.write(
-            "Disk GUID doesn't match expected checksum, "
-            f"got {exn.actual}, expected {exn.expected}\n"
+        client = gptsum.server.Client(path)
+    except OSError:
+        return False
+
+    with client:
+        if not hasattr(ns, "batch_images"):
+            try:
+                reply = client.request(_daemon_request(ns, images[0]))
+            except ConnectionError:
+                return False
+
+            error = gptsum.server.reply_error(reply)
+            if error is not None:
+                sys.stderr.write(f"{error}\n")
+                sys.exit(1)
+
+            print(reply["guid"])
+            return True
+
+        remaining: List[Path] = []
+
+        def results() -> Iterator[gptsum.BatchResult]:
+            for index, image in enumerate(images):
+                try:
+                    reply = client.request(_daemon_request(ns, image))
+                except ConnectionError:
+                    remaining.extend(images[index:])
+                    return
+
+                yield gptsum.BatchResult(image, gptsum.server.reply_error(reply))
+
+        failed = _report_batch(
+            results(),
+            ns.batch_prefix,
+            subject=_verified_subject(ns),
+            hint=_verified_hint(ns),
         )
-        sys.stderr.flush()
+
+    if remaining:
+        ns.batch_images = remaining
+        ns.func(ns)
+
+    if failed:
         sys.exit(1)
 
+    return True
+
+
+def _check_checksum_arguments(
+    parser: argparse.ArgumentParser, ns: argparse.Namespace
+) -> None:
+    """Check the arguments controlling the checksum calculation of a subcommand."""
+    if (
+        ns.version == gptsum.checksum.VERSION_2
+        and ns.read_strategy == gptsum.checksum.ReadStrategy.READ.value
+        and ns.threads != 1
+    ):
+        parser.error(
+            "--read-strategy=read can only be used with --checksum-version=2 "
+            "when using --threads=1"
+        )
+    if (
+        getattr(ns, "partitions", False)
+        and ns.read_strategy == gptsum.checksum.ReadStrategy.READ.value
+        and ns.threads != 1
+    ):
+        parser.error(
+            "--read-strategy=read can only be used with --partitions when using "
+            "--threads=1"
+        )
+
+    if getattr(ns, "manifest", False) and ns.version == gptsum.checksum.VERSION_3:
+        parser.error("--manifest can't be used with --checksum-version=3")
+
+    if ns.algorithm not in (None, gptsum.checksum.DEFAULT_ALGORITHM.value):
+        if ns.version == gptsum.checksum.VERSION_2:
+            parser.error("--algorithm can't be used with --checksum-version=2")
+        if gptsum.checksum.Algorithm(ns.algorithm) not in (
+            gptsum.checksum.available_algorithms()
+        ):
+            parser.error(f"--algorithm={ns.algorithm} is not available on this system")
+
+
+def _check_stream_arguments(
+    parser: argparse.ArgumentParser, ns: argparse.Namespace
+) -> None:
+    """Check the arguments of a 'verify' subcommand, setting `ns.stream`."""
+    streams = [path for path in ns.batch_images if _is_stream(path)]
+    ns.stream = len(streams) > 0
+
+    if ns.stream and len(ns.batch_images) > 1:
+        parser.error("images from standard input or pipes must be verified alone")
+    if ns.tee is not None and not ns.stream:
+        parser.error("--tee can only be used with an image read from a pipe")
+    if ns.stream and ns.locate:
+        parser.error("--locate can't be used with an image read from a pipe")
+    if ns.stream and ns.cache_policy != gptsum.cache.CachePolicy.NONE:
+        parser.error("the cache can't be used with an image read from a pipe")
+    if ns.stream and ns.size is not None:
+        parser.error("--size can't be used with an image read from a pipe")
+    if ns.partition is not None and ns.stream:
+        parser.error("--partition can't be used with an image read from a pipe")
+    if ns.partition is not None and ns.locate:
+        parser.error("--partition can't be used with --locate")
+
+
+def _check_serve_arguments(
+    parser: argparse.ArgumentParser, ns: argparse.Namespace
+) -> None:
+    """Check the arguments of a 'serve' subcommand, setting the default socket."""
+    if not hasattr(socket, "AF_UNIX"):  # pragma: no cover
+        parser.error("serve is not supported on this platform")
+
+    import gptsum.server  # pylint: disable=import-outside-toplevel
+
+    if ns.socket is None:
+        ns.socket = gptsum.server.default_socket()
+        if ns.socket is None:
+            parser.error(
+                "--socket must be given if neither GPTSUM_SOCKET nor "
+                "XDG_RUNTIME_DIR are set"
+            )
+
 
 def main(args: Optional[List[str]] = None) -> None:
     """Run the CLI program."""
-    parser = build_parser()
+    if args is None:
+        args = sys.argv[1:]
+
+    # The top-level parser only has options without values, so the first other
+    # argument is the subcommand
+    command = next((arg for arg in args if not arg.startswith("-")), None)
+    parser = build_parser(command)
     ns = parser.parse_args(args)
 
+    # Not done for other subcommands, which don't need `gptsum.checksum`
+    if hasattr(ns, "version"):
+        _check_checksum_arguments(parser, ns)
+
+    if hasattr(ns, "destination") and ns.size is not None:
+        parser.error("--size can't be used with copy-embed")
+
+    if getattr(ns, "stats_format", None) is not None:
+        ns.stats = ns.stats_format
+
+    if getattr(ns, "progress", False) and getattr(ns, "jobs", 1) != 1:
+        parser.error("--progress can only be used with --jobs=1")
+
+    if hasattr(ns, "images"):
+        ns.batch_images = _batch_images(ns)
+        if not ns.batch_images:
+            parser.error("at least one disk image file must be given")
+        # Only prefix messages with image paths when processing a batch
+        ns.batch_prefix = len(ns.images) > 1 or ns.files0_from is not None
+
+    if hasattr(ns, "tee"):
+        _check_stream_arguments(parser, ns)
+
+    if hasattr(ns, "socket"):
+        _check_serve_arguments(parser, ns)
+
     func = getattr(ns, "func", None)
     if func is not None:
-        func(ns)
+        if not _run_daemon(ns):
+            func(ns)
     else:
         parser.print_usage()
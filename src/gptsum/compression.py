@@ -0,0 +1,273 @@
+"""Support for compressed images.
+
+Compressed images are decompressed on the fly in a separate thread, while the
+decompressed data is hashed in the calling thread, so both run in parallel. The
+decompressed data is passed through a pipe, hence memory use is bounded and no
+scratch space is needed.
+
+.. versionadded:: 0.6.0
+"""
+
+import contextlib
+import enum
+import importlib
+import io
+import os
+import stat
+import threading
+from types import ModuleType
+from typing import Any, BinaryIO, Iterator, List, Optional, cast
+
+from gptsum import gpt
+
+# Size of the chunks of decompressed data written to the pipe at once
+_CHUNK_SIZE = 1024 * 1024
+
+
+class Compression(enum.Enum):
+    """Compression format of an image.
+
+    .. versionadded:: 0.6.0
+    """
+
+    XZ = "xz"
+    GZIP = "gzip"
+    BZIP2 = "bzip2"
+    ZSTD = "zstd"
+    """Only supported on Python 3.14 and later, using :mod:`compression.zstd`."""
+
+
+_MAGIC = {
+    Compression.XZ: b"\xfd7zXZ\0",
+    Compression.GZIP: b"\x1f\x8b",
+    Compression.BZIP2: b"BZh",
+    Compression.ZSTD: b"\x28\xb5\x2f\xfd",
+}
+_GPT_SIGNATURE = b"EFI PART"
+# Number of bytes at the start of an image used to detect its compression format
+_DETECT_SIZE = gpt.MBR_SIZE + len(_GPT_SIGNATURE)
+
+
+class DecompressionError(ValueError):
+    """Decompressing an image failed."""
+
+
+def _zstd() -> Optional[ModuleType]:
+    """Import the standard library :mod:`compression.zstd` module, if available."""
+    try:
+        return importlib.import_module("compression.zstd")
+    except ImportError:  # pragma: py-lt-314
+        return None
+
+
+def detect(fd: int) -> Optional[Compression]:
+    """Detect the compression format of an image file.
+
+    Only regular files are checked. Files which contain a GPT header at the usual
+    location are never considered compressed, even if their boot code happens to
+    start like one.
+
+    :param fd: Readable file descriptor of the image file
+
+    :returns: Compression format, or ``None`` if the file is not compressed
+    """
+    fstat = os.fstat(fd)
+    if not stat.S_ISREG(fstat.st_mode):
+        return None
+
+    size = min(fstat.st_size, _DETECT_SIZE)
+    return _detect(gpt.pread_all(fd, size, 0))
+
+
+def _detect(data: bytes) -> Optional[Compression]:
+    """Detect the compression format of an image from its first bytes."""
+    if data[gpt.MBR_SIZE :] == _GPT_SIGNATURE:
+        return None
+
+    for compression, magic in _MAGIC.items():
+        if data.startswith(magic):
+            return compression
+
+    return None
+
+
+def _open(compression: Compression, fileobj: BinaryIO) -> io.BufferedIOBase:
+    """Open a file object to read decompressed data from.
+
+    The decompression modules are only imported here, so uncompressed images don't
+    pay for importing them.
+    """
+    # pylint: disable=import-outside-toplevel
+    if compression == Compression.XZ:
+        import lzma
+
+        return lzma.LZMAFile(fileobj)
+    if compression == Compression.GZIP:
+        import gzip
+
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    if compression == Compression.BZIP2:
+        import bz2
+
+        return bz2.BZ2File(fileobj)
+
+    zstd = _zstd()
+    if zstd is None:  # pragma: py-lt-314
+        raise DecompressionError("zstd compressed images require Python 3.14 or later")
+
+    return cast(io.BufferedIOBase, zstd.ZstdFile(fileobj))  # pragma: py-gte-314
+
+
+def _enlarge_pipe(fd: int) -> None:
+    """Try to enlarge the buffer of a pipe, to reduce context switches."""
+    try:
+        import fcntl  # pylint: disable=import-outside-toplevel
+    except ImportError:  # pragma: platform-win32
+        return
+
+    option = getattr(fcntl, "F_SETPIPE_SZ", None)
+    if option is not None:  # pragma: platform-darwin, platform-win32
+        try:
+            fcntl.fcntl(fd, option, _CHUNK_SIZE)
+        except OSError:
+            pass
+
+
+@contextlib.contextmanager
+def _piped(fileobj: BinaryIO, compression: Optional[Compression]) -> Iterator[int]:
+    """Copy a file to a pipe in a separate thread, decompressing it if compressed.
+
+    :raises DecompressionError: Decompression failed
+    :raises OSError: Reading an uncompressed file failed
+    """
+    read_fd, write_fd = os.pipe()
+    _enlarge_pipe(write_fd)
+    errors: List[Exception] = []
+
+    def copy() -> None:
+        try:
+            if compression is None:
+                source: BinaryIO = fileobj
+            else:
+                source = cast(BinaryIO, _open(compression, fileobj))
+
+            with source:
+                while True:
+                    data = source.read(_CHUNK_SIZE)
+                    if not data:
+                        break
+
+                    view = memoryview(data)
+                    while len(view) > 0:
+                        view = view[os.write(write_fd, view) :]
+        except BrokenPipeError:
+            # The reader stopped early, and will report why
+            pass
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+        finally:
+            os.close(write_fd)
+
+    thread = threading.Thread(target=copy, name="gptsum-decompress")
+    thread.start()
+
+    try:
+        yield read_fd
+    finally:
+        os.close(read_fd)
+        thread.join()
+
+        if errors:
+            if compression is None:
+                raise errors[0]
+            raise DecompressionError(
+                f"Failed to decompress {compression.value} image: {errors[0]}"
+            ) from errors[0]
+
+
+@contextlib.contextmanager
+def decompressed(fd: int, compression: Optional[Compression]) -> Iterator[int]:
+    """Decompress a file in a separate thread, yielding a pipe to read from.
+
+    The file is read from its current offset. If decompression fails, a
+    :exc:`DecompressionError` is raised when exiting the context, replacing any
+    exception raised by the caller, which is likely caused by the truncated data.
+
+    :param fd: Readable file descriptor of the compressed file
+    :param compression: Compression format of the file. If ``None``, ``fd`` itself
+        is yielded.
+
+    :returns: Context manager yielding a readable file descriptor of the
+        decompressed data
+
+    :raises DecompressionError: Decompression failed
+    """
+    if compression is None:
+        yield fd
+        return
+
+    with open(fd, "rb", closefd=False) as fileobj:
+        with _piped(fileobj, compression) as read_fd:
+            yield read_fd
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Stream of data read from a file descriptor already, followed by the rest."""
+
+    def __init__(self, prefix: bytes, fd: int) -> None:
+        super().__init__()
+        self._prefix = memoryview(prefix)
+        self._fd = fd
+
+    def readable(self) -> bool:
+        """Whether the stream is readable, which it is."""
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        """Read into a buffer, first from the prefix, then from the file."""
+        view = memoryview(buffer).cast("B")
+
+        if len(self._prefix) > 0:
+            cnt = min(len(view), len(self._prefix))
+            view[:cnt] = self._prefix[:cnt]
+            self._prefix = self._prefix[cnt:]
+            return cnt
+
+        data = os.read(self._fd, len(view))
+        view[: len(data)] = data
+        return len(data)
+
+
+@contextlib.contextmanager
+def decompressed_stream(fd: int) -> Iterator[int]:
+    """Detect the compression format of a stream, and decompress it if compressed.
+
+    Unlike :func:`detect`, this works for pipes, by reading the first bytes of the
+    stream. If the stream is a pipe, these are passed on, followed by the rest of
+    the stream, through another pipe by a separate thread, like decompressed data.
+    Regular files are handled like by :func:`decompressed`.
+
+    :param fd: Readable file descriptor of the stream
+    :returns: Context manager yielding a readable file descriptor of the
+        decompressed data
+
+    :raises DecompressionError: Decompression failed
+    """
+    if stat.S_ISREG(os.fstat(fd).st_mode):
+        with decompressed(fd, detect(fd)) as read_fd:
+            yield read_fd
+        return
+
+    chunks = []
+    left = _DETECT_SIZE
+    while left > 0:
+        data = os.read(fd, left)
+        if not data:
+            break
+        chunks.append(data)
+        left -= len(data)
+    prefix = b"".join(chunks)
+
+    with io.BufferedReader(_PrefixedStream(prefix, fd), _CHUNK_SIZE) as fileobj:
+        with _piped(cast(BinaryIO, fileobj), _detect(prefix)) as read_fd:
+            yield read_fd
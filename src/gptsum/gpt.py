@@ -6,12 +6,16 @@
 import binascii
 import contextlib
 import dataclasses
+import itertools
+import operator
 import os
+import stat
 import struct
+import sys
 import uuid
 from pathlib import Path
 from types import TracebackType
-from typing import Optional, Type
+from typing import Callable, List, Mapping, Optional, Tuple, Type, Union, cast
 
 LBA_SIZE = 512
 MBR_SIZE = LBA_SIZE
@@ -33,6 +37,29 @@ _EXPECTED_REVISION = b"\0\0\1\0"
 _EXPECTED_RESERVED = b"\0" * 4
 _EXPECTED_PADDING = b"\0" * _EXPECTED_PADDING_SIZE
 
+# Offset of the CRC32 field in a header, which is zeroed to calculate the CRC32
+_HEADER_CRC32_OFFSET = 8 + 4 + 4
+_HEADER_CRC32_STRUCT = struct.Struct("<I")
+_ZEROED_CRC32 = b"\0" * _HEADER_CRC32_STRUCT.size
+
+# Layout of a partition entry, which may be followed by reserved space
+_PARTITION_ENTRY_STRUCT = struct.Struct("<16s16sQQQ72s")
+assert _PARTITION_ENTRY_STRUCT.size == 128  # noqa: S101
+# Size of the words partition entries are scanned in, see `GPTPartitionTable`
+_WORD_SIZE = struct.calcsize("Q")
+
+_ZERO_GUID_BYTES = bytes(16)
+# Offset of the unique partition GUID in a partition entry
+_UNIQUE_GUID_OFFSET = 16
+
+# Objects exposing their contents using the buffer protocol
+_Buffer = Union[bytes, bytearray, memoryview]
+
+# Linux block device ioctls, see <linux/fs.h>
+_BLKSSZGET = 0x1268
+_BLKPBSZGET = 0x127B
+_BLKGETSIZE64 = 0x80081272
+
 
 class GPTError(Exception):
     """Generic GPT error."""
@@ -62,9 +89,32 @@ class InvalidImageError(ValueError, GPTError):
     """A file which is supposedly a GPT image is not."""
 
 
-@dataclasses.dataclass(frozen=True)
+class EntriesChecksumMismatchError(ValueError, GPTError):
+    """GPT partition entry array checksum mismatch.
+
+    .. versionadded:: 0.6.0
+    """
+
+
+def _header_crc32(raw_header: _Buffer, offset: int = 0) -> int:
+    """Calculate the CRC32 of a raw GPT header, as if its CRC32 field is zeroed."""
+    crc32_start = offset + _HEADER_CRC32_OFFSET
+    crc32_end = crc32_start + _HEADER_CRC32_STRUCT.size
+
+    crc32 = binascii.crc32(raw_header[offset:crc32_start])
+    crc32 = binascii.crc32(_ZEROED_CRC32, crc32)
+    return binascii.crc32(
+        raw_header[crc32_end : offset + _EXPECTED_ACTUAL_HEADER_SIZE], crc32
+    )
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
 class GPTHeader:  # pylint: disable=too-many-instance-attributes
-    """Representation of a GPT header."""
+    """Representation of a GPT header.
+
+    .. versionchanged:: 0.6.0
+       Instances use ``__slots__``.
+    """
 
     current_lba: int
     backup_lba: int
@@ -78,15 +128,16 @@ class GPTHeader:  # pylint: disable=too-many-instance-attributes
 
     @classmethod
     def unpack(  # pylint: disable=too-many-locals
-        cls, raw_header: bytes
+        cls, raw_header: _Buffer
     ) -> "GPTHeader":
         """Unpack a GPT header from its raw encoding.
 
         The given raw header must include all padding, i.e., its length must be
-        512 bytes.
+        512 bytes. It's parsed in place, so a :class:`memoryview` of a larger
+        buffer of bytes can be passed without copying it.
 
         :param raw_header: Raw GPT header
-        :type raw_header: bytes
+        :type raw_header: bytes, bytearray or memoryview
 
         :return: A :class:`GPTHeader` instance representing the raw GPT header
         :rtype: GPTHeader
@@ -96,6 +147,9 @@ class GPTHeader:  # pylint: disable=too-many-instance-attributes
         :raises UnsupportedRevisionError: Unsupported GPT revision
         :raises InvalidFieldError: Invalid GPT field value detected
         :raises HeaderChecksumMismatchError: Header checksum mismatch detected
+
+        .. versionchanged:: 0.6.0
+           Accept any object supporting the buffer protocol.
         """
         if len(raw_header) != GPT_HEADER_SIZE:
             raise InvalidHeaderSizeError(
@@ -118,7 +172,7 @@ class GPTHeader:  # pylint: disable=too-many-instance-attributes
             entry_size,
             entries_crc32,
             padding,
-        ) = _GPT_HEADER_STRUCT.unpack(raw_header)
+        ) = _GPT_HEADER_STRUCT.unpack_from(raw_header)
 
         if signature != _EXPECTED_SIGNATURE:
             raise InvalidSignatureError(
@@ -135,20 +189,13 @@ class GPTHeader:  # pylint: disable=too-many-instance-attributes
                 f"expected {_EXPECTED_ACTUAL_HEADER_SIZE}"
             )
 
-        header = raw_header[:header_size]
-
         if reserved != _EXPECTED_RESERVED:
             raise InvalidFieldError("GPT 'reserved' field has unexpected contents")
 
         if padding != _EXPECTED_PADDING:
             raise InvalidFieldError("GPT header padding has unexpected contents")
 
-        prefix_crc32 = binascii.crc32(header[: 8 + 4 + 4])
-        with_zeroed_crc32_crc32 = binascii.crc32(b"\0" * 4, prefix_crc32)
-        calculated_header_crc32 = binascii.crc32(
-            header[8 + 4 + 4 + 4 :], with_zeroed_crc32_crc32
-        )
-        calculated_header_crc32 &= 0xFFFFFFFF
+        calculated_header_crc32 = _header_crc32(raw_header)
 
         if header_crc32 != calculated_header_crc32:
             raise HeaderChecksumMismatchError(
@@ -176,32 +223,31 @@ class GPTHeader:  # pylint: disable=too-many-instance-attributes
         :return: Serialized representation of the GPT header
         :rtype: bytes
         """
-        if override_crc32 is not None:
-            header_crc32 = override_crc32
-        else:
-            header_with_zero_crc32 = _GPT_ACTUAL_HEADER_STRUCT.pack(
-                _EXPECTED_SIGNATURE,
-                _EXPECTED_REVISION,
-                _EXPECTED_ACTUAL_HEADER_SIZE,
-                0,
-                _EXPECTED_RESERVED,
-                self.current_lba,
-                self.backup_lba,
-                self.first_usable_lba,
-                self.last_usable_lba,
-                self.disk_guid.bytes_le,
-                self.entries_starting_lba,
-                self.num_entries,
-                self.entry_size,
-                self.entries_crc32,
-            )
-            header_crc32 = binascii.crc32(header_with_zero_crc32)
+        buffer = bytearray(GPT_HEADER_SIZE)
+        self.pack_into(buffer, override_crc32=override_crc32)
+        return bytes(buffer)
+
+    def pack_into(
+        self,
+        buffer: Union[bytearray, memoryview],
+        offset: int = 0,
+        override_crc32: Optional[int] = None,
+    ) -> None:
+        """Pack the header in its raw serialized form into a writable buffer.
+
+        :param buffer: Buffer to write the header into
+        :param offset: Offset in the buffer to write the header at
+        :param override_crc32: Use the given value as CRC32 instead of calculating it
 
-        return _GPT_HEADER_STRUCT.pack(
+        .. versionadded:: 0.6.0
+        """
+        _GPT_HEADER_STRUCT.pack_into(
+            buffer,
+            offset,
             _EXPECTED_SIGNATURE,
             _EXPECTED_REVISION,
             _EXPECTED_ACTUAL_HEADER_SIZE,
-            header_crc32,
+            0,
             _EXPECTED_RESERVED,
             self.current_lba,
             self.backup_lba,
@@ -215,6 +261,14 @@ class GPTHeader:  # pylint: disable=too-many-instance-attributes
             _EXPECTED_PADDING,
         )
 
+        header_crc32 = override_crc32
+        if header_crc32 is None:
+            header_crc32 = _header_crc32(buffer, offset)
+
+        _HEADER_CRC32_STRUCT.pack_into(
+            buffer, offset + _HEADER_CRC32_OFFSET, header_crc32
+        )
+
     def is_backup_of(self, other: "GPTHeader") -> bool:
         """Check whether the given GPT header is a backup of this one."""
         return all(
@@ -245,10 +299,241 @@ class GPTHeader:  # pylint: disable=too-many-instance-attributes
         )
 
 
-def pread_all(fd: int, size: int, offset: int) -> bytes:
-    """Use :func:`os.pread` to read data, handling partial reads."""
-    pieces = []
+@dataclasses.dataclass(frozen=True, slots=True)
+class GPTPartition:  # pylint: disable=too-many-instance-attributes
+    """Representation of a used GPT partition entry.
+
+    .. versionadded:: 0.6.0
+    """
+
+    number: int
+    """Number of the partition, i.e., the index of its entry plus one."""
+    type_guid: uuid.UUID
+    """Partition type GUID."""
+    unique_guid: uuid.UUID
+    """Unique partition GUID."""
+    first_lba: int
+    """First LBA of the partition."""
+    last_lba: int
+    """Last LBA of the partition, inclusive."""
+    attributes: int
+    """Attribute flags of the partition."""
+    name: str
+    """Name of the partition."""
+
+    @property
+    def size(self) -> int:
+        """Size of the partition in bytes."""
+        return (self.last_lba - self.first_lba + 1) * LBA_SIZE
+
+
+class GPTPartitionTable:
+    """Partition entry array of a GPT image.
+
+    The entries are kept in their packed form, in a single buffer. Finding the
+    used entries, whose partition type GUID isn't zero, scans the buffer as an
+    array of words, so no Python objects are created for unused entries, and used
+    entries are only decoded when asked for.
+
+    :param raw: Raw partition entry array, which is not copied
+    :param num_entries: Number of entries in the array
+    :param entry_size: Size of every entry in the array
+
+    :raises InvalidFieldError: Invalid entry size
+    :raises InvalidHeaderSizeError: Size of `raw` doesn't match the number of
+        entries and their size
+
+    .. versionadded:: 0.6.0
+    """
+
+    __slots__ = ("_raw", "_num_entries", "_entry_size", "_used")
+
+    def __init__(self, raw: _Buffer, num_entries: int, entry_size: int) -> None:
+        if entry_size < _PARTITION_ENTRY_STRUCT.size or entry_size % _WORD_SIZE != 0:
+            raise InvalidFieldError(f"Invalid GPT partition entry size {entry_size}")
+
+        if len(raw) != num_entries * entry_size:
+            raise InvalidHeaderSizeError(
+                f"GPT partition entry array must be {num_entries * entry_size} bytes"
+            )
+
+        self._raw = raw
+        self._num_entries = num_entries
+        self._entry_size = entry_size
+        self._used: Optional[List[int]] = None
+
+    @classmethod
+    def unpack(cls, raw: _Buffer, header: GPTHeader) -> "GPTPartitionTable":
+        """Unpack the partition entry array described by a GPT header.
+
+        :param raw: Raw partition entry array, which is not copied
+        :param header: GPT header describing the array
+
+        :returns: The partition table
+
+        :raises InvalidFieldError: Invalid entry size
+        :raises InvalidHeaderSizeError: Size of `raw` doesn't match the header
+        :raises EntriesChecksumMismatchError: Entry array checksum mismatch
+        """
+        table = cls(raw, header.num_entries, header.entry_size)
+
+        calculated_crc32 = binascii.crc32(raw)
+        if calculated_crc32 != header.entries_crc32:
+            raise EntriesChecksumMismatchError(
+                f"GPT partition entries CRC32 mismatch, got {calculated_crc32}, "
+                f"expected {header.entries_crc32}"
+            )
+
+        return table
+
+    @property
+    def num_entries(self) -> int:
+        """Number of entries in the array, used or not."""
+        return self._num_entries
+
+    @property
+    def entry_size(self) -> int:
+        """Size of every entry in the array."""
+        return self._entry_size
+
+    def used(self) -> List[int]:
+        """Get the indexes of the used entries.
+
+        :returns: Indexes of the entries whose partition type GUID isn't zero
+        """
+        if self._used is None:
+            words = memoryview(self._raw).cast("B").cast("Q")
+            stride = self._entry_size // _WORD_SIZE
+            # A type GUID is zero if both of its words are
+            nonzero = map(
+                operator.or_, words[0::stride].tolist(), words[1::stride].tolist()
+            )
+            self._used = list(itertools.compress(range(self._num_entries), nonzero))
+
+        return self._used
+
+    def partition(self, index: int) -> Optional[GPTPartition]:
+        """Decode an entry.
+
+        :param index: Index of the entry
+
+        :returns: The partition, or ``None`` if the entry is unused
+
+        :raises IndexError: No such entry
+        """
+        if not 0 <= index < self._num_entries:
+            raise IndexError(f"No GPT partition entry {index}")
+
+        (
+            type_guid,
+            unique_guid,
+            first_lba,
+            last_lba,
+            attributes,
+            name,
+        ) = _PARTITION_ENTRY_STRUCT.unpack_from(self._raw, index * self._entry_size)
+
+        if type_guid == _ZERO_GUID_BYTES:
+            return None
+
+        return GPTPartition(
+            index + 1,
+            uuid.UUID(bytes_le=type_guid),
+            uuid.UUID(bytes_le=unique_guid),
+            first_lba,
+            last_lba,
+            attributes,
+            name.decode("utf-16-le", errors="replace").split("\0", 1)[0],
+        )
+
+    def partitions(self) -> List[GPTPartition]:
+        """Decode all used entries.
+
+        :returns: The used partitions, in the order of their entries
+        """
+        return [cast(GPTPartition, self.partition(index)) for index in self.used()]
+
+    def pack(self) -> bytes:
+        """Pack the partition entry array.
+
+        :returns: Raw partition entry array
+        """
+        return bytes(self._raw)
+
+    def with_unique_guids(self, guids: Mapping[int, uuid.UUID]) -> "GPTPartitionTable":
+        """Construct a copy of the table, with the unique GUIDs of entries replaced.
+
+        :param guids: New unique partition GUIDs, by index of their entry
+
+        :returns: The new partition table
+
+        :raises IndexError: No such entry
+        """
+        raw = bytearray(self._raw)
+
+        for index, guid in guids.items():
+            if not 0 <= index < self._num_entries:
+                raise IndexError(f"No GPT partition entry {index}")
+
+            offset = index * self._entry_size + _UNIQUE_GUID_OFFSET
+            raw[offset : offset + len(_ZERO_GUID_BYTES)] = guid.bytes_le
+
+        return GPTPartitionTable(raw, self._num_entries, self._entry_size)
+
+
+@dataclasses.dataclass(frozen=True)
+class DeviceGeometry:
+    """Geometry of a block device.
+
+    .. versionadded:: 0.6.0
+    """
+
+    size: int
+    """Size of the device in bytes."""
+    logical_block_size: int
+    """Size of the blocks the device can address."""
+    physical_block_size: int
+    """Size of the blocks the device reads and writes internally."""
+
+
+def _is_block_device(fstat: os.stat_result) -> bool:
+    """Check whether a file is a block device."""
+    return stat.S_ISBLK(fstat.st_mode)
+
+
+def device_geometry(fd: int) -> DeviceGeometry:
+    """Get the geometry of a block device.
+
+    On Linux, this uses the `BLKGETSIZE64`, `BLKSSZGET` and `BLKPBSZGET` ioctls.
+    Elsewhere, the size is found by seeking to the end of the device, and blocks
+    of :data:`LBA_SIZE` bytes are assumed.
+
+    :param fd: File descriptor of the block device
+
+    :returns: Geometry of the device
+
+    .. versionadded:: 0.6.0
+    """
+    if sys.platform.startswith("linux"):  # pragma: platform-darwin, platform-win32
+        import fcntl  # pylint: disable=import-outside-toplevel
 
+        (size,) = struct.unpack("=Q", fcntl.ioctl(fd, _BLKGETSIZE64, bytes(8)))
+        (logical,) = struct.unpack("=i", fcntl.ioctl(fd, _BLKSSZGET, bytes(4)))
+        (physical,) = struct.unpack("=I", fcntl.ioctl(fd, _BLKPBSZGET, bytes(4)))
+
+        return DeviceGeometry(size, logical, physical)
+
+    curr = os.lseek(fd, 0, os.SEEK_CUR)  # pragma: no cover
+    try:  # pragma: no cover
+        size = os.lseek(fd, 0, os.SEEK_END)
+    finally:  # pragma: no cover
+        os.lseek(fd, curr, os.SEEK_SET)
+
+    return DeviceGeometry(size, LBA_SIZE, LBA_SIZE)  # pragma: no cover
+
+
+def _pread_function() -> Callable[[int, int, int], bytes]:
+    """Get :func:`os.pread`, or an emulation on platforms lacking it."""
     pread = getattr(os, "pread", None)
     if pread is None:  # pragma: platform-win32
 
@@ -263,6 +548,15 @@ def pread_all(fd: int, size: int, offset: int) -> bytes:
 
         pread = _pread
 
+    return cast(Callable[[int, int, int], bytes], pread)
+
+
+def pread_all(fd: int, size: int, offset: int) -> bytes:
+    """Use :func:`os.pread` to read data, handling partial reads."""
+    pieces = []
+
+    pread = _pread_function()
+
     while size > 0:
         read = pread(fd, size, offset)
         pieces.append(read)
@@ -272,6 +566,51 @@ def pread_all(fd: int, size: int, offset: int) -> bytes:
     return b"".join(pieces)
 
 
+def pread_into(fd: int, buffer: Union[bytearray, memoryview], offset: int) -> int:
+    """Read data into a buffer, handling partial reads.
+
+    This uses :func:`os.preadv` if available, which reads into the buffer without
+    allocating any intermediate objects.
+
+    :param fd: File descriptor to read from
+    :param buffer: Buffer of bytes to fill
+    :param offset: Offset in the file to read at
+
+    :returns: Number of bytes read, which is less than the size of ``buffer`` if the
+        end of the file was reached
+
+    .. versionadded:: 0.6.0
+    """
+    size = len(buffer)
+
+    preadv = getattr(os, "preadv", None)
+    if preadv is not None:  # pragma: platform-win32
+        # Most reads complete at once, so only set up a view if they don't
+        done: int = preadv(fd, [buffer], offset)
+        if done in (0, size):
+            return done
+    else:
+        done = 0
+
+    view = memoryview(buffer)
+    pread = _pread_function()
+
+    while done < size:
+        if preadv is not None:  # pragma: platform-win32
+            len_read = preadv(fd, [view[done:]], offset + done)
+        else:
+            data = pread(fd, size - done, offset + done)
+            len_read = len(data)
+            view[done : done + len_read] = data
+
+        if len_read == 0:
+            break
+
+        done += len_read
+
+    return done
+
+
 def pwrite_all(fd: int, data: bytes, offset: int) -> None:
     """Use :func:`os.pwrite` to write data, handling partial writes."""
     pwrite = getattr(os, "pwrite", None)
@@ -295,7 +634,15 @@ def pwrite_all(fd: int, data: bytes, offset: int) -> None:
 
 
 class GPTImage(contextlib.AbstractContextManager["GPTImage"]):
-    """Wrapper around a GPT-partitioned disk image file."""
+    """Wrapper around a GPT-partitioned disk image file or block device.
+
+    While in a context, the status of the image file and its GPT headers are only
+    retrieved once, and cached. Headers are read into a buffer which is reused
+    across reads and contexts. The cached headers are replaced by the ones written
+    using :meth:`write_gpt_headers`. Partition entry arrays are cached likewise,
+    until headers are written, and replaced by the ones written using
+    :meth:`write_partition_tables`.
+    """
 
     def __init__(
         self,
@@ -303,14 +650,20 @@ class GPTImage(contextlib.AbstractContextManager["GPTImage"]):
         fd: Optional[int] = None,
         path: Optional[Path] = None,
         open_mode: int = os.O_RDWR,
+        size: Optional[int] = None,
     ):
         """Construct a new :class:`GPTImage`.
 
         :param fd: File descriptor to open image file
         :param path: Path to image file to use
         :param open_mode: Mode to use when opening the disk image file
+        :param size: Size of the image, if only a prefix of the file or device
+            contains the image
 
         :raises ValueError: Both or none of `fd` and `path` are provided
+
+        .. versionchanged:: 0.6.0
+           Added the ``size`` argument, and support for block devices.
         """
         if fd is None and path is None:
             raise ValueError("Either fd or path must be given")
@@ -321,6 +674,16 @@ class GPTImage(contextlib.AbstractContextManager["GPTImage"]):
         self._fd = fd
         self._path = path
         self._open_mode = open_mode
+        self._size_override = size
+
+        self._stat: Optional[os.stat_result] = None
+        self._geometry: Optional[DeviceGeometry] = None
+        self._size = 0
+        self._primary: Optional[GPTHeader] = None
+        self._backup: Optional[GPTHeader] = None
+        self._header_buffer = bytearray(GPT_HEADER_SIZE)
+        self._primary_table: Optional[GPTPartitionTable] = None
+        self._backup_table: Optional[GPTPartitionTable] = None
 
     def fileno(self) -> int:
         """Get a file descriptor for the image file.
@@ -334,6 +697,70 @@ class GPTImage(contextlib.AbstractContextManager["GPTImage"]):
 
         return self._fd
 
+    def fstat(self) -> os.stat_result:
+        """Get the status of the image file, as retrieved when entering the context.
+
+        :returns: Status of the image file
+
+        :raises RuntimeError: Not in a context
+
+        .. versionadded:: 0.6.0
+        """
+        if self._stat is None:
+            raise RuntimeError("No open file descriptor")  # pragma: no cover
+
+        return self._stat
+
+    @property
+    def size(self) -> int:
+        """Size of the image, as retrieved when entering the context.
+
+        This is the size of the file or block device, unless overridden.
+
+        .. versionadded:: 0.6.0
+        """
+        self.fstat()
+        return self._size
+
+    @property
+    def geometry(self) -> Optional[DeviceGeometry]:
+        """Geometry of the block device, or ``None`` if the image is a file.
+
+        .. versionadded:: 0.6.0
+        """
+        self.fstat()
+        return self._geometry
+
+    def _image_size(self, fd: int, fstat: os.stat_result) -> int:
+        """Get the size of the image, checking it against the file or device.
+
+        :raises InvalidImageError: Image doesn't fit the file or device
+        """
+        if _is_block_device(fstat):
+            geometry = device_geometry(fd)
+            if geometry.logical_block_size != LBA_SIZE:
+                raise InvalidImageError(
+                    f"Only block devices with {LBA_SIZE} byte logical blocks are "
+                    f"supported, got {geometry.logical_block_size}"
+                )
+
+            self._geometry = geometry
+            size = geometry.size
+        else:
+            size = fstat.st_size
+
+        if self._size_override is None:
+            return size
+
+        if self._size_override % LBA_SIZE != 0:
+            raise InvalidImageError(f"Image size must be a multiple of {LBA_SIZE}")
+        if self._size_override > size:
+            raise InvalidImageError(
+                f"Image size {self._size_override} exceeds the file size {size}"
+            )
+
+        return self._size_override
+
     def __enter__(self) -> "GPTImage":
         """Open the disk image for use in a context.
 
@@ -353,11 +780,20 @@ class GPTImage(contextlib.AbstractContextManager["GPTImage"]):
                 | self._open_mode,
             )
 
-        if os.fstat(self._fd).st_size < MBR_SIZE + GPT_HEADER_SIZE + GPT_HEADER_SIZE:
+        try:
+            fstat = os.fstat(self._fd)
+            self._size = self._image_size(self._fd, fstat)
+
+            if self._size < MBR_SIZE + GPT_HEADER_SIZE + GPT_HEADER_SIZE:
+                raise InvalidImageError("Image file too small to be a valid GPT image")
+        except BaseException:
+            self._geometry = None
             if self._path is not None:
                 os.close(self._fd)
                 self._fd = None
-            raise InvalidImageError("Image file too small to be a valid GPT image")
+            raise
+
+        self._stat = fstat
 
         return self
 
@@ -368,6 +804,13 @@ class GPTImage(contextlib.AbstractContextManager["GPTImage"]):
         traceback: Optional[TracebackType],
     ) -> None:
         """Close the disk image when exiting a context."""
+        self._stat = None
+        self._geometry = None
+        self._primary = None
+        self._backup = None
+        self._primary_table = None
+        self._backup_table = None
+
         if self._path is not None and self._fd is not None:
             os.close(self._fd)
             self._fd = None
@@ -375,19 +818,90 @@ class GPTImage(contextlib.AbstractContextManager["GPTImage"]):
     def _read_gpt_header(self, offset: int) -> GPTHeader:
         if self._fd is None:
             raise RuntimeError("No open file descriptor")  # pragma: no cover
-        raw_header = pread_all(self._fd, GPT_HEADER_SIZE, offset)
-        return GPTHeader.unpack(raw_header)
+        read = pread_into(self._fd, self._header_buffer, offset)
+        if read != GPT_HEADER_SIZE:
+            raise InvalidImageError("Image file ended before its GPT header")
+        return GPTHeader.unpack(self._header_buffer)
 
     def read_primary_gpt_header(self) -> GPTHeader:
         """Read the primary GPT header from the image."""
-        return self._read_gpt_header(MBR_SIZE)
+        if self._primary is None:
+            self._primary = self._read_gpt_header(MBR_SIZE)
+        return self._primary
 
     def read_backup_gpt_header(self) -> GPTHeader:
         """Read the backup GPT header from the image."""
+        if self._backup is None:
+            self._backup = self._read_gpt_header(self.size - GPT_HEADER_SIZE)
+        return self._backup
+
+    def _partition_table_location(self, header: GPTHeader) -> Tuple[int, int]:
+        """Get the offset and size of the partition entry array of a header.
+
+        :raises InvalidImageError: The array doesn't fit between the header and the
+            usable space of the image
+        """
+        if header.current_lba < header.backup_lba:
+            start, end = header.current_lba + 1, header.first_usable_lba
+        else:
+            start, end = header.last_usable_lba + 1, header.current_lba
+
+        offset = header.entries_starting_lba * LBA_SIZE
+        size = header.num_entries * header.entry_size
+        if not (
+            start <= header.entries_starting_lba
+            and offset + size <= end * LBA_SIZE <= self.size
+        ):
+            raise InvalidImageError(
+                "GPT partition entries don't fit between the header and the "
+                "usable space"
+            )
+
+        return (offset, size)
+
+    def _read_partition_table(self, header: GPTHeader) -> GPTPartitionTable:
+        """Read the partition entry array described by a header, in a single read.
+
+        :raises InvalidImageError: The array doesn't fit between the header and the
+            usable space of the image
+        """
         if self._fd is None:
             raise RuntimeError("No open file descriptor")  # pragma: no cover
-        size = os.fstat(self._fd).st_size
-        return self._read_gpt_header(size - GPT_HEADER_SIZE)
+
+        offset, size = self._partition_table_location(header)
+        raw = bytearray(size)
+        if pread_into(self._fd, raw, offset) != size:
+            raise InvalidImageError("Image file ended before its partition entries")
+
+        return GPTPartitionTable.unpack(raw, header)
+
+    def read_primary_partition_table(self) -> GPTPartitionTable:
+        """Read the partition entry array described by the primary GPT header.
+
+        :raises InvalidImageError: The array doesn't fit in the image
+        :raises EntriesChecksumMismatchError: Entry array checksum mismatch
+
+        .. versionadded:: 0.6.0
+        """
+        if self._primary_table is None:
+            self._primary_table = self._read_partition_table(
+                self.read_primary_gpt_header()
+            )
+        return self._primary_table
+
+    def read_backup_partition_table(self) -> GPTPartitionTable:
+        """Read the partition entry array described by the backup GPT header.
+
+        :raises InvalidImageError: The array doesn't fit in the image
+        :raises EntriesChecksumMismatchError: Entry array checksum mismatch
+
+        .. versionadded:: 0.6.0
+        """
+        if self._backup_table is None:
+            self._backup_table = self._read_partition_table(
+                self.read_backup_gpt_header()
+            )
+        return self._backup_table
 
     def validate(self) -> None:
         """Validate the GPT headers found in the image.
@@ -400,11 +914,14 @@ class GPTImage(contextlib.AbstractContextManager["GPTImage"]):
         if not gpt2.is_backup_of(gpt1) or not gpt1.is_backup_of(gpt2):
             raise InvalidImageError("GPT headers don't match")
 
-    def write_gpt_headers(self, primary: GPTHeader, backup: GPTHeader) -> None:
+    def write_gpt_headers(
+        self, primary: GPTHeader, backup: GPTHeader, *, sync: bool = True
+    ) -> None:
         """Write primary and backup GPT headers to the image.
 
         :param primary: Primary GPT header to write
         :param backup: Backup GPT header to write
+        :param sync: Whether to `fsync` the image after writing the headers
 
         :raises RuntimeError: No open file descriptor
         :raises ValueError: Given headers are not backups of each other
@@ -420,8 +937,9 @@ class GPTImage(contextlib.AbstractContextManager["GPTImage"]):
         if primary.current_lba != 1:
             raise ValueError("Primary header has invalid 'current_lba', expected 1")
 
-        size = os.fstat(self._fd).st_size
-        expected_backup_lba = size // 512 - 1
+        # Don't rely on the cached status: make sure we never write at a wrong offset
+        size = self._image_size(self._fd, os.fstat(self._fd))
+        expected_backup_lba = size // LBA_SIZE - 1
         if backup.current_lba != expected_backup_lba:
             raise ValueError(
                 "Backup header has invalid 'current_lba', "
@@ -433,14 +951,70 @@ class GPTImage(contextlib.AbstractContextManager["GPTImage"]):
 
         pwrite_all(self._fd, gpt1, primary.current_lba * LBA_SIZE)
         pwrite_all(self._fd, gpt2, backup.current_lba * LBA_SIZE)
-        os.fsync(self._fd)
+        if sync:
+            os.fsync(self._fd)
+
+        self._primary = primary
+        self._backup = backup
+        # The new headers may describe other partition entry arrays
+        self._primary_table = None
+        self._backup_table = None
+
+    def write_partition_tables(
+        self, table: GPTPartitionTable, *, sync: bool = True
+    ) -> None:
+        """Write the primary and backup partition entry arrays to the image.
+
+        Both arrays are replaced by `table`, then the GPT headers are updated with
+        its CRC32, and written using :meth:`write_gpt_headers`.
+
+        :param table: Partition entry array to write
+        :param sync: Whether to `fsync` the image after writing the headers
+
+        :raises RuntimeError: No open file descriptor
+        :raises ValueError: Number or size of entries differs from the headers
+        :raises InvalidImageError: An array doesn't fit in the image
+
+        .. versionadded:: 0.6.0
+        """
+        if self._fd is None:
+            raise RuntimeError("No open file descriptor")  # pragma: no cover
+
+        primary = self.read_primary_gpt_header()
+        backup = self.read_backup_gpt_header()
+
+        if (table.num_entries, table.entry_size) != (
+            primary.num_entries,
+            primary.entry_size,
+        ):
+            raise ValueError(
+                "Partition entry array doesn't match the GPT headers, expected "
+                f"{primary.num_entries} entries of {primary.entry_size} bytes"
+            )
+
+        raw = table.pack()
+        entries_crc32 = binascii.crc32(raw)
+
+        for header in [primary, backup]:
+            offset, _ = self._partition_table_location(header)
+            pwrite_all(self._fd, raw, offset)
+
+        self.write_gpt_headers(
+            dataclasses.replace(primary, entries_crc32=entries_crc32),
+            dataclasses.replace(backup, entries_crc32=entries_crc32),
+            sync=sync,
+        )
+
+        self._primary_table = table
+        self._backup_table = table
 
-    def update_guid(self, guid: uuid.UUID) -> None:
+    def update_guid(self, guid: uuid.UUID, *, sync: bool = True) -> None:
         """Update the label GUID of the image to some new UUID.
 
         The new GPT headers are written to the image.
 
         :param guid: New label GUID to write to the disk image
+        :param sync: Whether to `fsync` the image after writing the headers
         """
         primary = self.read_primary_gpt_header()
         backup = self.read_backup_gpt_header()
@@ -448,4 +1022,4 @@ class GPTImage(contextlib.AbstractContextManager["GPTImage"]):
         new_primary = primary.with_new_guid(guid)
         new_backup = backup.with_new_guid(guid)
 
-        self.write_gpt_headers(new_primary, new_backup)
+        self.write_gpt_headers(new_primary, new_backup, sync=sync)
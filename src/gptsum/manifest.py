@@ -0,0 +1,217 @@
+"""Manifests of chunk digests, used to locate damaged regions of an image.
+
+A manifest records the checksum of an image, as well as the digests of all its
+chunks (see :func:`gptsum.checksum.calculate_chunks`), at the time the checksum was
+embedded. Comparing the chunk digests of an image against its manifest reveals which
+byte ranges changed since.
+
+.. versionadded:: 0.6.0
+"""
+
+import dataclasses
+import struct
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+from gptsum import checksum
+
+_MAGIC = b"GPTSUMMF"
+_FORMAT = 1
+# Magic, format, checksum version, checksum algorithm, chunk size, image size,
+# checksum and number of chunks
+_HEADER = struct.Struct("<8sBBHIQ16sQ")
+_DIGEST_SIZE = 16
+# Identifiers of checksum algorithms. Manifests written before algorithms were
+# recorded contain 0 (reserved) in their place, i.e., Blake2b.
+_ALGORITHMS = {
+    checksum.Algorithm.BLAKE2B: 0,
+    checksum.Algorithm.BLAKE2S: 1,
+    checksum.Algorithm.SHA256: 2,
+    checksum.Algorithm.BLAKE3: 3,
+}
+
+SUFFIX = ".gptsum-manifest"
+"""Suffix of the default manifest file name of an image, see :func:`default_path`."""
+
+
+class InvalidManifestError(ValueError):
+    """A file which is supposedly a manifest is not."""
+
+
+def default_path(path: Path) -> Path:
+    """Get the default path of the manifest of an image.
+
+    >>> default_path(Path("disk.img")).name
+    'disk.img.gptsum-manifest'
+
+    :param path: Path of the image
+
+    :returns: Path of the manifest, next to the image
+    """
+    return path.with_name(path.name + SUFFIX)
+
+
+@dataclasses.dataclass(frozen=True)
+class Manifest:
+    """Checksum and chunk digests of an image."""
+
+    version: int
+    """Checksum version of :attr:`digest`."""
+    digest: bytes
+    """Checksum of the image."""
+    size: int
+    """Size of the image in bytes."""
+    chunk_size: int
+    """Size of the chunks of the image in bytes."""
+    chunk_digests: Sequence[bytes]
+    """Digests of all chunks of the image."""
+    algorithm: checksum.Algorithm = checksum.DEFAULT_ALGORITHM
+    """Digest algorithm of :attr:`digest`.
+
+    Chunk digests are always calculated using Blake2b.
+    """
+
+    def pack(self) -> bytes:
+        """Pack the manifest into its binary representation.
+
+        :returns: Binary representation of the manifest
+        """
+        header = _HEADER.pack(
+            _MAGIC,
+            _FORMAT,
+            self.version,
+            _ALGORITHMS[self.algorithm],
+            self.chunk_size,
+            self.size,
+            self.digest,
+            len(self.chunk_digests),
+        )
+
+        return header + b"".join(self.chunk_digests)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "Manifest":
+        """Unpack the binary representation of a manifest.
+
+        :param data: Binary representation of a manifest
+
+        :returns: Unpacked manifest
+
+        :raises InvalidManifestError: Data is not a valid manifest
+        """
+        if len(data) < _HEADER.size:
+            raise InvalidManifestError("Manifest is truncated")
+
+        (
+            magic,
+            fmt,
+            version,
+            algorithm_id,
+            chunk_size,
+            size,
+            digest,
+            count,
+        ) = _HEADER.unpack_from(data)
+
+        if magic != _MAGIC:
+            raise InvalidManifestError("Invalid manifest signature")
+        if fmt != _FORMAT:
+            raise InvalidManifestError(f"Unsupported manifest format {fmt}")
+
+        algorithms = {value: key for (key, value) in _ALGORITHMS.items()}
+        if algorithm_id not in algorithms:
+            raise InvalidManifestError(f"Unknown checksum algorithm {algorithm_id}")
+        if chunk_size == 0 or count != max(1, -(-size // chunk_size)):
+            raise InvalidManifestError("Manifest chunks don't cover the image")
+        if len(data) != _HEADER.size + count * _DIGEST_SIZE:
+            raise InvalidManifestError("Manifest is truncated")
+
+        chunk_digests = [
+            data[offset : offset + _DIGEST_SIZE]
+            for offset in range(_HEADER.size, len(data), _DIGEST_SIZE)
+        ]
+
+        return cls(
+            version, digest, size, chunk_size, chunk_digests, algorithms[algorithm_id]
+        )
+
+    @classmethod
+    def read(cls, path: Path) -> "Manifest":
+        """Read a manifest file.
+
+        :param path: Path of the manifest file
+
+        :returns: Manifest read from the file
+
+        :raises InvalidManifestError: File is not a valid manifest
+        """
+        return cls.unpack(path.read_bytes())
+
+    def write(self, path: Path) -> None:
+        """Write the manifest to a file.
+
+        The file is replaced atomically, so a concurrent reader never sees a partial
+        manifest.
+
+        :param path: Path of the manifest file
+        """
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_bytes(self.pack())
+        tmp.replace(path)
+
+    def differences(self, chunk_digests: Sequence[bytes]) -> List[Tuple[int, int]]:
+        """Get the byte ranges of an image whose chunk digests differ.
+
+        Adjacent differing chunks are merged into a single range.
+
+        :param chunk_digests: Current digests of all chunks of the image
+
+        :returns: Start and end offsets of all byte ranges which changed
+
+        :raises ValueError: Number of chunk digests doesn't match the manifest
+        """
+        if len(chunk_digests) != len(self.chunk_digests):
+            raise ValueError(
+                f"Expected {len(self.chunk_digests)} chunk digests, "
+                f"got {len(chunk_digests)}"
+            )
+
+        ranges: List[Tuple[int, int]] = []
+
+        for index, (expected, actual) in enumerate(
+            zip(self.chunk_digests, chunk_digests)
+        ):
+            if expected == actual:
+                continue
+
+            start = index * self.chunk_size
+            end = min(start + self.chunk_size, self.size)
+
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+
+        return ranges
+
+
+def create(
+    version: int,
+    digest: bytes,
+    size: int,
+    chunk_digests: Sequence[bytes],
+    algorithm: checksum.Algorithm = checksum.DEFAULT_ALGORITHM,
+) -> Manifest:
+    """Create the manifest of an image, using the current chunk size.
+
+    :param version: Checksum version, one of :data:`gptsum.checksum.VERSIONS`
+    :param digest: Checksum of the image
+    :param size: Size of the image in bytes
+    :param chunk_digests: Digests of all chunks of the image
+    :param algorithm: Digest algorithm of the checksum
+
+    :returns: Manifest of the image
+    """
+    return Manifest(
+        version, digest, size, checksum.CHUNK_SIZE, list(chunk_digests), algorithm
+    )
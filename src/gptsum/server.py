@@ -0,0 +1,378 @@
+"""A daemon serving requests over a Unix socket, and a client to talk to it.
+
+Starting the interpreter and importing :mod:`gptsum` dominates the cost of
+header-only commands like ``get-guid``. A daemon started using ``gptsum serve``
+keeps a pool of worker threads, and their read buffers, around. The CLI sends its
+requests to the daemon when its socket exists, see :func:`default_socket`.
+
+The protocol is line-based: a client sends a request as a JSON object on a line,
+and the daemon replies with a JSON object on a line, in order. Many requests can be
+sent over a single connection. Every request has a ``command`` (``get-guid``,
+``verify``, ``embed`` or ``calculate-expected-guid``) and the absolute ``path`` of
+an image, and optionally a ``size``. Requests hashing an image can contain
+``version``, ``algorithm``, ``threads``, ``read_strategy``, ``buffer_size``,
+``queue_depth``, ``page_cache`` and ``page_cache_window``, ``verify`` and
+``calculate-expected-guid`` requests a ``cache_policy``, ``verify`` requests
+``locate`` and a ``partition`` number, and ``embed`` requests ``manifest`` and
+``partitions``. If a ``verify`` request has neither a ``version`` nor an
+``algorithm``, those recorded when embedding are used, like in :func:`gptsum.verify`.
+
+A successful reply contains the ``guid`` of the image, if any. A failed reply
+contains an ``error`` message. If verification failed, it also contains the
+``expected`` and ``actual`` GUIDs, and the ``damaged`` byte ranges, if any.
+
+The daemon runs with the privileges of the user who started it. Its socket is
+only accessible by this user.
+
+.. versionadded:: 0.6.0
+"""
+
+import json
+import os
+import socket
+import socketserver
+import stat
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+import gptsum
+
+# The CLI imports this module to find the daemon socket, also when no daemon runs,
+# and only the daemon needs these, see `gptsum.__getattr__`
+if TYPE_CHECKING:  # pragma: no cover
+    import gptsum.cache
+    import gptsum.checksum
+    import gptsum.compression
+
+# Environment variable overriding the path of the daemon socket
+_SOCKET_ENV = "GPTSUM_SOCKET"
+
+# Request and reply messages
+_Message = Dict[str, Any]
+
+
+class RemoteError(Exception):
+    """Error raised by the daemon when handling a request."""
+
+
+def default_socket() -> Optional[Path]:
+    """Get the default path of the daemon socket.
+
+    This is the value of the ``GPTSUM_SOCKET`` environment variable if set, or
+    ``gptsum.sock`` in ``XDG_RUNTIME_DIR`` otherwise. Setting ``GPTSUM_SOCKET`` to
+    an empty string disables the daemon.
+
+    :returns: Path of the daemon socket, or ``None`` if there is none
+    """
+    path = os.environ.get(_SOCKET_ENV)
+    if path is not None:
+        return Path(path) if path else None
+
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    return Path(runtime_dir, "gptsum.sock") if runtime_dir else None
+
+
+def _read_options(request: _Message) -> "gptsum.checksum.ReadOptions":
+    """Get the read options of a request."""
+    defaults = gptsum.checksum.ReadOptions()
+    return gptsum.checksum.ReadOptions(
+        strategy=gptsum.checksum.ReadStrategy(
+            request.get("read_strategy", defaults.strategy.value)
+        ),
+        buffer_size=request.get("buffer_size", defaults.buffer_size),
+        queue_depth=request.get("queue_depth", defaults.queue_depth),
+        page_cache=gptsum.checksum.PageCachePolicy(
+            request.get("page_cache", defaults.page_cache.value)
+        ),
+        page_cache_window=request.get("page_cache_window", defaults.page_cache_window),
+    )
+
+
+def _algorithm(request: _Message) -> Optional["gptsum.checksum.Algorithm"]:
+    """Get the digest algorithm of a request, if given."""
+    algorithm = request.get("algorithm")
+    return None if algorithm is None else gptsum.checksum.Algorithm(algorithm)
+
+
+def _calculate_expected_guid(request: _Message, path: Path) -> uuid.UUID:
+    """Calculate the expected GUID of an image, which may be compressed."""
+    with open(path, "rb") as fd:
+        compression = gptsum.compression.detect(fd.fileno())
+        if compression is not None:
+            if request.get("size") is not None:
+                raise ValueError("The size of compressed images can't be overridden")
+
+            return gptsum.calculate_expected_guid_stream(
+                fd.fileno(),
+                version=request.get("version"),
+                algorithm=_algorithm(request),
+                read_options=_read_options(request),
+                compression=compression,
+            )
+
+        return gptsum.calculate_expected_guid(
+            fd=fd.fileno(),
+            version=request.get("version"),
+            algorithm=_algorithm(request),
+            threads=request.get("threads"),
+            read_options=_read_options(request),
+            cache_policy=gptsum.cache.CachePolicy(request.get("cache_policy", "none")),
+            size=request.get("size"),
+        )
+
+
+def _error_reply(error: Exception) -> _Message:
+    """Build the reply to a failed request."""
+    reply: _Message = {"error": str(error)}
+
+    if isinstance(error, gptsum.VerificationFailure):
+        reply["expected"] = str(error.expected)
+        reply["actual"] = str(error.actual)
+        reply["damaged"] = [list(damaged) for damaged in error.damaged]
+
+    return reply
+
+
+def handle_request(request: _Message) -> _Message:
+    """Handle a request, see the protocol described in :mod:`gptsum.server`.
+
+    :param request: Request to handle
+
+    :returns: Reply to the request
+    """
+    try:
+        command = request["command"]
+        path = Path(request["path"])
+        if not path.is_absolute():
+            raise ValueError(f"Path must be absolute: {path}")
+
+        if command == "get-guid":
+            guid = gptsum.get_guid(path=path, size=request.get("size"))
+            return {"guid": str(guid)}
+
+        if command == "calculate-expected-guid":
+            return {"guid": str(_calculate_expected_guid(request, path))}
+
+        kwargs: Dict[str, Any] = {
+            "jobs": 1,
+            "version": request.get("version"),
+            "algorithm": _algorithm(request),
+            "threads": request.get("threads"),
+            "read_options": _read_options(request),
+            "size": request.get("size"),
+        }
+
+        if command == "verify":
+            (result,) = gptsum.verify_many(
+                [path],
+                cache_policy=gptsum.cache.CachePolicy(
+                    request.get("cache_policy", "none")
+                ),
+                locate=request.get("locate", False),
+                partition=request.get("partition"),
+                **kwargs,
+            )
+        elif command == "embed":
+            (result,) = gptsum.embed_many(
+                [path],
+                write_manifests=request.get("manifest", False),
+                partitions=request.get("partitions", False),
+                **kwargs,
+            )
+        else:
+            raise ValueError(f"Unknown command: {command}")
+    except (KeyError, TypeError) as exc:
+        return {"error": f"Invalid request: {exc!r}"}
+    except (OSError, ValueError) as exc:
+        return _error_reply(exc)
+    except Exception as exc:  # pylint: disable=broad-except
+        # Reply rather than dropping the connection, and the other requests on it
+        return {"error": f"Internal error: {exc!r}"}
+
+    return {} if result.error is None else _error_reply(result.error)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handle the requests sent over a connection to the daemon."""
+
+    def handle(self) -> None:
+        """Reply to every request line, until the client disconnects."""
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError as exc:
+                reply: _Message = {"error": f"Invalid request: {exc}"}
+            else:
+                if isinstance(request, dict):
+                    reply = handle_request(request)
+                else:
+                    reply = {"error": "Invalid request: not an object"}
+
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+def _remove_stale_socket(path: Path) -> None:
+    """Remove a socket left behind by a daemon which didn't exit cleanly.
+
+    :raises RuntimeError: A daemon is listening on the socket
+    """
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+
+    try:
+        with Client(path):
+            pass
+    except ConnectionRefusedError:
+        path.unlink()
+    else:
+        raise RuntimeError(f"A gptsum daemon is listening on {path} already")
+
+
+class Server(socketserver.UnixStreamServer):
+    """Daemon serving requests over a Unix socket.
+
+    Connections are handled by a pool of worker threads, which is kept around
+    across connections. The socket is removed when the server is closed.
+
+    :param path: Path of the socket to listen on
+    :param workers: Number of connections handled concurrently, or ``None`` for
+        the default of :class:`concurrent.futures.ThreadPoolExecutor`
+
+    :raises RuntimeError: Another daemon is listening on the socket already
+    """
+
+    def __init__(self, path: Path, workers: Optional[int] = None) -> None:
+        self._path = path
+        self._bound = False
+        _remove_stale_socket(path)
+
+        import concurrent.futures  # pylint: disable=import-outside-toplevel
+
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="gptsum-worker"
+        )
+        super().__init__(str(path), _RequestHandler)
+
+    def server_bind(self) -> None:
+        """Bind the socket, only allowing access by the current user."""
+        umask = os.umask(0o077)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+        self._bound = True
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        """Handle a connection in the worker pool."""
+        self._pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request: Any, client_address: Any) -> None:
+        """Handle a connection in a worker thread."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:  # pylint: disable=broad-except
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        """Close the socket and remove it, then wait for connections to finish."""
+        super().server_close()
+        if self._bound:
+            self._path.unlink(missing_ok=True)
+        self._pool.shutdown(wait=True)
+
+
+def serve(path: Path, workers: Optional[int] = None) -> None:
+    """Run a daemon serving requests on a Unix socket, until interrupted.
+
+    :param path: Path of the socket to listen on
+    :param workers: Number of connections handled concurrently
+    """
+    with Server(path, workers) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+class Client:
+    """Client sending requests to a daemon over a connection.
+
+    :param path: Path of the daemon socket
+
+    :raises OSError: Connecting to the daemon failed
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.connect(str(path))
+        except OSError:
+            self._sock.close()
+            raise
+        self._file = self._sock.makefile("rwb")
+
+    def __enter__(self) -> "Client":
+        """Use the client in a context, closing the connection when done.
+
+        :returns: `self`
+        """
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close the connection."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._file.close()
+        self._sock.close()
+
+    def request(self, request: _Message) -> _Message:
+        """Send a request, and wait for its reply.
+
+        :param request: Request to send
+
+        :returns: Reply to the request
+
+        :raises ConnectionError: The daemon closed the connection
+        """
+        self._file.write(json.dumps(request).encode() + b"\n")
+        self._file.flush()
+
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("The gptsum daemon closed the connection")
+
+        reply: _Message = json.loads(line)
+        return reply
+
+
+def reply_error(reply: _Message) -> Optional[Exception]:
+    """Get the error of a failed request from its reply.
+
+    :param reply: Reply to a request
+
+    :returns: A :class:`gptsum.VerificationFailure` if verification failed, a
+        :class:`RemoteError` if the request failed otherwise, or ``None``
+    """
+    error = reply.get("error")
+    if error is None:
+        return None
+
+    if "expected" in reply:
+        damaged: Tuple[Tuple[int, int], ...] = tuple(
+            (start, end) for (start, end) in reply["damaged"]
+        )
+        return gptsum.VerificationFailure(
+            uuid.UUID(reply["expected"]), uuid.UUID(reply["actual"]), damaged
+        )
+
+    return RemoteError(error)
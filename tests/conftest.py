@@ -1,6 +1,7 @@
 """Global definitions for pytest tests."""
 
 import io
+import os
 import shutil
 import tempfile
 import uuid
@@ -9,11 +10,37 @@ from typing import TYPE_CHECKING, Callable, Iterator, cast
 
 import pytest
 
+from gptsum import gpt
+
 TESTDATA_DISK = Path(__file__).parent / "testdata" / "disk"
 TESTDATA_DISK_GUID = uuid.UUID("66E0318D-A103-9549-8583-80E8ABCD4CD8")
 
 TESTDATA_EMBEDDED_DISK = Path(__file__).parent / "testdata" / "embedded-disk"
 TESTDATA_EMBEDDED_DISK_GUID = uuid.UUID("D4750646-01FD-2608-959F-159017007377")
+# Version 2 (tree) checksum of `TESTDATA_DISK` and `TESTDATA_EMBEDDED_DISK`
+TESTDATA_DISK_V2_GUID = uuid.UUID("F388B220-2C57-EAF8-C201-3E723EE72554")
+
+# Partitions written to copies of `conftest.TESTDATA_DISK`, leaving entry 2 unused
+PARTITIONS = [
+    gpt.GPTPartition(
+        1,
+        uuid.UUID("0fc63daf-8483-4772-8e79-3d69d8477de4"),
+        uuid.UUID("5f1e2d3c-4b5a-4697-8877-665544332211"),
+        2048,
+        3071,
+        0,
+        "root",
+    ),
+    gpt.GPTPartition(
+        3,
+        uuid.UUID("c12a7328-f81f-11d2-ba4b-00a0c93ec93b"),
+        uuid.UUID("11223344-5566-4788-99aa-bbccddeeff00"),
+        3072,
+        4062,
+        1 << 63,
+        "EFI system partition",
+    ),
+]
 
 
 @pytest.fixture
@@ -37,3 +64,28 @@ def disk_image(tmp_path: Path) -> Iterator[Path]:
 
         tmp.close()
         yield Path(tmp.name)
+
+
+@pytest.fixture
+def sparse_disk_image(tmp_path: Path) -> Path:
+    """Return the path to a copy of `TESTDATA_DISK` with holes for all-zero blocks."""
+    block_size = 4096
+    path = tmp_path / "sparse-disk"
+
+    with open(TESTDATA_DISK, "rb") as disk, open(path, "wb") as sparse:
+        size = os.fstat(disk.fileno()).st_size
+        sparse.truncate(size)
+
+        for offset in range(0, size, block_size):
+            block = disk.read(block_size)
+            if block.count(0) != len(block):
+                sparse.seek(offset)
+                sparse.write(block)
+
+    return path
+
+
+@pytest.fixture(autouse=True)
+def _no_daemon(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Don't send CLI requests to a daemon which may run on the host."""
+    monkeypatch.setenv("GPTSUM_SOCKET", "")
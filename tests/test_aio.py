@@ -0,0 +1,171 @@
+"""Tests for the :mod:`gptsum.aio` module."""
+
+import asyncio
+import concurrent.futures
+import threading
+from pathlib import Path
+from typing import List
+
+import pytest
+from pytest_mock import MockerFixture
+
+import gptsum
+import gptsum.aio
+from gptsum import checksum
+from tests import conftest, utils
+
+
+def test_api(disk_image: Path) -> None:
+    """Test the coroutines of :mod:`gptsum.aio`."""
+
+    async def run() -> None:
+        guid = await gptsum.aio.get_guid(path=disk_image)
+        assert guid == conftest.TESTDATA_DISK_GUID
+
+        with pytest.raises(gptsum.VerificationFailure):
+            await gptsum.aio.verify(path=disk_image)
+
+        expected = await gptsum.aio.calculate_expected_guid(path=disk_image)
+        assert expected == conftest.TESTDATA_EMBEDDED_DISK_GUID
+
+        await gptsum.aio.embed(path=disk_image)
+        await gptsum.aio.verify(path=disk_image)
+
+        sha256 = checksum.Algorithm.SHA256
+        expected = await gptsum.aio.calculate_expected_guid(
+            path=disk_image, algorithm=sha256
+        )
+        assert expected != conftest.TESTDATA_EMBEDDED_DISK_GUID
+        with pytest.raises(gptsum.VerificationFailure):
+            await gptsum.aio.verify(path=disk_image, algorithm=sha256)
+
+    asyncio.run(run())
+
+    assert disk_image.read_bytes() == conftest.TESTDATA_EMBEDDED_DISK.read_bytes()
+
+
+def test_recorded_algorithm(disk_image: Path) -> None:
+    """Test :func:`gptsum.aio.verify` using the algorithm recorded when embedding."""
+    sha256 = checksum.Algorithm.SHA256
+
+    async def run() -> None:
+        await gptsum.aio.embed(path=disk_image, algorithm=sha256)
+        await gptsum.aio.verify(path=disk_image)
+
+        with pytest.raises(gptsum.VerificationFailure):
+            await gptsum.aio.verify(path=disk_image, version=checksum.DEFAULT_VERSION)
+
+    asyncio.run(run())
+
+
+def test_partitions(disk_image: Path) -> None:
+    """Test the coroutines of :mod:`gptsum.aio` handling partition checksums."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+
+    async def run() -> None:
+        with pytest.raises(gptsum.VerificationFailure):
+            await gptsum.aio.verify_partition(1, path=disk_image)
+
+        await gptsum.aio.embed(path=disk_image, partitions=True)
+        await gptsum.aio.verify_partition(1, path=disk_image)
+
+    asyncio.run(run())
+
+
+def test_progress() -> None:
+    """Test progress is reported by :mod:`gptsum.aio` coroutines."""
+    reports: List[int] = []
+
+    asyncio.run(
+        gptsum.aio.verify(
+            path=conftest.TESTDATA_EMBEDDED_DISK,
+            progress=lambda done, total: reports.append(done),
+        )
+    )
+
+    assert reports[0] == 0
+    assert reports[-1] == conftest.TESTDATA_EMBEDDED_DISK.stat().st_size
+
+
+def test_cancel(mocker: MockerFixture, disk_image: Path) -> None:
+    """Test cancelling a coroutine stops the operation in the executor."""
+    mocker.patch.object(checksum, "_PROGRESS_INTERVAL", 0)
+    mocker.patch.object(checksum, "_PROGRESS_GRANULE", 4096)
+    started = threading.Event()
+    resume = threading.Event()
+
+    def progress(done: int, total: int) -> None:
+        started.set()
+        resume.wait()
+
+    async def run() -> None:
+        task = asyncio.create_task(gptsum.aio.embed(path=disk_image, progress=progress))
+
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+
+        task.cancel()
+        await asyncio.sleep(0)
+        assert not task.done()
+
+        resume.set()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+    assert disk_image.read_bytes() == conftest.TESTDATA_DISK.read_bytes()
+
+
+def test_semaphore() -> None:
+    """Test the number of concurrent operations is bounded by a semaphore."""
+    lock = threading.Lock()
+    active: List[int] = [0, 0]
+
+    def progress(done: int, total: int) -> None:
+        with lock:
+            # The image is too small for progress to be reported while hashing
+            if done == 0:
+                active[0] += 1
+                active[1] = max(active)
+            else:
+                assert done == total
+                active[0] -= 1
+
+    async def run() -> None:
+        semaphore = asyncio.Semaphore(2)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            await asyncio.gather(
+                *(
+                    gptsum.aio.calculate_expected_guid(
+                        path=conftest.TESTDATA_DISK,
+                        progress=progress,
+                        semaphore=semaphore,
+                        executor=executor,
+                    )
+                    for _ in range(8)
+                )
+            )
+
+    asyncio.run(run())
+
+    assert active[0] == 0
+    assert 1 <= active[1] <= 2
+
+
+def test_default_semaphore() -> None:
+    """Test a default semaphore is shared by all operations on an event loop."""
+
+    async def get() -> asyncio.Semaphore:
+        # pylint: disable-next=protected-access
+        return gptsum.aio._default_semaphore()
+
+    async def run() -> List[asyncio.Semaphore]:
+        return [await get(), await get()]
+
+    first = asyncio.run(run())
+    second = asyncio.run(run())
+
+    assert first[0] is first[1]
+    assert first[0] is not second[0]
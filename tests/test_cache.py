@@ -0,0 +1,190 @@
+"""Tests for the :mod:`gptsum.cache` module."""
+
+import errno
+import os
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+import gptsum
+import gptsum.checksum
+from gptsum import cache, gpt
+from tests import conftest
+
+DIGEST = bytes(range(16))
+SHA256 = gptsum.checksum.Algorithm.SHA256
+
+
+@pytest.fixture
+def no_xattr(mocker: MockerFixture) -> None:
+    """Make extended attribute operations fail as if unsupported."""
+    error = OSError(errno.ENOTSUP, os.strerror(errno.ENOTSUP))
+
+    for name in ["getxattr", "setxattr", "removexattr"]:
+        mocker.patch(f"os.{name}", side_effect=error, create=True)
+
+
+@pytest.mark.parametrize("xattr", [True, False], ids=["xattr", "sidecar"])
+def test_store_lookup(
+    request: pytest.FixtureRequest, disk_image: Path, xattr: bool
+) -> None:
+    """Test storing a checksum, and looking it up."""
+    if not xattr:
+        request.getfixturevalue("no_xattr")
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        assert cache.lookup(image, disk_image, 1) is None
+        assert cache.store(image, disk_image, 1, DIGEST)
+        assert cache.lookup(image, disk_image, 1) == DIGEST
+        assert cache.lookup(image, disk_image, 2) is None
+        assert cache.lookup(image, disk_image, 1, SHA256) is None
+
+    assert list(disk_image.parent.glob("*.gptsum-cache")) == (
+        [] if xattr else [disk_image.with_name(f".{disk_image.name}.v1.gptsum-cache")]
+    )
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        assert cache.lookup(image, disk_image, 1) == DIGEST
+
+    stat = disk_image.stat()
+    os.utime(disk_image, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        assert cache.lookup(image, disk_image, 1) is None
+
+
+def test_store_without_path(no_xattr: None, disk_image: Path) -> None:
+    """Test storing a checksum without xattr support or a sidecar path."""
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        assert not cache.store(image, None, 1, DIGEST)
+        assert cache.lookup(image, None, 1) is None
+
+
+def test_invalidate(no_xattr: None, disk_image: Path) -> None:
+    """Test removing cached checksums."""
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        assert cache.store(image, disk_image, 1, DIGEST)
+        assert cache.store(image, disk_image, 1, DIGEST[::-1], SHA256)
+        assert cache.lookup(image, disk_image, 1, SHA256) == DIGEST[::-1]
+        assert disk_image.with_name(
+            f".{disk_image.name}.v1-sha256.gptsum-cache"
+        ).exists()
+
+        cache.invalidate(image, disk_image, gptsum.checksum.VERSIONS)
+        assert cache.lookup(image, disk_image, 1) is None
+        assert cache.lookup(image, disk_image, 1, SHA256) is None
+
+    assert not list(disk_image.parent.glob("*.gptsum-cache"))
+
+
+def test_trust_cache(mocker: MockerFixture, disk_image: Path) -> None:
+    """Test a trusted cache skips calculating the checksum."""
+    calculate = mocker.spy(gptsum.checksum, "calculate")
+    trust = cache.CachePolicy.TRUST
+
+    assert gptsum.calculate_expected_guid(path=disk_image, cache_policy=trust) == (
+        conftest.TESTDATA_EMBEDDED_DISK_GUID
+    )
+    assert gptsum.calculate_expected_guid(path=disk_image, cache_policy=trust) == (
+        conftest.TESTDATA_EMBEDDED_DISK_GUID
+    )
+    assert calculate.call_count == 1
+
+    gptsum.embed(path=disk_image)
+    gptsum.verify(path=disk_image, cache_policy=trust)
+    assert calculate.call_count == 3
+
+    gptsum.set_guid(path=disk_image, guid=conftest.TESTDATA_DISK_GUID)
+    with pytest.raises(gptsum.VerificationFailure):
+        gptsum.verify(path=disk_image, cache_policy=trust)
+    assert calculate.call_count == 4
+
+
+def test_store_policy(mocker: MockerFixture, disk_image: Path) -> None:
+    """Test the store policy always calculates the checksum."""
+    calculate = mocker.spy(gptsum.checksum, "calculate")
+
+    for _ in range(2):
+        gptsum.calculate_expected_guid(
+            path=disk_image, cache_policy=cache.CachePolicy.STORE
+        )
+
+    assert calculate.call_count == 2
+
+    gptsum.calculate_expected_guid(
+        path=disk_image, cache_policy=cache.CachePolicy.TRUST
+    )
+    assert calculate.call_count == 2
+
+
+def test_device(mocker: MockerFixture, disk_image: Path) -> None:
+    """Test checksums of devices are never cached."""
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        assert cache.store(image, disk_image, 1, DIGEST)
+
+        mocker.patch.object(image, "fstat", return_value=os.stat(os.devnull))
+        assert cache.lookup(image, disk_image, 1) is None
+        assert not cache.store(image, disk_image, 1, DIGEST)
+        cache.invalidate(image, disk_image, gptsum.checksum.VERSIONS)
+
+        mocker.stopall()
+        assert cache.lookup(image, disk_image, 1) == DIGEST
+
+
+@pytest.mark.parametrize("xattr", [True, False], ids=["xattr", "sidecar"])
+def test_record_embedded(
+    request: pytest.FixtureRequest, disk_image: Path, xattr: bool
+) -> None:
+    """Test recording the checksum version and algorithm an image was embedded with."""
+    if not xattr:
+        request.getfixturevalue("no_xattr")
+
+    guid = conftest.TESTDATA_EMBEDDED_DISK_GUID
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        assert cache.lookup_embedded(image, disk_image, guid) is None
+        assert cache.record_embedded(image, disk_image, guid, 3, SHA256)
+        assert cache.lookup_embedded(image, disk_image, guid) == (3, SHA256)
+        assert (
+            cache.lookup_embedded(image, disk_image, conftest.TESTDATA_DISK_GUID)
+            is None
+        )
+
+        # Recorded checksums are kept when invalidating cached ones
+        cache.invalidate(image, disk_image, gptsum.checksum.VERSIONS)
+        assert cache.lookup_embedded(image, disk_image, guid) == (3, SHA256)
+
+    assert list(disk_image.parent.glob("*.gptsum-cache")) == (
+        []
+        if xattr
+        else [disk_image.with_name(f".{disk_image.name}.embedded.gptsum-cache")]
+    )
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        b"",
+        bytes([2, 1]) + conftest.TESTDATA_EMBEDDED_DISK_GUID.bytes + b"sha256",
+        bytes([1, 4]) + conftest.TESTDATA_EMBEDDED_DISK_GUID.bytes + b"sha256",
+        bytes([1, 1]) + conftest.TESTDATA_EMBEDDED_DISK_GUID.bytes + b"md5",
+        bytes([1, 1]) + conftest.TESTDATA_EMBEDDED_DISK_GUID.bytes + b"\xff",
+    ],
+    ids=["short", "format", "version", "algorithm", "encoding"],
+)
+def test_lookup_embedded_invalid(
+    no_xattr: None, disk_image: Path, record: bytes
+) -> None:
+    """Test invalid records of the checksum an image was embedded with are ignored."""
+    disk_image.with_name(f".{disk_image.name}.embedded.gptsum-cache").write_bytes(
+        record
+    )
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        assert (
+            cache.lookup_embedded(
+                image, disk_image, conftest.TESTDATA_EMBEDDED_DISK_GUID
+            )
+            is None
+        )
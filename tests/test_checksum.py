@@ -1,10 +1,14 @@
 """Tests for the :mod:`gptsum.checksum` module."""
 
+import dataclasses
+import errno
 import hashlib
 import math
+import mmap
 import os
+import struct
 from pathlib import Path
-from typing import BinaryIO
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
 
 import pytest
 import pytest_benchmark.fixture
@@ -12,13 +16,16 @@ from pytest_mock import MockerFixture
 from pytest_mock.plugin import MockType
 
 from gptsum import checksum, gpt
-from tests import conftest
+from tests import conftest, utils
 
 # Access to protected members is somewhat common in tests.
 # Granted, this should not be the case since we should only test publicly-exposed
 # functionality, but when aiming for good coverage, some tests need to dive deeper.
 # pylint: disable=protected-access
 
+# Necessary to allow locally-defined fixtures to be used
+# pylint: disable=redefined-outer-name
+
 
 def test__posix_fadvise_sequential_not_supported(
     monkeypatch: pytest.MonkeyPatch,
@@ -132,6 +139,674 @@ def test_hash_file_read(monkeypatch: pytest.MonkeyPatch, mocker: MockerFixture)
     _test_hash_file(read)
 
 
+@pytest.mark.parametrize("strategy", list(checksum.ReadStrategy))
+@pytest.mark.parametrize(
+    ("offset", "size"),
+    [
+        (0, None),
+        (0, 2 * checksum._BUFFSIZE + int(checksum._BUFFSIZE / 2 - 1)),
+        (gpt.MBR_SIZE, 4 * 1024 * 1024),
+        (1000, 333),
+    ],
+)
+def test_hash_file_strategy(
+    strategy: checksum.ReadStrategy, offset: int, size: Optional[int]
+) -> None:
+    """Test `checksum.hash_file` using all read strategies."""
+    read_options = checksum.ReadOptions(strategy=strategy)
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        file_size = os.fstat(fd.fileno()).st_size
+        if size is None:
+            size = file_size
+        expected_size = max(0, min(size, file_size - offset))
+
+        expected = hashlib.sha1(  # noqa: S303, S324
+            fd.read()[offset : offset + size]
+        ).hexdigest()
+
+        hasher = hashlib.sha1()  # noqa: S303, S324
+        result = checksum.hash_file(
+            hasher.update, fd.fileno(), size, offset, read_options=read_options
+        )
+
+    assert result == expected_size
+    assert hasher.hexdigest() == expected
+
+
+@pytest.mark.parametrize(
+    "strategy", [checksum.ReadStrategy.PREADV, checksum.ReadStrategy.DIRECT]
+)
+def test_hash_file_preadv_not_supported(
+    monkeypatch: pytest.MonkeyPatch, strategy: checksum.ReadStrategy
+) -> None:
+    """Test `checksum.hash_file` with strategies using `preadv`, but no `preadv`."""
+    monkeypatch.delattr(os, "preadv", raising=False)
+    read_options = checksum.ReadOptions(strategy=strategy)
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        with pytest.raises(ValueError, match=f"'{strategy.value}' is not supported"):
+            checksum.hash_file(
+                lambda _: None, fd.fileno(), 1024, 0, read_options=read_options
+            )
+
+
+def test_hash_file_mmap_windows(mocker: MockerFixture) -> None:
+    """Test `checksum.hash_file` using `ReadStrategy.MMAP` with small windows."""
+    mocker.patch.object(checksum, "_MMAP_WINDOW", 2 * mmap.ALLOCATIONGRANULARITY)
+    mocker.patch.object(checksum, "_MMAP_CHUNK", 3 * mmap.PAGESIZE)
+    mapped = mocker.spy(mmap, "mmap")
+    read_options = checksum.ReadOptions(strategy=checksum.ReadStrategy.MMAP)
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        data = fd.read()
+        offset = mmap.ALLOCATIONGRANULARITY + 123
+        size = len(data) - offset - 456
+
+        hasher = hashlib.sha1()  # noqa: S303, S324
+        result = checksum.hash_file(
+            hasher.update, fd.fileno(), size, offset, read_options=read_options
+        )
+
+    assert result == size
+    assert (
+        hasher.hexdigest()
+        == hashlib.sha1(data[offset : offset + size]).hexdigest()  # noqa: S303, S324
+    )
+
+    windows = math.ceil((size + 123) / (2 * mmap.ALLOCATIONGRANULARITY))
+    assert mapped.call_count == windows
+
+
+@pytest.mark.skipif(
+    not hasattr(mmap, "MADV_DONTNEED"), reason="No support for MADV_DONTNEED"
+)
+def test__read_file_mmap_madvise(
+    mocker: MockerFixture,
+) -> None:  # pragma: platform-darwin, platform-win32
+    """Test `checksum._read_file_mmap` drops pages behind the cursor."""
+    madvise = mocker.spy(checksum, "_madvise")
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        size = os.fstat(fd.fileno()).st_size
+        checksum._read_file_mmap(lambda _: None, fd.fileno(), size, 0)
+
+    advice = [call.args[1] for call in madvise.call_args_list]
+    assert advice[0] == "MADV_SEQUENTIAL"
+    assert advice[1:] == ["MADV_DONTNEED"] * math.ceil(size / checksum._MMAP_CHUNK)
+
+
+@pytest.mark.skipif(not os.path.exists("/dev/zero"), reason="No /dev/zero")
+def test_hash_file_mmap_device() -> None:  # pragma: platform-win32
+    """Test `checksum.hash_file` using `ReadStrategy.MMAP` on a character device."""
+    read_options = checksum.ReadOptions(strategy=checksum.ReadStrategy.MMAP)
+    size = 3 * mmap.ALLOCATIONGRANULARITY + 1
+
+    with open("/dev/zero", "rb") as fd:
+        hasher = hashlib.sha1()  # noqa: S303, S324
+        result = checksum.hash_file(
+            hasher.update, fd.fileno(), size, 0, read_options=read_options
+        )
+
+    assert result == size
+    assert (
+        hasher.hexdigest() == hashlib.sha1(b"\0" * size).hexdigest()  # noqa: S303, S324
+    )
+
+
+@pytest.mark.skipif(not hasattr(os, "preadv"), reason="No preadv support on platform")
+@pytest.mark.parametrize(
+    ("offset", "size", "buffer_size", "queue_depth"),
+    [
+        # Short final buffer
+        (0, 64 * 1024 + 1, 4096, 4),
+        # End of file before `size`, with more buffers than reads
+        (1000, 1024 * 1024 * 1024, checksum._BUFFSIZE, 16),
+        # Buffer size not a multiple of 512
+        (1000, 333 * 1000, 1000, 3),
+    ],
+    ids=["short-final-buffer", "eof-before-size", "unaligned-buffer-size"],
+)
+def test__read_file_pipelined(
+    offset: int, size: int, buffer_size: int, queue_depth: int
+) -> None:  # pragma: platform-win32
+    """Test `checksum._read_file_pipelined`."""
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        expected = fd.read()[offset : offset + size]
+
+        hasher = hashlib.sha1()  # noqa: S303, S324
+        result = checksum._read_file_pipelined(
+            hasher.update, fd.fileno(), size, offset, buffer_size, queue_depth
+        )
+
+    assert result == len(expected)
+    assert hasher.hexdigest() == hashlib.sha1(expected).hexdigest()  # noqa: S303, S324
+
+
+@pytest.mark.skipif(not hasattr(os, "preadv"), reason="No preadv support on platform")
+def test_hash_file_pipelined() -> None:  # pragma: platform-win32
+    """Test `checksum.hash_file` reading ahead with a queue depth larger than 1."""
+    read_options = checksum.ReadOptions(
+        strategy=checksum.ReadStrategy.PREADV, buffer_size=4096, queue_depth=4
+    )
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        data = fd.read()
+
+        hasher = hashlib.sha1()  # noqa: S303, S324
+        result = checksum.hash_file(
+            hasher.update, fd.fileno(), len(data), 0, read_options=read_options
+        )
+
+    assert result == len(data)
+    assert hasher.hexdigest() == hashlib.sha1(data).hexdigest()  # noqa: S303, S324
+
+
+@pytest.mark.skipif(not hasattr(os, "preadv"), reason="No preadv support on platform")
+def test__read_file_pipelined_short_reads(
+    mocker: MockerFixture,
+) -> None:  # pragma: platform-win32
+    """Test `checksum._read_file_pipelined` when `preadv` returns short reads."""
+    # Make mypy happy
+    assert hasattr(os, "preadv")
+    real_preadv = os.preadv  # pylint: disable=no-member
+
+    def short_preadv(fd: int, buffers: List[memoryview], offset: int) -> int:
+        with buffers[0][:100] as view:
+            return real_preadv(fd, [view], offset)
+
+    mocker.patch("os.preadv", side_effect=short_preadv)
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        data = fd.read(64 * 1024)
+
+        hasher = hashlib.sha1()  # noqa: S303, S324
+        result = checksum._read_file_pipelined(
+            hasher.update, fd.fileno(), len(data), 0, 4096, 4
+        )
+
+    assert result == len(data)
+    assert hasher.hexdigest() == hashlib.sha1(data).hexdigest()  # noqa: S303, S324
+
+
+@pytest.mark.skipif(not hasattr(os, "preadv"), reason="No preadv support on platform")
+def test__read_file_pipelined_error(
+    mocker: MockerFixture,
+) -> None:  # pragma: platform-win32
+    """Test `checksum._read_file_pipelined` when a read fails."""
+    mocker.patch("os.preadv", side_effect=OSError(errno.EIO, "I/O error"))
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        with pytest.raises(OSError, match="I/O error"):
+            checksum._read_file_pipelined(
+                lambda _: None, fd.fileno(), 64 * 1024, 0, 4096, 4
+            )
+
+
+@pytest.mark.skipif(not hasattr(os, "preadv"), reason="No preadv support on platform")
+@pytest.mark.parametrize(
+    ("offset", "size", "buffer_size"),
+    [
+        (0, None, checksum._BUFFSIZE),
+        (1000, 333, 4096),
+        (4095, 4097, 1000),
+        (gpt.MBR_SIZE, 1024 * 1024 * 1024, 3 * checksum._DIRECT_ALIGNMENT),
+    ],
+)
+def test__read_file_direct(
+    offset: int, size: Optional[int], buffer_size: int
+) -> None:  # pragma: platform-win32
+    """Test `checksum._read_file_direct` using unaligned offsets and sizes."""
+    read_options = checksum.ReadOptions(strategy=checksum.ReadStrategy.DIRECT)
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        data = fd.read()
+        expected = data[offset:] if size is None else data[offset : offset + size]
+
+        hasher = hashlib.sha1()  # noqa: S303, S324
+        with checksum._direct_io(fd.fileno(), read_options):
+            result = checksum._read_file_direct(
+                hasher.update,
+                fd.fileno(),
+                len(data) if size is None else size,
+                offset,
+                buffer_size,
+            )
+
+    assert result == len(expected)
+    assert hasher.hexdigest() == hashlib.sha1(expected).hexdigest()  # noqa: S303, S324
+
+
+@pytest.mark.skipif(not hasattr(os, "O_DIRECT"), reason="No O_DIRECT support")
+def test__direct_io() -> None:  # pragma: platform-darwin, platform-win32
+    """Test `checksum._direct_io` sets and restores `O_DIRECT`."""
+    import fcntl  # pylint: disable=import-outside-toplevel
+
+    # Make mypy happy
+    assert hasattr(os, "O_DIRECT")
+    read_options = checksum.ReadOptions(strategy=checksum.ReadStrategy.DIRECT)
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        flags = fcntl.fcntl(fd.fileno(), fcntl.F_GETFL)
+
+        with checksum._direct_io(fd.fileno(), checksum.ReadOptions()):
+            assert fcntl.fcntl(fd.fileno(), fcntl.F_GETFL) == flags
+
+        try:
+            with checksum._direct_io(fd.fileno(), read_options):
+                direct = fcntl.fcntl(fd.fileno(), fcntl.F_GETFL)
+                raise RuntimeError("Failure")
+        except RuntimeError:
+            pass
+
+        assert direct & os.O_DIRECT  # pylint: disable=no-member
+        assert fcntl.fcntl(fd.fileno(), fcntl.F_GETFL) == flags
+
+
+@pytest.mark.skipif(not hasattr(os, "O_DIRECT"), reason="No O_DIRECT support")
+@pytest.mark.parametrize("error", [errno.EINVAL, errno.EBADF])
+def test__direct_io_not_supported(
+    mocker: MockerFixture, error: int
+) -> None:  # pragma: platform-darwin, platform-win32
+    """Test `checksum._direct_io` when the filesystem doesn't support `O_DIRECT`."""
+    import fcntl  # pylint: disable=import-outside-toplevel
+
+    real_fcntl = fcntl.fcntl
+
+    def fake_fcntl(fd: int, cmd: int, arg: int = 0) -> int:
+        if cmd == fcntl.F_SETFL:
+            raise OSError(error, os.strerror(error))
+        return real_fcntl(fd, cmd, arg)
+
+    mocker.patch("fcntl.fcntl", side_effect=fake_fcntl)
+    read_options = checksum.ReadOptions(strategy=checksum.ReadStrategy.DIRECT)
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        if error == errno.EINVAL:
+            with checksum._direct_io(fd.fileno(), read_options):
+                pass
+        else:
+            with pytest.raises(OSError, match=os.strerror(error)):
+                with checksum._direct_io(fd.fileno(), read_options):
+                    pass  # pragma: no cover
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "message"),
+    [
+        ({"buffer_size": 0}, "Invalid buffer size 0"),
+        ({"queue_depth": 0}, "Invalid queue depth 0"),
+        ({"queue_depth": -1}, "Invalid queue depth -1"),
+        ({"page_cache_window": 0}, "Invalid page cache window 0"),
+    ],
+)
+def test_readoptions_invalid(kwargs: Dict[str, int], message: str) -> None:
+    """Test constructing invalid :class:`checksum.ReadOptions`."""
+    with pytest.raises(ValueError, match=message):
+        checksum.ReadOptions(**kwargs)  # type: ignore[arg-type]
+
+
+def test__physical_memory_unknown(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test `checksum._physical_memory` when `sysconf` is not supported."""
+    monkeypatch.delattr(os, "sysconf", raising=False)
+    assert checksum._physical_memory() is None
+
+
+@pytest.mark.parametrize(
+    ("policy", "memory", "expected"),
+    [
+        (checksum.PageCachePolicy.KEEP, 1024, checksum.PageCachePolicy.KEEP),
+        (checksum.PageCachePolicy.DROP, None, checksum.PageCachePolicy.DROP),
+        (checksum.PageCachePolicy.AUTO, None, checksum.PageCachePolicy.KEEP),
+        (checksum.PageCachePolicy.AUTO, 4 * 4096, checksum.PageCachePolicy.KEEP),
+        (checksum.PageCachePolicy.AUTO, 4 * 4095, checksum.PageCachePolicy.DROP),
+    ],
+)
+def test__resolve_page_cache(
+    mocker: MockerFixture,
+    policy: checksum.PageCachePolicy,
+    memory: Optional[int],
+    expected: checksum.PageCachePolicy,
+) -> None:
+    """Test `checksum._resolve_page_cache`."""
+    mocker.patch("gptsum.checksum._physical_memory", return_value=memory)
+    read_options = checksum.ReadOptions(page_cache=policy, buffer_size=4096)
+
+    resolved = checksum._resolve_page_cache(read_options, 4096)
+
+    assert resolved == dataclasses.replace(read_options, page_cache=expected)
+
+
+def test__write_sparse(tmp_path: Path) -> None:
+    """Test `checksum._write_sparse` seeking over blocks of zeroes."""
+    block = checksum._SPARSE_BLOCK_SIZE
+    data = b"a" * block + bytes(2 * block) + b"b" * 100 + bytes(block + 100)
+    zeroes = bytes(len(data))
+
+    with open(tmp_path / "sparse", "w+b") as fd:
+        fd.write(b"\xff" * 2 * len(data))
+        fd.seek(0)
+        for piece in [bytes(block), data]:
+            checksum._write_sparse(fd.fileno(), memoryview(piece), zeroes)
+
+        assert fd.tell() == block + len(data)
+        fd.seek(0)
+        written = fd.read(block + len(data))
+
+    # Skipped blocks are left alone
+    ones = b"\xff" * block
+    assert written == (
+        ones + b"a" * block + ones * 2 + b"b" * 100 + bytes(block - 100) + b"\xff" * 200
+    )
+
+
+def test__drop_behind(mocker: MockerFixture) -> None:
+    """Test `checksum._DropBehind` reads ahead, and drops pages behind."""
+    fadvise = mocker.patch("gptsum.checksum._posix_fadvise")
+    received: List[int] = []
+
+    window = checksum._DropBehind(7, 1000, 10000, 4000)
+    update = window.wrap(lambda data: received.append(len(data)))
+    for _ in range(4):
+        update(b"\0" * 2500)
+    window.finish()
+
+    assert received == [2500] * 4
+    assert fadvise.call_args_list == [
+        mocker.call(7, 1000, 4000, "POSIX_FADV_WILLNEED"),
+        mocker.call(7, 5000, 5000, "POSIX_FADV_WILLNEED"),
+        mocker.call(7, 1000, 1000, "POSIX_FADV_DONTNEED"),
+        mocker.call(7, 10000, 1000, "POSIX_FADV_WILLNEED"),
+        mocker.call(7, 2000, 5000, "POSIX_FADV_DONTNEED"),
+        mocker.call(7, 7000, 4000, "POSIX_FADV_DONTNEED"),
+    ]
+
+
+@pytest.mark.parametrize("strategy", list(checksum.ReadStrategy))
+def test_hash_file_page_cache_drop(
+    mocker: MockerFixture, strategy: checksum.ReadStrategy
+) -> None:
+    """Test `checksum.hash_file` dropping all data read from the page cache."""
+    fadvise = mocker.spy(checksum, "_posix_fadvise")
+    read_options = checksum.ReadOptions(
+        strategy=strategy,
+        buffer_size=64 * 1024,
+        page_cache=checksum.PageCachePolicy.DROP,
+        page_cache_window=256 * 1024,
+    )
+    stats = checksum.IOStatistics()
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        data = fd.read()
+
+        hasher = hashlib.sha1()  # noqa: S303, S324
+        checksum.hash_file(
+            hasher.update,
+            fd.fileno(),
+            len(data),
+            0,
+            read_options=read_options,
+            stats=stats,
+        )
+
+    assert hasher.hexdigest() == hashlib.sha1(data).hexdigest()  # noqa: S303, S324
+    dropped = [
+        call.args[2]
+        for call in fadvise.call_args_list
+        if call.args[3] == "POSIX_FADV_DONTNEED"
+    ]
+    assert len(dropped) > 1
+    assert sum(dropped) == stats.bytes_read
+
+
+def test__madvise_not_supported(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test `checksum._madvise` when the advice is not supported."""
+    monkeypatch.delattr(mmap, "MADV_SEQUENTIAL", raising=False)
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            checksum._madvise(mapped, "MADV_SEQUENTIAL")
+
+
+def _is_sparse(path: Path) -> bool:
+    """Check whether a file has holes on the filesystem it's stored on."""
+    stat = os.stat(path)
+    return stat.st_blocks * 512 < stat.st_size
+
+
+def test_hash_file_sparse(sparse_disk_image: Path) -> None:
+    """Test `checksum.hash_file` on a sparse file."""
+    if not _is_sparse(sparse_disk_image):
+        pytest.skip("Filesystem doesn't support sparse files")  # pragma: no cover
+
+    stats = checksum.IOStatistics()
+
+    with open(sparse_disk_image, "rb") as fd:
+        hasher = hashlib.sha1()  # noqa: S303, S324
+        size = os.fstat(fd.fileno()).st_size
+        pos = fd.seek(123)
+
+        result = checksum.hash_file(hasher.update, fd.fileno(), size, 0, stats=stats)
+
+        assert fd.tell() == pos
+
+    assert result == size
+    # sha1sum tests/testdata/disk
+    assert hasher.hexdigest() == "fdb8443238315360e1c15940e07d5249127fb909"
+
+    assert stats.bytes_read + stats.bytes_synthesized == size
+    assert stats.bytes_synthesized > 0
+
+    with open(sparse_disk_image, "rb") as fd:
+        extents = checksum._data_extents(fd.fileno(), 0, size)
+    assert stats.bytes_read == sum(
+        extent_size for (_, extent_size, is_data) in extents if is_data
+    )
+
+    with open(sparse_disk_image, "rb") as fd:
+        hasher = hashlib.sha1()  # noqa: S303, S324
+        assert checksum.hash_file(hasher.update, fd.fileno(), size, 0) == size
+        assert hasher.hexdigest() == "fdb8443238315360e1c15940e07d5249127fb909"
+
+
+def test__data_extents_no_seek_data(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test `checksum._data_extents` when `SEEK_DATA` is not supported."""
+    monkeypatch.delattr(os, "SEEK_DATA", raising=False)
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        assert checksum._data_extents(fd.fileno(), 512, 4096) == [(512, 4096, True)]
+
+
+def test__data_extents(tmp_path: Path) -> None:
+    """Test `checksum._data_extents`."""
+    path = tmp_path / "file"
+    with open(path, "wb") as fd:
+        fd.truncate(1024 * 1024)
+        fd.seek(64 * 1024)
+        fd.write(b"\1" * 4096)
+
+    if not _is_sparse(path):
+        pytest.skip("Filesystem doesn't support sparse files")  # pragma: no cover
+
+    with open(path, "rb") as fd:
+        assert checksum._data_extents(fd.fileno(), 0, 1024 * 1024) == [
+            (0, 64 * 1024, False),
+            (64 * 1024, 4096, True),
+            (64 * 1024 + 4096, 1024 * 1024 - 64 * 1024 - 4096, False),
+        ]
+        assert checksum._data_extents(fd.fileno(), 65 * 1024, 1024) == [
+            (65 * 1024, 1024, True)
+        ]
+        assert checksum._data_extents(fd.fileno(), 0, 1024) == [(0, 1024, False)]
+
+
+def _mock_lseek_seek_data_error(mocker: MockerFixture, error: int) -> None:
+    """Mock `os.lseek` to fail with the given error when using `SEEK_DATA`."""
+    real_lseek = os.lseek
+
+    def lseek(fd: int, pos: int, how: int) -> int:
+        # Make mypy happy
+        assert hasattr(os, "SEEK_DATA")
+
+        if how == os.SEEK_DATA:  # pylint: disable=no-member
+            raise OSError(error, os.strerror(error))
+        return real_lseek(fd, pos, how)
+
+    mocker.patch("os.lseek", side_effect=lseek)
+
+
+@pytest.mark.skipif(not hasattr(os, "SEEK_DATA"), reason="No SEEK_DATA support")
+def test__data_extents_not_supported(
+    mocker: MockerFixture,
+) -> None:  # pragma: platform-win32
+    """Test `checksum._data_extents` when a filesystem doesn't support `SEEK_DATA`."""
+    _mock_lseek_seek_data_error(mocker, errno.EINVAL)
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        assert checksum._data_extents(fd.fileno(), 512, 4096) == [(512, 4096, True)]
+
+
+@pytest.mark.skipif(not hasattr(os, "SEEK_DATA"), reason="No SEEK_DATA support")
+@pytest.mark.parametrize(
+    ("data", "hole"),
+    [(0, 1024), (1024, 1024), (1024, 512)],
+    ids=["data-before-offset", "empty-data", "hole-before-data"],
+)
+def test__data_extents_nonsensical(
+    mocker: MockerFixture, data: int, hole: int
+) -> None:  # pragma: platform-win32
+    """Test `checksum._data_extents` when `lseek` doesn't move forward."""
+    real_lseek = os.lseek
+
+    def lseek(fd: int, pos: int, how: int) -> int:
+        # Make mypy happy
+        assert hasattr(os, "SEEK_DATA") and hasattr(os, "SEEK_HOLE")
+
+        if how == os.SEEK_DATA:  # pylint: disable=no-member
+            return data
+        if how == os.SEEK_HOLE:  # pylint: disable=no-member
+            return hole
+        return real_lseek(fd, pos, how)
+
+    mocker.patch("os.lseek", side_effect=lseek)
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        extents = checksum._data_extents(fd.fileno(), 512, 4096)
+
+    assert extents[-1][2]
+    assert sum(extent_size for (_, extent_size, _) in extents) == 4096
+    assert [offset for (offset, _, _) in extents][0] == 512
+
+
+@pytest.mark.skipif(not os.path.exists("/dev/zero"), reason="No /dev/zero")
+def test__data_extents_device() -> None:  # pragma: platform-win32
+    """Test `checksum._data_extents` on a character device."""
+    with open("/dev/zero", "rb") as fd:
+        assert checksum._data_extents(fd.fileno(), 0, 10) == [(0, 10, True)]
+
+
+@pytest.mark.skipif(not hasattr(os, "SEEK_DATA"), reason="No SEEK_DATA support")
+def test__data_extents_error(mocker: MockerFixture) -> None:  # pragma: platform-win32
+    """Test `checksum._data_extents` when `lseek` fails unexpectedly."""
+    _mock_lseek_seek_data_error(mocker, errno.EIO)
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        with pytest.raises(OSError, match=os.strerror(errno.EIO)):
+            checksum._data_extents(fd.fileno(), 512, 4096)
+
+
+def test__clip_extents() -> None:
+    """Test `checksum._clip_extents`."""
+    extents = [(0, 10, False), (10, 10, True), (20, 10, False)]
+    starts = [0, 10, 20]
+
+    assert list(checksum._clip_extents(extents, starts, 0, 30)) == extents
+    assert list(checksum._clip_extents(extents, starts, 5, 10)) == [
+        (5, 5, False),
+        (10, 5, True),
+    ]
+    assert list(checksum._clip_extents(extents, starts, 12, 3)) == [(12, 3, True)]
+    assert list(checksum._clip_extents(extents, starts, 25, 5)) == [(25, 5, False)]
+
+
+def test_iostatistics_update() -> None:
+    """Test :meth:`checksum.IOStatistics.update`."""
+    stats = checksum.IOStatistics(1, 2)
+    stats.update(checksum.IOStatistics(10, 20))
+    assert stats == checksum.IOStatistics(11, 22)
+
+    stats = checksum.IOStatistics(
+        1, 2, 3, {checksum.Phase.OPEN: checksum.PhaseTime(1.0, 2.0)}
+    )
+    stats.update(
+        checksum.IOStatistics(
+            10,
+            20,
+            30,
+            {
+                checksum.Phase.OPEN: checksum.PhaseTime(10.0, 20.0),
+                checksum.Phase.HASH: checksum.PhaseTime(3.0, 4.0),
+            },
+        )
+    )
+    assert stats == checksum.IOStatistics(
+        11,
+        22,
+        33,
+        {
+            checksum.Phase.OPEN: checksum.PhaseTime(11.0, 22.0),
+            checksum.Phase.HASH: checksum.PhaseTime(3.0, 4.0),
+        },
+    )
+
+
+def test_iostatistics_measure(mocker: MockerFixture) -> None:
+    """Test :meth:`checksum.IOStatistics.measure` and derived statistics."""
+    mocker.patch("time.perf_counter", side_effect=[1.0, 3.0])
+    mocker.patch("time.process_time", side_effect=[1.0, 2.0])
+    stats = checksum.IOStatistics(bytes_read=1000, bytes_synthesized=3000)
+
+    assert stats.average_read_size is None
+    assert stats.hash_throughput is None
+
+    with stats.measure(checksum.Phase.HASH):
+        stats.read_calls += 4
+
+    assert stats.phases == {checksum.Phase.HASH: checksum.PhaseTime(2.0, 1.0)}
+    assert stats.average_read_size == 250
+    assert stats.hash_throughput == 2000
+
+
+@pytest.mark.parametrize(
+    ("strategy", "queue_depth"),
+    [(strategy, 1) for strategy in checksum.ReadStrategy]
+    + [(checksum.ReadStrategy.PREADV, 4)],
+)
+def test_hash_file_read_calls(
+    strategy: checksum.ReadStrategy, queue_depth: int
+) -> None:
+    """Test read calls are counted by all read strategies."""
+    read_options = checksum.ReadOptions(
+        strategy=strategy, buffer_size=64 * 1024, queue_depth=queue_depth
+    )
+    stats = checksum.IOStatistics()
+    size = os.stat(conftest.TESTDATA_DISK).st_size
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        checksum.hash_file(
+            lambda _: None,
+            fd.fileno(),
+            size,
+            0,
+            read_options=read_options,
+            stats=stats,
+        )
+
+    # One window is mapped, other strategies read whole buffers
+    expected = 1 if strategy == checksum.ReadStrategy.MMAP else size // (64 * 1024)
+    assert stats.read_calls == expected
+
+
 def test_calculate() -> None:
     """Test checksum calculation of an image twice."""
     with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
@@ -147,6 +822,59 @@ def test_calculate() -> None:
         assert checksum.calculate(image) == conftest.TESTDATA_EMBEDDED_DISK_GUID.bytes
 
 
+@pytest.mark.parametrize("version", [checksum.VERSION_1, checksum.VERSION_2])
+def test_calculate_sparse(sparse_disk_image: Path, version: int) -> None:
+    """Test checksum calculation of a sparse image."""
+    if not _is_sparse(sparse_disk_image):
+        pytest.skip("Filesystem doesn't support sparse files")  # pragma: no cover
+
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        expected = checksum.calculate(image, version)
+
+    stats = checksum.IOStatistics()
+
+    with gpt.GPTImage(path=sparse_disk_image, open_mode=os.O_RDONLY) as image:
+        assert checksum.calculate(image, version, stats=stats) == expected
+
+    assert (
+        stats.bytes_read + stats.bytes_synthesized == os.stat(sparse_disk_image).st_size
+    )
+    assert stats.bytes_synthesized > 0
+
+
+@pytest.mark.parametrize("strategy", list(checksum.ReadStrategy))
+@pytest.mark.parametrize("version", checksum.VERSIONS)
+def test_calculate_strategy(strategy: checksum.ReadStrategy, version: int) -> None:
+    """Test checksum calculation using all read strategies."""
+    read_options = checksum.ReadOptions(strategy=strategy)
+    # Version 2 checksums can only be calculated using `read` in a single thread
+    threads = 1 if strategy == checksum.ReadStrategy.READ else None
+
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        expected = checksum.calculate(image, version)
+        digest = checksum.calculate(
+            image, version, threads=threads, read_options=read_options
+        )
+        assert digest == expected
+
+
+def test_calculate_version_2_queue_depth(mocker: MockerFixture) -> None:
+    """Test `VERSION_2` checksums don't read ahead within leaves."""
+    pipelined = mocker.spy(checksum, "_read_file_pipelined")
+    read_options = checksum.ReadOptions(
+        strategy=checksum.ReadStrategy.PREADV, queue_depth=4
+    )
+
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        expected = checksum.calculate(image, checksum.VERSION_2)
+        digest = checksum.calculate(
+            image, checksum.VERSION_2, read_options=read_options
+        )
+
+    assert digest == expected
+    pipelined.assert_not_called()
+
+
 def test_calculate_inplace(disk_image: Path) -> None:
     """Test :func:`checksum.calculate` by modifying in image in-place."""
     with open(disk_image, "rb") as fd:
@@ -176,6 +904,599 @@ def test_calculate_inplace(disk_image: Path) -> None:
         assert new_hash == digest
 
 
+@pytest.mark.parametrize(
+    "disk_file", [conftest.TESTDATA_DISK, conftest.TESTDATA_EMBEDDED_DISK]
+)
+def test_calculate_version_2(disk_file: Path) -> None:
+    """Test :func:`checksum.calculate` of a version 2 (tree) checksum."""
+    with gpt.GPTImage(path=disk_file, open_mode=os.O_RDONLY) as image:
+        digest = checksum.calculate(image, checksum.VERSION_2)
+        assert digest == conftest.TESTDATA_DISK_V2_GUID.bytes
+
+        assert checksum.calculate(image, checksum.VERSION_2, threads=1) == digest
+
+
+def _zeroed_image(path: Path) -> bytearray:
+    """Read an image, with the GUID and CRC32 fields of both headers zeroed."""
+    with open(path, "rb") as fd:
+        data = bytearray(fd.read())
+
+    header_crc32_offset = 8 + 4 + 4
+    guid_offset = header_crc32_offset + 4 + 4 + 8 + 8 + 8 + 8
+    for header_offset in [gpt.MBR_SIZE, len(data) - gpt.LBA_SIZE]:
+        crc32_offset = header_offset + header_crc32_offset
+        data[crc32_offset : crc32_offset + 4] = b"\0" * 4
+        data[header_offset + guid_offset : header_offset + guid_offset + 16] = (
+            b"\0" * 16
+        )
+
+    return data
+
+
+def _reference_tree_digests(path: Path, leaf_size: int) -> Tuple[bytes, List[bytes]]:
+    """Calculate a version 2 digest and its leaf digests the naive way, in-memory."""
+    data = _zeroed_image(path)
+    leaves = [bytes(data[i : i + leaf_size]) for i in range(0, len(data), leaf_size)]
+
+    def node(chunk: bytes, node_offset: int, node_depth: int, last: bool) -> bytes:
+        return hashlib.blake2b(
+            chunk,
+            digest_size=16,
+            fanout=0,
+            depth=2,
+            leaf_size=leaf_size,
+            node_offset=node_offset,
+            node_depth=node_depth,
+            inner_size=16,
+            last_node=last,
+        ).digest()
+
+    leaf_digests = [
+        node(leaf, index, 0, index == len(leaves) - 1)
+        for index, leaf in enumerate(leaves)
+    ]
+
+    return (node(b"".join(leaf_digests), 0, 1, True), leaf_digests)
+
+
+def _reference_tree_digest(path: Path, leaf_size: int) -> bytes:
+    """Calculate a version 2 digest the naive way, entirely in-memory."""
+    return _reference_tree_digests(path, leaf_size)[0]
+
+
+@pytest.mark.parametrize("leaf_size", [512, 4096, 64 * 1024, 3 * checksum._BUFFSIZE])
+def test_calculate_version_2_leaves(
+    monkeypatch: pytest.MonkeyPatch, disk_image: Path, leaf_size: int
+) -> None:
+    """Test :func:`checksum.calculate` version 2 against a reference implementation."""
+    monkeypatch.setattr(checksum, "_TREE_LEAF_SIZE", leaf_size)
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        digest = checksum.calculate(image, checksum.VERSION_2, threads=4)
+
+    assert digest == _reference_tree_digest(disk_image, leaf_size)
+
+
+@pytest.mark.parametrize("strategy", list(checksum.ReadStrategy))
+def test_calculate_version_2_threads(
+    monkeypatch: pytest.MonkeyPatch, strategy: checksum.ReadStrategy
+) -> None:
+    """Test :func:`checksum.calculate` version 2 using many leaves and threads."""
+    monkeypatch.setattr(checksum, "_TREE_LEAF_SIZE", 4096)
+    read_options = checksum.ReadOptions(strategy=strategy)
+    expected = _reference_tree_digest(conftest.TESTDATA_DISK, 4096)
+
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        if strategy == checksum.ReadStrategy.READ:
+            with pytest.raises(ValueError, match="multiple threads"):
+                checksum.calculate(
+                    image, checksum.VERSION_2, threads=16, read_options=read_options
+                )
+            threads = 1
+        else:
+            threads = 16
+
+        for _ in range(10):
+            digest = checksum.calculate(
+                image, checksum.VERSION_2, threads=threads, read_options=read_options
+            )
+            assert digest == expected
+
+
+def test_calculate_version_2_auto_without_preadv(
+    monkeypatch: pytest.MonkeyPatch, mocker: MockerFixture
+) -> None:
+    """Test version 2 checksums don't use `read` when `preadv` is unavailable."""
+    monkeypatch.setattr(checksum, "_TREE_LEAF_SIZE", 4096)
+    monkeypatch.delattr(os, "preadv", raising=False)
+    read = mocker.spy(checksum, "_read_file_read")
+
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        digest = checksum.calculate(image, checksum.VERSION_2, threads=16)
+
+    assert digest == _reference_tree_digest(conftest.TESTDATA_DISK, 4096)
+    read.assert_not_called()
+
+
+@pytest.mark.parametrize("leaf_size", [512, 1000, 4096, 3 * checksum._BUFFSIZE + 1])
+def test_calculate_chunk_digests(
+    monkeypatch: pytest.MonkeyPatch, leaf_size: int
+) -> None:
+    """Test chunk digests are the same for all checksum versions and strategies."""
+    monkeypatch.setattr(checksum, "_TREE_LEAF_SIZE", leaf_size)
+    _, expected = _reference_tree_digests(conftest.TESTDATA_DISK, leaf_size)
+
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        for version in [checksum.VERSION_1, checksum.VERSION_2]:
+            digests: List[bytes] = []
+            digest = checksum.calculate(image, version, chunk_digests=digests)
+            assert digest == checksum.calculate(image, version)
+            assert digests == expected
+
+        mmap_options = checksum.ReadOptions(strategy=checksum.ReadStrategy.MMAP)
+        assert checksum.calculate_chunks(image, threads=4) == expected
+        assert (
+            checksum.calculate_chunks(image, threads=4, read_options=mmap_options)
+            == expected
+        )
+
+
+# Algorithms provided by `hashlib`, and their reference constructors
+_HASHLIB_ALGORITHMS: Dict[checksum.Algorithm, Callable[[], Any]] = {
+    checksum.Algorithm.BLAKE2B: lambda: hashlib.blake2b(digest_size=16),
+    checksum.Algorithm.BLAKE2S: lambda: hashlib.blake2s(digest_size=16),
+    checksum.Algorithm.SHA256: hashlib.sha256,
+}
+
+
+def _reference_allocated_digest(
+    path: Path,
+    regions: List[Tuple[int, int]],
+    algorithm: checksum.Algorithm = checksum.Algorithm.BLAKE2B,
+) -> bytes:
+    """Calculate a version 3 digest of some regions the naive way, in-memory."""
+    data = _zeroed_image(path)
+    if algorithm == checksum.Algorithm.BLAKE2B:
+        hasher = hashlib.blake2b(digest_size=16, person=b"gptsum allocated")
+    else:
+        hasher = _HASHLIB_ALGORITHMS[algorithm]()
+        hasher.update(b"gptsum allocated")
+
+    for offset, size in regions:
+        hasher.update(struct.pack("<QQ", offset, size))
+        hasher.update(data[offset : offset + size])
+
+    return hasher.digest()[:16]
+
+
+def _write_at(path: Path, offset: int, data: bytes) -> None:
+    """Overwrite part of a file."""
+    with open(path, "r+b") as fd:
+        fd.seek(offset)
+        fd.write(data)
+
+
+def test_calculate_version_3(disk_image: Path) -> None:
+    """Test :func:`checksum.calculate` version 3 against a reference implementation."""
+    utils.write_partitions(
+        disk_image,
+        [
+            dataclasses.replace(conftest.PARTITIONS[0], last_lba=2559),
+            dataclasses.replace(conftest.PARTITIONS[1], first_lba=2560, last_lba=3071),
+        ],
+    )
+    _write_at(disk_image, 2048 * gpt.LBA_SIZE, os.urandom(4096))
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        header = image.read_primary_gpt_header()
+        size = image.size
+        stats = checksum.IOStatistics()
+        calls: List[Tuple[int, int]] = []
+        digest = checksum.calculate(
+            image,
+            checksum.VERSION_3,
+            stats=stats,
+            progress=lambda done, total: calls.append((done, total)),
+        )
+
+    first = header.first_usable_lba * gpt.LBA_SIZE
+    last = (header.last_usable_lba + 1) * gpt.LBA_SIZE
+    # Both partitions are adjacent, so hashed as a single region
+    regions = [
+        (0, first),
+        (2048 * gpt.LBA_SIZE, 1024 * gpt.LBA_SIZE),
+        (last, size - last),
+    ]
+    assert digest == _reference_allocated_digest(disk_image, regions)
+    total = sum(region_size for (_, region_size) in regions)
+    assert stats.bytes_read + stats.bytes_synthesized == total
+    _check_progress(calls, total)
+
+    with utils.pipe_from(disk_image.read_bytes()) as fd:
+        _, stream_digest = checksum.calculate_stream(fd, checksum.VERSION_3)
+    assert stream_digest == digest
+
+    # Data outside of partitions isn't covered, data within them is
+    for offset, changed in [
+        (3072 * gpt.LBA_SIZE, False),
+        (last - 1, False),
+        (first - 1, True),
+        (2560 * gpt.LBA_SIZE, True),
+        (last, True),
+    ]:
+        original = disk_image.read_bytes()
+        _write_at(disk_image, offset, b"\xff")
+        with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+            assert (checksum.calculate(image, checksum.VERSION_3) != digest) == changed
+        disk_image.write_bytes(original)
+
+
+@pytest.mark.parametrize("algorithm", list(_HASHLIB_ALGORITHMS))
+def test_calculate_algorithm(disk_image: Path, algorithm: checksum.Algorithm) -> None:
+    """Test :func:`checksum.calculate` using all algorithms provided by hashlib."""
+    _write_at(disk_image, 2048 * gpt.LBA_SIZE, os.urandom(4096))
+    expected_1 = _HASHLIB_ALGORITHMS[algorithm]()
+    expected_1.update(_zeroed_image(disk_image))
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        header = image.read_primary_gpt_header()
+        size = image.size
+        digest_1 = checksum.calculate(image, algorithm=algorithm)
+        digest_3 = checksum.calculate(image, checksum.VERSION_3, algorithm=algorithm)
+
+    assert digest_1 == expected_1.digest()[:16]
+
+    first = header.first_usable_lba * gpt.LBA_SIZE
+    last = (header.last_usable_lba + 1) * gpt.LBA_SIZE
+    # The image has no partitions
+    regions = [(0, first), (last, size - last)]
+    assert digest_3 == _reference_allocated_digest(disk_image, regions, algorithm)
+
+
+@pytest.mark.parametrize("version", [checksum.VERSION_1, checksum.VERSION_3])
+@pytest.mark.parametrize("algorithm", checksum.available_algorithms())
+def test_calculate_stream_algorithm(
+    algorithm: checksum.Algorithm, version: int
+) -> None:
+    """Test :func:`checksum.calculate_stream` using all available algorithms."""
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        expected = checksum.calculate(image, version, algorithm=algorithm)
+        default = checksum.calculate(image, version)
+
+    with utils.pipe_from(conftest.TESTDATA_DISK.read_bytes()) as fd:
+        _, digest = checksum.calculate_stream(fd, version, algorithm=algorithm)
+
+    assert digest == expected
+    assert len(digest) == 16
+    assert (digest == default) == (algorithm == checksum.DEFAULT_ALGORITHM)
+
+
+def test_calculate_algorithm_version_2() -> None:
+    """Test version 2 checksums can only use Blake2b."""
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        with pytest.raises(ValueError, match="can only use the blake2b algorithm"):
+            checksum.calculate(
+                image, checksum.VERSION_2, algorithm=checksum.Algorithm.SHA256
+            )
+
+    with pytest.raises(ValueError, match="can only use the blake2b algorithm"):
+        checksum.calculate_stream(
+            0, checksum.VERSION_2, algorithm=checksum.Algorithm.SHA256
+        )
+
+
+def test_calculate_blake3_not_installed(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test using BLAKE3 if the :mod:`blake3` package is not installed."""
+    monkeypatch.setattr(checksum, "_blake3", lambda: None)
+    assert checksum.Algorithm.BLAKE3 not in checksum.available_algorithms()
+
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        with pytest.raises(ValueError, match="requires the blake3 package"):
+            checksum.calculate(image, algorithm=checksum.Algorithm.BLAKE3)
+
+
+@pytest.mark.parametrize("algorithm", checksum.available_algorithms())
+def test_measure_throughput(algorithm: checksum.Algorithm) -> None:
+    """Test measuring the throughput of all available algorithms."""
+    assert checksum.measure_throughput(algorithm, 3 * checksum._BUFFSIZE + 1) > 0
+
+
+def test_calculate_version_3_layout(disk_image: Path) -> None:
+    """Test version 3 checksums cover the layout of the partitions."""
+    partitions = [
+        dataclasses.replace(conftest.PARTITIONS[0], last_lba=2559),
+        dataclasses.replace(conftest.PARTITIONS[1], first_lba=2560),
+    ]
+    digests = set()
+
+    # Same data in the same LBAs, but different partitions, or a larger gap
+    for layout in [
+        partitions,
+        [partitions[0]],
+        [partitions[1], dataclasses.replace(partitions[0], number=2)],
+        [partitions[0], dataclasses.replace(partitions[1], first_lba=2561)],
+    ]:
+        utils.write_partitions(disk_image, layout)
+        with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+            digests.add(checksum.calculate(image, checksum.VERSION_3))
+        with utils.pipe_from(disk_image.read_bytes()) as fd:
+            assert checksum.calculate_stream(fd, checksum.VERSION_3)[1] in digests
+
+    assert len(digests) == 4
+
+
+@pytest.mark.parametrize(
+    ("changes", "message"),
+    [
+        ({"last_usable_lba": 1 << 40}, "Invalid usable space"),
+        ({"last_usable_lba": 1}, "Invalid usable space"),
+        ({"entries_starting_lba": 1}, "don't fit"),
+    ],
+)
+def test_calculate_version_3_invalid(
+    disk_image: Path, changes: Dict[str, Any], message: str
+) -> None:
+    """Test version 3 checksums of images with an invalid layout."""
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDWR) as image:
+        primary = image.read_primary_gpt_header()
+        backup = image.read_backup_gpt_header()
+        if "entries_starting_lba" not in changes:
+            backup = dataclasses.replace(backup, **changes)
+        image.write_gpt_headers(
+            dataclasses.replace(primary, **changes), backup, sync=False
+        )
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        with pytest.raises(gpt.InvalidImageError, match=message):
+            checksum.calculate(image, checksum.VERSION_3)
+
+    with utils.pipe_from(disk_image.read_bytes()) as fd:
+        with pytest.raises(gpt.InvalidImageError, match=message):
+            checksum.calculate_stream(fd, checksum.VERSION_3)
+
+
+def test_calculate_version_3_partition_invalid(disk_image: Path) -> None:
+    """Test version 3 checksums of images with partitions outside usable space."""
+    utils.write_partitions(
+        disk_image, [dataclasses.replace(conftest.PARTITIONS[0], first_lba=1)]
+    )
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        with pytest.raises(gpt.InvalidImageError, match="Partition 1"):
+            checksum.calculate(image, checksum.VERSION_3)
+
+        with pytest.raises(ValueError, match="Chunk digests"):
+            checksum.calculate(image, checksum.VERSION_3, chunk_digests=[])
+
+    data = bytearray(disk_image.read_bytes())
+    data[2 * gpt.LBA_SIZE] ^= 1
+    with utils.pipe_from(bytes(data)) as fd:
+        with pytest.raises(gpt.EntriesChecksumMismatchError):
+            checksum.calculate_stream(fd, checksum.VERSION_3)
+
+
+def _check_progress(calls: List[Tuple[int, int]], total: int) -> None:
+    """Check progress reports start at 0, increase and end at ``total``."""
+    assert calls[0] == (0, total)
+    assert calls[-1] == (total, total)
+    assert all(reported_total == total for (_, reported_total) in calls)
+    assert [done for (done, _) in calls] == sorted(done for (done, _) in calls)
+
+
+@pytest.mark.parametrize("version", [checksum.VERSION_1, checksum.VERSION_2])
+def test_calculate_progress(monkeypatch: pytest.MonkeyPatch, version: int) -> None:
+    """Test progress reported by :func:`checksum.calculate`."""
+    monkeypatch.setattr(checksum, "_TREE_LEAF_SIZE", 64 * 1024)
+    monkeypatch.setattr(checksum, "_PROGRESS_INTERVAL", 0)
+    monkeypatch.setattr(checksum, "_PROGRESS_GRANULE", 256 * 1024)
+    size = os.stat(conftest.TESTDATA_DISK).st_size
+    calls: List[Tuple[int, int]] = []
+
+    def progress(done: int, total: int) -> None:
+        calls.append((done, total))
+
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        expected = checksum.calculate(image, version)
+        assert checksum.calculate(image, version, progress=progress) == expected
+        _check_progress(calls, size)
+        # Reported about every granule, and when starting and finishing
+        assert len(calls) >= size // (256 * 1024)
+
+        calls.clear()
+        checksum.calculate_chunks(image, progress=progress)
+        _check_progress(calls, size)
+
+    calls.clear()
+    with utils.pipe_from(conftest.TESTDATA_DISK.read_bytes()) as fd:
+        checksum.calculate_stream(fd, version, progress=progress)
+    _check_progress(calls, size)
+
+
+def _reference_partition_digest(path: Path, partition: gpt.GPTPartition) -> bytes:
+    """Calculate the checksum of a partition of an image, reading it at once."""
+    with open(path, "rb") as fd:
+        fd.seek(partition.first_lba * gpt.LBA_SIZE)
+        data = fd.read(partition.size)
+
+    return hashlib.blake2b(
+        data,
+        digest_size=16,
+        salt=partition.number.to_bytes(16, "little"),
+        person=b"gptsum partition",
+    ).digest()
+
+
+def test_calculate_partitions(
+    monkeypatch: pytest.MonkeyPatch, disk_image: Path
+) -> None:
+    """Test :func:`checksum.calculate_partitions`."""
+    monkeypatch.setattr(checksum, "_PROGRESS_INTERVAL", 0)
+    monkeypatch.setattr(checksum, "_PROGRESS_GRANULE", 64 * 1024)
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+    with open(disk_image, "r+b") as fd:
+        fd.seek(conftest.PARTITIONS[0].first_lba * gpt.LBA_SIZE)
+        fd.write(os.urandom(conftest.PARTITIONS[0].size))
+
+    expected = [
+        _reference_partition_digest(disk_image, partition)
+        for partition in conftest.PARTITIONS
+    ]
+    total = sum(partition.size for partition in conftest.PARTITIONS)
+    calls: List[Tuple[int, int]] = []
+
+    def progress(done: int, total: int) -> None:
+        calls.append((done, total))
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        stats = checksum.IOStatistics()
+        digests = checksum.calculate_partitions(
+            image, conftest.PARTITIONS, stats=stats, progress=progress
+        )
+        assert digests == expected
+        assert stats.bytes_read + stats.bytes_synthesized == total
+        _check_progress(calls, total)
+
+        for strategy in checksum.ReadStrategy:
+            read_options = checksum.ReadOptions(strategy=strategy)
+            assert (
+                checksum.calculate_partitions(
+                    image, conftest.PARTITIONS, threads=1, read_options=read_options
+                )
+                == expected
+            )
+
+        assert checksum.calculate_partitions(image, []) == []
+
+
+def test_calculate_partitions_invalid(disk_image: Path) -> None:
+    """Test :func:`checksum.calculate_partitions` with invalid arguments."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        header = image.read_primary_gpt_header()
+
+        for first_lba, last_lba in [
+            (header.first_usable_lba - 1, header.first_usable_lba),
+            (header.last_usable_lba, header.last_usable_lba + 1),
+            (2048, 2047),
+        ]:
+            partition = dataclasses.replace(
+                conftest.PARTITIONS[0], first_lba=first_lba, last_lba=last_lba
+            )
+            with pytest.raises(gpt.InvalidImageError, match="usable space"):
+                checksum.calculate_partitions(image, [partition])
+
+        read_options = checksum.ReadOptions(strategy=checksum.ReadStrategy.READ)
+        with pytest.raises(ValueError, match="multiple threads"):
+            checksum.calculate_partitions(
+                image, conftest.PARTITIONS, read_options=read_options
+            )
+
+
+def test_hash_file_progress(mocker: MockerFixture) -> None:
+    """Test progress reports of :func:`checksum.hash_file` are rate-limited."""
+    monotonic = mocker.patch("time.monotonic", return_value=100.0)
+    progress = mocker.Mock()
+    size = os.stat(conftest.TESTDATA_DISK).st_size
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        hasher = hashlib.blake2b()
+        checksum.hash_file(
+            hasher.update, fd.fileno(), size, 0, progress=progress, stats=None
+        )
+
+    # The clock didn't advance, so only the start and end are reported
+    assert progress.call_args_list == [mocker.call(0, size), mocker.call(size, size)]
+    assert monotonic.call_count == 1
+
+
+@pytest.mark.parametrize("version", [checksum.VERSION_1, checksum.VERSION_2])
+def test_calculate_block_device(mocker: MockerFixture, version: int) -> None:
+    """Test reads of block devices are aligned to their physical block size."""
+    size = os.stat(conftest.TESTDATA_DISK).st_size
+
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        expected = checksum.calculate(image, version)
+
+    mocker.patch.object(gpt, "_is_block_device", return_value=True)
+    mocker.patch.object(
+        gpt, "device_geometry", return_value=gpt.DeviceGeometry(size, 512, 4096)
+    )
+    read_file = mocker.spy(checksum, "_read_file")
+
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        assert checksum.calculate(image, version) == expected
+
+    offsets = sorted(call.args[3] for call in read_file.call_args_list)
+    assert offsets[0] == gpt.MBR_SIZE + gpt.GPT_HEADER_SIZE
+    assert all(offset % 4096 == 0 for offset in offsets[1:])
+    assert all(
+        call.args[4].buffer_size == checksum._DEVICE_BUFFSIZE
+        for call in read_file.call_args_list
+    )
+
+
+@pytest.mark.parametrize("version", checksum.VERSIONS)
+def test_calculate_stream(tmp_path: Path, version: int) -> None:
+    """Test :func:`checksum.calculate_stream` from a pipe, copying the stream."""
+    data = conftest.TESTDATA_DISK.read_bytes()
+    tee = tmp_path / "tee"
+    stats = checksum.IOStatistics()
+    read_options = checksum.ReadOptions(buffer_size=1000)
+
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        expected = checksum.calculate(image, version)
+
+    with utils.pipe_from(data) as fd, open(tee, "wb") as tee_fd:
+        primary, digest = checksum.calculate_stream(
+            fd,
+            version,
+            read_options=read_options,
+            tee=tee_fd.fileno(),
+            stats=stats,
+        )
+
+    assert primary.disk_guid == conftest.TESTDATA_DISK_GUID
+    assert digest == expected
+    assert stats.bytes_read == len(data)
+    utils.assert_files_equal(conftest.TESTDATA_DISK, tee)
+
+
+@pytest.mark.parametrize(
+    ("data", "message"),
+    [
+        (b"\0" * gpt.MBR_SIZE, "too small"),
+        (conftest.TESTDATA_DISK.read_bytes()[: 1024 * 1024], "ended before"),
+        (conftest.TESTDATA_DISK.read_bytes()[:-1], "ended before"),
+        (conftest.TESTDATA_DISK.read_bytes() + b"\0", "continues after"),
+        (
+            conftest.TESTDATA_DISK.read_bytes()[: -gpt.LBA_SIZE]
+            + conftest.TESTDATA_EMBEDDED_DISK.read_bytes()[-gpt.LBA_SIZE :],
+            "don't match",
+        ),
+    ],
+    ids=["too-small", "truncated", "truncated-backup", "trailing-data", "mismatch"],
+)
+def test_calculate_stream_invalid(data: bytes, message: str) -> None:
+    """Test :func:`checksum.calculate_stream` on invalid streams."""
+    with utils.pipe_from(data) as fd:
+        with pytest.raises(gpt.InvalidImageError, match=message):
+            checksum.calculate_stream(fd)
+
+
+def test_calculate_stream_unknown_version() -> None:
+    """Test :func:`checksum.calculate_stream` with an unknown checksum version."""
+    with pytest.raises(ValueError, match="Unknown checksum version 0"):
+        checksum.calculate_stream(0, 0)
+
+
+def test_calculate_unknown_version() -> None:
+    """Test :func:`checksum.calculate` with an unknown checksum version."""
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        with pytest.raises(ValueError, match="Unknown checksum version 0"):
+            checksum.calculate(image, 0)
+
+
 def test_calculate_benchmark(
     benchmark: pytest_benchmark.fixture.BenchmarkFixture,
 ) -> None:
@@ -184,6 +1505,62 @@ def test_calculate_benchmark(
         benchmark(checksum.calculate, image)
 
 
+def test_calculate_version_2_benchmark(
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture,
+) -> None:
+    """Benchmark :func:`checksum.calculate` of a version 2 checksum."""
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        benchmark(checksum.calculate, image, checksum.VERSION_2)
+
+
+@pytest.mark.parametrize("progress", [False, True], ids=["disabled", "enabled"])
+def test_calculate_progress_benchmark(
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture, progress: bool
+) -> None:
+    """Benchmark the overhead of progress reporting in :func:`checksum.calculate`."""
+
+    def report(done: int, total: int) -> None:
+        pass
+
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        benchmark(checksum.calculate, image, progress=report if progress else None)
+
+
+@pytest.fixture(scope="module")
+def benchmark_file(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Return the path to a 16 MiB file of random data."""
+    path = tmp_path_factory.mktemp("benchmark") / "data"
+    with open(path, "wb") as fd:
+        fd.write(os.urandom(16 * 1024 * 1024))
+    return path
+
+
+@pytest.mark.parametrize(
+    ("strategy", "queue_depth"),
+    [(strategy, 1) for strategy in checksum.ReadStrategy]
+    + [(checksum.ReadStrategy.PREADV, 4), (checksum.ReadStrategy.PREADV, 16)],
+)
+def test_hash_file_benchmark(
+    benchmark: pytest_benchmark.fixture.BenchmarkFixture,
+    benchmark_file: Path,
+    strategy: checksum.ReadStrategy,
+    queue_depth: int,
+) -> None:
+    """Benchmark :func:`checksum.hash_file` on a file in the page cache."""
+    read_options = checksum.ReadOptions(strategy=strategy, queue_depth=queue_depth)
+
+    with open(benchmark_file, "rb") as fd:
+        size = os.fstat(fd.fileno()).st_size
+
+        def run() -> None:
+            hasher = hashlib.blake2b(digest_size=16)
+            checksum.hash_file(
+                hasher.update, fd.fileno(), size, 0, read_options=read_options
+            )
+
+        benchmark(run)
+
+
 def test_digest_to_guid() -> None:
     """Test :func:`checksum.digest_to_guid`."""
     hasher = hashlib.blake2b(digest_size=16)
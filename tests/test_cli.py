@@ -1,10 +1,19 @@
 """Tests for the :mod:`gptsum.cli` module."""
 
+import argparse
+import io
+import json
 import os
+import re
+import shutil
+import sys
+import threading
 import uuid
 from pathlib import Path
+from typing import Dict, List, Optional
 
 import pytest
+from pytest_mock import MockerFixture
 
 import gptsum
 from gptsum import cli
@@ -28,6 +37,52 @@ def test_version(capsys: pytest.CaptureFixture[str]) -> None:
     assert captured.out == f"{gptsum.__version__}\n"
 
 
+def _subcommand_options(parser: argparse.ArgumentParser) -> Dict[str, List[str]]:
+    """Get the options of all subcommands of a parser."""
+    (subparsers,) = (
+        action
+        for action in parser._actions  # pylint: disable=protected-access
+        if isinstance(action, argparse._SubParsersAction)
+    )
+    return {
+        name: [
+            option
+            for action in subparser._actions  # pylint: disable=protected-access
+            for option in action.option_strings
+        ]
+        for name, subparser in subparsers.choices.items()
+    }
+
+
+@pytest.mark.parametrize("command", [None, "unknown"])
+def test_build_parser(command: Optional[str]) -> None:
+    """Test building the parser with all subcommands."""
+    options = _subcommand_options(cli.build_parser(command))
+
+    assert "--manifest" in options["embed"]
+    assert "--size" in options["get-guid"]
+    assert "--workers" in options["serve"]
+
+
+def test_build_parser_command() -> None:
+    """Test building the parser with the arguments of a single subcommand."""
+    options = _subcommand_options(cli.build_parser("get-guid"))
+
+    assert "--size" in options["get-guid"]
+    assert options["embed"] == ["-h", "--help"]
+    assert list(options) == [
+        "embed",
+        "copy-embed",
+        "verify",
+        "get-guid",
+        "inspect",
+        "set-guid",
+        "calculate-expected-guid",
+        "benchmark",
+        "serve",
+    ]
+
+
 @pytest.mark.parametrize(
     ("disk_file", "expected_guid"),
     [
@@ -47,6 +102,60 @@ def test_get_guid(
     assert captured.out == f"{expected_guid}\n"
 
 
+def test_inspect(capsys: pytest.CaptureFixture[str], disk_image: Path) -> None:
+    """Test the CLI :option:`inspect` subcommand."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+
+    cli.main(["inspect", str(disk_image)])
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == f"Disk GUID: {conftest.TESTDATA_DISK_GUID}"
+    assert lines[1].split() == [
+        "Number",
+        "Start",
+        "(LBA)",
+        "End",
+        "(LBA)",
+        "Size",
+        "Type",
+        "GUID",
+        "Unique",
+        "GUID",
+        "Name",
+    ]
+    assert lines[2].split() == [
+        "1",
+        "2048",
+        "3071",
+        "524288",
+        "0fc63daf-8483-4772-8e79-3d69d8477de4",
+        "5f1e2d3c-4b5a-4697-8877-665544332211",
+        "root",
+    ]
+    assert lines[3].endswith("  EFI system partition")
+    assert len(lines) == 4
+
+
+def test_inspect_json(capsys: pytest.CaptureFixture[str], disk_image: Path) -> None:
+    """Test the CLI :option:`inspect --json` subcommand."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+
+    cli.main(["inspect", "--json", str(disk_image)])
+
+    report = json.loads(capsys.readouterr().out)
+    assert report["guid"] == str(conftest.TESTDATA_DISK_GUID)
+    assert report["partitions"][1] == {
+        "number": 3,
+        "type_guid": "c12a7328-f81f-11d2-ba4b-00a0c93ec93b",
+        "unique_guid": "11223344-5566-4788-99aa-bbccddeeff00",
+        "first_lba": 3072,
+        "last_lba": 4062,
+        "attributes": 1 << 63,
+        "name": "EFI system partition",
+    }
+    assert len(report["partitions"]) == 2
+
+
 @pytest.mark.parametrize(
     ("disk_file", "expected_guid"),
     [
@@ -64,6 +173,168 @@ def test_calculate_expected_guid(
     assert captured.out == f"{expected_guid}\n"
 
 
+def test_calculate_expected_guid_version_2(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Test the CLI :option:`calculate-expected-guid` subcommand, version 2."""
+    cli.main(
+        [
+            "calculate-expected-guid",
+            "--checksum-version=2",
+            "--threads=2",
+            str(conftest.TESTDATA_DISK),
+        ]
+    )
+
+    captured = capsys.readouterr()
+    assert captured.out == f"{conftest.TESTDATA_DISK_V2_GUID}\n"
+
+
+@pytest.mark.parametrize("strategy", ["auto", "preadv", "read", "mmap", "direct"])
+def test_calculate_expected_guid_read_strategy(
+    capsys: pytest.CaptureFixture[str], strategy: str
+) -> None:
+    """Test the CLI :option:`calculate-expected-guid` :option:`--read-strategy`."""
+    cli.main(
+        [
+            "calculate-expected-guid",
+            f"--read-strategy={strategy}",
+            str(conftest.TESTDATA_DISK),
+        ]
+    )
+
+    captured = capsys.readouterr()
+    assert captured.out == f"{conftest.TESTDATA_EMBEDDED_DISK_GUID}\n"
+
+
+@pytest.mark.parametrize("version", ["1", "2"])
+def test_calculate_expected_guid_queue_depth(
+    capsys: pytest.CaptureFixture[str], version: str
+) -> None:
+    """Test the CLI :option:`--queue-depth` and :option:`--buffer-size` options."""
+    cli.main(
+        [
+            "calculate-expected-guid",
+            f"--checksum-version={version}",
+            "--read-strategy=preadv",
+            "--queue-depth=4",
+            "--buffer-size=65536",
+            str(conftest.TESTDATA_DISK),
+        ]
+    )
+
+    expected = {
+        "1": conftest.TESTDATA_EMBEDDED_DISK_GUID,
+        "2": conftest.TESTDATA_DISK_V2_GUID,
+    }[version]
+    captured = capsys.readouterr()
+    assert captured.out == f"{expected}\n"
+
+
+@pytest.mark.parametrize("policy", ["keep", "drop", "auto"])
+def test_calculate_expected_guid_page_cache(
+    capsys: pytest.CaptureFixture[str], policy: str
+) -> None:
+    """Test the CLI :option:`--page-cache` and :option:`--page-cache-window` options."""
+    cli.main(
+        [
+            "calculate-expected-guid",
+            f"--page-cache={policy}",
+            "--page-cache-window=65536",
+            str(conftest.TESTDATA_DISK),
+        ]
+    )
+
+    captured = capsys.readouterr()
+    assert captured.out == f"{conftest.TESTDATA_EMBEDDED_DISK_GUID}\n"
+
+
+def test_version_2_read_strategy_read(capsys: pytest.CaptureFixture[str]) -> None:
+    """Test :option:`--read-strategy=read` with version 2 checksums."""
+    with pytest.raises(SystemExit):
+        cli.main(
+            [
+                "calculate-expected-guid",
+                "--checksum-version=2",
+                "--read-strategy=read",
+                str(conftest.TESTDATA_DISK),
+            ]
+        )
+
+    captured = capsys.readouterr()
+    assert "--threads=1" in captured.err
+
+    cli.main(
+        [
+            "calculate-expected-guid",
+            "--checksum-version=2",
+            "--read-strategy=read",
+            "--threads=1",
+            str(conftest.TESTDATA_DISK),
+        ]
+    )
+
+    captured = capsys.readouterr()
+    assert captured.out == f"{conftest.TESTDATA_DISK_V2_GUID}\n"
+
+
+def test_partitions_read_strategy_read(
+    capsys: pytest.CaptureFixture[str], disk_image: Path
+) -> None:
+    """Test :option:`--read-strategy=read` with :option:`embed --partitions`."""
+    with pytest.raises(SystemExit):
+        cli.main(["embed", "--partitions", "--read-strategy=read", str(disk_image)])
+
+    captured = capsys.readouterr()
+    assert "--partitions when using --threads=1" in captured.err
+
+    cli.main(
+        [
+            "embed",
+            "--partitions",
+            "--read-strategy=read",
+            "--threads=1",
+            str(disk_image),
+        ]
+    )
+    assert gptsum.get_guid(path=disk_image) == conftest.TESTDATA_EMBEDDED_DISK_GUID
+
+
+@pytest.mark.parametrize("threads", ["0", "-1"])
+def test_invalid_threads(capsys: pytest.CaptureFixture[str], threads: str) -> None:
+    """Test passing an invalid :option:`--threads` value."""
+    with pytest.raises(SystemExit):
+        cli.main(
+            [
+                "calculate-expected-guid",
+                f"--threads={threads}",
+                str(conftest.TESTDATA_DISK),
+            ]
+        )
+
+    captured = capsys.readouterr()
+    assert "must be a positive integer" in captured.err
+
+
+@pytest.mark.parametrize("subcommand", ["calculate-expected-guid", "embed", "verify"])
+def test_stats(
+    capsys: pytest.CaptureFixture[str], sparse_disk_image: Path, subcommand: str
+) -> None:
+    """Test the :option:`--stats` option."""
+    try:
+        cli.main([subcommand, "--stats", str(sparse_disk_image)])
+    except SystemExit:
+        assert subcommand == "verify"
+
+    captured = capsys.readouterr()
+    stats = captured.err.splitlines()[-1]
+    match = re.fullmatch(r"Read (\d+) bytes, synthesized (\d+) bytes", stats)
+    assert match is not None
+    assert (
+        int(match.group(1)) + int(match.group(2)) == os.stat(sparse_disk_image).st_size
+    )
+
+
 def test_set_guid(capsys: pytest.CaptureFixture[str], disk_image: Path) -> None:
     """Test the CLI :option:`set-guid` subcommand."""
     new_guid = uuid.UUID("bf85e1a8-748e-46f8-909f-4a70067efbe2")
@@ -111,3 +382,420 @@ def test_verify(disk_image: Path) -> None:
 
     cli.main(["embed", str(disk_image)])
     cli.main(["verify", str(disk_image)])
+
+
+def test_verify_version_2(disk_image: Path) -> None:
+    """Test the CLI :option:`verify` subcommand using version 2 checksums."""
+    cli.main(["embed", "--checksum-version=2", str(disk_image)])
+    cli.main(["verify", "--checksum-version=2", str(disk_image)])
+    # The version was recorded when embedding
+    cli.main(["verify", str(disk_image)])
+
+    with pytest.raises(SystemExit):
+        cli.main(["verify", "--checksum-version=1", str(disk_image)])
+
+    assert gptsum.get_guid(path=disk_image) == conftest.TESTDATA_DISK_V2_GUID
+
+
+def test_verify_partition(capsys: pytest.CaptureFixture[str], disk_image: Path) -> None:
+    """Test the CLI :option:`embed --partitions` and `verify --partition` options."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+    cli.main(["embed", "--partitions", str(disk_image)])
+    cli.main(["verify", str(disk_image)])
+    cli.main(["verify", "--partition=1", "--read-strategy=read", str(disk_image)])
+
+    partitions = gptsum.get_partitions(path=disk_image)
+    with open(disk_image, "r+b") as fd:
+        fd.seek(partitions[0].first_lba * gptsum.gpt.LBA_SIZE)
+        fd.write(b"\1")
+
+    cli.main(["verify", "--partition=3", str(disk_image)])
+    with pytest.raises(SystemExit):
+        cli.main(["verify", "--partition=1", str(disk_image)])
+
+    captured = capsys.readouterr()
+    assert captured.err.startswith(
+        "Unique GUID of partition 1 doesn't match expected checksum, "
+        f"got {partitions[0].unique_guid}, "
+    )
+
+    with pytest.raises(SystemExit):
+        cli.main(["verify", "--partition=2", str(disk_image)])
+
+    captured = capsys.readouterr()
+    assert captured.err == "No partition 2 in the image\n"
+
+
+def test_verify_version_3(capsys: pytest.CaptureFixture[str], disk_image: Path) -> None:
+    """Test the CLI :option:`verify` subcommand using version 3 checksums."""
+    cli.main(["embed", "--checksum-version=3", str(disk_image)])
+    cli.main(["verify", "--checksum-version=3", str(disk_image)])
+
+    with pytest.raises(SystemExit):
+        cli.main(["embed", "--checksum-version=3", "--manifest", str(disk_image)])
+
+    captured = capsys.readouterr()
+    assert "--manifest can't be used with --checksum-version=3" in captured.err
+
+
+def test_verify_algorithm(
+    capsys: pytest.CaptureFixture[str],
+    monkeypatch: pytest.MonkeyPatch,
+    disk_image: Path,
+    tmp_path: Path,
+) -> None:
+    """Test the CLI :option:`verify` subcommand using another algorithm."""
+    cli.main(["embed", "--algorithm=sha256", str(disk_image)])
+    cli.main(["verify", "--algorithm=sha256", str(disk_image)])
+    # The algorithm was recorded when embedding
+    cli.main(["verify", str(disk_image)])
+
+    with pytest.raises(SystemExit):
+        cli.main(["verify", "--algorithm=blake2b", str(disk_image)])
+    captured = capsys.readouterr()
+    assert captured.err.startswith("Disk GUID doesn't match expected checksum")
+    assert "--algorithm" not in captured.err
+
+    # Copies don't carry the record, so a hint is given
+    copy = tmp_path / "copy.img"
+    shutil.copyfile(disk_image, copy)
+    with pytest.raises(SystemExit):
+        cli.main(["verify", str(copy)])
+    captured = capsys.readouterr()
+    assert captured.err.splitlines()[1] == (
+        "If the checksum was embedded using another --checksum-version or "
+        "--algorithm, which wasn't recorded with the image, these must be given"
+    )
+
+    with pytest.raises(SystemExit):
+        cli.main(
+            ["verify", "--checksum-version=2", "--algorithm=sha256", str(disk_image)]
+        )
+    assert (
+        "--algorithm can't be used with --checksum-version=2" in capsys.readouterr().err
+    )
+
+    monkeypatch.setattr(gptsum.checksum, "_blake3", lambda: None)
+    with pytest.raises(SystemExit):
+        cli.main(["verify", "--algorithm=blake3", str(disk_image)])
+    assert (
+        "--algorithm=blake3 is not available on this system" in capsys.readouterr().err
+    )
+
+
+def test_benchmark(
+    capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test the CLI :option:`benchmark` subcommand."""
+    monkeypatch.setattr(gptsum.checksum, "_blake3", lambda: None)
+    cli.main(["benchmark", "--data-size=1048576"])
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ["Algorithm", "Throughput"]
+    assert [line.split()[0] for line in lines[1:]] == [
+        algorithm.value for algorithm in gptsum.checksum.Algorithm
+    ]
+    assert lines[1].endswith("MB/s (default)")
+    assert lines[-1].endswith("not available")
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_verify_many(
+    capsys: pytest.CaptureFixture[str],
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    jobs: str,
+) -> None:
+    """Test the CLI :option:`verify` subcommand with many images."""
+    disk = tmp_path / "disk"
+    shutil.copyfile(conftest.TESTDATA_DISK, disk)
+    embedded = tmp_path / "embedded"
+    shutil.copyfile(conftest.TESTDATA_EMBEDDED_DISK, embedded)
+    missing = tmp_path / "missing"
+
+    monkeypatch.setattr(
+        sys, "stdin", io.TextIOWrapper(io.BytesIO(f"{missing}\0".encode()))
+    )
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["verify", f"-j{jobs}", "--files0-from=-", str(disk), str(embedded)])
+
+    assert exc_info.value.code == 1
+
+    captured = capsys.readouterr()
+    assert captured.out == f"{embedded}: OK\n"
+    errors = sorted(captured.err.splitlines())
+    assert len(errors) == 3
+    assert errors[0].startswith(f"{disk}: Disk GUID doesn't match expected checksum")
+    assert errors[1].startswith(f"{disk}: If the checksum was embedded using another")
+    assert errors[2].startswith(f"{missing}: ")
+
+
+def test_embed_many(capsys: pytest.CaptureFixture[str], tmp_path: Path) -> None:
+    """Test the CLI :option:`embed` subcommand with many images."""
+    images = []
+    for index in range(3):
+        path = tmp_path / f"disk-{index}"
+        shutil.copyfile(conftest.TESTDATA_DISK, path)
+        images.append(path)
+
+    cli.main(["embed", "--jobs=2", *(str(image) for image in images)])
+
+    captured = capsys.readouterr()
+    assert sorted(captured.out.splitlines()) == [f"{image}: OK" for image in images]
+
+    for image in images:
+        utils.assert_files_equal(conftest.TESTDATA_EMBEDDED_DISK, image)
+
+
+@pytest.mark.parametrize("subcommand", ["embed", "verify"])
+def test_no_images(capsys: pytest.CaptureFixture[str], subcommand: str) -> None:
+    """Test :option:`embed` and :option:`verify` without any images."""
+    with pytest.raises(SystemExit):
+        cli.main([subcommand])
+
+    captured = capsys.readouterr()
+    assert "at least one disk image file must be given" in captured.err
+
+
+@pytest.mark.parametrize("subcommand", ["calculate-expected-guid", "verify"])
+def test_trust_cache(tmp_path: Path, subcommand: str) -> None:
+    """Test the CLI :option:`--trust-cache` option."""
+    disk = tmp_path / "disk"
+    shutil.copy(conftest.TESTDATA_EMBEDDED_DISK, disk)
+
+    cli.main([subcommand, "--trust-cache", str(disk)])
+
+    with gptsum.gpt.GPTImage(path=disk, open_mode=os.O_RDONLY) as image:
+        digest = gptsum.cache.lookup(image, disk, gptsum.checksum.VERSION_1)
+        assert gptsum.checksum.digest_to_guid(digest or b"") == (
+            conftest.TESTDATA_EMBEDDED_DISK_GUID
+        )
+
+    cli.main([subcommand, "--trust-cache", str(disk)])
+
+    with pytest.raises(SystemExit):
+        cli.main([subcommand, "--cache", "--no-cache", str(disk)])
+
+
+def test_verify_locate(capsys: pytest.CaptureFixture[str], disk_image: Path) -> None:
+    """Test the CLI :option:`verify --locate` option."""
+    cli.main(["embed", "--manifest", str(disk_image)])
+    assert gptsum.manifest.default_path(disk_image).exists()
+    cli.main(["verify", "--locate", str(disk_image)])
+
+    with open(disk_image, "r+b") as fd:
+        fd.seek(1024 * 1024)
+        fd.write(b"\1")
+
+    capsys.readouterr()
+    with pytest.raises(SystemExit):
+        cli.main(["verify", "--locate", str(disk_image)])
+
+    size = os.stat(disk_image).st_size
+    captured = capsys.readouterr()
+    assert captured.err == f"Image contents changed in bytes 0-{size - 1}\n"
+
+
+def test_verify_stdin(
+    capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test the CLI :option:`verify` subcommand reading from standard input."""
+    with open(conftest.TESTDATA_EMBEDDED_DISK, "rb") as fd:
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(fd))
+        cli.main(["verify", "--checksum-version=1", "-"])
+
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(fd))
+        with pytest.raises(SystemExit):
+            cli.main(["verify", "-"])
+
+    captured = capsys.readouterr()
+    assert captured.err.startswith("Disk GUID doesn't match expected checksum")
+
+    read_fd, write_fd = os.pipe()
+    with os.fdopen(read_fd, "rb") as stdin:
+        with os.fdopen(write_fd, "wb") as writer:
+            writer.write(b"EFI")
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(stdin))
+        with pytest.raises(SystemExit):
+            cli.main(["verify", "-"])
+
+    captured = capsys.readouterr()
+    assert captured.err.endswith("too small to be a valid GPT image\n")
+
+
+def test_copy_embed(
+    capsys: pytest.CaptureFixture[str],
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Test the CLI :option:`copy-embed` subcommand."""
+    copy = tmp_path / "copy"
+
+    cli.main(["copy-embed", "--stats", str(conftest.TESTDATA_DISK), str(copy)])
+    utils.assert_files_equal(conftest.TESTDATA_EMBEDDED_DISK, copy)
+
+    copy.unlink()
+    with open(conftest.TESTDATA_DISK, "rb") as fd:
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(fd))
+        cli.main(["copy-embed", "-", str(copy)])
+    utils.assert_files_equal(conftest.TESTDATA_EMBEDDED_DISK, copy)
+
+    with pytest.raises(SystemExit):
+        cli.main(["copy-embed", str(copy), str(copy)])
+    utils.assert_files_equal(conftest.TESTDATA_EMBEDDED_DISK, copy)
+
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert captured.err.startswith("Open: ")
+    assert captured.err.endswith("Source and destination are the same file\n")
+
+
+def test_copy_embed_size(capsys: pytest.CaptureFixture[str], tmp_path: Path) -> None:
+    """Test the CLI :option:`copy-embed` subcommand doesn't take a size."""
+    with pytest.raises(SystemExit):
+        cli.main(
+            [
+                "copy-embed",
+                "--size=1024",
+                str(conftest.TESTDATA_DISK),
+                str(tmp_path / "copy"),
+            ]
+        )
+
+    captured = capsys.readouterr()
+    assert "--size can't be used with copy-embed" in captured.err
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="mkfifo not available")
+def test_verify_fifo_tee(tmp_path: Path) -> None:
+    """Test the CLI :option:`verify --tee` option, reading from a named pipe."""
+    fifo = tmp_path / "fifo"
+    os.mkfifo(fifo)
+    tee = tmp_path / "tee"
+
+    def writer() -> None:
+        with open(fifo, "wb") as fd:
+            fd.write(conftest.TESTDATA_EMBEDDED_DISK.read_bytes())
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        cli.main(["verify", "--tee", str(tee), str(fifo)])
+    finally:
+        thread.join()
+
+    utils.assert_files_equal(conftest.TESTDATA_EMBEDDED_DISK, tee)
+
+
+@pytest.mark.parametrize(
+    ("args", "message"),
+    [
+        (["-", str(conftest.TESTDATA_DISK)], "must be verified alone"),
+        (["--tee", "out", str(conftest.TESTDATA_DISK)], "--tee can only be used"),
+        (["--locate", "-"], "--locate can't be used"),
+        (["--trust-cache", "-"], "the cache can't be used"),
+        (["--size=1024", "-"], "--size can't be used"),
+        (["--partition=1", "-"], "--partition can't be used with an image"),
+        (
+            ["--partition=1", "--locate", str(conftest.TESTDATA_DISK)],
+            "--partition can't be used with --locate",
+        ),
+    ],
+)
+def test_verify_stream_invalid_arguments(
+    capsys: pytest.CaptureFixture[str], args: List[str], message: str
+) -> None:
+    """Test invalid combinations of arguments when verifying a stream."""
+    with pytest.raises(SystemExit):
+        cli.main(["verify", *args])
+
+    captured = capsys.readouterr()
+    assert message in captured.err
+
+
+def test_size(capsys: pytest.CaptureFixture[str], tmp_path: Path) -> None:
+    """Test handling an image written to a larger file, e.g., a device."""
+    path = tmp_path / "device"
+    size = os.stat(conftest.TESTDATA_EMBEDDED_DISK).st_size
+    path.write_bytes(conftest.TESTDATA_EMBEDDED_DISK.read_bytes() + bytes(64 * 1024))
+
+    with pytest.raises(SystemExit):
+        cli.main(["verify", str(path)])
+    capsys.readouterr()
+
+    cli.main(["verify", f"--size={size}", str(path)])
+    cli.main(["get-guid", f"--size={size}", str(path)])
+    cli.main(["calculate-expected-guid", f"--size={size}", str(path)])
+
+    captured = capsys.readouterr()
+    guid = conftest.TESTDATA_EMBEDDED_DISK_GUID
+    assert captured.out == f"{guid}\n{guid}\n"
+
+    with pytest.raises(SystemExit):
+        cli.main(["verify", "--size=1000", str(path)])
+
+    captured = capsys.readouterr()
+    assert "must be a multiple of 512: 1000" in captured.err
+
+
+def test_progress(capsys: pytest.CaptureFixture[str], disk_image: Path) -> None:
+    """Test progress reports when not writing to a terminal."""
+    cli.main(["calculate-expected-guid", "--progress", str(disk_image)])
+
+    captured = capsys.readouterr()
+    size = os.stat(disk_image).st_size
+    report = json.loads(captured.err.splitlines()[-1])
+    assert report["done"] == report["total"] == size
+    assert report["eta"] == 0
+
+    with pytest.raises(SystemExit):
+        cli.main(["verify", "--progress", "--jobs=2", str(disk_image)])
+
+    captured = capsys.readouterr()
+    assert "--progress can only be used with --jobs=1" in captured.err
+
+
+def test_progress_terminal(mocker: MockerFixture) -> None:
+    """Test progress reports on a terminal."""
+    mocker.patch("time.monotonic", side_effect=[0.0, 0.0, 2.0, 4.0, 5.0])
+    stream = io.StringIO()
+    mocker.patch.object(stream, "isatty", return_value=True)
+    reporter = cli._ProgressReporter(stream)  # pylint: disable=protected-access
+
+    reporter(0, 4_000_000_000)
+    reporter(1_000_000_000, 4_000_000_000)
+    assert stream.getvalue() == ("\r1000/4000 MB (25%), 500.0 MB/s, ETA 0:00:06\x1b[K")
+
+    reporter(3_000_000_000, 4_000_000_000)
+    reporter.clear()
+    reporter(4_000_000_000, 4_000_000_000)
+    assert stream.getvalue().endswith("ETA 0:00:01\x1b[K\r\x1b[K")
+
+
+def test_stats_json(
+    capsys: pytest.CaptureFixture[str], sparse_disk_image: Path
+) -> None:
+    """Test the :option:`--stats-format=json` option."""
+    cli.main(["embed", "--stats-format=json", str(sparse_disk_image)])
+
+    captured = capsys.readouterr()
+    stats = json.loads(captured.err)
+    assert (
+        stats["bytes_read"] + stats["bytes_synthesized"]
+        == os.stat(sparse_disk_image).st_size
+    )
+    assert stats["read_calls"] > 0
+    assert set(stats["phases"]) == {"open", "headers", "hash", "write"}
+    assert set(stats["phases"]["hash"]) == {"wall", "cpu"}
+
+
+def test_stats_format_text(
+    capsys: pytest.CaptureFixture[str], sparse_disk_image: Path
+) -> None:
+    """Test the :option:`--stats-format=text` option, with :option:`--stats`."""
+    cli.main(["embed", "--stats", "--stats-format", "text", str(sparse_disk_image)])
+
+    captured = capsys.readouterr()
+    assert captured.err.startswith("Open: ")
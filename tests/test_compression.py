@@ -0,0 +1,190 @@
+"""Tests for the :mod:`gptsum.compression` module."""
+
+import bz2
+import gzip
+import lzma
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import pytest
+from pytest_mock import MockerFixture
+
+import gptsum
+from gptsum import cli, compression
+from tests import conftest, utils
+
+# Necessary to allow locally-defined fixtures to be used
+# pylint: disable=redefined-outer-name
+
+_COMPRESS: Dict[compression.Compression, Callable[[bytes], bytes]] = {
+    compression.Compression.XZ: lzma.compress,
+    compression.Compression.GZIP: gzip.compress,
+    compression.Compression.BZIP2: bz2.compress,
+}
+
+_zstd = compression._zstd()  # pylint: disable=protected-access
+if _zstd is not None:  # pragma: py-gte-314
+    _COMPRESS[compression.Compression.ZSTD] = _zstd.compress
+
+
+@pytest.fixture(params=list(_COMPRESS), ids=lambda c: c.value)
+def compressed_image(request: pytest.FixtureRequest, tmp_path: Path) -> Path:
+    """Return the path to a compressed copy of `TESTDATA_EMBEDDED_DISK`."""
+    path = tmp_path / "disk"
+    path.write_bytes(
+        _COMPRESS[request.param](conftest.TESTDATA_EMBEDDED_DISK.read_bytes())
+    )
+    return path
+
+
+@pytest.mark.parametrize(
+    "disk_file", [conftest.TESTDATA_DISK, conftest.TESTDATA_EMBEDDED_DISK]
+)
+def test_detect_uncompressed(disk_file: Path) -> None:
+    """Test :func:`compression.detect` on uncompressed images."""
+    with open(disk_file, "rb") as fd:
+        assert compression.detect(fd.fileno()) is None
+
+    with utils.pipe_from(b"\xfd7zXZ\0") as fd:
+        assert compression.detect(fd) is None
+
+
+def test_detect_gpt_signature(tmp_path: Path) -> None:
+    """Test images whose boot code looks like a compression header."""
+    data = bytearray(conftest.TESTDATA_EMBEDDED_DISK.read_bytes())
+    data[:2] = b"\x1f\x8b"
+    path = tmp_path / "disk"
+    path.write_bytes(data)
+
+    with open(path, "rb") as fd:
+        assert compression.detect(fd.fileno()) is None
+
+
+def test_decompressed(compressed_image: Path) -> None:
+    """Test :func:`compression.decompressed` and :func:`compression.detect`."""
+    with open(compressed_image, "rb") as fd:
+        kind = compression.detect(fd.fileno())
+        assert kind is not None
+
+        with compression.decompressed(fd.fileno(), kind) as stream:
+            guid = gptsum.calculate_expected_guid_stream(stream)
+
+    assert guid == conftest.TESTDATA_EMBEDDED_DISK_GUID
+
+
+def test_decompressed_stream(compressed_image: Path) -> None:
+    """Test :func:`compression.decompressed_stream` on a compressed pipe."""
+    with utils.pipe_from(compressed_image.read_bytes()) as fd:
+        with compression.decompressed_stream(fd) as stream:
+            guid = gptsum.calculate_expected_guid_stream(stream)
+
+    assert guid == conftest.TESTDATA_EMBEDDED_DISK_GUID
+
+
+@pytest.mark.parametrize("disk_file", [conftest.TESTDATA_DISK, None])
+def test_decompressed_stream_uncompressed(disk_file: Optional[Path]) -> None:
+    """Test :func:`compression.decompressed_stream` on uncompressed pipes."""
+    data = b"EFI" if disk_file is None else disk_file.read_bytes()
+
+    with utils.pipe_from(data) as fd:
+        with compression.decompressed_stream(fd) as stream:
+            with os.fdopen(stream, "rb", closefd=False) as fileobj:
+                assert fileobj.read() == data
+
+
+def test_decompressed_stream_file(compressed_image: Path) -> None:
+    """Test :func:`compression.decompressed_stream` on a regular file."""
+    with open(compressed_image, "rb") as fd:
+        with compression.decompressed_stream(fd.fileno()) as stream:
+            guid = gptsum.calculate_expected_guid_stream(stream)
+
+    assert guid == conftest.TESTDATA_EMBEDDED_DISK_GUID
+
+
+def test_decompressed_stream_error(mocker: MockerFixture) -> None:
+    """Test read errors of uncompressed pipes replace the error they caused."""
+    mocker.patch.object(
+        compression._PrefixedStream, "readinto", side_effect=OSError("broken")
+    )
+
+    with utils.pipe_from(conftest.TESTDATA_DISK.read_bytes()) as fd:
+        with pytest.raises(OSError, match="broken"):
+            with compression.decompressed_stream(fd) as stream:
+                gptsum.calculate_expected_guid_stream(stream)
+
+
+def test_decompressed_corrupt(tmp_path: Path) -> None:
+    """Test decompression errors replace the error caused by truncated data."""
+    data = lzma.compress(conftest.TESTDATA_EMBEDDED_DISK.read_bytes())
+    path = tmp_path / "disk.xz"
+    path.write_bytes(data[: len(data) // 2])
+
+    with open(path, "rb") as fd:
+        with pytest.raises(compression.DecompressionError, match="xz"):
+            gptsum.verify_stream(fd.fileno(), compression=compression.Compression.XZ)
+
+
+def test_decompressed_reader_stops(tmp_path: Path) -> None:
+    """Test errors of the reader are reported when it stops reading early."""
+    path = tmp_path / "disk.gz"
+    path.write_bytes(gzip.compress(b"\0" * (4 * 1024 * 1024)))
+
+    with open(path, "rb") as fd:
+        with pytest.raises(gptsum.gpt.InvalidSignatureError):
+            gptsum.verify_stream(fd.fileno(), compression=compression.Compression.GZIP)
+
+
+def test_zstd_unsupported(mocker: MockerFixture, tmp_path: Path) -> None:
+    """Test zstd compressed images when :mod:`compression.zstd` is unavailable."""
+    mocker.patch.object(compression, "_zstd", return_value=None)
+    path = tmp_path / "disk.zst"
+    path.write_bytes(b"\x28\xb5\x2f\xfd" + bytes(1024))
+
+    with open(path, "rb") as fd:
+        assert compression.detect(fd.fileno()) == compression.Compression.ZSTD
+
+        with pytest.raises(compression.DecompressionError, match="Python 3.14"):
+            gptsum.verify_stream(fd.fileno(), compression=compression.Compression.ZSTD)
+
+
+def test_verify_many(compressed_image: Path) -> None:
+    """Test :func:`gptsum.verify_many` on compressed images."""
+    (result,) = gptsum.verify_many([compressed_image], jobs=1)
+    assert result.error is None
+
+    (result,) = gptsum.verify_many([compressed_image], jobs=1, locate=True)
+    assert isinstance(result.error, ValueError)
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="mkfifo not available")
+def test_cli_pipe(tmp_path: Path, compressed_image: Path) -> None:
+    """Test the CLI verifying a compressed image read from a named pipe."""
+    fifo = tmp_path / "fifo"
+    os.mkfifo(fifo)
+    tee = tmp_path / "tee"
+
+    def writer() -> None:
+        with open(fifo, "wb") as fd:
+            fd.write(compressed_image.read_bytes())
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        cli.main(["verify", "--tee", str(tee), str(fifo)])
+    finally:
+        thread.join()
+
+    utils.assert_files_equal(conftest.TESTDATA_EMBEDDED_DISK, tee)
+
+
+def test_cli(capsys: pytest.CaptureFixture[str], compressed_image: Path) -> None:
+    """Test the CLI on compressed images."""
+    cli.main(["verify", "--checksum-version=1", str(compressed_image)])
+    cli.main(["calculate-expected-guid", "--stats", str(compressed_image)])
+
+    captured = capsys.readouterr()
+    assert captured.out == f"{conftest.TESTDATA_EMBEDDED_DISK_GUID}\n"
+    size = os.stat(conftest.TESTDATA_EMBEDDED_DISK).st_size
+    assert f"{size}" in captured.err
@@ -1,21 +1,26 @@
 """Tests for the :mod:`gptsum.gpt` module."""
 
+import dataclasses
 import os
 import struct
+import sys
 import tempfile
 import uuid
 from pathlib import Path
-from typing import Iterator, Type
+from typing import Any, Dict, Iterator, Type
 
 import pytest
 from pytest_mock import MockerFixture
 
 from gptsum import gpt
-from tests import conftest
+from tests import conftest, utils
 
 # Necessary to allow locally-defined fixtures to be used
 # pylint: disable=redefined-outer-name
 
+# Block devices are emulated by patching protected members
+# pylint: disable=protected-access
+
 
 @pytest.mark.parametrize(
     "header",
@@ -236,6 +241,34 @@ def test_gptheader_pack_override_crc32() -> None:
         gpt.GPTHeader.unpack(packed)
 
 
+def test_gptheader_unpack_memoryview() -> None:
+    """Test :meth:`gpt.GPTHeader.unpack` from a view of a larger buffer."""
+    buffer = bytearray(gpt.LBA_SIZE) + TEST_DISK_GPT_HEADER + bytearray(gpt.LBA_SIZE)
+    view = memoryview(buffer)[gpt.LBA_SIZE : 2 * gpt.LBA_SIZE]
+
+    header = gpt.GPTHeader.unpack(view)
+
+    assert header == gpt.GPTHeader.unpack(TEST_DISK_GPT_HEADER)
+
+
+def test_gptheader_pack_into() -> None:
+    """Test :meth:`gpt.GPTHeader.pack_into` at an offset in a buffer."""
+    header = gpt.GPTHeader.unpack(TEST_DISK_GPT_HEADER)
+    buffer = bytearray(b"\xff" * 3 * gpt.LBA_SIZE)
+
+    header.pack_into(buffer, gpt.LBA_SIZE)
+
+    assert buffer[gpt.LBA_SIZE : 2 * gpt.LBA_SIZE] == TEST_DISK_GPT_HEADER
+    assert buffer[: gpt.LBA_SIZE] == b"\xff" * gpt.LBA_SIZE
+    assert buffer[2 * gpt.LBA_SIZE :] == b"\xff" * gpt.LBA_SIZE
+
+
+def test_gptheader_slots() -> None:
+    """Ensure :class:`gpt.GPTHeader` instances have no ``__dict__``."""
+    header = gpt.GPTHeader.unpack(TEST_DISK_GPT_HEADER)
+    assert not hasattr(header, "__dict__")
+
+
 @pytest.fixture
 def small_file(tmp_path: Path) -> Iterator[Path]:
     """Yield the path of an empty, 1kB temporary file."""
@@ -318,14 +351,32 @@ def test_gptimage_read_primary_gpt_header() -> None:
     _test_gptimage_read_primary_gpt_header()
 
 
+@pytest.mark.skipif(not hasattr(os, "preadv"), reason="No preadv support on platform")
+def test_gptimage_read_primary_gpt_header_preadv(
+    mocker: MockerFixture,
+) -> None:  # pragma: platform-darwin, platform-win32
+    """Test :meth:`gpt.GPTImage.read_primary_gpt_header` using `preadv`."""
+    # Make mypy happy
+    assert hasattr(os, "preadv")
+
+    # pylint: disable-next=no-member
+    preadv = mocker.patch("os.preadv", side_effect=os.preadv)
+
+    _test_gptimage_read_primary_gpt_header()
+
+    preadv.assert_called()
+
+
 @pytest.mark.skipif(not hasattr(os, "pread"), reason="No pread support on platform")
 def test_gptimage_read_primary_gpt_header_pread(
+    monkeypatch: pytest.MonkeyPatch,
     mocker: MockerFixture,
 ) -> None:  # pragma: platform-win32
     """Test :meth:`gpt.GPTImage.read_primary_gpt_header` using `pread`."""
     # Make mypy happy
     assert hasattr(os, "pread")
 
+    monkeypatch.delattr(os, "preadv", raising=False)
     # pylint: disable-next=no-member
     pread = mocker.patch("os.pread", side_effect=os.pread)
 
@@ -338,6 +389,7 @@ def test_gptimage_read_primary_gpt_header_read(
     monkeypatch: pytest.MonkeyPatch, mocker: MockerFixture
 ) -> None:
     """Test :meth:`gpt.GPTImage.read_primary_gpt_header` using `read`."""
+    monkeypatch.delattr(os, "preadv", raising=False)
     monkeypatch.delattr(os, "pread", raising=False)
     read = mocker.patch("os.read", side_effect=os.read)
 
@@ -346,6 +398,38 @@ def test_gptimage_read_primary_gpt_header_read(
     read.assert_called()
 
 
+def test_gptimage_read_gpt_header_truncated(disk_image: Path) -> None:
+    """Test reading a header of an image truncated while it's open."""
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        os.truncate(disk_image, image.size - gpt.GPT_HEADER_SIZE // 2)
+
+        with pytest.raises(gpt.InvalidImageError, match="ended before"):
+            image.read_backup_gpt_header()
+
+
+@pytest.mark.parametrize("preadv", [True, False])
+def test_pread_into(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, preadv: bool
+) -> None:
+    """Test :func:`gpt.pread_into` up to the end of a file."""
+    if not preadv:
+        monkeypatch.delattr(os, "preadv", raising=False)
+
+    path = tmp_path / "data"
+    path.write_bytes(bytes(range(256)))
+    buffer = bytearray(16)
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        assert gpt.pread_into(fd, buffer, 16) == 16
+        assert buffer == bytes(range(16, 32))
+
+        assert gpt.pread_into(fd, memoryview(buffer)[4:], 248) == 8
+        assert buffer[4:12] == bytes(range(248, 256))
+    finally:
+        os.close(fd)
+
+
 def test_gptimage_read_backup_gpt_header() -> None:
     """Test :meth:`gpt.GPTImage.read_backup_gpt_header`."""
     with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
@@ -488,3 +572,282 @@ def test_gptimage_update_guid(disk_image: Path) -> None:
         image.validate()
         assert image.read_primary_gpt_header().disk_guid == new_guid
         assert image.read_backup_gpt_header().disk_guid == new_guid
+
+
+def test_gptimage_header_cache(mocker: MockerFixture, disk_image: Path) -> None:
+    """Test :class:`gpt.GPTImage` reads headers only once per context."""
+    pread_into = mocker.spy(gpt, "pread_into")
+    new_guid = uuid.UUID("6c2a4a54-8c1c-4d5e-9b43-1f1bd3b5c0a1")
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDWR) as image:
+        image.validate()
+        image.validate()
+        assert pread_into.call_count == 2
+
+        image.update_guid(new_guid)
+        assert image.read_primary_gpt_header().disk_guid == new_guid
+        assert image.read_backup_gpt_header().disk_guid == new_guid
+        assert pread_into.call_count == 2
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        assert image.read_primary_gpt_header().disk_guid == new_guid
+        assert pread_into.call_count == 3
+
+    # Both headers of an image are read into the same buffer
+    (first, second, _) = pread_into.call_args_list
+    assert first.args[1] is second.args[1]
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="Block device ioctls are Linux-only"
+)
+def test_device_geometry(mocker: MockerFixture) -> None:
+    """Test :func:`gpt.device_geometry` using the Linux block device ioctls."""
+    results = {
+        gpt._BLKGETSIZE64: struct.pack("=Q", 64 * 1024 * 1024 * 1024),
+        gpt._BLKSSZGET: struct.pack("=i", 512),
+        gpt._BLKPBSZGET: struct.pack("=I", 4096),
+    }
+    ioctl = mocker.patch("fcntl.ioctl", side_effect=lambda fd, req, arg: results[req])
+
+    geometry = gpt.device_geometry(3)
+
+    assert geometry == gpt.DeviceGeometry(64 * 1024 * 1024 * 1024, 512, 4096)
+    assert {call.args[:2] for call in ioctl.call_args_list} == {
+        (3, request) for request in results
+    }
+
+
+def _fake_block_device(
+    mocker: MockerFixture, size: int, logical_block_size: int = gpt.LBA_SIZE
+) -> None:
+    """Make :class:`gpt.GPTImage` consider image files block devices."""
+    mocker.patch.object(gpt, "_is_block_device", return_value=True)
+    mocker.patch.object(
+        gpt,
+        "device_geometry",
+        return_value=gpt.DeviceGeometry(size, logical_block_size, 4096),
+    )
+
+
+def test_gptimage_block_device(mocker: MockerFixture, disk_image: Path) -> None:
+    """Test :class:`gpt.GPTImage` on a block device."""
+    size = os.stat(disk_image).st_size
+    _fake_block_device(mocker, size)
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDWR) as image:
+        assert image.size == size
+        assert image.geometry == gpt.DeviceGeometry(size, gpt.LBA_SIZE, 4096)
+        image.validate()
+        image.update_guid(uuid.UUID("6c2a4a54-8c1c-4d5e-9b43-1f1bd3b5c0a1"))
+
+
+def test_gptimage_block_device_logical_block_size(
+    mocker: MockerFixture, disk_image: Path
+) -> None:
+    """Test :class:`gpt.GPTImage` rejects devices with large logical blocks."""
+    _fake_block_device(mocker, os.stat(disk_image).st_size, 4096)
+
+    with pytest.raises(gpt.InvalidImageError, match="got 4096"):  # noqa: PT012
+        with gpt.GPTImage(path=disk_image):
+            pytest.fail("This code should not be reached")  # pragma: no cover
+
+
+def test_gptimage_size(tmp_path: Path) -> None:
+    """Test :class:`gpt.GPTImage` with an image covering a prefix of a file."""
+    path = tmp_path / "disk"
+    image_size = os.stat(conftest.TESTDATA_EMBEDDED_DISK).st_size
+    path.write_bytes(conftest.TESTDATA_EMBEDDED_DISK.read_bytes() + bytes(64 * 1024))
+
+    with gpt.GPTImage(path=path) as image:
+        with pytest.raises(gpt.InvalidSignatureError):
+            image.validate()
+
+    with gpt.GPTImage(path=path, size=image_size) as image:
+        assert image.size == image_size
+        image.validate()
+        assert image.read_primary_gpt_header().disk_guid == (
+            conftest.TESTDATA_EMBEDDED_DISK_GUID
+        )
+
+
+@pytest.mark.parametrize(
+    ("size", "message"),
+    [(1000, "multiple of 512"), (1024 * 1024 * 1024, "exceeds the file size")],
+    ids=["unaligned", "too-large"],
+)
+def test_gptimage_size_invalid(size: int, message: str) -> None:
+    """Test :class:`gpt.GPTImage` with invalid image sizes."""
+    with pytest.raises(gpt.InvalidImageError, match=message):  # noqa: PT012
+        with gpt.GPTImage(path=conftest.TESTDATA_DISK, size=size):
+            pytest.fail("This code should not be reached")  # pragma: no cover
+
+
+def test_gptpartition_size() -> None:
+    """Test :attr:`gpt.GPTPartition.size`."""
+    assert conftest.PARTITIONS[0].size == 1024 * gpt.LBA_SIZE
+
+
+def test_gptimage_partition_tables(disk_image: Path) -> None:
+    """Test reading the partition entry arrays of an image."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        primary = image.read_primary_partition_table()
+        backup = image.read_backup_partition_table()
+
+    for table in (primary, backup):
+        assert table.num_entries == 128
+        assert table.entry_size == 128
+        assert table.used() == [0, 2]
+        assert table.partitions() == conftest.PARTITIONS
+        assert table.partition(1) is None
+
+        with pytest.raises(IndexError):
+            table.partition(128)
+
+
+def test_gptimage_partition_tables_empty() -> None:
+    """Test reading the partition entry arrays of an image without partitions."""
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        assert image.read_primary_partition_table().partitions() == []
+        assert image.read_backup_partition_table().partitions() == []
+
+
+def test_gptimage_partition_table_cache(
+    mocker: MockerFixture, disk_image: Path
+) -> None:
+    """Test partition entry arrays are read once, until headers are written."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDWR) as image:
+        image.validate()
+        pread_into = mocker.spy(gpt, "pread_into")
+
+        table = image.read_primary_partition_table()
+        assert image.read_primary_partition_table() is table
+        backup_table = image.read_backup_partition_table()
+        assert image.read_backup_partition_table() is backup_table
+        assert pread_into.call_count == 2
+
+        image.update_guid(uuid.uuid4(), sync=False)
+        assert image.read_primary_partition_table() is not table
+        assert pread_into.call_count == 3
+
+
+def test_gptpartitiontable_with_unique_guids(disk_image: Path) -> None:
+    """Test :meth:`gpt.GPTPartitionTable.with_unique_guids`."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+    guid = uuid.UUID("1b2a4d2e-8c5e-4d24-9a1c-26d1b4c8e9f0")
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        table = image.read_primary_partition_table()
+
+    new_table = table.with_unique_guids({2: guid})
+    assert new_table.partitions() == [
+        conftest.PARTITIONS[0],
+        dataclasses.replace(conftest.PARTITIONS[1], unique_guid=guid),
+    ]
+    assert table.partitions() == conftest.PARTITIONS
+    assert len(new_table.pack()) == len(table.pack()) == 128 * 128
+
+    with pytest.raises(IndexError):
+        table.with_unique_guids({128: guid})
+
+
+def test_gptimage_write_partition_tables(disk_image: Path) -> None:
+    """Test :meth:`gpt.GPTImage.write_partition_tables`."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+    guid = uuid.UUID("1b2a4d2e-8c5e-4d24-9a1c-26d1b4c8e9f0")
+    expected = [dataclasses.replace(conftest.PARTITIONS[0], unique_guid=guid)]
+    expected.append(conftest.PARTITIONS[1])
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDWR) as image:
+        table = image.read_primary_partition_table().with_unique_guids({0: guid})
+        image.write_partition_tables(table, sync=False)
+
+        assert image.read_primary_partition_table() is table
+        assert image.read_backup_partition_table() is table
+
+        with pytest.raises(ValueError, match="doesn't match the GPT headers"):
+            image.write_partition_tables(
+                gpt.GPTPartitionTable(bytes(128 * 64), 64, 128)
+            )
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        image.validate()
+        assert image.read_primary_partition_table().partitions() == expected
+        assert image.read_backup_partition_table().partitions() == expected
+
+
+def test_gptimage_partition_table_checksum_mismatch(disk_image: Path) -> None:
+    """Test reading a partition entry array which doesn't match its checksum."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDWR) as image:
+        backup = image.read_backup_gpt_header()
+        gpt.pwrite_all(
+            image.fileno(), b"\xff", backup.entries_starting_lba * gpt.LBA_SIZE
+        )
+
+        assert image.read_primary_partition_table().partitions() == conftest.PARTITIONS
+        with pytest.raises(gpt.EntriesChecksumMismatchError):
+            image.read_backup_partition_table()
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"entries_starting_lba": 1},
+        {"entries_starting_lba": 2047},
+        {"num_entries": 1024 * 1024},
+    ],
+    ids=["overlaps-header", "overlaps-usable", "too-many"],
+)
+def test_gptimage_partition_table_out_of_bounds(changes: Dict[str, Any]) -> None:
+    """Test reading a partition entry array which doesn't fit."""
+    with gpt.GPTImage(path=conftest.TESTDATA_DISK, open_mode=os.O_RDONLY) as image:
+        header = dataclasses.replace(image.read_primary_gpt_header(), **changes)
+
+        with pytest.raises(gpt.InvalidImageError, match="don't fit"):
+            image._read_partition_table(header)
+
+
+def test_gptimage_partition_table_truncated(disk_image: Path) -> None:
+    """Test reading a partition entry array of an image truncated while open."""
+    with gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        image.read_backup_gpt_header()
+        os.truncate(disk_image, image.size - 2 * gpt.LBA_SIZE)
+
+        with pytest.raises(gpt.InvalidImageError, match="ended before"):
+            image.read_backup_partition_table()
+
+
+@pytest.mark.parametrize(
+    ("raw", "entry_size", "error"),
+    [
+        (bytes(128 * 64), 64, gpt.InvalidFieldError),
+        (bytes(128 * 132), 132, gpt.InvalidFieldError),
+        (bytes(128 * 127), 128, gpt.InvalidHeaderSizeError),
+    ],
+)
+def test_gptpartitiontable_invalid(
+    raw: bytes, entry_size: int, error: Type[Exception]
+) -> None:
+    """Test constructing :class:`gpt.GPTPartitionTable` with invalid sizes."""
+    with pytest.raises(error):
+        gpt.GPTPartitionTable(raw, 128, entry_size)
+
+
+def test_gptpartitiontable_large_entries() -> None:
+    """Test :class:`gpt.GPTPartitionTable` with entries larger than 128 bytes."""
+    raw = bytearray(4 * 256)
+    raw[2 * 256 + 15] = 1
+    raw[2 * 256 + 128 : 2 * 256 + 256] = b"\xff" * 128
+
+    table = gpt.GPTPartitionTable(memoryview(raw), 4, 256)
+
+    assert table.used() == [2]
+    partition = table.partition(2)
+    assert partition is not None
+    assert partition.type_guid == uuid.UUID(bytes_le=bytes(15) + b"\1")
@@ -1,11 +1,17 @@
 """Tests for :mod:`gptsum`."""
 
+import lzma
 import os
+import pickle
+import shutil
+import subprocess  # noqa: S404
+import sys
 import uuid
 from pathlib import Path
 from typing import Any, Callable, List
 
 import pytest
+from pytest_mock import MockerFixture
 
 import gptsum
 from tests import conftest, utils
@@ -20,14 +26,59 @@ def test_attribute(attr: str) -> None:
     assert type(getattr(gptsum, real_attr)) is str
 
 
+def test_metadata() -> None:
+    """Test the distribution metadata of the package."""
+    assert gptsum.__metadata__["Version"] == gptsum.__version__
+
+
+def test_unknown_attribute() -> None:
+    """Ensure looking up unknown attributes of the package fails."""
+    with pytest.raises(AttributeError, match="__unknown__"):
+        getattr(gptsum, "__unknown__")
+
+
+def test_lazy_imports() -> None:
+    """Ensure importing the CLI doesn't import modules only needed to hash images."""
+    modules = ["importlib.metadata", "hashlib", "concurrent.futures", "lzma", "json"]
+    code = (
+        "import sys, gptsum.cli; "
+        f"print(*(m for m in {modules!r} if m in sys.modules))"
+    )
+
+    output = subprocess.check_output(  # noqa: S603
+        [sys.executable, "-c", code], text=True
+    )
+    assert output == "\n"
+
+
+def test_lazy_submodules() -> None:
+    """Ensure ``get-guid`` only imports the modules needed to read GPT headers."""
+    code = (
+        "import sys, gptsum.cli; "
+        f"gptsum.cli.main(['get-guid', {str(conftest.TESTDATA_DISK)!r}]); "
+        "print(*sorted(m for m in sys.modules if m.startswith('gptsum.'))); "
+        "print(gptsum.checksum.__name__, gptsum.manifest.__name__)"
+    )
+
+    output = subprocess.check_output(  # noqa: S603
+        [sys.executable, "-c", code], text=True
+    )
+    assert output.splitlines()[1:] == [
+        "gptsum.cli gptsum.gpt gptsum.server",
+        "gptsum.checksum gptsum.manifest",
+    ]
+
+
 @pytest.mark.parametrize(
     ("func", "args"),
     [
         (gptsum.get_guid, []),
+        (gptsum.get_partitions, []),
         (gptsum.set_guid, [uuid.UUID("656156c4-2456-4038-b7f3-dfa0ae263e95")]),
         (gptsum.calculate_expected_guid, []),
         (gptsum.embed, []),
         (gptsum.verify, []),
+        (gptsum.verify_partition, [1]),
     ],
 )
 def test_argument_conflicts(func: Callable[..., Any], args: List[Any]) -> None:
@@ -54,6 +105,27 @@ def test_get_guid(disk_file: Path, expected_guid: uuid.UUID) -> None:
         assert gptsum.get_guid(fd=fd.fileno()) == expected_guid
 
 
+def test_get_partitions(disk_image: Path) -> None:
+    """Test :func:`gptsum.get_partitions`."""
+    assert gptsum.get_partitions(path=disk_image) == []
+
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+
+    with open(disk_image, "rb") as fd:
+        assert gptsum.get_partitions(fd=fd.fileno()) == conftest.PARTITIONS
+
+
+def test_get_partitions_checksum_mismatch(disk_image: Path) -> None:
+    """Test :func:`gptsum.get_partitions` with a corrupted backup entry array."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+    with open(disk_image, "r+b") as fd:
+        fd.seek(-33 * gptsum.gpt.LBA_SIZE, os.SEEK_END)
+        fd.write(b"\xff")
+
+    with pytest.raises(gptsum.gpt.EntriesChecksumMismatchError):
+        gptsum.get_partitions(path=disk_image)
+
+
 @pytest.mark.parametrize(("method"), ["by_fd", "by_path"])
 def test_set_guid(method: str, disk_image: Path) -> None:
     """Test :func:`gptsum.set_guid`."""
@@ -86,6 +158,50 @@ def test_calculate_expected_guid(disk_file: Path, expected_guid: uuid.UUID) -> N
         assert gptsum.calculate_expected_guid(fd=fd.fileno()) == expected_guid
 
 
+def test_calculate_expected_guid_stats(sparse_disk_image: Path) -> None:
+    """Test :func:`gptsum.calculate_expected_guid` reporting statistics."""
+    stats = gptsum.checksum.IOStatistics()
+    guid = gptsum.calculate_expected_guid(path=sparse_disk_image, stats=stats)
+
+    assert guid == conftest.TESTDATA_EMBEDDED_DISK_GUID
+    assert (
+        stats.bytes_read + stats.bytes_synthesized == os.stat(sparse_disk_image).st_size
+    )
+
+
+def test_embed_stats(disk_image: Path) -> None:
+    """Test :func:`gptsum.embed` timing all phases."""
+    stats = gptsum.checksum.IOStatistics()
+    gptsum.embed(path=disk_image, stats=stats)
+
+    assert set(stats.phases) == set(gptsum.checksum.Phase)
+    assert all(phase.wall >= 0 and phase.cpu >= 0 for phase in stats.phases.values())
+    assert stats.read_calls > 0
+
+    stats = gptsum.checksum.IOStatistics()
+    gptsum.verify(path=disk_image, stats=stats)
+    assert gptsum.checksum.Phase.WRITE not in stats.phases
+
+
+def test_calculate_expected_guid_read_options() -> None:
+    """Test :func:`gptsum.calculate_expected_guid` with non-default read options."""
+    read_options = gptsum.checksum.ReadOptions(
+        strategy=gptsum.checksum.ReadStrategy.MMAP
+    )
+    guid = gptsum.calculate_expected_guid(
+        path=conftest.TESTDATA_DISK, read_options=read_options
+    )
+    assert guid == conftest.TESTDATA_EMBEDDED_DISK_GUID
+
+
+def test_calculate_expected_guid_version_2() -> None:
+    """Test :func:`gptsum.calculate_expected_guid` using version 2 checksums."""
+    guid = gptsum.calculate_expected_guid(
+        path=conftest.TESTDATA_DISK, version=gptsum.checksum.VERSION_2
+    )
+    assert guid == conftest.TESTDATA_DISK_V2_GUID
+
+
 @pytest.mark.parametrize(("method"), ["by_fd", "by_path"])
 def test_embed(method: str, disk_image: Path) -> None:
     """Test :func:`gptsum.embed`."""
@@ -116,6 +232,90 @@ def test_embed_noop(disk_image: Path) -> None:
     assert stat2.st_ctime == stat1.st_ctime
 
 
+def test_embed_partitions(mocker: MockerFixture, disk_image: Path) -> None:
+    """Test :func:`gptsum.embed` embedding the checksums of partitions."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+
+    with pytest.raises(gptsum.VerificationFailure) as exc_info:
+        gptsum.verify_partition(1, path=disk_image)
+    assert exc_info.value.actual == conftest.PARTITIONS[0].unique_guid
+
+    stats = gptsum.checksum.IOStatistics()
+    gptsum.embed(path=disk_image, partitions=True, stats=stats)
+    sizes = [partition.size for partition in conftest.PARTITIONS]
+    # Partitions are read, then the whole image
+    assert (
+        stats.bytes_read + stats.bytes_synthesized
+        == sum(sizes) + os.stat(disk_image).st_size
+    )
+
+    partitions = gptsum.get_partitions(path=disk_image)
+    with gptsum.gpt.GPTImage(path=disk_image, open_mode=os.O_RDONLY) as image:
+        digests = gptsum.checksum.calculate_partitions(image, partitions)
+    assert [partition.unique_guid for partition in partitions] == [
+        gptsum.checksum.digest_to_guid(digest) for digest in digests
+    ]
+    assert partitions[0].unique_guid != partitions[1].unique_guid
+
+    gptsum.verify(path=disk_image)
+    with open(disk_image, "rb") as fd:
+        for partition in partitions:
+            gptsum.verify_partition(partition.number, fd=fd.fileno())
+
+    write_partition_tables = mocker.spy(gptsum.gpt.GPTImage, "write_partition_tables")
+    stat1 = os.stat(disk_image)
+    gptsum.embed(path=disk_image, partitions=True)
+    stat2 = os.stat(disk_image)
+
+    write_partition_tables.assert_not_called()
+    assert stat2.st_mtime == stat1.st_mtime
+
+
+def test_embed_partitions_guid_unchanged(
+    mocker: MockerFixture, disk_image: Path
+) -> None:
+    """Test headers are written after partition entries, even if the GUID is equal."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+    mocker.patch(
+        "gptsum.checksum.digest_to_guid",
+        return_value=gptsum.get_guid(path=disk_image),
+    )
+    fsync = mocker.spy(os, "fsync")
+
+    gptsum.embed(path=disk_image, partitions=True)
+
+    assert fsync.call_count == 1
+
+
+def test_verify_partition(disk_image: Path) -> None:
+    """Test :func:`gptsum.verify_partition` only reads the verified partition."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+    gptsum.embed(path=disk_image, partitions=True)
+
+    offset = conftest.PARTITIONS[1].first_lba * gptsum.gpt.LBA_SIZE
+    with open(disk_image, "r+b") as fd:
+        fd.seek(offset)
+        fd.write(b"\1")
+
+    stats = gptsum.checksum.IOStatistics()
+    gptsum.verify_partition(1, path=disk_image, stats=stats)
+    assert stats.bytes_read + stats.bytes_synthesized == conftest.PARTITIONS[0].size
+
+    with pytest.raises(gptsum.VerificationFailure):
+        gptsum.verify_partition(3, path=disk_image)
+    with pytest.raises(gptsum.VerificationFailure):
+        gptsum.verify(path=disk_image)
+
+
+@pytest.mark.parametrize("number", [0, 2, 129])
+def test_verify_partition_missing(disk_image: Path, number: int) -> None:
+    """Test :func:`gptsum.verify_partition` with partitions which don't exist."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+
+    with pytest.raises(ValueError, match=f"No partition {number}"):
+        gptsum.verify_partition(number, path=disk_image)
+
+
 @pytest.mark.parametrize(("method"), ["by_fd", "by_path"])
 def test_verify(method: str, disk_image: Path) -> None:
     """Test :func:`gptsum.verify`."""
@@ -136,3 +336,364 @@ def test_verify(method: str, disk_image: Path) -> None:
     else:
         assert method == "by_path"
         gptsum.verify(path=disk_image)
+
+
+def test_verify_version_2(disk_image: Path) -> None:
+    """Test :func:`gptsum.verify` using version 2 checksums."""
+    gptsum.embed(path=disk_image, version=gptsum.checksum.VERSION_2, threads=2)
+    gptsum.verify(path=disk_image, version=gptsum.checksum.VERSION_2)
+    # The version was recorded when embedding
+    gptsum.verify(path=disk_image)
+
+    with pytest.raises(gptsum.VerificationFailure):
+        gptsum.verify(path=disk_image, version=gptsum.checksum.VERSION_1)
+
+
+@pytest.mark.parametrize(
+    ("func", "embedded", "expected_writes"),
+    [
+        (gptsum.verify, True, 0),
+        (gptsum.embed, True, 0),
+        (gptsum.embed, False, 2),
+    ],
+)
+def test_syscalls(
+    mocker: MockerFixture,
+    disk_image: Path,
+    func: Callable[..., None],
+    embedded: bool,
+    expected_writes: int,
+) -> None:
+    """Test :func:`gptsum.verify` and :func:`gptsum.embed` open and stat only once.
+
+    Both headers and the MBR must be read only once as well, and headers only be
+    written when needed.
+    """
+    if embedded:
+        gptsum.embed(path=disk_image)
+
+    spies = {name: mocker.spy(os, name) for name in ["open", "fstat", "fsync", "close"]}
+    pread_into = mocker.spy(gptsum.gpt, "pread_into")
+    pwrite_all = mocker.spy(gptsum.gpt, "pwrite_all")
+
+    func(path=disk_image)
+
+    assert spies["open"].call_count == 1
+    assert spies["close"].call_count == 1
+    # Once when opening the image, once more before writing headers
+    assert spies["fstat"].call_count == (1 if expected_writes == 0 else 2)
+    assert pread_into.call_count == 3
+    assert pwrite_all.call_count == expected_writes
+    assert spies["fsync"].call_count == (1 if expected_writes else 0)
+
+
+def test_verificationfailure_pickle() -> None:
+    """Test :class:`gptsum.VerificationFailure` can be pickled."""
+    exc = gptsum.VerificationFailure(
+        conftest.TESTDATA_EMBEDDED_DISK_GUID, conftest.TESTDATA_DISK_GUID
+    )
+    assert pickle.loads(pickle.dumps(exc)) == exc  # noqa: S301
+
+    exc = gptsum.VerificationFailure(
+        conftest.TESTDATA_EMBEDDED_DISK_GUID,
+        conftest.TESTDATA_EMBEDDED_DISK_GUID,
+        ((0, 4096),),
+    )
+    assert pickle.loads(pickle.dumps(exc)) == exc  # noqa: S301
+
+
+@pytest.mark.parametrize("version", gptsum.checksum.VERSIONS)
+def test_verify_stream(disk_image: Path, version: int) -> None:
+    """Test :func:`gptsum.verify_stream`."""
+    with utils.pipe_from(disk_image.read_bytes()) as fd:
+        with pytest.raises(gptsum.VerificationFailure):
+            gptsum.verify_stream(fd, version=version)
+
+    gptsum.embed(path=disk_image, version=version)
+
+    with utils.pipe_from(disk_image.read_bytes()) as fd:
+        gptsum.verify_stream(fd, version=version)
+
+
+@pytest.mark.parametrize("version", gptsum.checksum.VERSIONS)
+def test_copy_embed(tmp_path: Path, sparse_disk_image: Path, version: int) -> None:
+    """Test :func:`gptsum.copy_embed` copying a sparse image file."""
+    copy = tmp_path / "copy"
+    # An existing destination is overwritten, even where the image has holes
+    copy.write_bytes(b"\xff" * 2 * os.stat(sparse_disk_image).st_size)
+
+    with open(sparse_disk_image, "rb") as source, open(copy, "r+b") as destination:
+        guid = gptsum.copy_embed(source.fileno(), destination.fileno(), version=version)
+
+    gptsum.embed(path=sparse_disk_image, version=version)
+    assert gptsum.get_guid(path=sparse_disk_image) == guid
+    utils.assert_files_equal(sparse_disk_image, copy)
+    assert os.stat(copy).st_blocks <= os.stat(sparse_disk_image).st_blocks
+
+
+def test_copy_embed_stream(tmp_path: Path) -> None:
+    """Test :func:`gptsum.copy_embed` copying an image read from a pipe."""
+    copy = tmp_path / "copy"
+    stats = gptsum.checksum.IOStatistics()
+
+    with utils.pipe_from(conftest.TESTDATA_DISK.read_bytes()) as source:
+        with open(copy, "w+b") as destination:
+            guid = gptsum.copy_embed(source, destination.fileno(), stats=stats)
+
+    assert guid == conftest.TESTDATA_EMBEDDED_DISK_GUID
+    utils.assert_files_equal(conftest.TESTDATA_EMBEDDED_DISK, copy)
+    assert stats.bytes_read == os.stat(copy).st_size
+    assert set(stats.phases) == {
+        gptsum.checksum.Phase.OPEN,
+        gptsum.checksum.Phase.HASH,
+        gptsum.checksum.Phase.WRITE,
+    }
+
+
+def test_copy_embed_compressed(tmp_path: Path) -> None:
+    """Test :func:`gptsum.copy_embed` decompressing the image it copies."""
+    compressed = tmp_path / "disk.xz"
+    compressed.write_bytes(lzma.compress(conftest.TESTDATA_DISK.read_bytes()))
+    copy = tmp_path / "copy"
+
+    with open(compressed, "rb") as source, open(copy, "w+b") as destination:
+        gptsum.copy_embed(
+            source.fileno(),
+            destination.fileno(),
+            compression=gptsum.compression.Compression.XZ,
+        )
+
+    utils.assert_files_equal(conftest.TESTDATA_EMBEDDED_DISK, copy)
+
+
+def test_copy_embed_not_regular(mocker: MockerFixture, tmp_path: Path) -> None:
+    """Test :func:`gptsum.copy_embed` writing all data to e.g. a block device."""
+    mocker.patch("stat.S_ISREG", return_value=False)
+    copy = tmp_path / "copy"
+    size = os.stat(conftest.TESTDATA_DISK).st_size
+    # Data of a device beyond the image is left alone
+    copy.write_bytes(b"\xff" * (size + 512))
+
+    with open(conftest.TESTDATA_DISK, "rb") as source:
+        with open(copy, "r+b") as destination:
+            gptsum.copy_embed(source.fileno(), destination.fileno())
+
+    data = copy.read_bytes()
+    assert data[:size] == conftest.TESTDATA_EMBEDDED_DISK.read_bytes()
+    assert data[size:] == b"\xff" * 512
+
+
+def test_copy_embed_same_file(disk_image: Path) -> None:
+    """Test :func:`gptsum.copy_embed` refusing to copy an image onto itself."""
+    with open(disk_image, "r+b") as fd:
+        with pytest.raises(ValueError, match="Source and destination are the same"):
+            gptsum.copy_embed(fd.fileno(), fd.fileno())
+
+    utils.assert_files_equal(conftest.TESTDATA_DISK, disk_image)
+
+
+def test_algorithm(tmp_path: Path, disk_image: Path) -> None:
+    """Test embedding and verifying a checksum using another algorithm."""
+    sha256 = gptsum.checksum.Algorithm.SHA256
+    manifest_path = gptsum.manifest.default_path(disk_image)
+
+    gptsum.embed(path=disk_image, algorithm=sha256, manifest=manifest_path)
+    gptsum.verify(path=disk_image, algorithm=sha256)
+    # The algorithm was recorded when embedding, also for other checksum versions
+    gptsum.verify(path=disk_image)
+    with pytest.raises(gptsum.VerificationFailure):
+        gptsum.verify(path=disk_image, algorithm=gptsum.checksum.DEFAULT_ALGORITHM)
+    with pytest.raises(gptsum.VerificationFailure):
+        gptsum.verify(path=disk_image, version=gptsum.checksum.VERSION_3)
+
+    manifest = gptsum.manifest.Manifest.read(manifest_path)
+    assert manifest.algorithm == sha256
+    gptsum.verify(path=disk_image, manifest=manifest)
+
+    # Checksums of both algorithms are cached separately
+    guid = gptsum.get_guid(path=disk_image)
+    for algorithm in [sha256, gptsum.checksum.DEFAULT_ALGORITHM]:
+        gptsum.calculate_expected_guid(
+            path=disk_image,
+            algorithm=algorithm,
+            cache_policy=gptsum.cache.CachePolicy.STORE,
+        )
+    assert (
+        gptsum.calculate_expected_guid(
+            path=disk_image,
+            algorithm=sha256,
+            cache_policy=gptsum.cache.CachePolicy.TRUST,
+        )
+        == guid
+    )
+
+    compressed = tmp_path / "disk.xz"
+    compressed.write_bytes(lzma.compress(disk_image.read_bytes()))
+    with open(compressed, "rb") as fd:
+        assert (
+            gptsum.calculate_expected_guid_stream(
+                fd.fileno(),
+                algorithm=sha256,
+                compression=gptsum.compression.Compression.XZ,
+            )
+            == guid
+        )
+    (result,) = gptsum.verify_many([compressed], jobs=1, algorithm=sha256)
+    assert result.error is None
+
+
+@pytest.mark.parametrize(
+    "version", [gptsum.checksum.VERSION_1, gptsum.checksum.VERSION_2]
+)
+def test_verify_manifest(
+    monkeypatch: pytest.MonkeyPatch, disk_image: Path, version: int
+) -> None:
+    """Test locating damaged regions of an image using a manifest."""
+    monkeypatch.setattr(gptsum.checksum, "_TREE_LEAF_SIZE", 4096)
+    monkeypatch.setattr(gptsum.checksum, "CHUNK_SIZE", 4096)
+    manifest_path = gptsum.manifest.default_path(disk_image)
+
+    gptsum.embed(path=disk_image, version=version, manifest=manifest_path)
+    manifest = gptsum.manifest.Manifest.read(manifest_path)
+    assert manifest.version == version
+    assert len(manifest.chunk_digests) == os.stat(disk_image).st_size // 4096
+
+    gptsum.verify(path=disk_image, version=version)
+    gptsum.verify(path=disk_image, manifest=manifest)
+
+    with open(disk_image, "r+b") as fd:
+        fd.seek(4096 * 10 + 100)
+        fd.write(b"\1" * 4096)
+        fd.seek(4096 * 100 + 4095)
+        fd.write(b"\1")
+
+    with pytest.raises(gptsum.VerificationFailure) as exc_info:
+        gptsum.verify(path=disk_image, manifest=manifest, threads=4)
+
+    assert exc_info.value.actual == exc_info.value.expected
+    assert exc_info.value.damaged == (
+        (4096 * 10, 4096 * 12),
+        (4096 * 100, 4096 * 101),
+    )
+
+    # Rewriting the GUID doesn't invalidate the manifest
+    gptsum.set_guid(path=disk_image, guid=conftest.TESTDATA_DISK_GUID)
+    with pytest.raises(gptsum.VerificationFailure) as exc_info:
+        gptsum.verify(path=disk_image, manifest=manifest)
+    assert exc_info.value.actual == conftest.TESTDATA_DISK_GUID
+    assert len(exc_info.value.damaged) == 2
+
+
+def test_verify_manifest_size_mismatch(disk_image: Path) -> None:
+    """Test verifying an image against the manifest of another image."""
+    manifest = gptsum.manifest.create(
+        gptsum.checksum.VERSION_1, bytes(16), 4096, [bytes(16)]
+    )
+
+    with pytest.raises(ValueError, match="Manifest is for an image of 4096 bytes"):
+        gptsum.verify(path=disk_image, manifest=manifest)
+
+
+@pytest.fixture
+def images(tmp_path: Path) -> List[Path]:
+    """Return the paths to copies of the test images, and a non-existing file."""
+    paths = []
+    for index, source in enumerate(
+        [conftest.TESTDATA_DISK, conftest.TESTDATA_EMBEDDED_DISK] * 2
+    ):
+        path = tmp_path / f"image-{index}"
+        shutil.copyfile(source, path)
+        paths.append(path)
+
+    return paths + [tmp_path / "missing"]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_verify_many(images: List[Path], jobs: int) -> None:
+    """Test :func:`gptsum.verify_many`."""
+    stats = gptsum.checksum.IOStatistics()
+    results = {
+        result.path: result
+        for result in gptsum.verify_many(images, jobs=jobs, stats=stats)
+    }
+
+    assert set(results) == set(images)
+    for index in [0, 2]:
+        assert isinstance(results[images[index]].error, gptsum.VerificationFailure)
+    for index in [1, 3]:
+        assert results[images[index]].error is None
+    assert isinstance(results[images[4]].error, FileNotFoundError)
+
+    assert stats.bytes_read == 4 * os.stat(conftest.TESTDATA_DISK).st_size
+
+
+def test_many_progress(mocker: MockerFixture, images: List[Path]) -> None:
+    """Test progress reporting when processing many images."""
+    progress = mocker.Mock()
+    size = os.stat(conftest.TESTDATA_DISK).st_size
+
+    list(gptsum.verify_many(images[:2], jobs=1, progress=progress))
+    assert (
+        progress.call_args_list == [mocker.call(0, size), mocker.call(size, size)] * 2
+    )
+
+    with pytest.raises(ValueError, match="single job"):
+        list(gptsum.verify_many(images, jobs=2, progress=progress))
+    with pytest.raises(ValueError, match="single job"):
+        list(gptsum.embed_many(images, jobs=2, progress=progress))
+
+
+def test_verify_many_locate(images: List[Path]) -> None:
+    """Test :func:`gptsum.verify_many` using manifests written by `embed_many`."""
+    list(gptsum.embed_many(images[:2], jobs=1, write_manifests=True))
+
+    with open(images[0], "r+b") as fd:
+        fd.seek(1024 * 1024)
+        fd.write(b"\1")
+
+    results = {
+        result.path: result
+        for result in gptsum.verify_many(images[:3], jobs=1, locate=True)
+    }
+
+    error = results[images[0]].error
+    assert isinstance(error, gptsum.VerificationFailure)
+    assert error.damaged == ((0, os.stat(images[0]).st_size),)
+    assert results[images[1]].error is None
+    assert isinstance(results[images[2]].error, FileNotFoundError)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_embed_many(mocker: MockerFixture, images: List[Path], jobs: int) -> None:
+    """Test :func:`gptsum.embed_many`."""
+    fsync = mocker.spy(os, "fsync")
+    results = list(gptsum.embed_many(images, jobs=jobs))
+
+    assert [result.path for result in results if result.error is not None] == [
+        images[4]
+    ]
+    # Only images whose headers were written are synced, once all are processed
+    assert fsync.call_count == 2
+
+    for image in images[:4]:
+        utils.assert_files_equal(conftest.TESTDATA_EMBEDDED_DISK, image)
+
+
+def test_many_partitions(tmp_path: Path, images: List[Path]) -> None:
+    """Test :func:`gptsum.embed_many` and `verify_many` with partition checksums."""
+    for image in images[:2]:
+        utils.write_partitions(image, conftest.PARTITIONS)
+    compressed = tmp_path / "disk.xz"
+    compressed.write_bytes(lzma.compress(images[0].read_bytes()))
+
+    results = list(gptsum.embed_many(images[:2], jobs=1, partitions=True))
+    assert [result.error for result in results] == [None, None]
+
+    results = list(gptsum.verify_many(images[:2], jobs=1, partition=3))
+    assert [result.error for result in results] == [None, None]
+
+    (result,) = gptsum.verify_many([compressed], jobs=1, partition=3)
+    assert "compressed" in str(result.error)
+
+    (result,) = gptsum.verify_many(images[:1], jobs=1, partition=3, locate=True)
+    assert "Damage can't be located" in str(result.error)
@@ -0,0 +1,67 @@
+"""Tests for the :mod:`gptsum.manifest` module."""
+
+import dataclasses
+from pathlib import Path
+
+import pytest
+
+from gptsum import checksum, manifest
+
+MANIFEST = manifest.Manifest(
+    checksum.VERSION_2,
+    bytes(range(16)),
+    10 * 4096 + 1,
+    4096,
+    [bytes([index]) * 16 for index in range(11)],
+)
+
+
+def test_pack_unpack(tmp_path: Path) -> None:
+    """Test packing and unpacking a manifest."""
+    assert manifest.Manifest.unpack(MANIFEST.pack()) == MANIFEST
+
+    path = tmp_path / "disk.gptsum-manifest"
+    MANIFEST.write(path)
+    assert manifest.Manifest.read(path) == MANIFEST
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+
+    sha256 = dataclasses.replace(
+        MANIFEST, version=checksum.VERSION_1, algorithm=checksum.Algorithm.SHA256
+    )
+    assert manifest.Manifest.unpack(sha256.pack()) == sha256
+
+
+@pytest.mark.parametrize(
+    ("data", "message"),
+    [
+        (b"", "truncated"),
+        (b"X" + MANIFEST.pack()[1:], "signature"),
+        (MANIFEST.pack()[:8] + b"\2" + MANIFEST.pack()[9:], "format 2"),
+        (MANIFEST.pack()[:10] + b"\x09\0" + MANIFEST.pack()[12:], "algorithm 9"),
+        (MANIFEST.pack()[:-1], "truncated"),
+        (dataclasses.replace(MANIFEST, size=20 * 4096).pack(), "don't cover"),
+    ],
+    ids=["empty", "signature", "format", "algorithm", "truncated", "size"],
+)
+def test_unpack_invalid(data: bytes, message: str) -> None:
+    """Test unpacking invalid manifests."""
+    with pytest.raises(manifest.InvalidManifestError, match=message):
+        manifest.Manifest.unpack(data)
+
+
+def test_differences() -> None:
+    """Test locating changed byte ranges."""
+    digests = list(MANIFEST.chunk_digests)
+    assert not MANIFEST.differences(digests)
+
+    for index in [0, 4, 5, 6, 10]:
+        digests[index] = b"\xff" * 16
+
+    assert MANIFEST.differences(digests) == [
+        (0, 4096),
+        (4 * 4096, 7 * 4096),
+        (10 * 4096, 10 * 4096 + 1),
+    ]
+
+    with pytest.raises(ValueError, match="Expected 11 chunk digests, got 10"):
+        MANIFEST.differences(digests[:-1])
@@ -69,6 +69,8 @@ Syncing disks.
         b"Disk GUID doesn't match expected checksum, "
         b"got 132e3631-1ec9-4411-ab25-9b95b54b0903, "
         b"expected 6190f5bb-1967-14ec-9fbd-a7d213a45461\n"
+        b"If the checksum was embedded using another --checksum-version or "
+        b"--algorithm, which wasn't recorded with the image, these must be given\n"
         b"Verification failed!\n"
     )
 
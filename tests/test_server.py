@@ -0,0 +1,431 @@
+"""Tests for the :mod:`gptsum.server` module."""
+
+import json
+import lzma
+import os
+import shutil
+import socket
+import stat
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import pytest
+from pytest_mock import MockerFixture
+
+import gptsum
+import gptsum.server
+from gptsum import cli
+from tests import conftest, utils
+
+# Necessary to allow locally-defined fixtures to be used
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def daemon(tmp_path: Path) -> Iterator[Path]:
+    """Run a daemon in a thread, and yield the path of its socket."""
+    path = tmp_path / "gptsum.sock"
+
+    with gptsum.server.Server(path, workers=2) as server:
+        thread = threading.Thread(
+            target=server.serve_forever, kwargs={"poll_interval": 0.01}
+        )
+        thread.start()
+
+        try:
+            yield path
+        finally:
+            server.shutdown()
+            thread.join()
+
+    assert not path.exists()
+
+
+def test_default_socket(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test :func:`gptsum.server.default_socket`."""
+    monkeypatch.setenv("GPTSUM_SOCKET", "/run/gptsum.sock")
+    assert gptsum.server.default_socket() == Path("/run/gptsum.sock")
+
+    monkeypatch.setenv("GPTSUM_SOCKET", "")
+    assert gptsum.server.default_socket() is None
+
+    monkeypatch.delenv("GPTSUM_SOCKET")
+    monkeypatch.setenv("XDG_RUNTIME_DIR", "/run/user/1000")
+    assert gptsum.server.default_socket() == Path("/run/user/1000/gptsum.sock")
+
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    assert gptsum.server.default_socket() is None
+
+
+def test_requests(daemon: Path, disk_image: Path) -> None:
+    """Test requests to the daemon."""
+    path = str(disk_image)
+
+    with gptsum.server.Client(daemon) as client:
+        reply = client.request({"command": "get-guid", "path": path})
+        assert reply == {"guid": str(conftest.TESTDATA_DISK_GUID)}
+
+        reply = client.request({"command": "verify", "path": path})
+        error = gptsum.server.reply_error(reply)
+        assert isinstance(error, gptsum.VerificationFailure)
+        assert error.expected == conftest.TESTDATA_EMBEDDED_DISK_GUID
+        assert error.actual == conftest.TESTDATA_DISK_GUID
+
+        reply = client.request(
+            {"command": "calculate-expected-guid", "path": path, "version": 2}
+        )
+        assert reply == {"guid": str(conftest.TESTDATA_DISK_V2_GUID)}
+
+        reply = client.request({"command": "embed", "path": path, "manifest": True})
+        assert gptsum.server.reply_error(reply) is None
+
+        reply = client.request({"command": "verify", "path": path, "locate": True})
+        assert gptsum.server.reply_error(reply) is None
+
+    assert disk_image.read_bytes() == conftest.TESTDATA_EMBEDDED_DISK.read_bytes()
+
+
+def test_partitions(daemon: Path, disk_image: Path) -> None:
+    """Test requests embedding and verifying partition checksums."""
+    utils.write_partitions(disk_image, conftest.PARTITIONS)
+    path = str(disk_image)
+
+    with gptsum.server.Client(daemon) as client:
+        reply = client.request({"command": "verify", "path": path, "partition": 1})
+        assert isinstance(gptsum.server.reply_error(reply), gptsum.VerificationFailure)
+
+        reply = client.request({"command": "embed", "path": path, "partitions": True})
+        assert gptsum.server.reply_error(reply) is None
+
+        reply = client.request({"command": "verify", "path": path, "partition": 1})
+        assert gptsum.server.reply_error(reply) is None
+
+    partitions = gptsum.get_partitions(path=disk_image)
+    assert partitions[0].unique_guid != conftest.PARTITIONS[0].unique_guid
+
+
+def test_algorithm(daemon: Path, disk_image: Path) -> None:
+    """Test requests using another digest algorithm."""
+    path = str(disk_image)
+    request = {"path": path, "algorithm": "sha256"}
+
+    with gptsum.server.Client(daemon) as client:
+        reply = client.request({"command": "embed", **request})
+        assert gptsum.server.reply_error(reply) is None
+
+        reply = client.request({"command": "verify", **request})
+        assert gptsum.server.reply_error(reply) is None
+
+        reply = client.request({"command": "calculate-expected-guid", **request})
+        assert reply == {"guid": str(gptsum.get_guid(path=disk_image))}
+
+        reply = client.request({"command": "verify", "path": path, "algorithm": "md5"})
+        assert "is not a valid Algorithm" in reply["error"]
+
+    assert gptsum.get_guid(path=disk_image) != conftest.TESTDATA_EMBEDDED_DISK_GUID
+
+
+def test_page_cache(daemon: Path) -> None:
+    """Test requests dropping the image from the page cache."""
+    request = {
+        "command": "calculate-expected-guid",
+        "path": str(conftest.TESTDATA_DISK),
+        "page_cache": "drop",
+        "page_cache_window": 65536,
+    }
+
+    with gptsum.server.Client(daemon) as client:
+        reply = client.request(request)
+        assert reply == {"guid": str(conftest.TESTDATA_EMBEDDED_DISK_GUID)}
+
+        reply = client.request({**request, "page_cache": "never"})
+        assert "is not a valid PageCachePolicy" in reply["error"]
+
+
+def test_compressed(daemon: Path, tmp_path: Path) -> None:
+    """Test requests for compressed images."""
+    path = tmp_path / "disk.xz"
+    path.write_bytes(lzma.compress(conftest.TESTDATA_EMBEDDED_DISK.read_bytes()))
+
+    with gptsum.server.Client(daemon) as client:
+        reply = client.request(
+            {"command": "calculate-expected-guid", "path": str(path)}
+        )
+        assert reply == {"guid": str(conftest.TESTDATA_EMBEDDED_DISK_GUID)}
+
+        reply = client.request(
+            {"command": "calculate-expected-guid", "path": str(path), "size": 512}
+        )
+        error = gptsum.server.reply_error(reply)
+        assert isinstance(error, gptsum.server.RemoteError)
+        assert "can't be overridden" in str(error)
+
+
+@pytest.mark.parametrize(
+    ("request_", "message"),
+    [
+        ({"path": "/disk"}, "Invalid request"),
+        ({"command": "get-guid", "path": 1}, "Invalid request"),
+        ({"command": "get-guid", "path": "disk"}, "must be absolute"),
+        ({"command": "set-guid", "path": "/disk"}, "Unknown command"),
+        ({"command": "get-guid", "path": "/nonexistent"}, "No such file"),
+    ],
+)
+def test_invalid_requests(daemon: Path, request_: Dict[str, Any], message: str) -> None:
+    """Test invalid requests are replied to with an error."""
+    with gptsum.server.Client(daemon) as client:
+        reply = client.request(request_)
+
+    assert message in reply["error"]
+    assert isinstance(gptsum.server.reply_error(reply), gptsum.server.RemoteError)
+
+
+@pytest.mark.parametrize("line", [b"{\n", b"[]\n"])
+def test_invalid_messages(daemon: Path, line: bytes) -> None:
+    """Test invalid messages are replied to with an error."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(daemon))
+        with sock.makefile("rwb") as fd:
+            fd.write(line)
+            fd.flush()
+            reply = json.loads(fd.readline())
+
+    assert reply["error"].startswith("Invalid request")
+
+
+def test_internal_error(mocker: MockerFixture, daemon: Path) -> None:
+    """Test unexpected errors are replied to, keeping the connection open."""
+    mocker.patch.object(gptsum, "get_guid", side_effect=RuntimeError("crash"))
+
+    with gptsum.server.Client(daemon) as client:
+        for _ in range(2):
+            reply = client.request({"command": "get-guid", "path": "/disk"})
+            assert reply == {"error": "Internal error: RuntimeError('crash')"}
+
+
+def test_closed_connection(mocker: MockerFixture, daemon: Path) -> None:
+    """Test clients detect connections closed by the daemon."""
+    mocker.patch.object(
+        gptsum.server, "handle_request", side_effect=RuntimeError("crash")
+    )
+    mocker.patch("socketserver.BaseServer.handle_error")
+
+    with gptsum.server.Client(daemon) as client:
+        with pytest.raises(ConnectionError):
+            client.request({"command": "get-guid", "path": "/disk"})
+
+
+def test_socket(daemon: Path) -> None:
+    """Test the socket is only accessible by the current user."""
+    mode = os.stat(daemon).st_mode
+    assert stat.S_ISSOCK(mode)
+    assert stat.S_IMODE(mode) & 0o077 == 0
+
+    with pytest.raises(RuntimeError, match="listening"):
+        gptsum.server.Server(daemon)
+
+    assert daemon.exists()
+
+
+def test_stale_socket(tmp_path: Path) -> None:
+    """Test sockets left behind by a daemon are replaced."""
+    path = tmp_path / "gptsum.sock"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(str(path))
+
+    with gptsum.server.Server(path):
+        assert path.exists()
+
+    assert not path.exists()
+
+
+def test_not_socket(tmp_path: Path) -> None:
+    """Test files which aren't sockets aren't replaced."""
+    path = tmp_path / "gptsum.sock"
+    path.write_bytes(b"")
+
+    with pytest.raises(OSError, match="in use"):
+        gptsum.server.Server(path)
+
+    assert path.exists()
+
+
+def test_serve(mocker: MockerFixture, tmp_path: Path) -> None:
+    """Test :func:`gptsum.server.serve` stops when interrupted."""
+    serve_forever = mocker.patch.object(
+        gptsum.server.Server, "serve_forever", side_effect=KeyboardInterrupt
+    )
+    path = tmp_path / "gptsum.sock"
+
+    gptsum.server.serve(path)
+
+    serve_forever.assert_called_once()
+    assert not path.exists()
+
+
+def test_cli(
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    daemon: Path,
+    disk_image: Path,
+) -> None:
+    """Test the CLI sends requests to a daemon."""
+    monkeypatch.setenv("GPTSUM_SOCKET", str(daemon))
+    handle_request = mocker.spy(gptsum.server, "handle_request")
+    other = disk_image.with_name("other")
+    shutil.copyfile(conftest.TESTDATA_EMBEDDED_DISK, other)
+
+    cli.main(["get-guid", str(disk_image)])
+    cli.main(["calculate-expected-guid", "--checksum-version=2", str(disk_image)])
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["verify", str(disk_image), str(other)])
+    assert exc_info.value.code == 1
+    cli.main(["embed", "--manifest", str(disk_image)])
+    cli.main(["verify", "--locate", "--trust-cache", str(disk_image)])
+
+    captured = capsys.readouterr()
+    assert captured.out == (
+        f"{conftest.TESTDATA_DISK_GUID}\n"
+        f"{conftest.TESTDATA_DISK_V2_GUID}\n"
+        f"{other}: OK\n"
+    )
+    assert captured.err == (
+        f"{disk_image}: Disk GUID doesn't match expected checksum, "
+        f"got {conftest.TESTDATA_DISK_GUID}, "
+        f"expected {conftest.TESTDATA_EMBEDDED_DISK_GUID}\n"
+        f"{disk_image}: If the checksum was embedded using another "
+        "--checksum-version or --algorithm, which wasn't recorded with the image, "
+        "these must be given\n"
+    )
+    assert handle_request.call_count == 6
+
+    request = handle_request.call_args.args[0]
+    assert request["path"] == str(disk_image.absolute())
+    assert request["locate"] is True
+    assert request["cache_policy"] == "trust"
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["get-guid", "--size=1024", str(disk_image)])
+    assert exc_info.value.code == 1
+    assert capsys.readouterr().err == "Image file too small to be a valid GPT image\n"
+
+
+def test_cli_closed_connection(
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    daemon: Path,
+    disk_image: Path,
+) -> None:
+    """Test the CLI runs locally what a daemon didn't, if it closed the connection."""
+    monkeypatch.setenv("GPTSUM_SOCKET", str(daemon))
+    mocker.patch("socketserver.BaseServer.handle_error")
+    handle_request = mocker.patch.object(
+        gptsum.server, "handle_request", side_effect=RuntimeError("crash")
+    )
+
+    cli.main(["get-guid", str(disk_image)])
+    assert capsys.readouterr().out == f"{conftest.TESTDATA_DISK_GUID}\n"
+
+    handle_request.side_effect = [{}, RuntimeError("crash")]
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["verify", str(conftest.TESTDATA_EMBEDDED_DISK), str(disk_image)])
+    assert exc_info.value.code == 1
+
+    captured = capsys.readouterr()
+    assert captured.out == f"{conftest.TESTDATA_EMBEDDED_DISK}: OK\n"
+    assert captured.err.startswith(f"{disk_image}: Disk GUID doesn't match")
+    assert handle_request.call_count == 3
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["get-guid", "-"],
+        ["verify", "--stats"],
+        ["verify", "--progress"],
+        ["verify", "--jobs=2"],
+    ],
+)
+def test_cli_local(
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    daemon: Path,
+    args: List[str],
+) -> None:
+    """Test the CLI doesn't use a daemon for requests it can't handle."""
+    monkeypatch.setenv("GPTSUM_SOCKET", str(daemon))
+    handle_request = mocker.spy(gptsum.server, "handle_request")
+    if args[-1] != "-":
+        args = [*args, str(conftest.TESTDATA_EMBEDDED_DISK)]
+
+    with open(conftest.TESTDATA_EMBEDDED_DISK, encoding="latin-1") as stdin:
+        mocker.patch("sys.stdin", stdin)
+        cli.main(args)
+
+    handle_request.assert_not_called()
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="mkfifo not available")
+def test_cli_pipe(mocker: MockerFixture, tmp_path: Path) -> None:
+    """Test the CLI doesn't use a daemon for images read from named pipes."""
+    daemon_images = mocker.spy(cli, "_daemon_images")
+    fifo = tmp_path / "fifo"
+    os.mkfifo(fifo)
+
+    def writer() -> None:
+        with open(fifo, "wb"):
+            pass
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        with pytest.raises(gptsum.gpt.InvalidImageError):
+            cli.main(["get-guid", str(fifo)])
+    finally:
+        thread.join()
+
+    assert daemon_images.spy_return is None
+
+
+def test_cli_no_daemon(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str], tmp_path: Path
+) -> None:
+    """Test the CLI runs locally if no daemon is listening on the socket."""
+    monkeypatch.setenv("GPTSUM_SOCKET", str(tmp_path / "gptsum.sock"))
+
+    cli.main(["get-guid", str(conftest.TESTDATA_EMBEDDED_DISK)])
+
+    assert capsys.readouterr().out == f"{conftest.TESTDATA_EMBEDDED_DISK_GUID}\n"
+
+
+def test_cli_serve(
+    mocker: MockerFixture, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test the 'serve' subcommand."""
+    serve = mocker.patch.object(gptsum.server, "serve")
+
+    cli.main(["serve", "--socket", str(tmp_path / "a.sock"), "--workers=4"])
+    serve.assert_called_once_with(tmp_path / "a.sock", 4)
+
+    monkeypatch.setenv("GPTSUM_SOCKET", str(tmp_path / "b.sock"))
+    cli.main(["serve"])
+    serve.assert_called_with(tmp_path / "b.sock", None)
+
+    monkeypatch.delenv("GPTSUM_SOCKET")
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["serve"])
+    assert exc_info.value.code == 2
+
+
+def test_reply_error_damaged() -> None:
+    """Test damaged ranges are passed in replies."""
+    failure = gptsum.VerificationFailure(uuid.uuid4(), uuid.uuid4(), ((0, 512),))
+    # pylint: disable-next=protected-access
+    reply = json.loads(json.dumps(gptsum.server._error_reply(failure)))
+
+    assert gptsum.server.reply_error(reply) == failure
@@ -1,11 +1,17 @@
 """Various utility functions."""
 
+import binascii
+import contextlib
+import dataclasses
 import hashlib
 import itertools
 import os
+import struct
+import threading
 from pathlib import Path
+from typing import Iterator, Sequence
 
-from gptsum import checksum
+from gptsum import checksum, gpt
 
 
 def _sha256sum(fd: int) -> str:
@@ -30,3 +36,67 @@ def assert_files_equal(file1: Path, file2: Path, *others: Path) -> None:
             digests.append(digest)
 
     assert digests == [digests[0]] * len(digests)
+
+
+@contextlib.contextmanager
+def pipe_from(data: bytes) -> Iterator[int]:
+    """Yield the read end of a pipe, to which `data` is written by a thread."""
+    read_fd, write_fd = os.pipe()
+
+    def writer() -> None:
+        try:
+            view = memoryview(data)
+            while len(view) > 0:
+                view = view[os.write(write_fd, view[: 64 * 1024]) :]
+        except BrokenPipeError:
+            pass
+        finally:
+            os.close(write_fd)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+
+    try:
+        yield read_fd
+    finally:
+        os.close(read_fd)
+        thread.join()
+
+
+def write_partitions(path: Path, partitions: Sequence[gpt.GPTPartition]) -> None:
+    """Write the entries of partitions to both partition entry arrays of an image.
+
+    The entry of every partition is written at the index given by its number.
+    Other entries are zeroed, and the GPT headers are updated accordingly.
+    """
+    with gpt.GPTImage(path=path, open_mode=os.O_RDWR) as image:
+        primary = image.read_primary_gpt_header()
+        backup = image.read_backup_gpt_header()
+
+        entries = bytearray(primary.num_entries * primary.entry_size)
+        for partition in partitions:
+            struct.pack_into(
+                "<16s16sQQQ72s",
+                entries,
+                (partition.number - 1) * primary.entry_size,
+                partition.type_guid.bytes_le,
+                partition.unique_guid.bytes_le,
+                partition.first_lba,
+                partition.last_lba,
+                partition.attributes,
+                partition.name.encode("utf-16-le"),
+            )
+
+        for header in (primary, backup):
+            gpt.pwrite_all(
+                image.fileno(),
+                bytes(entries),
+                header.entries_starting_lba * gpt.LBA_SIZE,
+            )
+
+        entries_crc32 = binascii.crc32(entries)
+        image.write_gpt_headers(
+            dataclasses.replace(primary, entries_crc32=entries_crc32),
+            dataclasses.replace(backup, entries_crc32=entries_crc32),
+            sync=False,
+        )